@@ -0,0 +1,347 @@
+"""Batch documentation of a whole catalog.
+
+`BatchDocumenter.run(tables)` takes a `SchemaExtractor.extract_all` result
+and documents every table concurrently:
+
+- at most `concurrency` completions are in flight;
+- a `RateLimiter` (token buckets for requests and tokens per minute) keeps
+  the job under the provider's limits, reserving the estimated prompt size
+  up front and settling with the usage the API reports;
+- 429 and 5xx answers are retried; a `Retry-After` header pauses every
+  worker of the limiter for that long, otherwise backoff is exponential;
+- each finished table is appended to a JSONL checkpoint, so re-running a
+  crashed job only documents the tables that are still missing.
+
+`BatchJobManager` runs documenters as background jobs for the API.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.ai.cache import canonical_json
+from app.ai.groq_client import STUB_PREFIX, GroqClient
+from app.ai.langchain_pipeline import LangChainPipeline
+from app.ai.prompt_builder import estimate_tokens, merge_text_outputs
+from app.config import settings
+from app.core.errors import AIError
+from app.core.logging import logger
+from app.core.metrics import metrics_registry
+from app.storage.artifact_manager import ARTIFACT_DIR
+
+JOBS_DIR = os.path.join(ARTIFACT_DIR, "batch_jobs")
+
+retries = metrics_registry.counter(
+    "llm_retries_total", "Retried Groq completions by reason (rate_limited, server_error, network_error)",
+    ("reason",))
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait according to a `Retry-After` header, if present."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `capacity`."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # a single request larger than the bucket would wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:  # first come, first served
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def debit(self, amount: float):
+        """Charge (or refund, if negative) units outside of `acquire`."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        rpm = settings.GROQ_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = settings.GROQ_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens: int):
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens:
+            await self.tokens.acquire(tokens)
+
+    def settle(self, reserved: int, used: int):
+        """Correct the token bucket once the real usage is known."""
+        if self.tokens and used:
+            self.tokens.debit(used - reserved)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds` (the provider said to wait)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class Checkpoint:
+    """Append-only JSONL file with one record per documented table."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a crash mid-write leaves a partial last line
+                    continue
+                records[record["table"]] = record
+        return records
+
+    def append(self, record: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BatchDocumenter:
+    def __init__(
+        self,
+        pipeline_factory: Optional[Callable[[], LangChainPipeline]] = None,
+        concurrency: Optional[int] = None,
+        limiter: Optional[RateLimiter] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+    ):
+        self.pipeline_factory = pipeline_factory or (lambda: LangChainPipeline(GroqClient(fallback=False)))
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+        self.limiter = limiter or RateLimiter()
+        self.checkpoint = checkpoint
+        self.max_retries = settings.BATCH_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.BATCH_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, str] = {}
+        self.progress: Dict[str, Any] = {"status": "pending"}
+        self._started: Optional[float] = None
+
+    async def run(self, tables: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Document `tables` (table name -> schema); returns table name -> record."""
+        done = await asyncio.to_thread(self.checkpoint.load) if self.checkpoint else {}
+        self.results = {name: done[name] for name in tables if name in done}
+        pending = [name for name in tables if name not in done]
+        self._started = time.perf_counter()
+        self.progress = {
+            "status": "running",
+            "total": len(tables),
+            "completed": len(self.results),
+            "resumed": len(self.results),
+            "failed": 0,
+            "cached": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "tokens_used": 0,
+        }
+        self._update_rate()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def document(name: str):
+            async with semaphore:
+                try:
+                    record = await self.document_table(name, tables[name])
+                except Exception as e:
+                    logger.error(f"Documenting {name} failed: {str(e)}")
+                    self.errors[name] = str(e)
+                    self.progress["failed"] += 1
+                    return
+            if self.checkpoint:
+                await asyncio.to_thread(self.checkpoint.append, record)
+            self.results[name] = record
+            self.progress["completed"] += 1
+            self.progress["tokens_used"] += record["tokens"]
+            self.progress["cached"] += int(record["cached"])
+            self._update_rate()
+
+        try:
+            await asyncio.gather(*(document(name) for name in pending))
+        except asyncio.CancelledError:
+            self.progress["status"] = "cancelled"
+            raise
+        self._update_rate()
+        self.progress["status"] = "completed" if not self.errors else "completed_with_errors"
+        logger.info(
+            f"Batch documentation finished: {self.progress['completed']}/{len(tables)} tables, "
+            f"{self.progress['tokens_used']} tokens, {self.progress['tables_per_minute']} tables/min"
+        )
+        return self.results
+
+    async def document_table(self, name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        pipeline = self.pipeline_factory()
+        outputs, tokens, attempts, cached = [], 0, 0, True
+        # wide tables arrive as several column chunks
+        for prompt in pipeline.build_prompts(schema):
+            summary = await pipeline.groq.cached_summary(prompt)
+            if summary is None:
+                cached = False
+                summary, used, tries = await self._complete(pipeline.groq, prompt)
+                if summary.startswith(STUB_PREFIX):
+                    # checkpointed, it would be served for this catalog for good
+                    raise AIError("Groq returned no answer (local stub)")
+                tokens += used
+                attempts += tries
+            outputs.append(summary)
+        return {"table": name, "summary": merge_text_outputs(outputs), "tokens": tokens, "cached": cached,
+                "attempts": attempts}
+
+    async def _complete(self, client: GroqClient, prompt: str) -> Tuple[str, int, int]:
+        """One completion under the rate limiter, with retries; returns (text, tokens, attempts)."""
+        reserved = estimate_tokens(prompt) + settings.BATCH_COMPLETION_TOKENS
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.limiter.acquire(reserved)
+            try:
+                summary = await client.generate_summary(prompt)
+                break
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if attempt > self.max_retries or not (status == 429 or status >= 500):
+                    raise
+                delay = retry_after(e.response)
+                reason = "rate_limited" if status == 429 else "server_error"
+                if status == 429:
+                    self.progress["rate_limited"] += 1
+                    if delay is not None:
+                        self.limiter.pause(delay)
+            except (httpx.RequestError, OSError):
+                if attempt > self.max_retries:
+                    raise
+                delay = None
+                reason = "network_error"
+            self.progress["retries"] += 1
+            retries.labels(reason).inc()
+            await asyncio.sleep(delay if delay is not None else self.retry_backoff * (2 ** (attempt - 1)))
+
+        used = client.last_usage.get("total_tokens") or 0
+        self.limiter.settle(reserved, used)
+        return summary, used, attempt
+
+    def _update_rate(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        finished = self.progress.get("completed", 0) - self.progress.get("resumed", 0)
+        self.progress["elapsed_seconds"] = round(elapsed, 2)
+        self.progress["tables_per_minute"] = round(finished / elapsed * 60, 2) if elapsed > 0 else 0.0
+
+
+def job_id_for(tables: Dict[str, Any]) -> str:
+    """Content-derived id: resubmitting the same catalog resumes the same job."""
+    return hashlib.sha256(canonical_json(tables).encode("utf-8")).hexdigest()[:16]
+
+
+class BatchJob:
+    def __init__(self, job_id: str, documenter: BatchDocumenter, task: asyncio.Task):
+        self.id = job_id
+        self.documenter = documenter
+        self.task = task
+
+    @property
+    def running(self) -> bool:
+        return not self.task.done()
+
+    def status(self) -> Dict[str, Any]:
+        progress = dict(self.documenter.progress)
+        if self.task.done() and not self.task.cancelled() and self.task.exception() is not None:
+            progress.update(status="failed", error=str(self.task.exception()))
+        return {"job_id": self.id, "progress": progress, "errors": dict(self.documenter.errors) or None}
+
+
+class BatchJobManager:
+    def __init__(self, directory: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        self.directory = directory or JOBS_DIR
+        # provider limits apply per API key, so every job shares one limiter
+        self.limiter = limiter or RateLimiter()
+        self._jobs: Dict[str, BatchJob] = {}
+
+    def _checkpoint(self, job_id: str) -> Checkpoint:
+        os.makedirs(self.directory, exist_ok=True)
+        return Checkpoint(os.path.join(self.directory, f"{job_id}.jsonl"))
+
+    def start(self, tables: Dict[str, Dict[str, Any]], job_id: Optional[str] = None, **options) -> BatchJob:
+        job_id = job_id or job_id_for(tables)
+        job = self._jobs.get(job_id)
+        if job is not None and job.running:
+            return job
+        options.setdefault("limiter", self.limiter)
+        documenter = BatchDocumenter(checkpoint=self._checkpoint(job_id), **options)
+        task = asyncio.create_task(documenter.run(tables))
+        job = self._jobs[job_id] = BatchJob(job_id, documenter, task)
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+
+    def load_results(self, job_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Checkpointed results, also for jobs started before a restart."""
+        checkpoint = self._checkpoint(job_id)
+        if not os.path.exists(checkpoint.path):
+            return None
+        return checkpoint.load()
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or not job.running:
+            return False
+        job.task.cancel()
+        return True
+
+    async def cancel_all(self):
+        running = [job.task for job in self._jobs.values() if job.running]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+batch_jobs = BatchJobManager()
@@ -0,0 +1,270 @@
+"""Content-addressed cache for LLM responses.
+
+Entries are keyed by a hash of (model, temperature, normalized prompt), so
+re-documenting an unchanged schema is served locally instead of calling the
+API again. There are two tiers:
+
+- an in-memory LRU bounded by entry count and bytes;
+- a persistent SQLite tier under artifacts/ bounded by bytes, so entries
+  survive restarts. Disk hits are promoted to memory.
+
+Both tiers honour the same TTL. `ResponseCache.stats()` reports hits per
+tier, misses, hit rate, bytes held and evictions.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, Gauge, metrics_registry
+from app.storage.artifact_manager import ARTIFACT_DIR
+
+DEFAULT_PATH = os.path.join(ARTIFACT_DIR, "llm_cache.sqlite3")
+
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def canonical_json(data: Any, indent: Optional[int] = None) -> str:
+    """JSON with sorted keys, so equivalent schemas produce identical prompts."""
+    return json.dumps(data, sort_keys=True, indent=indent, ensure_ascii=False, default=str)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-insensitive form of a prompt used for the cache key."""
+    prompt = prompt.replace("\r\n", "\n").strip()
+    prompt = _TRAILING_SPACE.sub("\n", prompt)
+    return _BLANK_LINES.sub("\n\n", prompt)
+
+
+def cache_key(model: str, temperature: float, prompt: str) -> str:
+    material = json.dumps([model, round(float(temperature), 4), normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        # path="" disables the disk tier
+        self.path = DEFAULT_PATH if path is None else path
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self.disk_max_bytes = disk_max_bytes or settings.LLM_CACHE_DISK_MAX_BYTES
+        # key -> (value, expires_at, size)
+        self._memory: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return value
+            self._drop_memory(key)
+            self._counters["expirations"] += 1
+
+        if self.path:
+            try:
+                found = await asyncio.to_thread(self._disk_get, key, now)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {str(e)}")
+                found = None
+            if found is not None:
+                value, expires_at = found
+                self._remember(key, value, expires_at)
+                self._counters["disk_hits"] += 1
+                return value
+
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+        self._counters["writes"] += 1
+        if self.path:
+            try:
+                await asyncio.to_thread(self._disk_set, key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {str(e)}")
+
+    async def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self.path:
+            await asyncio.to_thread(self._disk_clear)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        lookups = hits + self._counters["misses"]
+        stats = dict(self._counters)
+        stats.update({
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": 0,
+            "disk_bytes": 0,
+        })
+        if self.path:
+            try:
+                stats["disk_entries"], stats["disk_bytes"] = self._disk_usage()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache stats failed: {str(e)}")
+        return stats
+
+    def metrics(self) -> List[Any]:
+        """Hit rates and memory tier size for `/metrics` (disk usage is left to `stats`)."""
+        counters = self._counters
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        return [
+            Counter.snapshot("llm_cache_lookups_total", "LLM response cache lookups by result", ("result",), {
+                ("memory_hit",): counters["memory_hits"], ("disk_hit",): counters["disk_hits"],
+                ("miss",): counters["misses"]}),
+            Gauge.snapshot("llm_cache_hit_ratio", "Share of LLM cache lookups answered from the cache",
+                           values={(): hits / lookups if lookups else 0.0}),
+            Counter.snapshot("llm_cache_evictions_total", "LLM cache entries evicted or expired", ("reason",), {
+                ("evicted",): counters["evictions"], ("expired",): counters["expirations"]}),
+            Gauge.snapshot("llm_cache_memory_bytes", "Size of the in-memory LLM cache tier",
+                           values={(): self._memory_bytes}),
+        ]
+
+    # memory tier
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._memory:
+            self._drop_memory(key)
+        self._memory[key] = (value, expires_at, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self._counters["evictions"] += 1
+
+    def _drop_memory(self, key: str):
+        _, _, size = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    # disk tier (runs in a worker thread)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        return conn
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                with conn:
+                    if row[1] <= now:
+                        conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                        self._counters["expirations"] += 1
+                        return None
+                    conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+                return row[0], row[1]
+            finally:
+                conn.close()
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        now = time.time()
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        """
+                        INSERT INTO llm_responses (key, value, size, expires_at, last_used)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (key) DO UPDATE SET
+                            value = excluded.value,
+                            size = excluded.size,
+                            expires_at = excluded.expires_at,
+                            last_used = excluded.last_used
+                        """,
+                        (key, value, len(value.encode("utf-8")), expires_at, now),
+                    )
+                    expired = conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,)).rowcount
+                    self._counters["expirations"] += max(expired, 0)
+                    self._evict_disk(conn)
+            finally:
+                conn.close()
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        # drop least recently used entries until the tier fits again
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used"):
+            if total <= self.disk_max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+        self._counters["evictions"] += len(victims)
+
+    def _disk_usage(self) -> Tuple[int, int]:
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+                return int(count), int(size)
+            finally:
+                conn.close()
+
+    def _disk_clear(self):
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM llm_responses")
+            finally:
+                conn.close()
+
+
+response_cache = ResponseCache()
+metrics_registry.register_collector(response_cache.metrics)
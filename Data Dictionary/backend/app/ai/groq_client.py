@@ -1,14 +1,64 @@
 import os
 import json
+import time
+from typing import AsyncIterator, Optional, Tuple
 import httpx
+from app.ai.cache import ResponseCache, cache_key, response_cache
+from app.ai.json_repair import repair_json
+from app.ai.streaming import delta_text, iter_sse_data
 from app.config import settings
+from app.core.errors import AIError
+from app.core.http import get_http_client
 from app.core.logging import logger
+from app.core.metrics import SLOW_BUCKETS, metrics_registry
+from app.core.reference_data import SAMPLE_PATH, reference_data
+from app.core.singleflight import flight_group
+
+completion_flight = flight_group("completion")
+
+# every local stand-in answer starts with this; never store or checkpoint one
+STUB_PREFIX = "[LOCAL STUB SUMMARY"
+
+call_seconds = metrics_registry.histogram(
+    "llm_request_duration_seconds", "Groq completion latency by model and HTTP status (or network_error)",
+    ("model", "status"), buckets=SLOW_BUCKETS)
+tokens_used = metrics_registry.counter("llm_tokens_total", "Tokens reported by Groq by model and kind", ("model", "kind"))
+
+
+def record_usage(model: str, usage: dict):
+    for kind in ("prompt", "completion"):
+        count = usage.get(f"{kind}_tokens")
+        if count:
+            tokens_used.labels(model, kind).inc(count)
+
 
 class GroqClient:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_cache: bool = None, cache: ResponseCache = None,
+                 http_client: httpx.AsyncClient = None, fallback: bool = True):
         self.api_key = api_key or settings.GROQ_API_KEY
+        self.url = settings.GROQ_API_URL
+        # defaults to the app-wide keep-alive client (app/core/http.py)
+        self.http_client = http_client
         # groq model name from settings
         self.model = getattr(settings, "MODEL_NAME", "groq-small")
+        self.temperature = 0.7
+        # use_cache=False opts a single request out of the response cache
+        self.use_cache = settings.LLM_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = cache or response_cache
+        # fallback=False raises instead of returning the local stub (no API
+        # key, network errors), so batch jobs retry or fail rather than
+        # checkpointing a stub
+        self.fallback = fallback
+        # token usage reported by the API for the last completion
+        self.last_usage: dict = {}
+        # time to first token etc. of the last stream_summary call
+        self.last_stream_stats: dict = {}
+
+    async def cached_summary(self, text: str):
+        """Return the cached completion for `text`, or None (also when caching is off)."""
+        if not self.use_cache or not self.api_key:
+            return None
+        return await self.cache.get(cache_key(self.model, self.temperature, text))
 
     async def generate_summary(self, text: str) -> str:
         """Send the supplied text to Groq API and return the model output.
@@ -18,6 +68,8 @@ class GroqClient:
         """
         logger.debug("GroqClient.generate_summary called")
         if not self.api_key:
+            if not self.fallback:
+                raise AIError("GROQ_API_KEY is not configured")
             # Local/dev fallback: return a simple deterministic summary so
             # the AI endpoints remain usable without an external API key.
             logger.warning("GROQ_API_KEY not configured — using local stub summary")
@@ -27,24 +79,12 @@ class GroqClient:
                 marker = "SAMPLE_EMPLOYEES:"
                 if marker in text:
                     payload = text.split(marker, 1)[1].strip()
-                    # payload may include trailing text; attempt to find JSON
-                    # first try to parse entire payload
+                    # payload may include trailing text; parse the first
+                    # JSON object/array in one tolerant pass
                     try:
-                        data = json.loads(payload)
-                    except Exception:
-                        # fallback: try to extract first JSON object/array substring
-                        start = payload.find("{")
-                        if start == -1:
-                            start = payload.find("[")
-                        if start != -1:
-                            # crude attempt to get JSON substring
-                            substring = payload[start:]
-                            try:
-                                data = json.loads(substring)
-                            except Exception:
-                                data = None
-                        else:
-                            data = None
+                        data, _ = repair_json(payload)
+                    except ValueError:
+                        data = None
 
                     if isinstance(data, list):
                         count = len(data)
@@ -64,8 +104,40 @@ class GroqClient:
             except Exception:
                 return "[LOCAL STUB SUMMARY] (unable to summarize input)"
 
+        # identical (model, temperature, prompt) requests are answered from the cache
+        key = cache_key(self.model, self.temperature, text) if self.use_cache else None
+        cached = await self.cached_summary(text)
+        if cached is not None:
+            logger.debug("GroqClient cache hit")
+            return cached
+
+        return await self._answer(text, key, shared=True)
+
+    async def refresh_summary(self, text: str) -> str:
+        """Ask the API again even if `text` is cached, and cache the new answer in place of the old one."""
+        if not self.api_key:
+            return await self.generate_summary(text)
+        key = cache_key(self.model, self.temperature, text) if self.use_cache else None
+        return await self._answer(text, key, shared=False)
+
+    async def _answer(self, text: str, key: Optional[str], shared: bool) -> str:
+        try:
+            if key and shared:
+                # concurrent identical prompts share one completion
+                content, self.last_usage = await completion_flight.do(key, lambda: self._complete(text, key))
+            else:
+                content, self.last_usage = await self._complete(text, key)
+            return content
+        except (httpx.RequestError, OSError) as e:
+            # network problem (DNS, no connection, etc.)
+            logger.error("Groq network error: %s", str(e))
+            if not self.fallback:
+                raise
+            return self._network_fallback(e)
+
+    async def _complete(self, text: str, key: Optional[str]) -> Tuple[str, dict]:
+        """One chat completion; returns (content, usage)."""
         # Use chat completions endpoint for Groq
-        url = "https://api.groq.com/openai/v1/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         # Use messages format for chat completion
         payload = {
@@ -73,46 +145,132 @@ class GroqClient:
             "messages": [
                 {"role": "user", "content": text}
             ],
-            "temperature": 0.7
+            "temperature": self.temperature
         }
 
+        client = self.http_client or get_http_client()
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.post(url, headers=headers, json=payload)
-                try:
-                    resp.raise_for_status()
-                except httpx.HTTPStatusError:
+            resp = await client.post(self.url, headers=headers, json=payload)
+        except (httpx.RequestError, OSError):
+            call_seconds.labels(self.model, "network_error").observe(time.perf_counter() - started)
+            raise
+        call_seconds.labels(self.model, str(resp.status_code)).observe(time.perf_counter() - started)
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError:
+            logger.error("Groq API error: %s %s", resp.status_code, resp.text)
+            # propagate so caller can see status code
+            raise
+        data = resp.json()
+        # Chat completions response format
+        content = None
+        choices = data.get("choices")
+        if isinstance(choices, list) and choices:
+            message = choices[0].get("message")
+            if message:
+                content = message.get("content", "")
+        if content is None:
+            # fallback to raw text
+            content = data.get("text", "")
+        # only real API answers are cached, never the local fallbacks
+        if key and content:
+            await self.cache.set(key, content)
+        usage = data.get("usage") or {}
+        record_usage(self.model, usage)
+        return content, usage
+
+    async def stream_summary(self, text: str) -> AsyncIterator[str]:
+        """Like `generate_summary`, but yield the answer piece by piece as it arrives.
+
+        Sends `stream: true` and parses the server-sent event stream. Cached
+        answers and the local fallbacks arrive as a single piece. Timings of
+        the call are kept in `last_stream_stats`.
+        """
+        started = time.perf_counter()
+        self.last_stream_stats = {"chunks": 0, "cached": False}
+
+        def first_piece():
+            self.last_stream_stats["time_to_first_token"] = round(time.perf_counter() - started, 4)
+
+        # local stub and cached answers: all at once
+        if not self.api_key:
+            whole = await self.generate_summary(text)
+        else:
+            whole = await self.cached_summary(text)
+            self.last_stream_stats["cached"] = whole is not None
+        if whole is not None:
+            first_piece()
+            self.last_stream_stats["total_seconds"] = self.last_stream_stats["time_to_first_token"]
+            yield whole
+            return
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": text}
+            ],
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        parts = []
+        status = "network_error"
+        requested = time.perf_counter()
+        try:
+            client = self.http_client or get_http_client()
+            async with client.stream("POST", self.url, headers=headers, json=payload) as resp:
+                status = str(resp.status_code)
+                if resp.status_code >= 400:
+                    await resp.aread()
                     logger.error("Groq API error: %s %s", resp.status_code, resp.text)
-                    # propagate so caller can see status code
-                    raise
-                data = resp.json()
-                # Chat completions response format
-                choices = data.get("choices")
-                if isinstance(choices, list) and choices:
-                    message = choices[0].get("message")
-                    if message:
-                        return message.get("content", "")
-                # fallback to raw text
-                return data.get("text", "")
+                    resp.raise_for_status()
+                async for data in iter_sse_data(resp.aiter_lines()):
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    # Groq reports usage on the last chunk under x_groq
+                    usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+                    if usage:
+                        self.last_usage = usage
+                        record_usage(self.model, usage)
+                    piece = delta_text(chunk)
+                    if piece:
+                        if not parts:
+                            first_piece()
+                        parts.append(piece)
+                        self.last_stream_stats["chunks"] += 1
+                        yield piece
         except (httpx.RequestError, OSError) as e:
-            # network problem (DNS, no connection, etc.)
             logger.error("Groq network error: %s", str(e))
-            try:
-                sample_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data", "sample.json"))
-                if os.path.exists(sample_path):
-                    with open(sample_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    if isinstance(data, list):
-                        count = len(data)
-                        keys = sorted(list({k for item in data if isinstance(item, dict) for k in item.keys()}))
-                        examples = json.dumps(data[:3], ensure_ascii=False)
-                        return f"[LOCAL STUB SUMMARY] employees={count} | columns={keys} | examples={examples}"
-                    elif isinstance(data, dict):
-                        keys = sorted(list(data.keys()))
-                        return f"[LOCAL STUB SUMMARY] object_keys={keys} | sample={json.dumps(data, ensure_ascii=False)[:400]}"
-            except Exception:
-                logger.exception("Failed to load local sample for fallback")
+            # once pieces went out, a stub cannot stand in for the rest
+            if parts or not self.fallback:
+                raise
+            first_piece()
+            yield self._network_fallback(e)
+            return
+        finally:
+            call_seconds.labels(self.model, status).observe(time.perf_counter() - requested)
+            self.last_stream_stats["total_seconds"] = round(time.perf_counter() - started, 4)
 
-            # final fallback: return a simple preview string
-            return f"[LOCAL STUB SUMMARY due to network error: {str(e)}]"
+        content = "".join(parts)
+        if self.use_cache and content:
+            await self.cache.set(cache_key(self.model, self.temperature, text), content)
+
+    def _network_fallback(self, e: Exception) -> str:
+        try:
+            if os.path.exists(SAMPLE_PATH):
+                data = reference_data.data(SAMPLE_PATH)
+                if isinstance(data, list):
+                    count = len(data)
+                    keys = sorted(list({k for item in data if isinstance(item, dict) for k in item.keys()}))
+                    examples = json.dumps(data[:3], ensure_ascii=False)
+                    return f"[LOCAL STUB SUMMARY] employees={count} | columns={keys} | examples={examples}"
+                elif isinstance(data, dict):
+                    keys = sorted(list(data.keys()))
+                    return f"[LOCAL STUB SUMMARY] object_keys={keys} | sample={json.dumps(data, ensure_ascii=False)[:400]}"
+        except Exception:
+            logger.exception("Failed to load local sample for fallback")
 
+        # final fallback: return a simple preview string
+        return f"[LOCAL STUB SUMMARY due to network error: {str(e)}]"
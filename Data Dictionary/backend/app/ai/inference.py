@@ -0,0 +1,318 @@
+"""Local, rule-based metadata for columns that do not need a model.
+
+Most columns sent to `/api/ai/json-metadata` are boilerplate: `id`,
+`created_at`, `email`, `<entity>_id` foreign keys. `MetadataInferenceEngine`
+describes them without a completion:
+
+- the data type comes from the values (JSON payloads) or from a
+  `ColumnProfiler` profile (`QualityAnalyzer.analyze_table`): the type
+  seen, integer ranges, and UUID / e-mail / date patterns of strings;
+- `nullable` and `isUnique` from null and distinct counts;
+- primary and foreign key candidates and a description from the column
+  name, by the rules in `_NAME_RULES`.
+
+A column is resolved locally when both its type and a name rule are
+certain enough (`INFERENCE_MIN_CONFIDENCE`); everything else, and the
+table description, is left to the model. `merge` puts both halves back
+together in the original column order.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[A-Za-z]{2,}$")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_INT32 = 2 ** 31
+
+_TEMPORAL = ("TIMESTAMP", "DATE")
+_VERBS = {"created": "created", "updated": "last updated", "modified": "last modified", "deleted": "deleted"}
+
+# (pattern on the snake_case name, types it applies to or None for any, description template)
+# templates see {entity} (the table in singular) and the named groups of the
+# pattern (underscores as spaces); descriptions are capitalized afterwards
+_NAME_RULES: List[Tuple[re.Pattern, Optional[Tuple[str, ...]], str]] = [
+    (re.compile(r"^id$"), None, "Unique identifier of the {entity} record."),
+    (re.compile(r"^(uuid|guid)$"), None, "Universally unique identifier of the {entity} record."),
+    (re.compile(r"^(?P<subject>.+)_(id|uuid)$"), None, "Identifier of the related {subject} record."),
+    (re.compile(r"^(?P<verb>created|updated|modified|deleted)_(at|on|date|time|ts)$"), _TEMPORAL,
+     "Date and time the {entity} record was {verb}."),
+    (re.compile(r"^(?P<subject>.+)_(at|ts|time)$"), ("TIMESTAMP",), "Date and time of the {subject} event."),
+    (re.compile(r"^(?P<subject>.+)_(date|on)$"), _TEMPORAL, "Date of the {subject} event."),
+    (re.compile(r"^(date_of_birth|birth_date|dob)$"), _TEMPORAL, "Date of birth of the {entity}."),
+    (re.compile(r"^(?P<aux>is|has|can|should)_(?P<subject>.+)$"), ("BOOLEAN",), "Whether the {entity} {aux} {subject}."),
+    (re.compile(r"^((?P<subject>.+)_)?(email|email_address)$"), ("VARCHAR",), "{subject} e-mail address."),
+    (re.compile(r"^((?P<subject>.+)_)?(phone|phone_number|mobile)$"), ("VARCHAR",), "{subject} phone number."),
+    (re.compile(r"^((?P<subject>.+)_)?(url|website|link)$"), ("VARCHAR",), "{subject} URL."),
+    (re.compile(r"^(?P<subject>(first|last|middle|full|display|user)_name)$"), ("VARCHAR",), "{subject} of the {entity}."),
+    (re.compile(r"^name$"), ("VARCHAR",), "Name of the {entity}."),
+]
+
+
+def snake_case(name: str) -> str:
+    return _CAMEL.sub("_", str(name)).replace("-", "_").replace(" ", "_").lower()
+
+
+def singular(word: str) -> str:
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("ses") or word.endswith("xes"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _type_of(value: Any) -> str:
+    if isinstance(value, bool):
+        return "BOOLEAN"
+    if isinstance(value, int):
+        return "BIGINT" if not -_INT32 <= value < _INT32 else "INTEGER"
+    if isinstance(value, float):
+        return "FLOAT"
+    if isinstance(value, (dict, list)):
+        return "JSON"
+    text = str(value)
+    if _UUID.match(text):
+        return "UUID"
+    if _DATETIME.match(text):
+        return "TIMESTAMP"
+    if _DATE.match(text):
+        return "DATE"
+    return "VARCHAR"
+
+
+def _combine_types(counts: Dict[str, int]) -> Tuple[Optional[str], float]:
+    """(type, confidence) of a column from the types of its values."""
+    total = sum(counts.values())
+    if not total:
+        return None, 0.0
+    if set(counts) <= {"INTEGER", "BIGINT"}:
+        return ("BIGINT" if "BIGINT" in counts else "INTEGER"), 1.0
+    if set(counts) <= {"INTEGER", "BIGINT", "FLOAT"}:
+        return "FLOAT", 1.0
+    if set(counts) <= {"TIMESTAMP", "DATE"}:
+        return ("TIMESTAMP" if "TIMESTAMP" in counts else "DATE"), 1.0
+    kind, seen = max(counts.items(), key=lambda kv: kv[1])
+    # mixed strings: a UUID / date column with a few free-text values is still
+    # that type, but not certain enough to skip the model
+    return kind, seen / total * (1.0 if len(counts) == 1 else 0.8)
+
+
+class ColumnEvidence:
+    """What is known about a column's values, from records or a profile."""
+
+    def __init__(self, name: str, data_type: Optional[str], type_confidence: float, count: int,
+                 nulls: int, distinct: Optional[int], samples: List[Any], email_ratio: float = 0.0):
+        self.name = name
+        self.data_type = data_type
+        self.type_confidence = type_confidence
+        self.count = count
+        self.nulls = nulls
+        self.distinct = distinct
+        self.samples = samples
+        self.email_ratio = email_ratio
+
+    @property
+    def unique(self) -> Optional[bool]:
+        non_null = self.count - self.nulls
+        if self.distinct is None or non_null < 2:
+            return None
+        return self.distinct == non_null
+
+
+def evidence_from_records(records: List[Dict[str, Any]], max_samples: int = 3) -> Dict[str, ColumnEvidence]:
+    names: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            names.setdefault(key, None)
+    evidence = {}
+    for name in names:
+        values = [record.get(name) for record in records]
+        present = [v for v in values if v is not None]
+        counts: Dict[str, int] = {}
+        for value in present:
+            kind = _type_of(value)
+            counts[kind] = counts.get(kind, 0) + 1
+        data_type, confidence = _combine_types(counts)
+        hashable = [repr(v) if isinstance(v, (dict, list)) else v for v in present]
+        distinct = list(dict.fromkeys(hashable))
+        emails = sum(1 for v in present if isinstance(v, str) and _EMAIL.match(v))
+        evidence[name] = ColumnEvidence(
+            name, data_type, confidence, len(values), len(values) - len(present), len(distinct),
+            _samples(present, max_samples),
+            emails / len(present) if present else 0.0,
+        )
+    return evidence
+
+
+def _samples(values: List[Any], limit: int) -> List[Any]:
+    seen: Dict[str, Any] = {}
+    for value in values:
+        key = repr(value)
+        if key not in seen:
+            seen[key] = value
+            if len(seen) == limit:
+                break
+    return list(seen.values())
+
+
+def payload_records(data: Any) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """(key, records) of a JSON payload: its first list of objects, else the payload as one record."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+                return key, value
+        return None, [data]
+    if isinstance(data, list) and all(isinstance(v, dict) for v in data):
+        return None, data
+    return None, []
+
+
+def restrict_payload(data: Any, key: Optional[str], keep: List[str]) -> Any:
+    """`data` with only the `keep` fields of its records."""
+    fields = set(keep)
+    if key is not None:
+        return {**data, key: [{k: v for k, v in r.items() if k in fields} for r in data[key]]}
+    if isinstance(data, list):
+        return [{k: v for k, v in r.items() if k in fields} for r in data]
+    return {k: v for k, v in data.items() if k in fields}
+
+
+def evidence_from_profile(name: str, profile: Dict[str, Any], max_samples: int = 3) -> ColumnEvidence:
+    """Evidence from one `ColumnProfiler` column profile."""
+    kind, dtype = profile.get("kind"), str(profile.get("dtype") or "")
+    confidence = 1.0
+    if kind == "numeric":
+        if dtype.startswith("bool"):
+            data_type = "BOOLEAN"
+        elif "int" in dtype:
+            bounds = [v for v in (profile.get("min"), profile.get("max")) if isinstance(v, (int, float))]
+            data_type = "BIGINT" if any(not -_INT32 <= v < _INT32 for v in bounds) else "INTEGER"
+        else:
+            data_type = "FLOAT"
+    elif kind == "datetime":
+        data_type = "TIMESTAMP"
+    else:
+        patterns = profile.get("patterns") or {}
+        if (patterns.get("uuid") or 0) >= 0.99:
+            data_type = "UUID"
+        elif (profile.get("date_parse_rate") or 0) >= 0.99:
+            data_type, confidence = "TIMESTAMP", 0.9
+        else:
+            data_type = "VARCHAR"
+    if not profile.get("non_null"):
+        data_type, confidence = None, 0.0
+    return ColumnEvidence(
+        name, data_type, confidence, int(profile.get("count") or 0), int(profile.get("null_count") or 0),
+        profile.get("distinct"), [t["value"] for t in (profile.get("top_values") or [])[:max_samples]],
+        ((profile.get("patterns") or {}).get("email") or 0.0),
+    )
+
+
+class MetadataInferenceEngine:
+    def __init__(self, min_confidence: Optional[float] = None):
+        self.min_confidence = settings.INFERENCE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+
+    def infer_records(self, table_name: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.infer(table_name, evidence_from_records(records))
+
+    def infer_profiles(self, table_name: str, profiles: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        return self.infer(table_name, {name: evidence_from_profile(name, p) for name, p in profiles.items()})
+
+    def infer(self, table_name: str, evidence: Dict[str, ColumnEvidence]) -> Dict[str, Any]:
+        """Column metadata plus `resolved` / `unresolved` column names and key candidates."""
+        entity = singular(snake_case(table_name).split(".")[-1]).replace("_", " ")
+        columns, resolved, unresolved, primary, foreign = {}, [], [], [], []
+        for name, ev in evidence.items():
+            column, rule_confidence, key = self._column(entity, ev)
+            columns[name] = column
+            if min(ev.type_confidence, rule_confidence) >= self.min_confidence:
+                resolved.append(name)
+            else:
+                unresolved.append(name)
+            if key == "primary" and ev.nulls == 0 and ev.unique is not False:
+                primary.append(name)
+            elif key:
+                foreign.append({"columnName": name, "referencedTable": key, "inferred": True})
+        return {"tableName": table_name, "columns": columns, "resolved": resolved, "unresolved": unresolved,
+                "primaryKeys": primary, "foreignKeys": foreign}
+
+    def _column(self, entity: str, ev: ColumnEvidence) -> Tuple[Dict[str, Any], float, Optional[str]]:
+        """(column metadata, confidence of the name rule, key candidate: "primary" or a table)."""
+        snake = snake_case(ev.name)
+        data_type = ev.data_type or "VARCHAR"
+        description, confidence, key = None, 0.0, None
+        for pattern, types, template in _NAME_RULES:
+            match = pattern.match(snake)
+            if not match or (types and data_type not in types):
+                continue
+            fields = {k: (v or "").replace("_", " ") for k, v in match.groupdict().items()}
+            if "verb" in fields:
+                fields["verb"] = _VERBS[fields["verb"]]
+            description = template.format(entity=entity, **fields).strip()
+            description = description[0].upper() + description[1:]
+            confidence = 1.0
+            if snake in ("id", "uuid", "guid"):
+                key = "primary"
+            elif snake.endswith(("_id", "_uuid")):
+                key = match.group("subject")
+            break
+        if description is None and data_type == "VARCHAR" and ev.email_ratio >= 0.99:
+            description, confidence = f"E-mail address ({ev.name.replace('_', ' ')}).", self.min_confidence
+        column = {
+            "columnName": ev.name,
+            "dataType": data_type,
+            # unresolved columns go to the model; this is only a fallback
+            "description": description or snake.replace("_", " ").capitalize() + ".",
+            "nullable": ev.nulls > 0,
+            "isUnique": bool(ev.unique),
+            "sampleValues": ev.samples,
+        }
+        return column, confidence, key
+
+    @staticmethod
+    def report(inference: Dict[str, Any]) -> Dict[str, Any]:
+        total = len(inference["columns"])
+        local = len(inference["resolved"])
+        return {"columns": total, "resolved_locally": local,
+                "local_fraction": round(local / total, 4) if total else None,
+                "model_columns": list(inference["unresolved"])}
+
+    @staticmethod
+    def local_metadata(inference: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete metadata when every column was resolved locally."""
+        names = list(inference["columns"])
+        table = inference["tableName"]
+        return {
+            "tableType": "TABLE",
+            "tableName": table,
+            "description": f"Records of {table.replace('_', ' ')} with the fields {', '.join(names)}.",
+            "primaryKeys": inference["primaryKeys"],
+            "foreignKeys": inference["foreignKeys"],
+            "columns": [inference["columns"][n] for n in names],
+        }
+
+    @staticmethod
+    def merge(inference: Dict[str, Any], model: Dict[str, Any]) -> Dict[str, Any]:
+        """Model metadata for the unresolved columns plus the local ones, in column order."""
+        merged = dict(model)
+        by_name = {c.get("columnName"): c for c in model.get("columns") or [] if isinstance(c, dict)}
+        columns = []
+        for name, local in inference["columns"].items():
+            if name in inference["resolved"] or name not in by_name:
+                columns.append(local)
+            else:
+                columns.append(by_name.pop(name))
+        columns.extend(by_name.values())  # anything the model added on its own
+        merged["columns"] = columns
+        merged["primaryKeys"] = list(dict.fromkeys(inference["primaryKeys"] + list(model.get("primaryKeys") or [])))
+        merged["primaryKeys"] = [k for k in merged["primaryKeys"] if k in inference["columns"]]
+        foreign = list(model.get("foreignKeys") or [])
+        named = {f.get("columnName") for f in foreign if isinstance(f, dict)}
+        merged["foreignKeys"] = foreign + [f for f in inference["foreignKeys"] if f["columnName"] not in named]
+        return merged
@@ -0,0 +1,194 @@
+"""Single-pass, tolerant JSON parsing of model output.
+
+Models wrap JSON in prose or code fences, leave trailing commas, write
+Python literals and get cut off at the token limit. `repair_json` scans the
+text once, from the first `{` or `[` to the end of that value, and fixes
+what it meets on the way:
+
+- prose and code fences around the value are skipped;
+- trailing commas are dropped, missing ones between values added and
+  mismatched closing brackets corrected;
+- raw newlines and tabs inside strings are escaped;
+- `True`/`False`/`None`/`NaN` become JSON literals, other bare words null;
+- truncated output is closed: an open string is terminated, a dangling key
+  gets a null value, partial literals and numbers are completed or trimmed,
+  and every open container is closed.
+
+It returns the parsed value and the list of repairs it made.
+"""
+
+import json
+from typing import Any, List, Tuple
+
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false",
+             "None": "null", "NaN": "null", "Infinity": "null", "-Infinity": "null"}
+_DELIMITERS = set(",:{}[]\"")
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+# container states: what the scanner expects next
+_KEY, _COLON, _VALUE, _AFTER = "key", "colon", "value", "after"
+
+
+def _strip_trailing_comma(out: List[str]) -> bool:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+        return True
+    return False
+
+
+def _literal(token: str, at_end: bool) -> Tuple[str, str]:
+    """(JSON text, repair or "") for a bare token outside strings."""
+    if token in _LITERALS:
+        return _LITERALS[token], "" if token == _LITERALS[token] else "python_literal"
+    try:
+        json.loads(token)
+        return token, ""
+    except ValueError:
+        pass
+    if at_end:
+        for word in ("true", "false", "null"):
+            if word.startswith(token):
+                return word, "truncated"
+        trimmed = token.rstrip(".eE+-")
+        if trimmed and trimmed != "-":
+            try:
+                json.loads(trimmed)
+                return trimmed, "truncated"
+            except ValueError:
+                pass
+    return "null", "invalid_literal"
+
+
+def repair_json(text: str, object_only: bool = False) -> Tuple[Any, List[str]]:
+    """Parse the first JSON object or array in `text`; returns (value, repairs).
+
+    With `object_only` the scan starts at the first `{`, so a bracket in the
+    prose before an object ("Sure [see below]: {...}") is not taken for an
+    array. Raises ValueError when there is no object or array, or it cannot
+    be repaired.
+    """
+    text = text or ""
+    starts = [i for i in (text.find("{"), -1 if object_only else text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object found" if object_only else "no JSON object or array found")
+    start = min(starts)
+    repairs: List[str] = []
+    prefix = text[:start]
+    if "```" in prefix:
+        repairs.append("code_fence")
+    elif prefix.strip():
+        repairs.append("prose")
+
+    out: List[str] = []
+    stack: List[List[str]] = []  # [bracket, state]
+    in_string = escape = False
+    i, n = start, len(text)
+
+    def value_done():
+        if stack:
+            stack[-1][1] = _AFTER
+
+    def begin():
+        # a value (or key) right after another one: the comma is missing
+        if stack and stack[-1][1] == _AFTER:
+            out.append(",")
+            repairs.append("missing_comma")
+            stack[-1][1] = _KEY if stack[-1][0] == "{" else _VALUE
+
+    def close(bracket: str):
+        kind, state = stack.pop()
+        if _strip_trailing_comma(out):
+            repairs.append("trailing_comma")
+        if kind == "{" and state == _COLON:
+            out.append(":null")
+            repairs.append("missing_value")
+        elif kind == "{" and state == _VALUE:
+            out.append("null")
+            repairs.append("missing_value")
+        out.append("}" if kind == "{" else "]")
+        if bracket and bracket != out[-1]:
+            repairs.append("mismatched_bracket")
+        value_done()
+
+    while i < n:
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(c)
+            elif c == "\\":
+                escape = True
+                out.append(c)
+            elif c == '"':
+                in_string = False
+                out.append(c)
+                if stack and stack[-1][0] == "{" and stack[-1][1] == _KEY:
+                    stack[-1][1] = _COLON
+                else:
+                    value_done()
+            elif c in _STRING_ESCAPES:
+                out.append(_STRING_ESCAPES[c])
+                if "control_character" not in repairs:
+                    repairs.append("control_character")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            begin()
+            in_string = True
+            out.append(c)
+        elif c in "{[":
+            begin()
+            stack.append([c, _KEY if c == "{" else _VALUE])
+            out.append(c)
+        elif c in "}]":
+            if not stack:
+                break
+            close(c)
+            if not stack:
+                break
+        elif c == ",":
+            if stack:
+                stack[-1][1] = _KEY if stack[-1][0] == "{" else _VALUE
+            out.append(c)
+        elif c == ":":
+            if stack:
+                stack[-1][1] = _VALUE
+            out.append(c)
+        elif c.isspace():
+            out.append(c)
+        else:
+            j = i
+            while j < n and text[j] not in _DELIMITERS and not text[j].isspace():
+                j += 1
+            begin()
+            token, repair = _literal(text[i:j], at_end=j >= n)
+            if repair:
+                repairs.append(repair)
+            out.append(token)
+            value_done()
+            i = j
+            continue
+        i += 1
+
+    if in_string or stack:
+        repairs.append("truncated")
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+        if stack and stack[-1][0] == "{" and stack[-1][1] == _KEY:
+            stack[-1][1] = _COLON
+        else:
+            value_done()
+    while stack:
+        close("")
+
+    value = json.loads("".join(out))
+    # one entry per kind of repair, in the order first met
+    return value, list(dict.fromkeys(repairs))
@@ -1,40 +1,91 @@
 from __future__ import annotations
 
-import os
-from typing import Any
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
 
+from app.ai.cache import cache_key
 from app.ai.groq_client import GroqClient
+from app.ai.packing import TablePacker
+from app.ai.prompt_builder import PromptBuilder, compact_json, merge_text_outputs
 from app.config import settings
+from app.core.reference_data import SAMPLE_PATH, reference_data
+from app.core.singleflight import flight_group
 
 # avoid importing langchain at all; we handle text composition ourselves
 
+SAMPLE_MARKER = "\n\nSAMPLE_EMPLOYEES:\n"
+# raw sample text kept when the file is not valid JSON
+MAX_RAW_SAMPLE_CHARS = 2000
+
+summary_flight = flight_group("summary")
 
 
 class LangChainPipeline:
-    def __init__(self, groq_client: GroqClient | None = None):
+    def __init__(self, groq_client: GroqClient | None = None, prompt_builder: PromptBuilder | None = None):
         # allow caller to inject a client for testing; otherwise create default
         self.groq = groq_client or GroqClient()
+        self.prompts = prompt_builder or PromptBuilder()
+        # token report of the last build_prompts call (see PromptBuilder.report)
+        self.last_prompt_stats: Dict[str, Any] = {}
+        # call report of the last document_tables call (see TablePacker)
+        self.last_pack_report: Dict[str, Any] = {}
 
     async def summarize_table(self, table_schema: dict) -> str:
-        """Compose a payload of schema and sample data and send to Groq."""
-
-        # gather text (schema plus sample file)
-        text = str(table_schema)
-        sample_path = os.path.join(
-            os.path.dirname(__file__),
-            "..",
-            "data",
-            "sample.json",
-        )
-        sample_path = os.path.normpath(sample_path)
-        if os.path.exists(sample_path):
-            try:
-                with open(sample_path, "r", encoding="utf-8") as f:
-                    sample_text = f.read()
-                text += "\n\nSAMPLE_EMPLOYEES:\n" + sample_text
-            except Exception:
-                pass
-
-        # call groq client directly
-        return await self.groq.generate_summary(text)
+        """Compose a payload of schema and sample data and send to Groq.
+
+        Schemas over the prompt budget are sent as several column chunks
+        whose answers are merged.
+        """
+        prompts = self.build_prompts(table_schema)
+        if not self.groq.use_cache:
+            # an opt-out of the cache asks for a fresh answer, not one already on its way
+            return await self._summarize(prompts)
+        # concurrent requests for the same table (same prompts) share one run
+        client = f"{type(self.groq).__qualname__}:{self.groq.model}"
+        key = cache_key(client, self.groq.temperature, "\x1e".join(prompts))
+        return await summary_flight.do(key, lambda: self._summarize(prompts))
+
+    async def _summarize(self, prompts: List[str]) -> str:
+        outputs = await asyncio.gather(*(self.groq.generate_summary(p) for p in prompts))
+        return merge_text_outputs(list(outputs))
+
+    async def document_tables(self, tables: Dict[str, dict], **options) -> Dict[str, Any]:
+        """Metadata for many tables, packing the small ones several to a call."""
+        packer = TablePacker(self.groq, self.prompts, **options)
+        try:
+            return await packer.document(tables)
+        finally:
+            self.last_pack_report = packer.last_report
+
+    def build_prompts(self, table_schema: dict) -> List[str]:
+        # the schema as a compact column table plus representative sample
+        # values; the old repr + raw file prompt is kept only as the baseline
+        # for the token report
+        baseline = str(table_schema)
+        suffix = ""
+        sample = self._read_sample()
+        if sample is not None:
+            sample_text, compacted = sample
+            baseline += SAMPLE_MARKER + sample_text
+            suffix = SAMPLE_MARKER + compacted
+        prompts, self.last_prompt_stats = self.prompts.table_prompts(table_schema, suffix=suffix, baseline=baseline)
+        return prompts
+
+    def _compact_sample(self, sample_text: str) -> str:
+        try:
+            data = json.loads(sample_text)
+        except ValueError:
+            return sample_text[:MAX_RAW_SAMPLE_CHARS]
+        return compact_json(self.prompts.compact(data))
 
+    def _read_sample(self) -> Tuple[str, str] | None:
+        """(sample text, its compact prompt form); both cached until the file changes."""
+        try:
+            sample_text = reference_data.text(SAMPLE_PATH)
+            if sample_text is None:
+                return None
+            key = f"prompt_sample:{self.prompts.max_examples}:{self.prompts.max_value_chars}"
+            return sample_text, reference_data.derive(key, lambda asset: self._compact_sample(asset.text), SAMPLE_PATH)
+        except (OSError, UnicodeDecodeError):
+            return None
@@ -0,0 +1,181 @@
+"""Metadata for many small tables with few completions.
+
+Most tables have a handful of columns, so one call per table spends more on
+per-call overhead and rate-limit budget than on the schema itself.
+`TablePacker.document(tables)`:
+
+- gives every table wider than `PACK_MAX_COLUMNS` (or over half the prompt
+  budget) a call of its own, with the single-table `METADATA_PROMPT`;
+- bins the others first-fit decreasing into packed prompts, bounded by the
+  prompt budget, an estimate of the answer size and `PACK_MAX_TABLES`;
+- asks for one JSON object keyed by table name and splits it back,
+  validating every table against `TableMetadata`;
+- retries every table missing from (or invalid in) a packed answer on its
+  own, so a truncated answer costs one extra call per lost table only.
+  Single-table answers go through `MetadataValidator` (targeted re-asks).
+
+The report counts the calls made against one call per table (and chunk).
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.ai.groq_client import GroqClient
+from app.ai.prompt_builder import (
+    METADATA_FORMAT,
+    METADATA_PROMPT,
+    PromptBuilder,
+    estimate_tokens,
+    extract_json_object,
+    merge_json_outputs,
+)
+from app.ai.structured import MetadataValidator, validation_problems
+from app.config import settings
+from app.core.logging import logger
+from app.models.metadata import TableMetadata
+
+PACKED_METADATA_PROMPT = (
+    "You are a data dictionary generator. Below are the schemas of several tables, each introduced by a "
+    "`### <table name>` line. Generate a metadata description for EVERY table. Answer with a single JSON "
+    "object whose keys are the table names exactly as written and whose values use this exact JSON format:\n\n"
+    + METADATA_FORMAT
+    + "\n\nAnswer with the JSON object only.\n\nTables:\n"
+)
+
+
+def table_section(name: str, description: str) -> str:
+    return f"### {name}\n{description}\n"
+
+
+def single_instructions(name: str) -> str:
+    return f"{METADATA_PROMPT}\n\nTable Name: {name}\n\nData:\n"
+
+
+def split_packed_output(text: str, names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-table metadata from a keyed answer; missing or invalid tables are left out."""
+    data = extract_json_object(text)
+    if data is None:
+        return {}
+    by_key = {str(k).strip().lower(): v for k, v in data.items()}
+    results = {}
+    for name in names:
+        value = data.get(name, by_key.get(name.lower()))
+        if isinstance(value, dict):
+            value.setdefault("tableName", name)
+            if not validation_problems(value):
+                results[name] = TableMetadata.model_validate(value).model_dump(mode="json")
+    return results
+
+
+def pack(costs: Dict[str, Tuple[int, int]], prompt_budget: int, completion_budget: int,
+         max_tables: int) -> List[List[str]]:
+    """First-fit decreasing bins of table names; `costs` maps name -> (prompt, answer) tokens."""
+    bins: List[List[str]] = []
+    used: List[List[int]] = []
+    for name in sorted(costs, key=lambda n: (-costs[n][0], n)):
+        prompt, answer = costs[name]
+        for i, (p, a) in enumerate(used):
+            if len(bins[i]) < max_tables and p + prompt <= prompt_budget and a + answer <= completion_budget:
+                bins[i].append(name)
+                used[i] = [p + prompt, a + answer]
+                break
+        else:
+            bins.append([name])
+            used.append([prompt, answer])
+    return bins
+
+
+class TablePacker:
+    def __init__(
+        self,
+        groq_client: GroqClient,
+        prompt_builder: Optional[PromptBuilder] = None,
+        max_columns: Optional[int] = None,
+        max_tables: Optional[int] = None,
+        completion_budget: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.groq = groq_client
+        self.prompts = prompt_builder or PromptBuilder()
+        self.max_columns = max_columns or settings.PACK_MAX_COLUMNS
+        self.max_tables = max_tables or settings.PACK_MAX_TABLES
+        self.completion_budget = completion_budget or settings.PACK_MAX_COMPLETION_TOKENS
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+        self.validator = MetadataValidator(groq_client)
+        self.last_report: Dict[str, Any] = {}
+
+    def describe(self, schema: Dict[str, Any]) -> List[str]:
+        """The compact schema text; several chunks for tables over the budget."""
+        prompts, _ = self.prompts.table_prompts(schema)
+        return prompts
+
+    def plan(self, tables: Dict[str, Dict[str, Any]],
+             described: Optional[Dict[str, List[str]]] = None) -> Tuple[List[List[str]], List[str]]:
+        """(packed bins, tables documented on their own)."""
+        described = described or {name: self.describe(schema) for name, schema in tables.items()}
+        prompt_budget = self.prompts.budget - estimate_tokens(PACKED_METADATA_PROMPT)
+        costs, solo = {}, []
+        for name, schema in tables.items():
+            columns = schema.get("columns") if isinstance(schema, dict) else None
+            chunks = described[name]
+            tokens = estimate_tokens(table_section(name, chunks[0]))
+            if len(chunks) > 1 or not isinstance(columns, list) or len(columns) > self.max_columns \
+                    or tokens > prompt_budget // 2:
+                solo.append(name)
+                continue
+            answer = settings.PACK_TOKENS_PER_COLUMN * (len(columns) + 1)
+            costs[name] = (tokens, answer)
+        bins = pack(costs, prompt_budget, self.completion_budget, self.max_tables)
+        # a bin of one is just a single-table call
+        solo += [b[0] for b in bins if len(b) == 1]
+        return [b for b in bins if len(b) > 1], solo
+
+    async def document(self, tables: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Metadata per table name: a validated dict; the best effort, or the raw
+        answer when it was not JSON, if validation failed."""
+        described = {name: self.describe(schema) for name, schema in tables.items()}
+        bins, solo = self.plan(tables, described)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: Dict[str, Any] = {}
+        calls = {"packed": 0, "single": 0}
+        retried: List[str] = []
+
+        async def complete(prompt: str, kind: str) -> str:
+            async with semaphore:
+                calls[kind] += 1
+                return await self.groq.generate_summary(prompt)
+
+        async def single(name: str):
+            prompts = [single_instructions(name) + chunk for chunk in described[name]]
+            outputs = await asyncio.gather(*(complete(p, "single") for p in prompts))
+            resolved = await self.validator.resolve(merge_json_outputs(list(outputs)), defaults={"tableName": name})
+            results[name] = resolved["metadata"]
+
+        async def packed(names: List[str]):
+            prompt = PACKED_METADATA_PROMPT + "\n".join(table_section(n, described[n][0]) for n in names)
+            answer = await complete(prompt, "packed")
+            found = split_packed_output(answer, names)
+            results.update(found)
+            missing = [n for n in names if n not in found]
+            if missing:
+                logger.warning(f"Packed answer lacked {len(missing)} of {len(names)} tables; retrying them one by one")
+                retried.extend(missing)
+                await asyncio.gather(*(single(n) for n in missing))
+
+        await asyncio.gather(*(packed(b) for b in bins), *(single(n) for n in solo))
+
+        # one call per table, or per chunk of a wide table, without packing
+        unpacked = sum(len(chunks) for chunks in described.values())
+        made = calls["packed"] + calls["single"]
+        self.last_report = {
+            "tables": len(tables),
+            "calls": made,
+            "packed_calls": calls["packed"],
+            "single_calls": calls["single"],
+            "packed_tables": sum(len(b) for b in bins),
+            "retried": retried,
+            "unpacked_calls": unpacked,
+            "calls_saved": unpacked - made,
+        }
+        logger.info(f"Documented {len(tables)} tables with {made} calls ({unpacked - made} saved by packing)")
+        return {name: results[name] for name in tables if name in results}
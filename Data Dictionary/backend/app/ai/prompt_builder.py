@@ -0,0 +1,296 @@
+"""Token-budgeted prompts for schemas and JSON payloads.
+
+The original prompts were a Python repr of the schema plus the whole
+sample file, or `json.dumps(..., indent=2)` of arbitrary payloads. This
+module builds compact prompts instead:
+
+- a table schema becomes a header (keys, indexes) and one `|`-separated
+  line per column instead of a repr of nested dicts;
+- record lists collapse to one entry per field with its types, null count
+  and a few representative distinct values, truncated to a few characters;
+- anything left is serialized as compact JSON without whitespace.
+
+Tokens are estimated locally (`estimate_tokens`). A prompt over the budget
+is split into column (or field) chunks; `merge_text_outputs` and
+`merge_json_outputs` put the per-chunk answers back together. Every build
+reports its token count next to the one of the old prompt.
+"""
+
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.ai.json_repair import repair_json
+from app.config import settings
+
+_LETTERS = re.compile(r"[^\W\d_]+")
+_DIGITS = re.compile(r"\d+")
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE_RUNS = re.compile(r"\n\s*|[ \t]{2,}")
+
+# Metadata answer format shared by the single-table and packed prompts
+METADATA_FORMAT = """{
+  "tableType": "TABLE",
+  "tableName": "<table_name>",
+  "description": "<brief description of what this data represents>",
+  "primaryKeys": ["<if there's an obvious primary key field>"],
+  "foreignKeys": [],
+  "columns": [
+    {
+      "columnName": "<field_name>",
+      "dataType": "<inferred data type like VARCHAR, INTEGER, DATE, JSON, etc.>",
+      "description": "<what this field represents>",
+      "nullable": <true/false>,
+      "isUnique": <true/false if field appears to have unique values>,
+      "sampleValues": ["<2-3 example values from the data>"]
+    }
+  ]
+}"""
+
+# Prompt template for generating metadata from JSON
+METADATA_PROMPT = (
+    "You are a data dictionary generator. Analyze the following JSON data and generate a metadata "
+    "description in this exact JSON format:\n\n" + METADATA_FORMAT + "\n\nGenerate this metadata for the following JSON data:\n"
+)
+
+# column attributes, in display order, and the keys they may appear under
+_COLUMN_FIELDS = [
+    ("name", ("column_name", "name", "field")),
+    ("type", ("data_type", "column_type", "type")),
+    ("nullable", ("is_nullable", "nullable")),
+    ("default", ("column_default", "default")),
+    ("comment", ("comment", "description", "column_comment")),
+]
+_LENGTH_KEYS = ("character_maximum_length", "numeric_precision", "numeric_scale")
+_TABLE_KEYS = {"table", "table_name", "name", "schema", "columns", "primary_key", "foreign_keys",
+               "unique_constraints", "indexes"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count without a tokenizer.
+
+    Letter runs cost one token per ~4 characters, digit runs one per ~3,
+    every punctuation mark one, and each newline or run of indentation one.
+    """
+    if not text:
+        return 0
+    tokens = sum((len(w) + 3) // 4 for w in _LETTERS.findall(text))
+    tokens += sum((len(d) + 2) // 3 for d in _DIGITS.findall(text))
+    tokens += len(_PUNCT.findall(text))
+    tokens += len(_SPACE_RUNS.findall(text))
+    return max(tokens, 1)
+
+
+def compact_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def truncate(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "…"
+    return value
+
+
+def representative_values(values: List[Any], limit: int, max_chars: int) -> List[Any]:
+    """Up to `limit` distinct non-null values, most frequent first, truncated."""
+    counts = Counter(compact_json(v) for v in values if v is not None)
+    return [truncate(json.loads(v), max_chars) for v, _ in counts.most_common(limit)]
+
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def compact_records(records: List[Dict[str, Any]], limit: int, max_chars: int) -> Dict[str, Any]:
+    """Summarize a list of records field by field instead of row by row."""
+    fields: Dict[str, List[Any]] = {}
+    for record in records:
+        for key in record:
+            fields.setdefault(key, [])
+    for record in records:
+        for key, values in fields.items():
+            values.append(record.get(key))
+    summary = {}
+    for key, values in fields.items():
+        types = sorted({_type_name(v) for v in values if v is not None}) or ["null"]
+        entry = {"type": "|".join(types), "examples": representative_values(values, limit, max_chars)}
+        nulls = sum(v is None for v in values)
+        if nulls:
+            entry["nulls"] = nulls
+        summary[key] = entry
+    return {"rows": len(records), "fields": summary}
+
+
+def compact_payload(data: Any, limit: int, max_chars: int) -> Any:
+    """Representative, size-bounded form of an arbitrary JSON payload."""
+    if isinstance(data, dict):
+        return {k: compact_payload(v, limit, max_chars) for k, v in data.items()}
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            return compact_records(data, limit, max_chars)
+        if len(data) > limit:
+            return {"items": len(data), "examples": representative_values(data, limit, max_chars)}
+        return [compact_payload(v, limit, max_chars) for v in data]
+    return truncate(data, max_chars)
+
+
+def _lowered(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {str(k).lower(): v for k, v in row.items()}
+
+
+def _first(row: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if row.get(key) is not None:
+            return row[key]
+    return None
+
+
+def column_line(column: Any) -> str:
+    if not isinstance(column, dict):
+        return str(column)
+    row = _lowered(column)
+    values = []
+    for field, keys in _COLUMN_FIELDS:
+        value = _first(row, keys)
+        if field == "type" and value is not None:
+            sizes = [str(row[k]) for k in _LENGTH_KEYS if row.get(k) is not None]
+            if sizes:
+                value = f"{value}({','.join(sizes)})"
+        values.append("" if value is None else str(value))
+    return "|".join(values).rstrip("|")
+
+
+def table_header(schema: Dict[str, Any]) -> List[str]:
+    name = schema.get("table") or schema.get("table_name") or schema.get("name")
+    qualified = f"{schema['schema']}.{name}" if schema.get("schema") and name else name
+    lines = [f"table: {qualified}"] if qualified else []
+    if schema.get("primary_key"):
+        lines.append("primary key: " + ", ".join(map(str, schema["primary_key"])))
+    for fk in schema.get("foreign_keys") or []:
+        target = ".".join(p for p in (fk.get("referenced_schema"), fk.get("referenced_table")) if p)
+        lines.append(
+            f"foreign key: ({', '.join(map(str, fk.get('columns') or []))}) -> "
+            f"{target}({', '.join(map(str, fk.get('referenced_columns') or []))})"
+        )
+    for uc in schema.get("unique_constraints") or []:
+        lines.append("unique: (" + ", ".join(map(str, uc.get("columns") or [])) + ")")
+    for index in schema.get("indexes") or []:
+        if index.get("is_primary"):
+            continue
+        unique = " unique" if index.get("is_unique") else ""
+        lines.append(f"index: {index.get('index_name')}({', '.join(map(str, index.get('columns') or []))}){unique}")
+    extra = {k: v for k, v in schema.items() if k not in _TABLE_KEYS}
+    if extra:
+        lines.append("other: " + compact_json(extra))
+    return lines
+
+
+class PromptBuilder:
+    def __init__(self, budget: Optional[int] = None, max_examples: int = 3, max_value_chars: int = 60):
+        self.budget = budget or settings.PROMPT_TOKEN_BUDGET
+        self.max_examples = max_examples
+        self.max_value_chars = max_value_chars
+
+    def compact(self, data: Any) -> Any:
+        return compact_payload(data, self.max_examples, self.max_value_chars)
+
+    def table_prompts(self, schema: Dict[str, Any], suffix: str = "", baseline: str = "") -> Tuple[List[str], Dict[str, Any]]:
+        """Prompts describing one table; several when its columns exceed the budget.
+
+        `suffix` (e.g. sample data) goes into the first prompt only.
+        `baseline` is the prompt the old code would have sent.
+        """
+        columns = schema.get("columns")
+        if not isinstance(columns, list) or not columns:
+            # not a catalog entry: fall back to the compact payload form
+            prompts = self._split_payload(self.compact(schema), "", suffix)
+            return prompts, self.report(prompts, baseline)
+
+        header = table_header(schema)
+        lines = [column_line(c) for c in columns]
+        label = "columns{} (name|type|nullable|default|comment):"
+        fixed = estimate_tokens("\n".join(header + [label.format(" (part 999 of 999)")])) + estimate_tokens(suffix)
+        chunks = self._chunk(lines, self.budget - fixed)
+        prompts = []
+        for i, chunk in enumerate(chunks):
+            part = f" (part {i + 1} of {len(chunks)})" if len(chunks) > 1 else ""
+            text = "\n".join(header + [label.format(part)] + chunk)
+            if i == 0 and suffix:
+                text += suffix
+            prompts.append(text)
+        return prompts, self.report(prompts, baseline)
+
+    def payload_prompts(self, data: Any, instructions: str, baseline: str = "") -> Tuple[List[str], Dict[str, Any]]:
+        """Prompts of `instructions` followed by a compact form of `data`."""
+        prompts = self._split_payload(self.compact(data), instructions, "")
+        return prompts, self.report(prompts, baseline)
+
+    def _split_payload(self, compacted: Any, instructions: str, suffix: str) -> List[str]:
+        text = instructions + compact_json(compacted) + suffix
+        if estimate_tokens(text) <= self.budget or not isinstance(compacted, dict):
+            return [text]
+        # split the widest level into groups of keys: record fields, else top-level keys
+        records = isinstance(compacted.get("fields"), dict)
+        items = list((compacted["fields"] if records else compacted).items())
+        fixed = estimate_tokens(instructions) + estimate_tokens(suffix) + 16
+        groups = self._chunk(items, self.budget - fixed, cost=lambda kv: estimate_tokens(compact_json({kv[0]: kv[1]})))
+        prompts = []
+        for i, group in enumerate(groups):
+            part = dict(compacted, fields=dict(group)) if records else dict(group)
+            prompts.append(instructions + compact_json(part) + (suffix if i == 0 else ""))
+        return prompts
+
+    @staticmethod
+    def _chunk(items: List[Any], budget: int, cost=estimate_tokens) -> List[List[Any]]:
+        chunks: List[List[Any]] = [[]]
+        used = 0
+        for item in items:
+            size = cost(item) + 1
+            if chunks[-1] and used + size > budget:
+                chunks.append([])
+                used = 0
+            chunks[-1].append(item)
+            used += size
+        return chunks
+
+    @staticmethod
+    def report(prompts: List[str], baseline: str = "") -> Dict[str, Any]:
+        tokens = sum(estimate_tokens(p) for p in prompts)
+        report = {"prompt_tokens": tokens, "chunks": len(prompts)}
+        if baseline:
+            report["baseline_tokens"] = estimate_tokens(baseline)
+            report["tokens_saved"] = report["baseline_tokens"] - tokens
+        return report
+
+
+def merge_text_outputs(outputs: List[str]) -> str:
+    if len(outputs) == 1:
+        return outputs[0]
+    return "\n\n".join(f"[part {i + 1} of {len(outputs)}]\n{out}" for i, out in enumerate(outputs))
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """The first JSON object in a model answer, repaired (see app/ai/json_repair.py)."""
+    try:
+        data, _ = repair_json(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def merge_json_outputs(outputs: List[str]) -> str:
+    """Merge per-chunk metadata JSON: the first object, with every chunk's `columns`."""
+    if len(outputs) == 1:
+        return outputs[0]
+    merged: Optional[Dict[str, Any]] = None
+    for out in outputs:
+        data = extract_json_object(out)
+        if data is None:
+            return merge_text_outputs(outputs)
+        if merged is None:
+            merged = data
+            merged["columns"] = list(data.get("columns") or [])
+        else:
+            merged["columns"].extend(data.get("columns") or [])
+    return json.dumps(merged, indent=2, ensure_ascii=False)
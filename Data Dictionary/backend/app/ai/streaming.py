@@ -0,0 +1,80 @@
+"""Server-sent events, in and out.
+
+With `stream: true` the chat completions API answers with an event stream:
+one `data:` line per delta and a final `data: [DONE]`. `iter_sse_data`
+parses it from the response lines and `GroqClient.stream_summary` turns the
+deltas into text pieces.
+
+`PromptStream` runs a pipeline's prompts (one per chunk of a wide schema)
+through `stream_summary`, yields the pieces tagged with their chunk and
+keeps the complete answers for the final merge. `sse_event` encodes the
+events the streaming routes send: `token` per piece, then `done` with the
+merged, validated result or `error`.
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from app.core.logging import logger
+
+
+async def iter_sse_data(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """The `data` of every event; multi-line data is joined with newlines."""
+    data: List[str] = []
+    async for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):  # comment / keep-alive
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def delta_text(chunk: Dict[str, Any]) -> str:
+    choices = chunk.get("choices")
+    if not isinstance(choices, list) or not choices:
+        return ""
+    delta = choices[0].get("delta") or {}
+    return delta.get("content") or ""
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+class PromptStream:
+    def __init__(self, groq_client, prompts: List[str]):
+        self.groq = groq_client
+        self.prompts = prompts
+        # complete answer per prompt, filled while streaming
+        self.outputs: List[str] = []
+        self.timing: Dict[str, Any] = {}
+
+    async def tokens(self) -> AsyncIterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        first = None
+        # chunks go one after another so pieces arrive in reading order
+        for part, prompt in enumerate(self.prompts):
+            pieces = []
+            async for piece in self.groq.stream_summary(prompt):
+                if first is None:
+                    first = time.perf_counter() - started
+                pieces.append(piece)
+                yield {"part": part, "text": piece}
+            self.outputs.append("".join(pieces))
+        total = time.perf_counter() - started
+        self.timing = {
+            "time_to_first_token": round(first, 4) if first is not None else None,
+            "total_seconds": round(total, 4),
+            "calls": len(self.prompts),
+        }
+        logger.info(f"Streamed {len(self.prompts)} completion(s): first token after {self.timing['time_to_first_token']}s, "
+                    f"done after {self.timing['total_seconds']}s")
@@ -0,0 +1,186 @@
+"""Validated table metadata from model answers.
+
+`MetadataValidator.resolve(text)` turns a `METADATA_PROMPT` answer into a
+`TableMetadata`:
+
+1. `repair_json` parses the answer in one tolerant pass (code fences,
+   trailing commas, truncation, ...);
+2. the result is validated against the Pydantic models;
+3. fields that are still missing or invalid are sent back to the model on
+   their own (the affected columns and the table-level fields only, not
+   the whole prompt) and the corrected fields are merged in, up to
+   `STRUCTURED_MAX_REASKS` times;
+4. only an answer without any JSON in it is regenerated in full, when the
+   caller passes `regenerate`.
+
+`parse_stats` counts parses, first-pass successes, repairs, re-asks and
+regenerations for the whole process.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.ai.json_repair import repair_json
+from app.ai.prompt_builder import compact_json
+from app.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, metrics_registry
+from app.models.metadata import TableMetadata
+
+REASK_PROMPT = """You are a data dictionary generator. Some fields of the table metadata you produced are missing or invalid:
+
+{problems}
+
+Table: {table}
+Affected columns, with their index:
+{columns}
+
+Answer with a JSON object holding only the corrected fields, in this form:
+{{"table": {{"<field>": <value>}}, "columns": [{{"index": <column index>, "<field>": <value>}}]}}
+"""
+
+Problem = Tuple[Tuple[Any, ...], str]
+
+
+class ParseStats:
+    def __init__(self):
+        self.counters = {
+            "parses": 0,
+            "valid": 0,
+            "valid_first_pass": 0,
+            "repaired": 0,
+            "reasks": 0,
+            "fixed_by_reask": 0,
+            "regenerations": 0,
+            "failed": 0,
+        }
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        parses = self.counters["parses"]
+        return {
+            **self.counters,
+            "success_rate": round(self.counters["valid"] / parses, 4) if parses else None,
+            "first_pass_rate": round(self.counters["valid_first_pass"] / parses, 4) if parses else None,
+        }
+
+    def metrics(self) -> List[Any]:
+        return [Counter.snapshot("llm_parse_events_total", "Structured metadata parsing outcomes by event",
+                                 ("event",), {(name,): value for name, value in self.counters.items()})]
+
+
+parse_stats = ParseStats()
+metrics_registry.register_collector(parse_stats.metrics)
+
+
+def parse_json_object(text: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """(object, repairs), or (None, []) when the text holds no repairable JSON object."""
+    try:
+        data, repairs = repair_json(text, object_only=True)
+    except ValueError:
+        return None, []
+    return (data, repairs) if isinstance(data, dict) else (None, [])
+
+
+def validation_problems(data: Dict[str, Any]) -> List[Problem]:
+    try:
+        TableMetadata.model_validate(data)
+    except ValidationError as e:
+        return [(tuple(err["loc"]), err["msg"]) for err in e.errors()]
+    return []
+
+
+def _location(loc: Tuple[Any, ...]) -> str:
+    text = ""
+    for part in loc:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else str(part))
+    return text
+
+
+def reask_prompt(data: Dict[str, Any], problems: List[Problem]) -> str:
+    columns = data.get("columns") if isinstance(data.get("columns"), list) else []
+    table = {k: v for k, v in data.items() if k != "columns"}
+    table["columnNames"] = [c.get("columnName") for c in columns if isinstance(c, dict)]
+    indexes = sorted({loc[1] for loc, _ in problems
+                      if len(loc) > 1 and loc[0] == "columns" and isinstance(loc[1], int)})
+    affected = "\n".join(compact_json({"index": i, **(columns[i] if isinstance(columns[i], dict) else {})})
+                         for i in indexes) or "(none)"
+    lines = "\n".join(f"- {_location(loc)}: {msg}" for loc, msg in problems)
+    return REASK_PROMPT.format(problems=lines, table=compact_json(table), columns=affected)
+
+
+def apply_patch(data: Dict[str, Any], patch: Dict[str, Any]):
+    """Merge a re-ask answer into `data` in place."""
+    if "table" not in patch and "columns" not in patch:
+        patch = {"table": patch}
+    if isinstance(patch.get("table"), dict):
+        data.update({k: v for k, v in patch["table"].items() if k != "columns"})
+    columns = data.get("columns")
+    for fix in patch.get("columns") or []:
+        if not isinstance(fix, dict) or not isinstance(columns, list):
+            continue
+        index = fix.get("index")
+        if isinstance(index, int) and 0 <= index < len(columns) and isinstance(columns[index], dict):
+            columns[index].update({k: v for k, v in fix.items() if k != "index"})
+
+
+class MetadataValidator:
+    def __init__(self, groq_client, max_reasks: Optional[int] = None, stats: Optional[ParseStats] = None):
+        self.groq = groq_client
+        self.max_reasks = settings.STRUCTURED_MAX_REASKS if max_reasks is None else max_reasks
+        self.stats = stats or parse_stats
+
+    async def resolve(
+        self,
+        text: str,
+        defaults: Optional[Dict[str, Any]] = None,
+        regenerate: Optional[Callable[[], Awaitable[str]]] = None,
+    ) -> Dict[str, Any]:
+        """Validated metadata for an answer.
+
+        Returns `metadata` (the validated dict; the best effort, or the raw
+        text when nothing parsed, if `valid` is false), `repairs`, `reasks`,
+        `regenerated` and the remaining `errors`.
+        """
+        self.stats.count("parses")
+        data, repairs = parse_json_object(text)
+        regenerated = False
+        if data is None and regenerate is not None and self.max_reasks > 0:
+            self.stats.count("regenerations")
+            regenerated = True
+            text = await regenerate()
+            data, repairs = parse_json_object(text)
+        if data is None:
+            self.stats.count("failed")
+            return {"metadata": text, "valid": False, "repairs": [], "reasks": 0, "regenerated": regenerated,
+                    "errors": ["no JSON object in the answer"]}
+        if repairs:
+            self.stats.count("repaired")
+        for key, value in (defaults or {}).items():
+            if not data.get(key):
+                data[key] = value
+
+        problems = validation_problems(data)
+        reasks = 0
+        while problems and reasks < self.max_reasks:
+            reasks += 1
+            self.stats.count("reasks")
+            logger.info(f"Re-asking for {len(problems)} invalid metadata field(s)")
+            patch, _ = parse_json_object(await self.groq.generate_summary(reask_prompt(data, problems)))
+            if patch is not None:
+                apply_patch(data, patch)
+            problems = validation_problems(data)
+
+        errors = [f"{_location(loc)}: {msg}" for loc, msg in problems]
+        if problems:
+            self.stats.count("failed")
+            metadata = data
+        else:
+            self.stats.count("valid")
+            self.stats.count("fixed_by_reask" if reasks or regenerated else "valid_first_pass")
+            metadata = TableMetadata.model_validate(data).model_dump(mode="json")
+        return {"metadata": metadata, "valid": not problems, "repairs": repairs, "reasks": reasks,
+                "regenerated": regenerated, "errors": errors}
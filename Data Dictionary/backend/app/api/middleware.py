@@ -1,8 +1,14 @@
+from time import perf_counter
+
+import anyio
 from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 from app.config import settings
 from app.core.logging import logger
+from app.core.metrics import metrics_registry
+from app.core.responses import compress, negotiate
 
 # Try to import slowapi; if unavailable provide a no-op fallback so the
 # application can run without the package installed (useful for local dev).
@@ -66,3 +72,108 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             logger.error(f"Request error: {str(e)}", exc_info=True)
             raise
+
+
+def _compressible(content_type: str) -> bool:
+    media = content_type.split(";", 1)[0].strip().lower()
+    return media.startswith("text/") or media.endswith(("json", "xml", "javascript"))
+
+
+class CompressionMiddleware:
+    """Compress complete responses with zstd or gzip, as `Accept-Encoding` allows.
+
+    Streaming responses (NDJSON, server-sent events, files) pass through
+    untouched, so records still reach the client as they are produced.
+    Bodies under `COMPRESSION_MIN_SIZE` are not worth it; bodies over
+    `COMPRESSION_THREAD_MIN_SIZE` are compressed off the event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message  # held until the body shows whether it is complete
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if (message.get("more_body") or "content-encoding" in headers or len(body) < settings.COMPRESSION_MIN_SIZE
+                    or not _compressible(headers.get("content-type", ""))):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            if len(body) >= settings.COMPRESSION_THREAD_MIN_SIZE:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+requests_in_flight = metrics_registry.gauge("http_requests_in_flight", "Requests being handled")
+request_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds", "Request latency by method, route template and status",
+    ("method", "route", "status"))
+
+
+class MetricsMiddleware:
+    """Time every request and count the ones in flight, per route template.
+
+    The route label is the matched path template (`/api/dictionary/tables/{table}`),
+    so paths with parameters do not grow a series each; unmatched paths share
+    `unmatched`. Streaming responses are timed until their last chunk is sent.
+    This runs on every request: keep it to a few attribute reads and one
+    histogram update (see benchmarks/metrics_overhead.py).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = requests_in_flight.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # unless a response starts
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = self.in_flight
+        in_flight.inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            in_flight.dec()
+            # the router stores the matched route in the scope it was given
+            route = scope.get("route")
+            request_seconds.labels(scope["method"], getattr(route, "path", "unmatched"),
+                                   status).observe(elapsed)
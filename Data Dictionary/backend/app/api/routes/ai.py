@@ -1,81 +1,262 @@
+import asyncio
+import inspect
 import json
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Any, Dict
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Callable, Dict, List, Optional
+from app.ai.batch import batch_jobs
+from app.ai.cache import response_cache
+from app.ai.inference import MetadataInferenceEngine, payload_records, restrict_payload
+from app.ai.prompt_builder import METADATA_PROMPT, PromptBuilder, merge_json_outputs, merge_text_outputs
 from app.ai.groq_client import GroqClient
 from app.ai.langchain_pipeline import LangChainPipeline
+from app.ai.streaming import PromptStream, sse_event
+from app.ai.structured import MetadataValidator, parse_stats
+from app.storage.dictionary_store import dictionary_store
 from app.config import settings
+from app.core.logging import logger
 
 router = APIRouter()
 
 class SummarizeRequest(BaseModel):
     schema: Dict[str, Any]
+    use_cache: bool = True  # False forces a fresh completion
 
 class QueryRequest(BaseModel):
     data: Dict[str, Any]
+    use_cache: bool = True
+
+class BatchDocumentRequest(BaseModel):
+    # SchemaExtractor.extract_all output; extracted from DATABASE_URL when omitted
+    tables: Optional[Dict[str, Dict[str, Any]]] = None
+    # defaults to a hash of the tables, so resubmitting resumes the same job
+    job_id: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
+    concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+class TablesMetadataRequest(BaseModel):
+    # table name -> schema, as returned by SchemaExtractor.extract_all
+    tables: Dict[str, Dict[str, Any]]
+    max_tables_per_call: Optional[int] = Field(default=None, ge=1, le=100)  # 1 disables packing
+    use_cache: bool = True
+    # store the descriptions with these tables in the dictionary store (a source key, see /api/dictionary/sources)
+    source: Optional[str] = None
 
 class JsonMetadataRequest(BaseModel):
     json_data: Dict[str, Any]
     table_name: str = "data"
-
-# Prompt template for generating metadata from JSON
-METADATA_PROMPT = """You are a data dictionary generator. Analyze the following JSON data and generate a metadata description in this exact JSON format:
-
-{
-  "tableType": "TABLE",
-  "tableName": "<table_name>",
-  "description": "<brief description of what this data represents>",
-  "primaryKeys": ["<if there's an obvious primary key field>"],
-  "foreignKeys": [],
-  "columns": [
-    {
-      "columnName": "<field_name>",
-      "dataType": "<inferred data type like VARCHAR, INTEGER, DATE, JSON, etc.>",
-      "description": "<what this field represents>",
-      "nullable": <true/false>,
-      "isUnique": <true/false if field appears to have unique values>,
-      "sampleValues": ["<2-3 example values from the data>"]
-    }
-  ]
-}
-
-Generate this metadata for the following JSON data:
-"""
+    use_cache: bool = True
+    local_inference: bool = True  # describe obvious columns without the model
 
 @router.post("/summarize")
 async def summarize(req: SummarizeRequest):
-    # create pipeline; pass explicit None for compatibility with older signatures
-    pipeline = LangChainPipeline(groq_client=None)
+    pipeline = LangChainPipeline(groq_client=GroqClient(use_cache=req.use_cache))
     try:
         summary = await pipeline.summarize_table(req.schema)
-        return {"status": "ok", "summary": summary}
+        return {"status": "ok", "summary": summary, "prompt": pipeline.last_prompt_stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/query")
 async def query(req: QueryRequest):
     """Accept arbitrary JSON data and return a Groq-generated response."""
-    pipeline = LangChainPipeline(groq_client=None)
+    pipeline = LangChainPipeline(groq_client=GroqClient(use_cache=req.use_cache))
     try:
         # Reuse pipeline but convert data to string
         summary = await pipeline.summarize_table(req.data)
-        return {"status": "ok", "output": summary}
+        return {"status": "ok", "output": summary, "prompt": pipeline.last_prompt_stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/json-metadata")
 async def generate_json_metadata(req: JsonMetadataRequest):
     """Generate metadata descriptions for JSON data."""
-    groq_client = GroqClient()
+    groq_client = GroqClient(use_cache=req.use_cache)
     
     try:
-        # Format the prompt with the JSON data
-        json_str = json.dumps(req.json_data, indent=2)
-        prompt = f"{METADATA_PROMPT}\n\nTable Name: {req.table_name}\n\nData:\n{json_str}"
-        
-        # Call Groq to generate metadata
-        result = await groq_client.generate_summary(prompt)
-        
-        return {"status": "ok", "metadata": result}
+        prompts, stats, inference = _metadata_prompts(req)
+
+        # Call Groq to generate metadata (one call per chunk) and merge the columns
+        outputs = await asyncio.gather(*(groq_client.generate_summary(p) for p in prompts))
+        result = await _finish_metadata(groq_client, list(outputs), req.table_name, prompts, inference)
+
+        return {"status": "ok", **result, "prompt": stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _metadata_prompts(req: JsonMetadataRequest):
+    """(prompts, prompt stats, local inference or None) of a `/json-metadata` request.
+
+    Columns the inference engine resolves are left out of the payload; there
+    are no prompts at all when it resolves every column.
+    """
+    instructions = f"{METADATA_PROMPT}\n\nTable Name: {req.table_name}\n\nData:\n"
+    baseline = instructions + json.dumps(req.json_data, indent=2)
+    payload, inference = req.json_data, None
+    if req.local_inference:
+        key, records = payload_records(req.json_data)
+        inference = MetadataInferenceEngine().infer_records(req.table_name, records)
+        if not inference["columns"]:
+            inference = None
+        elif not inference["unresolved"]:
+            return [], PromptBuilder.report([], baseline), inference
+        elif inference["resolved"]:
+            payload = restrict_payload(req.json_data, key, inference["unresolved"])
+            instructions = (f"{METADATA_PROMPT}\n\nTable Name: {req.table_name}\n"
+                            f"Also in the table, documented separately: {', '.join(inference['resolved'])}\n\nData:\n")
+    # compact, representative form of the data; split into field chunks
+    # when it exceeds the prompt budget
+    prompts, stats = PromptBuilder().payload_prompts(payload, instructions, baseline=baseline)
+    return prompts, stats, inference
+
+async def _finish_metadata(groq_client: GroqClient, outputs: List[str], table_name: str, prompts: List[str],
+                           inference: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Validated model metadata merged with the locally inferred columns."""
+    engine = MetadataInferenceEngine
+    if inference is not None and not prompts:
+        result = {"metadata": engine.local_metadata(inference), "valid": True, "validation": None}
+    else:
+        result = await _validated_metadata(groq_client, merge_json_outputs(outputs), table_name, prompts)
+        if inference is not None and isinstance(result["metadata"], dict):
+            result["metadata"] = engine.merge(inference, result["metadata"])
+    if inference is not None:
+        result["inference"] = {**engine.report(inference), "model_skipped": not prompts}
+    return result
+
+async def _validated_metadata(groq_client: GroqClient, answer: str, table_name: str, prompts: List[str]) -> Dict[str, Any]:
+    """Typed metadata of an answer; invalid fields are re-asked, an answer without JSON regenerated."""
+    async def regenerate() -> str:
+        # the cached answer is the broken one; the new answers replace it
+        return merge_json_outputs(list(await asyncio.gather(*(groq_client.refresh_summary(p) for p in prompts))))
+
+    result = await MetadataValidator(groq_client).resolve(answer, defaults={"tableName": table_name}, regenerate=regenerate)
+    metadata, valid = result.pop("metadata"), result.pop("valid")
+    return {"metadata": metadata, "valid": valid, "validation": result}
+
+def _event_stream(stream: PromptStream, finish: Callable[[List[str]], Any]) -> StreamingResponse:
+    """Forward answer pieces as `token` events, then the assembled result as `done`.
+
+    `finish` maps the complete answers to the `done` payload; it may be async.
+    """
+    async def body():
+        try:
+            async for token in stream.tokens():
+                yield sse_event("token", token)
+            result = finish(stream.outputs)
+            if inspect.isawaitable(result):
+                result = await result
+            yield sse_event("done", {"status": "ok", **result, "timing": stream.timing})
+        except Exception as e:
+            # headers are already sent; report the failure in-band
+            logger.error(f"Streaming completion failed: {str(e)}")
+            yield sse_event("error", {"status": "error", "error": str(e)})
+
+    # X-Accel-Buffering: keep reverse proxies from holding the events back
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
+
+@router.post("/summarize/stream")
+async def summarize_stream(req: SummarizeRequest):
+    """`/summarize` as server-sent events: `token` pieces, then `done` with the summary."""
+    pipeline = LangChainPipeline(groq_client=GroqClient(use_cache=req.use_cache))
+    stream = PromptStream(pipeline.groq, pipeline.build_prompts(req.schema))
+    stats = pipeline.last_prompt_stats
+    return _event_stream(stream, lambda outputs: {"summary": merge_text_outputs(outputs), "prompt": stats})
+
+@router.post("/query/stream")
+async def query_stream(req: QueryRequest):
+    pipeline = LangChainPipeline(groq_client=GroqClient(use_cache=req.use_cache))
+    stream = PromptStream(pipeline.groq, pipeline.build_prompts(req.data))
+    stats = pipeline.last_prompt_stats
+    return _event_stream(stream, lambda outputs: {"output": merge_text_outputs(outputs), "prompt": stats})
+
+@router.post("/json-metadata/stream")
+async def json_metadata_stream(req: JsonMetadataRequest):
+    """`/json-metadata` as server-sent events; `done` carries the parsed metadata.
+
+    The assembled answer is validated like `/json-metadata`: `valid` is
+    false (and `metadata` the best effort) when re-asks could not fix it.
+    """
+    prompts, stats, inference = _metadata_prompts(req)
+
+    groq_client = GroqClient(use_cache=req.use_cache)
+
+    async def finish(outputs: List[str]) -> Dict[str, Any]:
+        result = await _finish_metadata(groq_client, outputs, req.table_name, prompts, inference)
+        return {**result, "prompt": stats}
+
+    return _event_stream(PromptStream(groq_client, prompts), finish)
+
+@router.post("/metadata/tables")
+async def generate_tables_metadata(req: TablesMetadataRequest):
+    """Metadata for many tables; small tables share a completion."""
+    if not req.tables:
+        raise HTTPException(status_code=400, detail="No tables to document")
+    pipeline = LangChainPipeline(groq_client=GroqClient(use_cache=req.use_cache))
+    options = {"max_tables": req.max_tables_per_call} if req.max_tables_per_call else {}
+    try:
+        metadata = await pipeline.document_tables(req.tables, **options)
+        response = {"status": "ok", "metadata": metadata, "calls": pipeline.last_pack_report}
+        if req.source:
+            response["stored"] = await dictionary_store.save_descriptions(req.source, metadata)
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit rate, size and eviction counters of the LLM response cache."""
+    # disk tier figures come from SQLite; keep that off the event loop
+    stats = await asyncio.to_thread(response_cache.stats)
+    return {"status": "ok", "cache": stats}
+
+@router.get("/parse/stats")
+async def metadata_parse_stats():
+    """Success rate of metadata answers, repairs and re-ask counts."""
+    return {"status": "ok", "parse": parse_stats.stats()}
+
+@router.post("/batch", status_code=202)
+async def start_batch(req: BatchDocumentRequest):
+    """Document a whole catalog in the background; poll `/batch/{job_id}`."""
+    if not settings.GROQ_API_KEY:
+        raise HTTPException(status_code=400, detail="GROQ_API_KEY is not configured")
+    tables = req.tables
+    if tables is None:
+        from app.connectors.postgresql import PostgresConnector
+        from app.extractors.schema_extractor import SchemaExtractor
+
+        try:
+            connector = PostgresConnector(dsn=settings.DATABASE_URL)
+            await connector.connect()
+            tables = await SchemaExtractor(connector).extract_all()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Schema extraction failed: {str(e)}")
+    if not tables:
+        raise HTTPException(status_code=400, detail="No tables to document")
+    options = {"concurrency": req.concurrency} if req.concurrency else {}
+    job = batch_jobs.start(tables, job_id=req.job_id, **options)
+    return {"status": "ok", **job.status()}
+
+@router.get("/batch/{job_id}")
+async def batch_status(job_id: str):
+    job = batch_jobs.get(job_id)
+    if job is not None:
+        return {"status": "ok", **job.status()}
+    # not started by this process (e.g. before a restart): report the checkpoint
+    results = await asyncio.to_thread(batch_jobs.load_results, job_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    return {"status": "ok", "job_id": job_id, "progress": {"status": "interrupted", "completed": len(results)}}
+
+@router.get("/batch/{job_id}/results")
+async def batch_results(job_id: str):
+    results = await asyncio.to_thread(batch_jobs.load_results, job_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    return {"status": "ok", "job_id": job_id, "results": results}
+
+@router.delete("/batch/{job_id}")
+async def cancel_batch(job_id: str):
+    if not batch_jobs.cancel(job_id):
+        raise HTTPException(status_code=404, detail="No running batch job with this id")
+    return {"status": "ok", "job_id": job_id, "cancelled": True}
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.storage.dictionary_store import dictionary_store
+from app.storage.search_index import KINDS, MODES, search_index
+
+# Reads of the stored dictionary; none of these touch a source database.
+# Refresh a source with /api/extract/all or /api/extract/connect.
+
+router = APIRouter()
+
+@router.get("/sources")
+async def list_sources():
+    return {"status": "ok", "sources": await dictionary_store.sources()}
+
+@router.get("/tables")
+async def list_tables(
+    source: Optional[str] = None,
+    schema: Optional[str] = None,
+    q: Optional[str] = Query(default=None, description="substring of the table key"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+):
+    return {"status": "ok", **await dictionary_store.list_tables(source, schema, q, limit, offset)}
+
+@router.get("/tables/{table}")
+async def get_table(table: str, source: Optional[str] = None):
+    """A table by key (`schema.table`) or name, with its columns, descriptions and stored profiles."""
+    stored = await dictionary_store.get_table(table, source)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"{table} is not in the dictionary store")
+    return {"status": "ok", "table": stored}
+
+@router.get("/columns")
+async def list_columns(
+    source: Optional[str] = None,
+    schema: Optional[str] = None,
+    table: Optional[str] = None,
+    q: Optional[str] = Query(default=None, description="substring of the column name"),
+    data_type: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+):
+    return {"status": "ok", **await dictionary_store.list_columns(source, schema, table, q, data_type, limit, offset)}
+
+@router.get("/runs")
+async def list_runs(source: Optional[str] = None, limit: int = Query(default=20, ge=1, le=200)):
+    """Recent extraction runs: tables seen, changed and dropped, errors and stats."""
+    return {"status": "ok", "runs": await dictionary_store.runs(source, limit)}
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=500),
+    mode: str = "hybrid",
+    kind: Optional[str] = None,
+    source: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=200),
+):
+    """Tables and columns by name, type and description.
+
+    `mode`: `bm25` (keywords), `vector` (hashed n-gram similarity, finds
+    partial and differently split names) or `hybrid` (both, rank-fused).
+    `kind`: `table` or `column`.
+    """
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(MODES)}")
+    if kind is not None and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(KINDS)}")
+    await search_index.ensure_loaded(dictionary_store)
+    hits = search_index.search(q, limit=limit, mode=mode, kind=kind, source=source)
+    return {"status": "ok", "query": q, "mode": mode, "hits": hits}
+
+@router.get("/search/stats")
+async def search_stats():
+    return {"status": "ok", "index": search_index.stats()}
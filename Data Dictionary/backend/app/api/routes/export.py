@@ -1,12 +1,36 @@
+import asyncio
+from typing import List, Optional
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
 from app.connectors.postgresql import PostgresConnector
 from app.storage.artifact_manager import save_markdown_for_table
+from app.storage.catalog_export import catalog_exporter
+from app.storage.dictionary_store import default_source, dictionary_store
 from app.config import settings
 
 router = APIRouter()
 
+class CatalogExportRequest(BaseModel):
+    # a source key (see /api/dictionary/sources); defaults to the one of DATABASE_URL
+    source: Optional[str] = None
+    schemas: Optional[List[str]] = None
+    tables: Optional[List[str]] = None  # table keys or names
+    formats: List[str] = ["markdown", "json"]  # markdown, json, parquet
+    layout: str = "archive"  # archive (one zip) or directory
+    workers: Optional[int] = Field(default=None, ge=1, le=64)
+
 @router.get("/markdown/{table_name}")
-async def export_markdown(table_name: str):
+async def export_markdown(table_name: str, refresh: bool = False):
+    """Markdown of a stored table; `refresh=true` reads the live schema from `DATABASE_URL` instead."""
+    if not refresh:
+        stored = await dictionary_store.get_table(table_name)
+        if stored is None:
+            raise HTTPException(status_code=404, detail=f"{table_name} is not in the dictionary store; "
+                                                        "run /api/extract/all or pass refresh=true")
+        md_path = save_markdown_for_table(table_name, stored["definition"])
+        return {"status": "ok", "path": md_path, "source": stored["source"], "refreshed_at": stored["refreshed_at"]}
     dsn = settings.DATABASE_URL
     connector = PostgresConnector(dsn=dsn)
     try:
@@ -16,3 +40,38 @@ async def export_markdown(table_name: str):
         return {"status": "ok", "path": md_path}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/catalog")
+async def export_catalog(req: CatalogExportRequest):
+    """Export the stored catalog, or the `schemas`/`tables` subset, in one call."""
+    try:
+        manifest = await catalog_exporter.export(
+            dictionary_store, req.source or default_source(), formats=req.formats, layout=req.layout,
+            schemas=req.schemas, tables=req.tables, workers=req.workers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="no stored table matches; run /api/extract/all first")
+    return {"status": "ok", **manifest}
+
+@router.get("/catalog")
+async def list_catalog_exports():
+    return {"status": "ok", "exports": await asyncio.to_thread(catalog_exporter.list_exports)}
+
+@router.get("/catalog/{export_id}")
+async def get_catalog_export(export_id: str, download: bool = False):
+    """The manifest of an export; `download=true` returns the zip of an archive export."""
+    manifest = await asyncio.to_thread(catalog_exporter.get_export, export_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"export {export_id} not found")
+    if not download:
+        return {"status": "ok", **manifest}
+    if manifest["layout"] != "archive":
+        raise HTTPException(status_code=400, detail="only archive exports can be downloaded")
+    return FileResponse(manifest["path"], media_type="application/zip", filename=f"{export_id}.zip")
+
+@router.post("/gc")
+async def collect_export_garbage(keep: Optional[int] = None):
+    """Delete old exports, unreferenced rendered files and stale per-table artifacts."""
+    stats = await asyncio.to_thread(catalog_exporter.collect_garbage, keep)
+    return {"status": "ok", "removed": stats}
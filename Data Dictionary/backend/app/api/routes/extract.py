@@ -1,16 +1,59 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from app.extractors.schema_extractor import SchemaExtractor
 from app.core.errors import ConnectorError, ExtractionError
 from app.config import settings
 from app.models.schemas import DatabaseConnectionRequest, ExtractResponse
 from app.api.middleware import limiter
 from app.core.logging import logger
+from app.core.pools import pool_registry
+from app.core.responses import FastJSONResponse, dumps
+from app.storage.dictionary_store import default_source, dictionary_store, source_of
 
 router = APIRouter()
 
+
+async def _run_extraction(extractor: SchemaExtractor, connector, incremental: bool):
+    """Extract from the source and record the result in the dictionary store."""
+    source = source_of(connector)
+    if incremental:
+        result = await extractor.extract_incremental(source)
+    else:
+        result = await extractor.extract_all()
+    try:
+        extractor.stats["dictionary"] = await dictionary_store.save_catalog(
+            source, result, mode="incremental" if incremental else "full",
+            errors=extractor.errors, stats=extractor.stats)
+    except Exception as e:
+        # the extraction itself succeeded; the stored copy is refreshed next time
+        logger.error(f"Could not store the extraction of {source}: {str(e)}")
+    return result
+
+
+def _extract_response(extractor: SchemaExtractor, result):
+    # rendered here, so the catalog is not walked and re-validated against ExtractResponse
+    return FastJSONResponse({
+        "status": "ok",
+        "data": result,
+        "errors": extractor.errors or None,
+        "stats": extractor.stats,
+        "diff": extractor.diff,
+    })
+
+
 @router.get("/all", response_model=ExtractResponse)
 @limiter.limit(f"{settings.RATE_LIMIT_UNAUTHENTICATED}/minute")
-async def extract_all(request):
+async def extract_all(request: Request, incremental: bool = False, cached: bool = False):
+    """Extract the catalog of `DATABASE_URL` and store it.
+
+    `cached=true` returns the stored catalog instead, without connecting.
+    """
+    if cached:
+        data = await dictionary_store.catalog(default_source())
+        if not data:
+            raise HTTPException(status_code=404, detail="Nothing stored for this source yet; extract without cached first")
+        return FastJSONResponse({"status": "ok", "data": data, "errors": None,
+                                 "stats": {"from_store": True, "tables": len(data)}, "diff": None})
     try:
         logger.info("Schema extraction started (PostgreSQL)")
         # lazy import to avoid crashing when DB drivers are not installed
@@ -20,9 +63,9 @@ async def extract_all(request):
         connector = PostgresConnector(dsn=dsn)
         await connector.connect()
         extractor = SchemaExtractor(connector)
-        result = await extractor.extract_all()
+        result = await _run_extraction(extractor, connector, incremental)
         logger.info(f"Schema extraction completed: {len(result)} tables")
-        return {"status": "ok", "data": result}
+        return _extract_response(extractor, result)
     except ConnectorError as e:
         logger.error(f"Connector error during extraction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
@@ -33,9 +76,50 @@ async def extract_all(request):
         logger.error(f"Unexpected error during extraction: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _encode_record(record, fmt: str) -> bytes:
+    data = dumps(record)
+    if fmt == "sse":
+        return b"event: " + record["type"].encode("utf-8") + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+
+@router.get("/stream")
+@limiter.limit(f"{settings.RATE_LIMIT_UNAUTHENTICATED}/minute")
+async def extract_stream(request: Request, format: str = "ndjson"):
+    """Stream the catalog table by table as NDJSON or server-sent events.
+
+    Each table is sent as soon as it is extracted; a final `summary` record
+    carries the run stats. Use `/all` for a single JSON document.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    try:
+        logger.info("Streaming schema extraction started (PostgreSQL)")
+        from app.connectors.postgresql import PostgresConnector
+
+        connector = PostgresConnector(dsn=settings.DATABASE_URL)
+        await connector.connect()
+    except ConnectorError as e:
+        logger.error(f"Connector error during extraction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+
+    extractor = SchemaExtractor(connector)
+
+    async def body():
+        try:
+            async for record in extractor.iter_tables():
+                yield _encode_record(record, format)
+        except ExtractionError as e:
+            # headers are already sent; report the failure in-band
+            logger.error(f"Extraction error: {str(e)}")
+            yield _encode_record({"type": "error", "error": str(e)}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
 @router.post("/connect", response_model=ExtractResponse)
 @limiter.limit(f"{settings.RATE_LIMIT_UNAUTHENTICATED}/minute")
-async def extract_with_connection(request, conn_req: DatabaseConnectionRequest):
+async def extract_with_connection(request: Request, conn_req: DatabaseConnectionRequest):
     try:
         logger.info(f"Schema extraction started ({conn_req.db_type})")
         
@@ -52,14 +136,35 @@ async def extract_with_connection(request, conn_req: DatabaseConnectionRequest):
                 password=conn_req.password,
                 database=conn_req.database
             )
+        elif conn_req.db_type == "snowflake":
+            # lazy import: snowflake-connector-python is optional
+            from app.connectors.snowflake import SnowflakeConnector
+            connector = SnowflakeConnector(
+                account=conn_req.account or conn_req.host,
+                user=conn_req.user,
+                password=conn_req.password,
+                warehouse=conn_req.warehouse,
+                database=conn_req.database,
+                schema=conn_req.db_schema,
+            )
+        elif conn_req.db_type == "sqlserver":
+            # lazy import: pyodbc is optional
+            from app.connectors.sqlserver import SQLServerConnector
+            connector = SQLServerConnector.from_params(
+                host=conn_req.host,
+                port=conn_req.port,
+                user=conn_req.user,
+                password=conn_req.password,
+                database=conn_req.database,
+            )
         else:
             raise ValueError(f"Unsupported database type: {conn_req.db_type}")
         
         await connector.connect()
-        extractor = SchemaExtractor(connector)
-        result = await extractor.extract_all()
+        extractor = SchemaExtractor(connector, concurrency=conn_req.concurrency)
+        result = await _run_extraction(extractor, connector, conn_req.incremental)
         logger.info(f"Schema extraction completed: {len(result)} tables")
-        return {"status": "ok", "data": result}
+        return _extract_response(extractor, result)
     except ConnectorError as e:
         logger.error(f"Connector error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -67,3 +172,8 @@ async def extract_with_connection(request, conn_req: DatabaseConnectionRequest):
         logger.error(f"Error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+
+@router.get("/pools")
+async def pool_stats():
+    """Per-source connection pool usage (in-use, idle, wait time, creations)."""
+    return {"status": "ok", "pools": pool_registry.stats()}
@@ -1,21 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.extractors.quality_analyzer import QualityAnalyzer
 from app.config import settings
 from app.models.schemas import QualityResponse, TableQueryRequest
 from app.api.middleware import limiter
 from app.core.logging import logger
+from app.storage.dictionary_store import default_source, dictionary_store
 
 router = APIRouter()
 
+QUALITY_MODES = ("sample", "pushdown")
+
 @router.get("/table/{table_name}", response_model=QualityResponse)
 @limiter.limit(f"{settings.RATE_LIMIT_UNAUTHENTICATED}/minute")
-async def analyze_table(request, table_name: str, sample: int = 500):
+async def analyze_table(request: Request, table_name: str, sample: int = 500, mode: str = "sample", refresh: bool = False,
+                        profile: bool = False):
+    """Quality metrics of a table; the stored ones unless `refresh` or none are stored yet.
+
+    `profile` adds per-column profiles to sample-mode metrics.
+    """
     try:
         # Validate inputs
         if not table_name or len(table_name) > 255:
             raise HTTPException(status_code=400, detail="Invalid table name")
         if sample < 1 or sample > 10000:
             sample = 500
+        if mode not in QUALITY_MODES:
+            raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(QUALITY_MODES)}")
+
+        source = default_source()
+        stored = None if refresh else await dictionary_store.get_profile(source, table_name, mode)
+        if stored is not None and profile and mode == "sample" and "columns" not in stored["metrics"]:
+            stored = None  # stored without column profiles
+        if stored is not None:
+            return {"status": "ok", "table": table_name, "metrics": {**stored["metrics"], "analyzed_at": stored["analyzed_at"]}}
         
         logger.info(f"Quality analysis started for table: {table_name}")
         dsn = settings.DATABASE_URL
@@ -24,30 +41,26 @@ async def analyze_table(request, table_name: str, sample: int = 500):
         await connector.connect()
         analyzer = QualityAnalyzer(connector)
         
-        # fetch rows for sampling
-        rows = await connector.fetch_rows(table_name, limit=sample)
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        completeness = analyzer.compute_completeness(df)
+        # "pushdown" aggregates in the database; "sample" streams a sample in columnar batches
+        analysis = await analyzer.analyze(table_name, mode=mode, sample_rows=sample, profile=profile)
+        await dictionary_store.save_profile(source, table_name, mode, analysis["metrics"])
         
         result = {
             "status": "ok",
             "table": table_name,
-            "metrics": {
-                "completeness": completeness,
-                "rows_sampled": len(df),
-                "columns_analyzed": len(df.columns)
-            }
+            "metrics": analysis["metrics"]
         }
         logger.info(f"Quality analysis completed for {table_name}")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Quality analysis error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze", response_model=QualityResponse)
 @limiter.limit(f"{settings.RATE_LIMIT_UNAUTHENTICATED}/minute")
-async def analyze_table_advanced(request, query: TableQueryRequest):
+async def analyze_table_advanced(request: Request, query: TableQueryRequest):
     try:
         logger.info(f"Advanced quality analysis for {query.table_name}")
         dsn = settings.DATABASE_URL
@@ -56,19 +69,13 @@ async def analyze_table_advanced(request, query: TableQueryRequest):
         await connector.connect()
         analyzer = QualityAnalyzer(connector)
         
-        rows = await connector.fetch_rows(query.table_name, limit=query.limit)
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        completeness = analyzer.compute_completeness(df)
+        analysis = await analyzer.analyze(query.table_name, mode=query.mode, sample_rows=query.limit,
+                                          profile=query.profile)
         
         return {
             "status": "ok",
             "table": query.table_name,
-            "metrics": {
-                "completeness": completeness,
-                "rows_sampled": len(df),
-                "columns_analyzed": len(df.columns)
-            }
+            "metrics": analysis["metrics"]
         }
     except Exception as e:
         logger.error(f"Error: {str(e)}", exc_info=True)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Request
-import json
-import os
+from fastapi.responses import Response, StreamingResponse
+from app.core.reference_data import SAMPLE_PATH, reference_data
 
 router = APIRouter()
 
@@ -8,16 +8,16 @@ router = APIRouter()
 async def extract_metadata(request: Request):
     try:
         sources = await request.json()
-        
-        # Get the path to sample.json
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        sample_json_path = os.path.join(current_dir, "..", "data", "sample.json")
-        
-        # Read and return the sample.json content
-        with open(sample_json_path, "r") as f:
-            data = json.load(f)
-        
-        return data
+
+        # sample.json is loaded once and kept pre-serialized; it is
+        # reloaded when the file changes on disk
+        asset = reference_data.get(SAMPLE_PATH)
+
+        # Return the cached bytes as they are, without a JSON round trip
+        if asset.mapped is not None:
+            asset.data  # invalid JSON fails here, before the headers go out
+            return StreamingResponse(asset.iter_body(), media_type="application/json")
+        return Response(content=asset.body(), media_type="application/json")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="sample.json not found")
     except Exception as e:
@@ -29,9 +29,106 @@ class Settings(BaseSettings):
     MYSQL_PASSWORD: Optional[str] = None
     MYSQL_DB: Optional[str] = None
 
+    # Connection pools shared across requests (see app/core/pools.py)
+    POOL_MIN_SIZE: int = 1
+    POOL_MAX_SIZE: int = 10
+    POOL_IDLE_TIMEOUT: float = 300.0  # seconds before an unused pool is closed
+
+    # Blocking drivers (Snowflake, SQL Server) run on a bounded thread pool
+    BLOCKING_MAX_WORKERS: int = 4  # worker threads (and connections) per source
+    BLOCKING_QUERY_TIMEOUT: float = 60.0  # seconds; 0 disables the timeout
+    BLOCKING_CONNECT_TIMEOUT: float = 15.0
+    SQLSERVER_DRIVER: str = "ODBC Driver 18 for SQL Server"
+
+    # Per-table schema extraction (connectors without bulk catalog support)
+    EXTRACT_CONCURRENCY: int = 8  # tables extracted in parallel per source
+    EXTRACT_TABLE_TIMEOUT: float = 30.0  # seconds; 0 disables the timeout
+    EXTRACT_RETRIES: int = 2
+    EXTRACT_RETRY_BACKOFF: float = 0.5  # seconds, doubled after every retry
+    EXTRACT_STREAM_CHUNK: int = 500  # tables per catalog query round when streaming
+
+    # Row sampling for quality analysis
+    ROW_BATCH_SIZE: int = 500  # rows per columnar chunk from Connector.stream_rows
+    SAMPLE_TARGET_ERROR: float = 0.02  # 95% margin of error aimed for by the sampler
+    SAMPLE_SYSTEM_MIN_ROWS: int = 5_000_000  # use block sampling above this many rows
+    SAMPLE_SCAN_LIMIT: int = 100_000  # rows scanned by the reservoir fallback
+    SAMPLE_KEY_RANGES: int = 20  # random primary-key ranges read by MySQL sampling
+    PROFILE_MAX_ROWS: int = 10_000  # sampled rows kept for column profiles (profile=true)
+
+    # Dictionary store (see app/storage/dictionary_store.py); reads are served
+    # from it, source databases are only read by explicit refreshes
+    DICTIONARY_DATABASE_URL: Optional[str] = None  # defaults to artifacts/dictionary.sqlite3
+    DICTIONARY_WRITE_CHUNK: int = 2000  # rows per bulk upsert statement
+
+    # Dictionary search (see app/storage/search_index.py)
+    SEARCH_VECTOR_DIM: int = 128  # hashed n-gram embedding size
+    SEARCH_IVF_LISTS: int = 256  # vector clusters once the index is large
+    SEARCH_IVF_PROBES: int = 8  # clusters scanned per query
+    SEARCH_IVF_MIN_DOCS: int = 50_000  # below this, vectors are scanned in full
+
+    # Bulk catalog export (see app/storage/catalog_export.py)
+    EXPORT_WORKERS: int = 0  # render processes; 0 = one per CPU
+    EXPORT_PARALLEL_MIN_FILES: int = 500  # fewer files to render are rendered in a thread
+    EXPORT_KEEP: int = 10  # newest exports kept by garbage collection
+    ARTIFACT_MAX_AGE_DAYS: float = 7.0  # older per-table Markdown/JSON artifacts are removed
+
+    # Reference data files (see app/core/reference_data.py)
+    REFDATA_MMAP_THRESHOLD: int = 8 * 1024 * 1024  # bytes; larger files are memory-mapped
+
     # Groq model configuration
     GROQ_API_KEY: Optional[str] = None
     MODEL_NAME: str = "llama-3.3-70b-versatile"  # model to pass to Groq API
+    GROQ_API_URL: str = "https://api.groq.com/openai/v1/chat/completions"
+
+    # Prompts over this many (estimated) tokens are split into chunks
+    PROMPT_TOKEN_BUDGET: int = 4000
+
+    # Metadata answers failing validation: targeted re-asks of the bad fields (see app/ai/structured.py)
+    STRUCTURED_MAX_REASKS: int = 2
+
+    # Columns described locally, without the model (see app/ai/inference.py)
+    INFERENCE_MIN_CONFIDENCE: float = 0.9
+
+    # Several small tables per metadata call (see app/ai/packing.py)
+    PACK_MAX_COLUMNS: int = 15  # wider tables get a call of their own
+    PACK_MAX_TABLES: int = 20  # tables per packed call
+    PACK_MAX_COMPLETION_TOKENS: int = 6000  # estimated answer size per packed call
+    PACK_TOKENS_PER_COLUMN: int = 50  # estimated answer tokens per column (and per table header)
+
+    # Batch documentation jobs (see app/ai/batch.py); limits are per API key
+    GROQ_REQUESTS_PER_MINUTE: int = 30
+    GROQ_TOKENS_PER_MINUTE: int = 6000
+    BATCH_CONCURRENCY: int = 4  # tables documented in parallel per job
+    BATCH_MAX_RETRIES: int = 5
+    BATCH_RETRY_BACKOFF: float = 2.0  # seconds, doubled after every retry without Retry-After
+    BATCH_COMPLETION_TOKENS: int = 400  # completion tokens reserved per call before usage is known
+
+    # Shared outbound HTTP client (see app/core/http.py)
+    HTTP2_ENABLED: bool = True  # used when the h2 package is installed
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 60.0  # completions can take a while
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 10.0  # waiting for a free connection
+
+    # LLM response cache (see app/ai/cache.py)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: float = 7 * 24 * 3600.0  # seconds
+    LLM_CACHE_MAX_ENTRIES: int = 512  # in-memory LRU tier
+    LLM_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LLM_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024  # SQLite tier
+
+    # Response encoding (see app/core/responses.py)
+    COMPRESSION_ENABLED: bool = True  # zstd/gzip by Accept-Encoding; streaming responses are never compressed
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller bodies are sent as they are
+    COMPRESSION_THREAD_MIN_SIZE: int = 256 * 1024  # bytes; larger bodies are compressed off the event loop
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Metrics (see app/core/metrics.py)
+    METRICS_ENABLED: bool = True  # serve /metrics and time every request
 
     # Security
     RATE_LIMIT_ENABLED: bool = True
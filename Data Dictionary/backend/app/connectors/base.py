@@ -1,7 +1,167 @@
-from typing import Any, Dict, List
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.errors import SamplingUnsupported
+from app.core.metrics import metrics_registry
+
+# A batch of rows in columnar form: column name -> values, all the same length.
+ColumnChunk = Dict[str, List[Any]]
+
+
+def rows_to_columns(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> ColumnChunk:
+    """Transpose row tuples into a columnar chunk."""
+    if not rows:
+        return {name: [] for name in columns}
+    return {name: list(values) for name, values in zip(columns, zip(*rows))}
+
+
+query_seconds = metrics_registry.histogram(
+    "connector_query_duration_seconds", "Source database query latency by source and query kind", ("source", "kind"))
+query_rows = metrics_registry.counter(
+    "connector_rows_total", "Rows read from source databases by source and query kind", ("source", "kind"))
+query_errors = metrics_registry.counter(
+    "connector_query_errors_total", "Failed source database queries by source and query kind", ("source", "kind"))
+
+# connector methods recorded in the metrics above, and the kind they report
+QUERY_KINDS = {
+    "get_tables": "tables",
+    "get_table_schema": "columns",
+    "get_catalog": "catalog",
+    "get_table_signatures": "signatures",
+    "fetch_rows": "rows",
+    "stream_rows": "rows",
+    "stream_sample": "rows",
+    "estimate_row_count": "estimate",
+    "fetch_aggregate": "aggregate",
+}
+
+
+def _source(connector) -> str:
+    # the same label as dictionary_store.source_of: the pool key, without a password
+    return getattr(getattr(connector, "pool", None), "key", None) or type(connector).__name__
+
+
+def _row_count(kind: str, result: Any) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if not isinstance(result, dict):
+        return 0  # e.g. a row estimate
+    if kind == "columns":
+        return len(result.get("columns") or ())
+    if kind == "catalog":
+        return sum(len(rows) for rows in result.values() if isinstance(rows, list))
+    if kind == "rows":  # a columnar chunk
+        return len(next(iter(result.values()), ()))
+    return 1  # an aggregate row
+
+
+# (connector id, method name) of the instrumented calls running in this
+# context: an override that calls super() is recorded once, by the outer call
+_recording: ContextVar[frozenset] = ContextVar("connector_recording", default=frozenset())
+
+
+def _instrumented(method, kind: str):
+    """Wrap a connector query method to record its latency, rows and failures."""
+    if getattr(method, "_query_kind", None) is not None:
+        return method  # already wrapped, e.g. a method copied from another connector
+
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def stream(self, *args, **kwargs):
+            call = (id(self), method.__name__)
+            if call in _recording.get():
+                async for chunk in method(self, *args, **kwargs):
+                    yield chunk
+                return
+            chunks = method(self, *args, **kwargs)
+            rows, busy, failed = 0, 0.0, False
+            try:
+                while True:
+                    # only time spent in the driver, not in the consumer between chunks
+                    started = time.perf_counter()
+                    # set and reset within one step, so the consumer never sees it
+                    token = _recording.set(_recording.get() | {call})
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except SamplingUnsupported:  # callers fall back to reservoir sampling
+                        raise
+                    except Exception:
+                        failed = True
+                        raise
+                    finally:
+                        _recording.reset(token)
+                        busy += time.perf_counter() - started
+                    rows += _row_count(kind, chunk)
+                    yield chunk
+            finally:
+                await chunks.aclose()
+                source = _source(self)
+                query_seconds.labels(source, kind).observe(busy)
+                query_rows.labels(source, kind).inc(rows)
+                if failed:
+                    query_errors.labels(source, kind).inc()
+        stream._query_kind = kind
+        return stream
+
+    if not inspect.iscoroutinefunction(method):
+        return method
+
+    @functools.wraps(method)
+    async def query(self, *args, **kwargs):
+        call = (id(self), method.__name__)
+        active = _recording.get()
+        if call in active:
+            return await method(self, *args, **kwargs)
+        token = _recording.set(active | {call})
+        started = time.perf_counter()
+        try:
+            result = await method(self, *args, **kwargs)
+        except SamplingUnsupported:
+            raise
+        except Exception:
+            query_errors.labels(_source(self), kind).inc()
+            raise
+        finally:
+            _recording.reset(token)
+            query_seconds.labels(_source(self), kind).observe(time.perf_counter() - started)
+        query_rows.labels(_source(self), kind).inc(_row_count(kind, result))
+        return result
+    query._query_kind = kind
+    return query
+
 
 class BaseConnector:
-    """Abstract connector. Implementations must provide async connect and metadata methods."""
+    """Abstract connector. Implementations must provide async connect and metadata methods.
+
+    Query methods a subclass defines (`QUERY_KINDS`) are wrapped to record
+    their latency, row counts and failures per source; see app/core/metrics.py.
+    An override that calls `super()` is recorded once.
+    """
+
+    # Connectors that can read the whole catalog in a handful of set-based
+    # queries set this to True and implement `get_catalog`. Everything else
+    # is extracted table by table through `get_table_schema`.
+    supports_bulk_catalog: bool = False
+
+    # Connectors that can cheaply tell whether a table's DDL changed set this
+    # to True and implement `get_table_signatures` (used by incremental runs).
+    supports_table_signatures: bool = False
+
+    # SQL dialect used when generating queries for this source (see
+    # app/extractors/pushdown.py); None means no SQL pushdown.
+    dialect: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, kind in QUERY_KINDS.items():
+            if name in cls.__dict__:
+                setattr(cls, name, _instrumented(cls.__dict__[name], kind))
 
     async def connect(self) -> Any:
         raise NotImplementedError()
@@ -11,3 +171,58 @@ class BaseConnector:
 
     async def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         raise NotImplementedError()
+
+    async def get_catalog(self, tables: Optional[List[Tuple[str, str]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Return flat catalog rows for every table in a few queries.
+
+        The result has the keys `tables`, `columns`, `constraints` and
+        `indexes`. Every row carries the owning table's schema and name;
+        constraint and index rows list their `columns` in key order. When
+        `tables` is given, only those (schema, table) pairs are read.
+        """
+        raise NotImplementedError()
+
+    async def get_table_signatures(self) -> List[Dict[str, Any]]:
+        """Return one row per table with its schema, name and a `signature`
+        string that changes whenever the table's DDL does."""
+        raise NotImplementedError()
+
+    async def fetch_rows(self, table_name: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        raise NotImplementedError()
+
+    async def stream_rows(
+        self, table_name: str, limit: int = 1000, batch_size: Optional[int] = None
+    ) -> AsyncIterator[ColumnChunk]:
+        """Yield up to `limit` rows of `table_name` as columnar chunks of `batch_size` rows.
+
+        Drivers with server-side cursors override this so the sample is never
+        held in memory as a whole. This fallback fetches the rows in one go
+        and only re-shapes them.
+        """
+        batch_size = batch_size or settings.ROW_BATCH_SIZE
+        rows = await self.fetch_rows(table_name, limit=limit)
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            yield rows_to_columns(columns, [[r.get(c) for c in columns] for r in batch])
+
+    async def estimate_row_count(self, table_name: str) -> Optional[int]:
+        """Cheap row count from catalog statistics, or None if unknown."""
+        return None
+
+    def plan_sample(self, estimated_rows: Optional[int], sample_size: int) -> Optional[str]:
+        """Name of the native sampling strategy to use, or None for reservoir sampling."""
+        return None
+
+    async def stream_sample(
+        self, table_name: str, plan: Dict[str, Any], batch_size: int
+    ) -> AsyncIterator[ColumnChunk]:
+        """Yield about `plan["sample_size"]` sampled rows using `plan["strategy"]`."""
+        raise SamplingUnsupported(f"{type(self).__name__} has no native sampling")
+        yield  # pragma: no cover - makes this an async generator
+
+    async def fetch_aggregate(self, query: str) -> Dict[str, Any]:
+        """Run a single-row aggregate query and return the row as a dict."""
+        raise NotImplementedError()
@@ -0,0 +1,165 @@
+"""Run blocking DB-API drivers (snowflake-connector, pyodbc) off the event loop.
+
+`BlockingExecutor` is a bounded thread pool in which every worker thread owns
+its own driver connection, opened on first use. Connectors borrow it from the
+pool registry like an async pool:
+
+    async with self.pool.acquire() as lease:
+        rows = await lease.run(lambda cur: cur.execute(sql).fetchall())
+
+`acquire()` waits on the event loop for a free worker, so queueing shows up
+in the registry's wait-time stats instead of piling up inside the executor.
+Calls that time out or are cancelled before they start never run; calls
+already running get `cursor.cancel()` where the driver supports it and their
+worker slot is only handed out again once the thread is actually free.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, List, Optional, TypeVar
+
+from app.core.errors import ConnectorError
+from app.core.logging import logger
+
+T = TypeVar("T")
+
+
+class _Call:
+    """Shared state between the awaiting coroutine and the worker thread."""
+
+    def __init__(self):
+        self.cancelled = False
+        self.cursor = None
+
+    def cancel(self):
+        self.cancelled = True
+        cursor = self.cursor
+        cancel = getattr(cursor, "cancel", None)
+        if cancel is not None:
+            try:
+                cancel()
+            except Exception as e:
+                logger.warning(f"Driver refused to cancel running query: {str(e)}")
+
+
+class _Lease:
+    def __init__(self, executor: "BlockingExecutor"):
+        self._executor = executor
+        self.future = None
+
+    async def run(self, fn: Callable[[Any], T], timeout: Optional[float] = None) -> T:
+        """Run `fn(cursor)` on a worker thread and return its result."""
+        return await self._executor._run(self, fn, timeout)
+
+
+class BlockingExecutor:
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_workers: int,
+        name: str,
+        cursor_factory: Optional[Callable[[Any], Any]] = None,
+        query_timeout: Optional[float] = None,
+    ):
+        self._connect = connect
+        self._cursor_factory = cursor_factory or (lambda conn: conn.cursor())
+        self.max_workers = max_workers
+        self.query_timeout = query_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = asyncio.Semaphore(max_workers)
+        self._local = threading.local()
+        self._connections: List[Any] = []
+        self._connections_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of worker connections currently open."""
+        return len(self._connections)
+
+    @asynccontextmanager
+    async def acquire(self):
+        await self._slots.acquire()
+        lease = _Lease(self)
+        try:
+            yield lease
+        finally:
+            future = lease.future
+            if future is not None and not future.done():
+                # the thread is still busy with a cancelled call; keep the
+                # slot until it has really finished
+                loop = asyncio.get_running_loop()
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+            else:
+                self._slots.release()
+
+    async def _run(self, lease: _Lease, fn: Callable[[Any], T], timeout: Optional[float]) -> T:
+        timeout = timeout if timeout is not None else self.query_timeout
+        call = _Call()
+        lease.future = self._executor.submit(self._invoke, fn, call)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(lease.future), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            call.cancel()
+            raise ConnectorError(f"query timed out after {timeout}s")
+        except (asyncio.CancelledError, FutureCancelledError):
+            call.cancel()
+            raise
+
+    def _invoke(self, fn: Callable[[Any], T], call: _Call) -> T:
+        # runs on a worker thread
+        if call.cancelled:
+            raise FutureCancelledError()
+        conn = self._connection()
+        cursor = self._cursor_factory(conn)
+        call.cursor = cursor
+        try:
+            return fn(cursor)
+        except Exception:
+            if call.cancelled:
+                # the connection may be mid-cancel; don't hand it out again
+                self._discard_connection()
+            raise
+        finally:
+            call.cursor = None
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def _connection(self) -> Any:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _discard_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _close_connections(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Failed to close driver connection: {str(e)}")
+
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        await asyncio.get_running_loop().run_in_executor(None, self._close_connections)
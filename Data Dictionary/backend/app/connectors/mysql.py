@@ -1,32 +1,112 @@
+import hashlib
+import math
+import random
+
 import aiomysql
-from app.connectors.base import BaseConnector
-from app.core.errors import ConnectorError
+from app.connectors.base import BaseConnector, rows_to_columns
+from app.core.errors import ConnectorError, SamplingUnsupported
 from app.config import settings
+from app.core.pools import pool_registry
+
+_INTEGER_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint"}
+
+_SYSTEM_SCHEMAS = "('information_schema', 'mysql', 'performance_schema', 'sys')"
+
+# columns first: the base tables they list are the ones that get a signature;
+# views have columns too and would otherwise be reported as tables
+_SIGNATURE_QUERIES = (
+    f"""
+    SELECT c.TABLE_SCHEMA, c.TABLE_NAME,
+           MD5(GROUP_CONCAT(
+               CONCAT_WS(' ', c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE,
+                         IFNULL(c.COLUMN_DEFAULT, ''), c.COLUMN_KEY, c.EXTRA)
+               ORDER BY c.ORDINAL_POSITION SEPARATOR ','
+           )) AS part
+    FROM INFORMATION_SCHEMA.COLUMNS c
+    JOIN INFORMATION_SCHEMA.TABLES t
+      ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+     AND t.TABLE_TYPE = 'BASE TABLE'
+    WHERE c.TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+    GROUP BY c.TABLE_SCHEMA, c.TABLE_NAME
+    """,
+    f"""
+    SELECT k.TABLE_SCHEMA, k.TABLE_NAME,
+           MD5(GROUP_CONCAT(
+               CONCAT_WS(' ', k.CONSTRAINT_NAME, k.COLUMN_NAME,
+                         IFNULL(k.REFERENCED_TABLE_SCHEMA, ''), IFNULL(k.REFERENCED_TABLE_NAME, ''),
+                         IFNULL(k.REFERENCED_COLUMN_NAME, ''),
+                         IFNULL(rc.UPDATE_RULE, ''), IFNULL(rc.DELETE_RULE, ''))
+               ORDER BY k.CONSTRAINT_NAME, k.ORDINAL_POSITION SEPARATOR ','
+           )) AS part
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+    LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+      ON rc.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA
+     AND rc.TABLE_NAME = k.TABLE_NAME
+     AND rc.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+    WHERE k.TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+    GROUP BY k.TABLE_SCHEMA, k.TABLE_NAME
+    """,
+    f"""
+    SELECT TABLE_SCHEMA, TABLE_NAME,
+           MD5(GROUP_CONCAT(
+               CONCAT_WS(' ', INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME,
+                         IFNULL(SUB_PART, ''), INDEX_TYPE)
+               ORDER BY INDEX_NAME, SEQ_IN_INDEX SEPARATOR ','
+           )) AS part
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+    GROUP BY TABLE_SCHEMA, TABLE_NAME
+    """,
+)
+
 
 class MySQLConnector(BaseConnector):
-    def __init__(self, host=None, user=None, password=None, database=None, port=3306):
+    supports_bulk_catalog = True
+    supports_table_signatures = True
+    dialect = "mysql"
+
+    def __init__(self, host=None, user=None, password=None, database=None, port=3306, pool_max_size=None):
         self.host = host or settings.MYSQL_HOST or "localhost"
         self.user = user or settings.MYSQL_USER or "root"
         self.password = password or settings.MYSQL_PASSWORD or ""
         self.database = database or settings.MYSQL_DB or "information_schema"
         self.port = port or settings.MYSQL_PORT or 3306
+        self.pool_max_size = pool_max_size
         self.pool = None
 
     async def connect(self):
         try:
-            self.pool = await aiomysql.create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.database,
-                minsize=5,
-                maxsize=10,
-                connect_timeout=5
+            # pools are shared process-wide; connect() only borrows one
+            self.pool = await pool_registry.get(
+                "mysql",
+                {
+                    "host": self.host,
+                    "port": self.port,
+                    "user": self.user,
+                    "password": self.password,
+                    "database": self.database,
+                },
+                factory=lambda min_size, max_size: aiomysql.create_pool(
+                    host=self.host,
+                    port=self.port,
+                    user=self.user,
+                    password=self.password,
+                    db=self.database,
+                    minsize=min_size,
+                    maxsize=max_size,
+                    connect_timeout=5
+                ),
+                closer=self._close_pool,
+                max_size=self.pool_max_size,
             )
         except Exception as e:
             raise ConnectorError(f"MySQL connection failed: {str(e)}")
 
+    @staticmethod
+    async def _close_pool(pool):
+        pool.close()
+        await pool.wait_closed()
+
     async def get_tables(self):
         if not self.pool:
             await self.connect()
@@ -52,6 +132,142 @@ class MySQLConnector(BaseConnector):
                 cols = await cur.fetchall()
                 return {"columns": cols if cols else []}
 
+    async def get_catalog(self, tables=None):
+        if not self.pool:
+            await self.connect()
+
+        def table_filter(prefix=""):
+            # restrict a catalog query to the requested (schema, table) pairs
+            if tables is None:
+                return "", None
+            if not tables:
+                return "AND 1 = 0", None
+            pairs = ", ".join(["(%s, %s)"] * len(tables))
+            params = tuple(v for t in tables for v in (t[0], t[1]))
+            return f"AND ({prefix}TABLE_SCHEMA, {prefix}TABLE_NAME) IN ({pairs})", params
+
+        plain_filter, params = table_filter()
+        column_filter, _ = table_filter("c.")
+        key_filter, _ = table_filter("k.")
+        index_filter, _ = table_filter("s.")
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(f"""
+                    SELECT TABLE_SCHEMA, TABLE_NAME
+                    FROM INFORMATION_SCHEMA.TABLES
+                    WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+                    {plain_filter}
+                """, params)
+                tables = await cur.fetchall()
+                await cur.execute(f"""
+                    SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE,
+                           c.ORDINAL_POSITION, c.COLUMN_DEFAULT
+                    FROM INFORMATION_SCHEMA.COLUMNS c
+                    JOIN INFORMATION_SCHEMA.TABLES t
+                      ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+                     AND t.TABLE_TYPE = 'BASE TABLE'
+                    WHERE c.TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+                    {column_filter}
+                    ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+                """, params)
+                columns = await cur.fetchall()
+                await cur.execute(f"""
+                    SELECT k.TABLE_SCHEMA, k.TABLE_NAME, k.CONSTRAINT_NAME, tc.CONSTRAINT_TYPE,
+                           k.COLUMN_NAME, k.REFERENCED_TABLE_SCHEMA, k.REFERENCED_TABLE_NAME,
+                           k.REFERENCED_COLUMN_NAME
+                    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+                    JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+                      ON tc.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA
+                     AND tc.TABLE_NAME = k.TABLE_NAME
+                     AND tc.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+                    WHERE k.TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+                      AND tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'FOREIGN KEY', 'UNIQUE')
+                      {key_filter}
+                    ORDER BY k.TABLE_SCHEMA, k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+                """, params)
+                key_columns = await cur.fetchall()
+                await cur.execute(f"""
+                    SELECT s.TABLE_SCHEMA, s.TABLE_NAME, s.INDEX_NAME, s.NON_UNIQUE, s.COLUMN_NAME
+                    FROM INFORMATION_SCHEMA.STATISTICS s
+                    JOIN INFORMATION_SCHEMA.TABLES t
+                      ON t.TABLE_SCHEMA = s.TABLE_SCHEMA AND t.TABLE_NAME = s.TABLE_NAME
+                     AND t.TABLE_TYPE = 'BASE TABLE'
+                    WHERE s.TABLE_SCHEMA NOT IN {_SYSTEM_SCHEMAS}
+                    {index_filter}
+                    ORDER BY s.TABLE_SCHEMA, s.TABLE_NAME, s.INDEX_NAME, s.SEQ_IN_INDEX
+                """, params)
+                index_columns = await cur.fetchall()
+
+        # INFORMATION_SCHEMA returns one row per key column; fold them into
+        # one row per constraint / index with an ordered column list.
+        constraints = {}
+        for r in key_columns:
+            key = (r["TABLE_SCHEMA"], r["TABLE_NAME"], r["CONSTRAINT_NAME"])
+            entry = constraints.get(key)
+            if entry is None:
+                entry = constraints[key] = {
+                    "table_schema": r["TABLE_SCHEMA"],
+                    "table_name": r["TABLE_NAME"],
+                    "constraint_name": r["CONSTRAINT_NAME"],
+                    "constraint_type": r["CONSTRAINT_TYPE"],
+                    "columns": [],
+                    "referenced_schema": r["REFERENCED_TABLE_SCHEMA"],
+                    "referenced_table": r["REFERENCED_TABLE_NAME"],
+                    "referenced_columns": [],
+                }
+            entry["columns"].append(r["COLUMN_NAME"])
+            if r["REFERENCED_COLUMN_NAME"] is not None:
+                entry["referenced_columns"].append(r["REFERENCED_COLUMN_NAME"])
+
+        indexes = {}
+        for r in index_columns:
+            key = (r["TABLE_SCHEMA"], r["TABLE_NAME"], r["INDEX_NAME"])
+            entry = indexes.get(key)
+            if entry is None:
+                entry = indexes[key] = {
+                    "table_schema": r["TABLE_SCHEMA"],
+                    "table_name": r["TABLE_NAME"],
+                    "index_name": r["INDEX_NAME"],
+                    "is_unique": not r["NON_UNIQUE"],
+                    "is_primary": r["INDEX_NAME"] == "PRIMARY",
+                    "columns": [],
+                }
+            entry["columns"].append(r["COLUMN_NAME"])
+
+        return {
+            "tables": list(tables),
+            "columns": list(columns),
+            "constraints": list(constraints.values()),
+            "indexes": list(indexes.values()),
+        }
+
+    async def get_table_signatures(self):
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                # the default 1 KB limit would truncate wide tables and hide changes
+                await cur.execute("SET SESSION group_concat_max_len = 1048576")
+                # one hash per table from each catalog view the extractor reads, so
+                # a new index or foreign key changes the signature like a new column
+                parts = {}
+                for position, query in enumerate(_SIGNATURE_QUERIES):
+                    await cur.execute(query)
+                    for r in await cur.fetchall():
+                        key = (r["TABLE_SCHEMA"], r["TABLE_NAME"])
+                        if position == 0:
+                            parts[key] = [r["part"], "", ""]
+                        elif key in parts:
+                            parts[key][position] = r["part"]
+        return [
+            {
+                "TABLE_SCHEMA": schema,
+                "TABLE_NAME": table,
+                "signature": hashlib.md5("|".join(p).encode()).hexdigest(),
+            }
+            for (schema, table), p in parts.items()
+        ]
+
     async def fetch_rows(self, table_name: str, limit: int = 1000):
         if not self.pool:
             await self.connect()
@@ -59,3 +275,98 @@ class MySQLConnector(BaseConnector):
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(f"SELECT * FROM {table_name} LIMIT %s", (limit,))
                 return await cur.fetchall()
+
+    async def stream_rows(self, table_name: str, limit: int = 1000, batch_size: int = None):
+        if not self.pool:
+            await self.connect()
+        batch_size = batch_size or settings.ROW_BATCH_SIZE
+        async with self.pool.acquire() as conn:
+            # SSCursor streams from the server instead of buffering the whole result
+            async with conn.cursor(aiomysql.SSCursor) as cur:
+                await cur.execute(f"SELECT * FROM {table_name} LIMIT %s", (limit,))
+                columns = [d[0] for d in cur.description]
+                while True:
+                    rows = await cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows_to_columns(columns, rows)
+
+    async def estimate_row_count(self, table_name: str):
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                # InnoDB's TABLE_ROWS is an estimate, which is all we need for sizing
+                await cur.execute("""
+                    SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """, (table_name,))
+                row = await cur.fetchone()
+                return int(row[0]) if row and row[0] is not None else None
+
+    def plan_sample(self, estimated_rows, sample_size):
+        return "random_key_range" if estimated_rows else None
+
+    async def stream_sample(self, table_name: str, plan, batch_size: int):
+        """Sample by reading short primary-key ranges from random start keys.
+
+        Each range is an index seek, so the cost depends on the sample size
+        rather than the table size. Needs a single integer primary key.
+        """
+        if not self.pool:
+            await self.connect()
+        size = plan["sample_size"]
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("""
+                    SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_KEY = 'PRI'
+                """, (table_name,))
+                pk = await cur.fetchall()
+                if len(pk) != 1 or pk[0][1].lower() not in _INTEGER_TYPES:
+                    raise SamplingUnsupported(f"{table_name} has no single integer primary key")
+                pk_col = pk[0][0]
+                await cur.execute(f"SELECT MIN(`{pk_col}`), MAX(`{pk_col}`) FROM {table_name}")
+                low, high = await cur.fetchone()
+                if low is None:
+                    return
+
+                ranges = max(1, min(settings.SAMPLE_KEY_RANGES, size))
+                per_range = math.ceil(size / ranges)
+                starts = sorted(random.randint(low, high) for _ in range(ranges))
+                plan["key_ranges"] = ranges
+
+                seen = set()
+                buffer = []
+                columns = None
+                for start in starts:
+                    await cur.execute(
+                        f"SELECT * FROM {table_name} WHERE `{pk_col}` >= %s ORDER BY `{pk_col}` LIMIT %s",
+                        (start, per_range),
+                    )
+                    if columns is None:
+                        columns = [d[0] for d in cur.description]
+                        pk_index = columns.index(pk_col)
+                    for row in await cur.fetchall():
+                        # neighbouring ranges can overlap
+                        if row[pk_index] in seen:
+                            continue
+                        seen.add(row[pk_index])
+                        buffer.append(row)
+                        if len(buffer) >= batch_size:
+                            yield rows_to_columns(columns, buffer)
+                            buffer = []
+                        if len(seen) >= size:
+                            break
+                    if len(seen) >= size:
+                        break
+                if buffer:
+                    yield rows_to_columns(columns, buffer)
+
+    async def fetch_aggregate(self, query: str):
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query)
+                return await cur.fetchone() or {}
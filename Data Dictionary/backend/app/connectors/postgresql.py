@@ -11,14 +11,148 @@ try:
 except Exception:  # pragma: no cover - environment dependent
     asyncpg = None
 
-from app.connectors.base import BaseConnector
+from app.connectors.base import BaseConnector, rows_to_columns
 from app.core.errors import ConnectorError
 from app.config import settings
+from app.core.pools import normalize_dsn, pool_registry
+
+
+_SYSTEM_SCHEMAS = "('pg_catalog', 'information_schema')"
+
+# Catalog queries used by `get_catalog`. They read pg_catalog directly because
+# the information_schema views get very slow on catalogs with thousands of
+# tables.
+_CATALOG_COLUMNS_SQL = f"""
+    SELECT n.nspname AS table_schema,
+           c.relname AS table_name,
+           a.attname AS column_name,
+           format_type(a.atttypid, a.atttypmod) AS data_type,
+           CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+           a.attnum AS ordinal_position,
+           pg_get_expr(d.adbin, d.adrelid) AS column_default
+    FROM pg_catalog.pg_attribute a
+    JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE c.relkind IN ('r', 'p')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND n.nspname NOT IN {_SYSTEM_SCHEMAS}
+      AND n.nspname NOT LIKE 'pg_toast%'
+      {{table_filter}}
+    ORDER BY n.nspname, c.relname, a.attnum
+"""
+
+_CATALOG_CONSTRAINTS_SQL = f"""
+    SELECT n.nspname AS table_schema,
+           c.relname AS table_name,
+           con.conname AS constraint_name,
+           CASE con.contype
+               WHEN 'p' THEN 'PRIMARY KEY'
+               WHEN 'f' THEN 'FOREIGN KEY'
+               ELSE 'UNIQUE'
+           END AS constraint_type,
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns,
+           fn.nspname AS referenced_schema,
+           fc.relname AS referenced_table,
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(con.confkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_catalog.pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS referenced_columns
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_class fc ON fc.oid = con.confrelid
+    LEFT JOIN pg_catalog.pg_namespace fn ON fn.oid = fc.relnamespace
+    WHERE con.contype IN ('p', 'f', 'u')
+      AND n.nspname NOT IN {_SYSTEM_SCHEMAS}
+      {{table_filter}}
+"""
+
+_CATALOG_INDEXES_SQL = f"""
+    SELECT n.nspname AS table_schema,
+           t.relname AS table_name,
+           i.relname AS index_name,
+           ix.indisunique AS is_unique,
+           ix.indisprimary AS is_primary,
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(ix.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_catalog.pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns
+    FROM pg_catalog.pg_index ix
+    JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_catalog.pg_class t ON t.oid = ix.indrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = t.relnamespace
+    WHERE t.relkind IN ('r', 'p')
+      AND n.nspname NOT IN {_SYSTEM_SCHEMAS}
+      AND n.nspname NOT LIKE 'pg_toast%'
+      {{table_filter}}
+"""
+
+_CATALOG_TABLES_SQL = f"""
+    SELECT table_schema, table_name
+    FROM information_schema.tables
+    WHERE table_type='BASE TABLE' AND table_schema NOT IN {_SYSTEM_SCHEMAS}
+      {{table_filter}}
+"""
+
+# One md5 per table over its columns, constraints and indexes. Any DDL that
+# changes the extracted schema changes the signature, while DML and VACUUM
+# (which rewrite relfilenode) do not.
+_TABLE_SIGNATURES_SQL = f"""
+    SELECT n.nspname AS table_schema,
+           c.relname AS table_name,
+           md5(
+               coalesce((
+                   SELECT string_agg(
+                       a.attname || ' ' || format_type(a.atttypid, a.atttypmod) || ' ' || a.attnotnull::text
+                           || ' ' || coalesce(pg_get_expr(d.adbin, d.adrelid), ''),
+                       ',' ORDER BY a.attnum)
+                   FROM pg_catalog.pg_attribute a
+                   LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+                   WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+               ), '')
+               || '|' || coalesce((
+                   SELECT string_agg(con.conname || ' ' || pg_get_constraintdef(con.oid), ',' ORDER BY con.conname)
+                   FROM pg_catalog.pg_constraint con
+                   WHERE con.conrelid = c.oid
+               ), '')
+               || '|' || coalesce((
+                   SELECT string_agg(pg_get_indexdef(ix.indexrelid), ',' ORDER BY ix.indexrelid)
+                   FROM pg_catalog.pg_index ix
+                   WHERE ix.indrelid = c.oid
+               ), '')
+           ) AS signature
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p')
+      AND n.nspname NOT IN {_SYSTEM_SCHEMAS}
+      AND n.nspname NOT LIKE 'pg_toast%'
+"""
+
+
+def _table_filter(schema_col: str, table_col: str) -> str:
+    # $1/$2 are parallel text arrays of schema and table names
+    return f"AND ({schema_col}::text, {table_col}::text) IN (SELECT * FROM unnest($1::text[], $2::text[]))"
 
 
 class PostgresConnector(BaseConnector):
-    def __init__(self, dsn: str = None):
+    supports_bulk_catalog = True
+    supports_table_signatures = True
+    dialect = "postgresql"
+
+    def __init__(self, dsn: str = None, pool_max_size: int = None):
         self.dsn = dsn or settings.DATABASE_URL
+        self.pool_max_size = pool_max_size
         self.pool = None
         self._available = asyncpg is not None
 
@@ -26,7 +160,16 @@ class PostgresConnector(BaseConnector):
         if not self._available:
             raise ConnectorError("asyncpg is not installed in the environment. Install asyncpg to use PostgresConnector")
         try:
-            self.pool = await asyncpg.create_pool(dsn=self.dsn)
+            # pools are shared process-wide; connect() only borrows one
+            self.pool = await pool_registry.get(
+                "postgresql",
+                normalize_dsn(self.dsn),
+                factory=lambda min_size, max_size: asyncpg.create_pool(
+                    dsn=self.dsn, min_size=min_size, max_size=max_size
+                ),
+                closer=lambda pool: pool.close(),
+                max_size=self.pool_max_size,
+            )
         except Exception as e:
             raise ConnectorError(str(e))
 
@@ -53,6 +196,38 @@ class PostgresConnector(BaseConnector):
             """, table_name)
             return {"columns": [dict(r) for r in rows]}
 
+    async def get_catalog(self, tables=None):
+        if not self._available or not self.pool:
+            raise ConnectorError("PostgresConnector not connected")
+        args = ()
+        filters = {"tables": "", "columns": "", "constraints": "", "indexes": ""}
+        if tables is not None:
+            args = ([t[0] for t in tables], [t[1] for t in tables])
+            filters = {
+                "tables": _table_filter("table_schema", "table_name"),
+                "columns": _table_filter("n.nspname", "c.relname"),
+                "constraints": _table_filter("n.nspname", "c.relname"),
+                "indexes": _table_filter("n.nspname", "t.relname"),
+            }
+        async with self.pool.acquire() as conn:
+            tables = await conn.fetch(_CATALOG_TABLES_SQL.format(table_filter=filters["tables"]), *args)
+            columns = await conn.fetch(_CATALOG_COLUMNS_SQL.format(table_filter=filters["columns"]), *args)
+            constraints = await conn.fetch(_CATALOG_CONSTRAINTS_SQL.format(table_filter=filters["constraints"]), *args)
+            indexes = await conn.fetch(_CATALOG_INDEXES_SQL.format(table_filter=filters["indexes"]), *args)
+        return {
+            "tables": [dict(r) for r in tables],
+            "columns": [dict(r) for r in columns],
+            "constraints": [dict(r) for r in constraints],
+            "indexes": [dict(r) for r in indexes],
+        }
+
+    async def get_table_signatures(self):
+        if not self._available or not self.pool:
+            raise ConnectorError("PostgresConnector not connected")
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(_TABLE_SIGNATURES_SQL)
+            return [dict(r) for r in rows]
+
     async def fetch_rows(self, table_name: str, limit: int = 1000):
         if not self._available or not self.pool:
             raise ConnectorError("PostgresConnector not connected")
@@ -62,3 +237,59 @@ class PostgresConnector(BaseConnector):
             rows = await conn.fetch(q, limit)
             # convert to list of dicts
             return [dict(r) for r in rows]
+
+    async def stream_rows(self, table_name: str, limit: int = 1000, batch_size: int = None):
+        async for chunk in self._stream_query(f"SELECT * FROM {table_name} LIMIT $1", limit, batch_size=batch_size):
+            yield chunk
+
+    async def _stream_query(self, query: str, *args, batch_size: int = None):
+        if not self._available or not self.pool:
+            raise ConnectorError("PostgresConnector not connected")
+        batch_size = batch_size or settings.ROW_BATCH_SIZE
+        async with self.pool.acquire() as conn:
+            # server-side cursors need a transaction; rows arrive batch_size at a time
+            async with conn.transaction(readonly=True):
+                stmt = await conn.prepare(query)
+                columns = [a.name for a in stmt.get_attributes()]
+                cursor = await stmt.cursor(*args)
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    yield rows_to_columns(columns, rows)
+                    if len(rows) < batch_size:
+                        break
+
+    async def estimate_row_count(self, table_name: str):
+        if not self._available or not self.pool:
+            raise ConnectorError("PostgresConnector not connected")
+        async with self.pool.acquire() as conn:
+            # planner statistics; -1 when the table was never analyzed
+            return await conn.fetchval(
+                "SELECT reltuples::bigint FROM pg_catalog.pg_class WHERE oid = to_regclass($1)", table_name
+            )
+
+    def plan_sample(self, estimated_rows, sample_size):
+        if not estimated_rows:
+            return None
+        # SYSTEM picks whole pages and only reads those, BERNOULLI reads every
+        # page but picks rows independently; switch once a full scan gets costly
+        if estimated_rows >= settings.SAMPLE_SYSTEM_MIN_ROWS:
+            return "tablesample_system"
+        return "tablesample_bernoulli"
+
+    async def stream_sample(self, table_name: str, plan, batch_size: int):
+        method = "SYSTEM" if plan["strategy"] == "tablesample_system" else "BERNOULLI"
+        # oversample a little so that LIMIT, not chance, decides the sample size
+        percent = min(100.0, plan["sample_size"] / plan["estimated_rows"] * 100 * 1.2)
+        plan["percent"] = round(percent, 6)
+        query = f"SELECT * FROM {table_name} TABLESAMPLE {method} ({percent:.6f}) LIMIT $1"
+        async for chunk in self._stream_query(query, plan["sample_size"], batch_size=batch_size):
+            yield chunk
+
+    async def fetch_aggregate(self, query: str):
+        if not self._available or not self.pool:
+            raise ConnectorError("PostgresConnector not connected")
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(query)
+            return dict(row) if row is not None else {}
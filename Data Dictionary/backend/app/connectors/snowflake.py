@@ -1,45 +1,143 @@
-import snowflake.connector
-from app.connectors.base import BaseConnector
+"""Snowflake connector.
+
+`snowflake.connector` is a blocking DB-API driver, so every call runs on a
+bounded `BlockingExecutor` whose worker threads each own a connection. The
+driver is imported lazily so the app still starts when it isn't installed.
+"""
+
+try:
+    import snowflake.connector  # type: ignore
+    from snowflake.connector import DictCursor  # type: ignore
+except Exception:  # pragma: no cover - environment dependent
+    snowflake = None
+    DictCursor = None
+
+from app.connectors.base import BaseConnector, rows_to_columns
+from app.connectors.blocking import BlockingExecutor
 from app.core.errors import ConnectorError
+from app.core.pools import pool_registry
 from app.config import settings
 
 class SnowflakeConnector(BaseConnector):
-    def __init__(self, account=None, user=None, password=None, warehouse=None, database=None, schema=None):
+    supports_table_signatures = True
+    dialect = "snowflake"
+
+    def __init__(self, account=None, user=None, password=None, warehouse=None, database=None, schema=None,
+                 max_workers=None, query_timeout=None):
         self.account = account
         self.user = user
         self.password = password
         self.warehouse = warehouse
         self.database = database
         self.schema = schema
-        self.conn = None
+        self.max_workers = max_workers or settings.BLOCKING_MAX_WORKERS
+        self.query_timeout = query_timeout if query_timeout is not None else settings.BLOCKING_QUERY_TIMEOUT
+        self.pool = None
+
+    def _open_connection(self):
+        # runs on an executor worker thread
+        return snowflake.connector.connect(
+            user=self.user or settings.POSTGRES_USER,
+            password=self.password or settings.POSTGRES_PASSWORD,
+            account=self.account,
+            warehouse=self.warehouse,
+            database=self.database,
+            schema=self.schema,
+            login_timeout=settings.BLOCKING_CONNECT_TIMEOUT,
+            network_timeout=self.query_timeout or None,
+        )
+
+    async def _open_executor(self, min_size, max_size):
+        executor = BlockingExecutor(
+            self._open_connection,
+            max_workers=max_size,
+            name="snowflake",
+            cursor_factory=lambda conn: conn.cursor(DictCursor),
+            query_timeout=self.query_timeout,
+        )
+        try:
+            # open the first worker connection now so bad credentials surface in connect()
+            async with executor.acquire() as lease:
+                await lease.run(lambda cur: None, timeout=settings.BLOCKING_CONNECT_TIMEOUT)
+        except Exception:
+            await executor.close()
+            raise
+        return executor
 
     async def connect(self):
-        # snowflake.connector is synchronous; this is a thin wrapper
+        if snowflake is None:
+            raise ConnectorError("snowflake-connector-python is not installed. Install it to use SnowflakeConnector")
         try:
-            self.conn = snowflake.connector.connect(
-                user=self.user or settings.POSTGRES_USER,
-                password=self.password or settings.POSTGRES_PASSWORD,
-                account=self.account,
-                warehouse=self.warehouse,
-                database=self.database,
-                schema=self.schema,
+            self.pool = await pool_registry.get(
+                "snowflake",
+                {
+                    "host": self.account,
+                    "user": self.user,
+                    "password": self.password,
+                    "warehouse": self.warehouse,
+                    "database": self.database,
+                    "schema": self.schema,
+                },
+                factory=self._open_executor,
+                closer=lambda executor: executor.close(),
+                max_size=self.max_workers,
             )
         except Exception as e:
             raise ConnectorError(str(e))
 
+    async def _run(self, fn):
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as lease:
+            return await lease.run(fn)
+
+    def _execute(self, cursor, sql, params=None):
+        # server-side timeout as well, so a query abandoned by the caller doesn't keep the warehouse busy
+        cursor.execute(sql, params, timeout=int(self.query_timeout) if self.query_timeout else None)
+        return cursor.fetchall()
+
     async def get_tables(self):
-        cs = self.conn.cursor()
-        try:
-            cs.execute("SHOW TABLES")
-            return [dict(row) for row in cs.fetchall()]
-        finally:
-            cs.close()
+        rows = await self._run(lambda cs: self._execute(cs, "SHOW TABLES"))
+        return [dict(row) for row in rows]
 
     async def get_table_schema(self, table_name: str):
-        cs = self.conn.cursor()
-        try:
-            cs.execute(f"DESCRIBE TABLE {table_name}")
-            cols = cs.fetchall()
-            return {"columns": cols}
-        finally:
-            cs.close()
+        cols = await self._run(lambda cs: self._execute(cs, f"DESCRIBE TABLE {table_name}"))
+        return {"columns": [dict(c) for c in cols]}
+
+    async def get_table_signatures(self):
+        # LAST_DDL only moves on DDL, unlike LAST_ALTERED which DML bumps too
+        rows = await self._run(lambda cs: self._execute(cs, """
+            SELECT TABLE_SCHEMA, TABLE_NAME, TO_VARCHAR(LAST_DDL) AS SIGNATURE
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_TYPE = 'BASE TABLE'
+              AND TABLE_SCHEMA = COALESCE(CURRENT_SCHEMA(), TABLE_SCHEMA)
+        """))
+        return [dict(row) for row in rows]
+
+    async def fetch_rows(self, table_name: str, limit: int = 1000):
+        rows = await self._run(lambda cs: self._execute(cs, f"SELECT * FROM {table_name} LIMIT %s", (limit,)))
+        return [dict(r) for r in rows]
+
+    async def estimate_row_count(self, table_name: str):
+        rows = await self._run(lambda cs: self._execute(cs, """
+            SELECT ROW_COUNT FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_NAME = %s AND TABLE_SCHEMA = COALESCE(CURRENT_SCHEMA(), TABLE_SCHEMA)
+        """, (table_name.upper(),)))
+        return int(rows[0]["ROW_COUNT"]) if rows and rows[0]["ROW_COUNT"] is not None else None
+
+    def plan_sample(self, estimated_rows, sample_size):
+        return "snowflake_sample"
+
+    async def stream_sample(self, table_name: str, plan, batch_size: int):
+        # fixed-size row sampling happens inside the warehouse
+        size = int(plan["sample_size"])
+        rows = await self._run(lambda cs: self._execute(cs, f"SELECT * FROM {table_name} SAMPLE ({size} ROWS)"))
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        for i in range(0, len(rows), batch_size):
+            yield rows_to_columns(columns, [[r[c] for c in columns] for r in rows[i:i + batch_size]])
+
+    async def fetch_aggregate(self, query: str):
+        rows = await self._run(lambda cs: self._execute(cs, query))
+        return dict(rows[0]) if rows else {}
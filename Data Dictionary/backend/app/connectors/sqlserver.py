@@ -1,27 +1,111 @@
-import pyodbc
+"""SQL Server connector.
+
+`pyodbc` is blocking, so every call runs on a bounded `BlockingExecutor`
+whose worker threads each own a connection. The driver is imported lazily so
+the app still starts when it isn't installed.
+"""
+
+try:
+    import pyodbc  # type: ignore
+except Exception:  # pragma: no cover - environment dependent
+    pyodbc = None
+
 from app.connectors.base import BaseConnector
+from app.connectors.blocking import BlockingExecutor
 from app.core.errors import ConnectorError
+from app.core.pools import pool_registry
+from app.config import settings
+
+
+def _braced(value) -> str:
+    # ODBC values in braces may hold ';', '=' and spaces; a literal '}' is doubled
+    return "{" + str(value).replace("}", "}}") + "}"
+
 
 class SQLServerConnector(BaseConnector):
-    def __init__(self, conn_str: str):
+    dialect = "sqlserver"
+
+    def __init__(self, conn_str: str, max_workers: int = None, query_timeout: float = None):
         self.conn_str = conn_str
-        self.conn = None
+        self.max_workers = max_workers or settings.BLOCKING_MAX_WORKERS
+        self.query_timeout = query_timeout if query_timeout is not None else settings.BLOCKING_QUERY_TIMEOUT
+        self.pool = None
+
+    @classmethod
+    def from_params(cls, host=None, port=None, user=None, password=None, database=None, **kwargs):
+        server = f"{host or 'localhost'},{port or 1433}"
+        conn_str = (
+            f"DRIVER={_braced(settings.SQLSERVER_DRIVER)};"
+            f"SERVER={_braced(server)};"
+            f"DATABASE={_braced(database or 'master')};"
+            f"UID={_braced(user or '')};PWD={_braced(password or '')};"
+            "TrustServerCertificate=yes"
+        )
+        return cls(conn_str, **kwargs)
+
+    def _open_connection(self):
+        # runs on an executor worker thread
+        conn = pyodbc.connect(self.conn_str, timeout=int(settings.BLOCKING_CONNECT_TIMEOUT))
+        if self.query_timeout:
+            # pyodbc aborts statements that run longer than this many seconds
+            conn.timeout = int(self.query_timeout)
+        return conn
+
+    async def _open_executor(self, min_size, max_size):
+        executor = BlockingExecutor(
+            self._open_connection,
+            max_workers=max_size,
+            name="sqlserver",
+            query_timeout=self.query_timeout,
+        )
+        try:
+            # open the first worker connection now so bad credentials surface in connect()
+            async with executor.acquire() as lease:
+                await lease.run(lambda cur: None, timeout=settings.BLOCKING_CONNECT_TIMEOUT)
+        except Exception:
+            await executor.close()
+            raise
+        return executor
 
     async def connect(self):
-        # pyodbc is blocking; callers should run this in an executor for true async behavior
+        if pyodbc is None:
+            raise ConnectorError("pyodbc is not installed. Install it to use SQLServerConnector")
         try:
-            self.conn = pyodbc.connect(self.conn_str)
+            self.pool = await pool_registry.get(
+                "sqlserver",
+                {"conn_str": self.conn_str},
+                factory=self._open_executor,
+                closer=lambda executor: executor.close(),
+                max_size=self.max_workers,
+            )
         except Exception as e:
             raise ConnectorError(str(e))
 
-    async def get_tables(self):
-        cur = self.conn.cursor()
-        cur.execute("SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE'")
+    async def _run(self, fn):
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as lease:
+            return await lease.run(fn)
+
+    @staticmethod
+    def _fetch_dicts(cur, sql, *params):
+        cur.execute(sql, *params)
         rows = cur.fetchall()
         return [dict(zip([c[0] for c in cur.description], r)) for r in rows]
 
+    async def get_tables(self):
+        return await self._run(lambda cur: self._fetch_dicts(
+            cur, "SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE'"
+        ))
+
     async def get_table_schema(self, table_name: str):
-        cur = self.conn.cursor()
-        cur.execute("SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME=?", table_name)
-        rows = cur.fetchall()
-        return {"columns": [dict(zip([c[0] for c in cur.description], r)) for r in rows]}
+        cols = await self._run(lambda cur: self._fetch_dicts(
+            cur,
+            "SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME=?",
+            table_name,
+        ))
+        return {"columns": cols}
+
+    async def fetch_aggregate(self, query: str):
+        rows = await self._run(lambda cur: self._fetch_dicts(cur, query))
+        return rows[0] if rows else {}
@@ -1,28 +1,42 @@
+import os
+from typing import Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+# Engine of the dictionary store (app/storage/dictionary_store.py), not of
+# the source databases being documented.
 ENGINE: AsyncEngine = None
 SessionLocal: sessionmaker = None
 
 
-def init_db():
+def dictionary_url() -> str:
+    if settings.DICTIONARY_DATABASE_URL:
+        return settings.DICTIONARY_DATABASE_URL
+    from app.storage.artifact_manager import ARTIFACT_DIR
+    return f"sqlite+aiosqlite:///{os.path.join(ARTIFACT_DIR, 'dictionary.sqlite3')}"
+
+
+def init_db(db_url: Optional[str] = None):
     global ENGINE, SessionLocal
-    db_url = settings.DATABASE_URL
-    if not db_url:
-        # Build from individual parts if provided
-        user = settings.POSTGRES_USER or ""
-        pwd = settings.POSTGRES_PASSWORD or ""
-        host = settings.POSTGRES_HOST or "localhost"
-        port = settings.POSTGRES_PORT or 5432
-        db = settings.POSTGRES_DB or "postgres"
-        db_url = f"postgresql+asyncpg://{user}:{pwd}@{host}:{port}/{db}"
-
-    ENGINE = create_async_engine(db_url, echo=False, future=True)
+    ENGINE = create_async_engine(db_url or dictionary_url(), echo=False, future=True)
     SessionLocal = sessionmaker(ENGINE, expire_on_commit=False, class_=AsyncSession)
 
 
+def get_engine() -> AsyncEngine:
+    if ENGINE is None:
+        init_db()
+    return ENGINE
+
+
+async def close_db():
+    global ENGINE, SessionLocal
+    if ENGINE is not None:
+        await ENGINE.dispose()
+    ENGINE = SessionLocal = None
+
+
 async def get_session() -> AsyncSession:
     if SessionLocal is None:
         init_db()
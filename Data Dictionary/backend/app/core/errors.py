@@ -1,6 +1,10 @@
 class ConnectorError(Exception):
     pass
 
+class SamplingUnsupported(ConnectorError):
+    """A connector's native sampling strategy can't be used for a table."""
+    pass
+
 class ExtractionError(Exception):
     pass
 
@@ -0,0 +1,71 @@
+"""Application-scoped HTTP client for outbound API calls (Groq).
+
+Opening an `httpx.AsyncClient` per request pays a TCP + TLS handshake on
+every call. One long-lived client keeps connections alive between calls
+and, when the `h2` package is installed, multiplexes requests over HTTP/2.
+It is opened on startup and closed on shutdown; code running outside the
+app (scripts, tests) gets one lazily.
+"""
+
+import asyncio
+from typing import Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.core.logging import logger
+
+try:  # HTTP/2 needs the optional h2 package (httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HTTP2_AVAILABLE = False
+
+# (loop, client): an AsyncClient's connections belong to the loop that opened them
+_client: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+
+
+def build_client(**kwargs) -> httpx.AsyncClient:
+    """Create a client with the configured pool limits and split timeouts."""
+    options = {
+        "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        ),
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, opening one for the running loop if needed."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].is_closed:
+        if _client is not None and _client[0] is not loop:
+            logger.debug("Event loop changed; opening a new shared HTTP client")
+        _client = (loop, build_client())
+    return _client[1]
+
+
+async def start_http_client():
+    get_http_client()
+    logger.info(f"Shared HTTP client ready (http2={settings.HTTP2_ENABLED and HTTP2_AVAILABLE})")
+
+
+async def close_http_client():
+    global _client
+    if _client is None:
+        return
+    loop, client = _client
+    _client = None
+    if loop is asyncio.get_running_loop():
+        await client.aclose()
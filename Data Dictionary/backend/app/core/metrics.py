@@ -0,0 +1,227 @@
+"""Prometheus metrics, served as text at `/metrics`.
+
+Latency and counts are recorded where they happen. That covers requests
+(`MetricsMiddleware` in app/api/middleware.py), connector queries
+(app/connectors/base.py), Groq calls and retries, and column profiling.
+Pools, caches and coalescing groups already keep their own counters, so
+they register a collector that turns those into metrics when `/metrics` is
+scraped and cost nothing in between.
+
+Recording sits on every request, so it is built to stay cheap:
+
+- A family holds one child per label combination. After the first call for
+  a series, `labels()` is a single dict lookup.
+- A child is a `__slots__` object, and an update is one or two attribute
+  writes. Histograms find their bucket with `bisect` over fixed bounds and
+  make the counts cumulative only when rendering.
+- Nothing takes a lock. Updates come from the event loop thread, where they
+  cannot interleave. An update from a worker thread could lose an increment
+  to a race. A lock on every request would cost more than that imprecision,
+  which monitoring can tolerate.
+
+No third-party client is needed. `render()` writes the text exposition
+format (version 0.0.4).
+"""
+
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette adds the charset
+
+# seconds; the Prometheus client defaults with a finer low end for fast routes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# LLM calls take seconds, not milliseconds
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class _GaugeValue(_Value):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # `le` is inclusive: the first bound >= value
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        # families without labels have exactly one series
+        self._only = self.labels() if not self.labelnames else None
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._child()
+        return child
+
+    def _child(self):
+        raise NotImplementedError()
+
+    def _lines(self, values: tuple, child) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}"]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._lines(values, child))
+        return lines
+
+    @classmethod
+    def snapshot(cls, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 values: Dict[tuple, float] = None):
+        """A family filled from counters kept elsewhere, for collectors."""
+        family = cls(name, documentation, labelnames)
+        for key, value in (values or {}).items():
+            family.labels(*key).value = value
+        return family
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._only.inc(amount)
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1):
+        self._only.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._only.dec(amount)
+
+    def set(self, value: float):
+        self._only.set(value)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._only.observe(value)
+
+    def _lines(self, values: tuple, child) -> List[str]:
+        names = self.labelnames + ("le",)
+        counts = list(child.counts)
+        lines, total = [], 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            total += count
+            lines.append(f"{self.name}_bucket{_label_text(names, values + (_number(bound),))} {total}")
+        labels = _label_text(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+Collector = Callable[[], Iterable[_Family]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._collectors: List[Collector] = []
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = cls(name, *args, **kwargs)
+        elif type(family) is not cls:
+            raise ValueError(f"metric {name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Collector):
+        """Call `collector` at every scrape; it returns families built from its own counters."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
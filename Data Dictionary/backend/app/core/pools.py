@@ -0,0 +1,281 @@
+"""Process-wide registry of database connection pools.
+
+Connectors used to create a fresh driver pool on every `connect()` call and
+never close it. The registry hands out one shared pool per normalized set of
+connection parameters instead, opens it lazily, evicts pools that have been
+idle for too long and closes everything on application shutdown.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, Gauge, metrics_registry
+
+PoolFactory = Callable[[int, int], Awaitable[Any]]
+PoolCloser = Callable[[Any], Awaitable[None]]
+
+_DEFAULT_PORTS = {"postgresql": 5432, "mysql": 3306, "sqlserver": 1433}
+
+
+def normalize_dsn(dsn: str) -> Dict[str, Any]:
+    """Split a database URL into comparable parts.
+
+    `postgres://U@Host/db` and `postgresql://U@host:5432/db` describe the same
+    source and must map to the same pool.
+    """
+    parts = urlsplit(dsn or "")
+    scheme = (parts.scheme or "").split("+", 1)[0]
+    if scheme == "postgres":
+        scheme = "postgresql"
+    return {
+        "scheme": scheme,
+        "host": (parts.hostname or "localhost").lower(),
+        "port": parts.port or _DEFAULT_PORTS.get(scheme),
+        "user": parts.username or "",
+        "password": parts.password or "",
+        "database": parts.path.lstrip("/"),
+        "query": parts.query,
+    }
+
+
+def pool_key(kind: str, params: Dict[str, Any]) -> str:
+    """Build a registry key from connection parameters.
+
+    Host names are case-insensitive and the password is hashed so it never
+    shows up in stats or logs.
+    """
+    normalized = {k: v for k, v in params.items() if v is not None}
+    if "host" in normalized:
+        normalized["host"] = str(normalized["host"]).lower()
+    password = normalized.pop("password", "")
+    digest = hashlib.sha256(
+        json.dumps([kind, normalized, password], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:12]
+    user = normalized.get("user") or ""
+    host = normalized.get("host") or ""
+    port = normalized.get("port")
+    database = normalized.get("database") or ""
+    location = f"{host}:{port}" if port else host
+    return f"{kind}://{user}@{location}/{database}#{digest}"
+
+
+def pool_slot(key: str, max_size: int) -> str:
+    """Registry entry of the pool for `key` with at most `max_size` connections."""
+    return f"{key}?max_size={max_size}"
+
+
+class ManagedPool:
+    """Wraps a driver pool and records usage statistics.
+
+    Exposes `acquire()` as an async context manager so connectors keep using
+    `async with self.pool.acquire() as conn` unchanged.
+    """
+
+    def __init__(self, key: str, pool: Any, min_size: int, max_size: int, closer: PoolCloser):
+        # `key` names the source (stores and metrics use it); `slot` the pool
+        # within the registry, as one source may have pools of several caps
+        self.key = key
+        self.slot = pool_slot(key, max_size)
+        self.pool = pool
+        self.min_size = min_size
+        self.max_size = max_size
+        self._closer = closer
+        self._loop = asyncio.get_running_loop()
+        self.in_use = 0
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.closed = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        started = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            waited = time.perf_counter() - started
+            self.acquisitions += 1
+            self.total_wait += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+            self.in_use += 1
+            try:
+                yield conn
+            finally:
+                self.in_use -= 1
+                self.last_used = time.monotonic()
+
+    def belongs_to_running_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def idle_seconds(self) -> float:
+        if self.in_use:
+            return 0.0
+        return time.monotonic() - self.last_used
+
+    def size(self) -> int:
+        # asyncpg exposes get_size(); aiomysql exposes a `size` property
+        if hasattr(self.pool, "get_size"):
+            return self.pool.get_size()
+        return getattr(self.pool, "size", self.in_use)
+
+    def stats(self) -> Dict[str, Any]:
+        size = self.size()
+        return {
+            "in_use": self.in_use,
+            "idle": max(size - self.in_use, 0),
+            "size": size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "acquisitions": self.acquisitions,
+            "avg_wait_ms": round(self.total_wait / self.acquisitions * 1000, 3) if self.acquisitions else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "idle_seconds": round(self.idle_seconds(), 1),
+        }
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        await self._closer(self.pool)
+
+
+class PoolRegistry:
+    def __init__(self, idle_timeout: Optional[float] = None, reap_interval: Optional[float] = None):
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.POOL_IDLE_TIMEOUT
+        self.reap_interval = reap_interval if reap_interval is not None else max(self.idle_timeout / 4, 1.0)
+        self._pools: Dict[str, ManagedPool] = {}
+        # creation locks are bound to the loop they were created on
+        self._locks: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+        self._creations: Dict[str, int] = {}
+        self._evictions: Dict[str, int] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def get(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        factory: PoolFactory,
+        closer: PoolCloser,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> ManagedPool:
+        """Return the shared pool for `params`, creating it on first use.
+
+        `factory(min_size, max_size)` opens the driver pool; `closer(pool)`
+        closes it again on eviction or shutdown. Callers asking for another
+        `max_size` get a pool of their own rather than one with a different cap.
+        """
+        key = pool_key(kind, params)
+        max_size = max_size or settings.POOL_MAX_SIZE
+        min_size = min(min_size if min_size is not None else settings.POOL_MIN_SIZE, max_size)
+        slot = pool_slot(key, max_size)
+        managed = self._pools.get(slot)
+        if managed is not None and not managed.closed and managed.belongs_to_running_loop():
+            return managed
+
+        loop = asyncio.get_running_loop()
+        loop_and_lock = self._locks.get(slot)
+        if loop_and_lock is None or loop_and_lock[0] is not loop:
+            loop_and_lock = self._locks[slot] = (loop, asyncio.Lock())
+        async with loop_and_lock[1]:
+            managed = self._pools.get(slot)
+            if managed is not None and not managed.closed and managed.belongs_to_running_loop():
+                return managed
+
+            pool = await factory(min_size, max_size)
+            managed = ManagedPool(key, pool, min_size, max_size, closer)
+            self._pools[slot] = managed
+            self._creations[slot] = self._creations.get(slot, 0) + 1
+            logger.info(f"Opened connection pool {key} (min={min_size}, max={max_size})")
+            self._ensure_reaper()
+            return managed
+
+    def _ensure_reaper(self):
+        if self.idle_timeout <= 0:
+            return
+        if self._reaper is None or self._reaper.done() or self._reaper.get_loop() is not asyncio.get_running_loop():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_forever())
+
+    async def _reap_forever(self):
+        while self._pools:
+            await asyncio.sleep(self.reap_interval)
+            await self.evict_idle()
+
+    async def evict_idle(self) -> int:
+        """Close pools that have had no checked-out connection for `idle_timeout` seconds."""
+        evicted = 0
+        for slot, managed in list(self._pools.items()):
+            if managed.idle_seconds() < self.idle_timeout:
+                continue
+            self._pools.pop(slot, None)
+            self._evictions[slot] = self._evictions.get(slot, 0) + 1
+            evicted += 1
+            try:
+                await managed.close()
+                logger.info(f"Evicted idle connection pool {slot}")
+            except Exception as e:
+                logger.error(f"Failed to close idle pool {slot}: {str(e)}")
+        return evicted
+
+    async def close_all(self):
+        if self._reaper is not None and not self._reaper.done():
+            self._reaper.cancel()
+        self._reaper = None
+        pools, self._pools = list(self._pools.values()), {}
+        for managed in pools:
+            try:
+                await managed.close()
+            except Exception as e:
+                logger.error(f"Failed to close pool {managed.slot}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        slots = set(self._creations) | set(self._pools)
+        result = {}
+        for slot in sorted(slots):
+            managed = self._pools.get(slot)
+            entry = managed.stats() if managed is not None else {"in_use": 0, "idle": 0, "size": 0}
+            entry["open"] = managed is not None
+            entry["creations"] = self._creations.get(slot, 0)
+            entry["evictions"] = self._evictions.get(slot, 0)
+            result[slot] = entry
+        return result
+
+    def metrics(self) -> List[Any]:
+        """Pool utilization for `/metrics`."""
+        connections, limits, acquisitions, waited, creations, evictions = {}, {}, {}, {}, {}, {}
+        for slot in sorted(set(self._creations) | set(self._pools)):
+            creations[(slot,)] = self._creations.get(slot, 0)
+            evictions[(slot,)] = self._evictions.get(slot, 0)
+            managed = self._pools.get(slot)
+            if managed is None:
+                continue
+            connections[(slot, "in_use")] = managed.in_use
+            connections[(slot, "idle")] = max(managed.size() - managed.in_use, 0)
+            limits[(slot,)] = managed.max_size
+            acquisitions[(slot,)] = managed.acquisitions
+            waited[(slot,)] = managed.total_wait
+        return [
+            Gauge.snapshot("db_pool_connections", "Open source connections by pool and state", ("pool", "state"),
+                           connections),
+            Gauge.snapshot("db_pool_max_connections", "Connection limit by pool", ("pool",), limits),
+            Counter.snapshot("db_pool_acquisitions_total", "Connections handed out by pool", ("pool",), acquisitions),
+            Counter.snapshot("db_pool_acquire_wait_seconds_total", "Time spent waiting for a free connection",
+                             ("pool",), waited),
+            Counter.snapshot("db_pool_creations_total", "Pools opened by key", ("pool",), creations),
+            Counter.snapshot("db_pool_evictions_total", "Idle or stale pools closed by key", ("pool",), evictions),
+        ]
+
+
+pool_registry = PoolRegistry()
+metrics_registry.register_collector(pool_registry.metrics)
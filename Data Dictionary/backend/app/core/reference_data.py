@@ -0,0 +1,169 @@
+"""Process-wide cache of reference data files (app/data/sample.json).
+
+The sample file used to be opened and parsed on every summary request, on
+every network fallback of the Groq client and on every
+`/api/sample/extract` call. `ReferenceDataCache` loads a file once and keeps:
+
+- the text and the parsed object (parsed lazily; not every caller needs it);
+- a pre-serialized compact JSON body, so routes can return the bytes
+  without a JSON round trip;
+- values derived from the file (`derive`), e.g. the compacted prompt form.
+
+Every access checks the file's mtime and size (one `stat` call) and reloads
+it when either changed. Files above `REFDATA_MMAP_THRESHOLD` bytes are
+memory-mapped instead of read, parsed from the map on demand and served from
+it as they are, without keeping a second copy.
+"""
+
+import json
+import mmap
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, metrics_registry
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
+SAMPLE_PATH = os.path.join(DATA_DIR, "sample.json")
+
+_MISSING = object()
+
+
+class ReferenceAsset:
+    def __init__(self, path: str, version: Tuple[int, int], mmap_threshold: int):
+        self.path = path
+        self.version = version
+        self.size = version[1]
+        self.mapped: Optional[mmap.mmap] = None
+        self._raw: Optional[bytes] = None
+        with open(path, "rb") as f:
+            if self.size >= mmap_threshold > 0:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._raw = f.read()
+        self._data: Any = _MISSING
+        self._error: Optional[ValueError] = None
+        self._body: Optional[bytes] = None
+        self._text: Optional[str] = None
+        self.derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def raw(self) -> bytes:
+        return self._raw if self._raw is not None else self.mapped[:]
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.raw.decode("utf-8")
+        return self._text
+
+    @property
+    def data(self) -> Any:
+        """The parsed JSON; raises ValueError when the file is not valid JSON."""
+        with self._lock:
+            if self._data is _MISSING and self._error is None:
+                try:
+                    self._data = json.loads(self.raw)
+                except ValueError as e:
+                    self._error = e
+            if self._error is not None:
+                raise self._error
+            return self._data
+
+    def body(self) -> bytes:
+        """Compact JSON bytes, as `JSONResponse` would render `data`."""
+        if self._body is None:
+            data = self.data
+            self._body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        return self._body
+
+    def iter_body(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """The response body in chunks; mapped files are served as stored.
+
+        Check `data` first: once streaming starts, errors can no longer
+        change the status code.
+        """
+        if self.mapped is None:
+            yield self.body()
+            return
+        view = memoryview(self.mapped)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+    def close(self):
+        if self.mapped is not None:
+            try:
+                self.mapped.close()
+            except BufferError:  # a response still holds a view; let GC close it
+                pass
+
+
+class ReferenceDataCache:
+    def __init__(self, mmap_threshold: Optional[int] = None):
+        self.mmap_threshold = settings.REFDATA_MMAP_THRESHOLD if mmap_threshold is None else mmap_threshold
+        self._assets: Dict[str, ReferenceAsset] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "loads": 0, "reloads": 0}
+
+    def get(self, path: str = SAMPLE_PATH) -> ReferenceAsset:
+        """The cached asset for `path`; raises FileNotFoundError if it does not exist."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is not None and asset.version == version:
+                self._counters["hits"] += 1
+                return asset
+            if asset is not None:
+                logger.info(f"Reference data changed on disk, reloading {path}")
+                self._counters["reloads"] += 1
+                asset.close()
+            self._counters["loads"] += 1
+            asset = self._assets[path] = ReferenceAsset(path, version, self.mmap_threshold)
+            return asset
+
+    def text(self, path: str = SAMPLE_PATH) -> Optional[str]:
+        """File text, or None when the file is missing or unreadable."""
+        try:
+            return self.get(path).text
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def data(self, path: str = SAMPLE_PATH) -> Any:
+        return self.get(path).data
+
+    def derive(self, name: str, fn: Callable[[ReferenceAsset], Any], path: str = SAMPLE_PATH) -> Any:
+        """`fn(asset)`, computed once per version of the file."""
+        asset = self.get(path)
+        if name not in asset.derived:
+            asset.derived[name] = fn(asset)
+        return asset.derived[name]
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            paths = [os.path.abspath(path)] if path else list(self._assets)
+            for p in paths:
+                asset = self._assets.pop(p, None)
+                if asset is not None:
+                    asset.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = {
+                p: {"bytes": a.size, "memory_mapped": a.mapped is not None, "derived": sorted(a.derived)}
+                for p, a in self._assets.items()
+            }
+        return {**self._counters, "files": files}
+
+    def metrics(self) -> List[Any]:
+        return [Counter.snapshot("reference_data_lookups_total", "Reference data reads by result (hit, load, reload)",
+                                 ("result",), {("hit",): self._counters["hits"], ("load",): self._counters["loads"],
+                                               ("reload",): self._counters["reloads"]})]
+
+
+reference_data = ReferenceDataCache()
+metrics_registry.register_collector(reference_data.metrics)
@@ -0,0 +1,121 @@
+"""Request coalescing ("single flight") for identical concurrent calls.
+
+When a dashboard loads, several users ask for the same table summary or the
+same catalog at once, and each request used to do the full database and LLM
+work. `SingleFlight.do(key, fn)` runs `fn` once per key at a time: callers
+arriving while a call for their key is in flight wait for it and get the
+same result, or the same exception.
+
+The call runs as its own task, so a caller that goes away (client
+disconnect) does not cancel it for the others. Nothing is cached: once the
+call finishes the next caller starts a new one. Per-key counters (calls,
+shared waits, most waiters at once) are kept for the most recent keys.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from app.core.logging import logger
+from app.core.metrics import Counter, Gauge, metrics_registry
+
+T = TypeVar("T")
+
+# per-key counters kept for this many recently used keys per group
+MAX_TRACKED_KEYS = 256
+
+
+class SingleFlight:
+    def __init__(self, name: str, max_tracked_keys: int = MAX_TRACKED_KEYS):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._keys: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._totals = {"calls": 0, "executions": 0, "shared": 0, "errors": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Result of `fn()`, shared with every concurrent caller using the same `key`."""
+        loop = asyncio.get_running_loop()
+        metrics = self._metrics(key)
+        metrics["calls"] += 1
+        self._totals["calls"] += 1
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._finished(key, t))
+            metrics["executions"] += 1
+            self._totals["executions"] += 1
+        else:
+            metrics["shared"] += 1
+            self._totals["shared"] += 1
+            logger.debug(f"Single-flight {self.name}: joining in-flight call for {key}")
+        self._waiters[key] += 1
+        metrics["max_waiters"] = max(metrics["max_waiters"], self._waiters[key])
+        try:
+            # shield: one caller being cancelled must not cancel the call for the rest
+            return await asyncio.shield(task)
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._metrics(key)["errors"] += 1
+            self._totals["errors"] += 1
+
+    def _metrics(self, key: str) -> Dict[str, int]:
+        metrics = self._keys.get(key)
+        if metrics is None:
+            metrics = self._keys[key] = {"calls": 0, "executions": 0, "shared": 0, "errors": 0, "max_waiters": 0}
+            while len(self._keys) > self.max_tracked_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+        return metrics
+
+    def in_flight(self, key: Optional[str] = None) -> int:
+        """Number of calls in flight, or of callers waiting on `key`."""
+        if key is not None:
+            return self._waiters.get(key, 0)
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._totals,
+            "in_flight": len(self._calls),
+            "keys": {key: dict(m, waiting=self._waiters.get(key, 0)) for key, m in self._keys.items()},
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def flight_group(name: str) -> SingleFlight:
+    """The process-wide group for one kind of call (e.g. "completion")."""
+    group = _groups.get(name)
+    if group is None:
+        group = _groups[name] = SingleFlight(name)
+    return group
+
+
+def flight_stats() -> Dict[str, Any]:
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+def flight_metrics() -> List[Any]:
+    totals = {(name, event): value for name, group in _groups.items() for event, value in group._totals.items()}
+    return [
+        Counter.snapshot("singleflight_events_total", "Coalesced calls by group and event (calls, executions, "
+                         "shared, errors)", ("group", "event"), totals),
+        Gauge.snapshot("singleflight_in_flight", "Distinct calls running by group", ("group",),
+                       {(name,): len(group._calls) for name, group in _groups.items()}),
+    ]
+
+
+metrics_registry.register_collector(flight_metrics)
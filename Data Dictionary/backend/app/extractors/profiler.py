@@ -0,0 +1,360 @@
+"""Vectorized column profiles for the data dictionary.
+
+`ColumnProfiler.profile(df)` groups the columns of a frame by dtype
+(numeric, datetime, text) and computes every metric for a whole block of
+same-typed columns at once on a 2-D NumPy array, instead of looping over
+columns in Python:
+
+- numeric / datetime blocks are sorted once along the row axis; nulls sort
+  last, so min/max, quantiles, distinct counts and top-k values all come
+  from that single sorted array.
+- text blocks are factorized once into distinct strings and per-column
+  occurrence counts; lists and dicts (ARRAY and json columns) count as
+  their JSON text. Lengths, pattern classes and parse rates are `.str`
+  passes over the distinct strings only, weighted back per column with
+  `bincount`.
+
+Blocks are at most `block_size` columns wide to bound peak memory.
+"""
+
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.core.metrics import metrics_registry
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+DEFAULT_TOP_K = 5
+DEFAULT_BLOCK_SIZE = 16
+
+# pattern classes reported for text columns, as the share of non-null values
+# that fully match
+PATTERNS = {
+    "email": r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}",
+    "uuid": r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    "phone": r"\+?\(?\d{1,4}\)?[\s.-]?\d{2,4}[\s.-]?\d{3,4}(?:[\s.-]?\d{1,4})?",
+    "url": r"https?://\S+",
+}
+_DATE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}"
+)
+
+profile_seconds = metrics_registry.histogram("profile_duration_seconds", "Time spent profiling one sample with pandas")
+profiled_columns = metrics_registry.counter("profile_columns_total", "Columns profiled")
+
+
+def _py(value: Any) -> Any:
+    """JSON-friendly scalar: numpy types unwrapped, NaN/NaT as None."""
+    if value is None:
+        return None
+    if isinstance(value, (np.datetime64, pd.Timestamp)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _quantile_key(q: float) -> str:
+    return f"p{round(q * 100):g}"
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """Boolean mask marking where any of the (sorted) `keys` changes value."""
+    starts = np.zeros(len(keys[0]), dtype=bool)
+    if len(starts):
+        starts[0] = True
+        for key in keys:
+            starts[1:] |= key[1:] != key[:-1]
+    return starts
+
+
+def _top_k(groups: np.ndarray, values: np.ndarray, counts: np.ndarray, k: int, n_groups: int) -> List[List[Dict[str, Any]]]:
+    """The `k` most frequent values per group from (group, value, count) runs."""
+    top: List[List[Dict[str, Any]]] = [[] for _ in range(n_groups)]
+    if not len(groups) or k <= 0:
+        return top
+    order = np.lexsort((-counts, groups))
+    groups, values, counts = groups[order], values[order], counts[order]
+    first = np.flatnonzero(_group_starts(groups))
+    rank = np.arange(len(groups)) - np.repeat(first, np.diff(np.r_[first, len(groups)]))
+    for i in np.flatnonzero(rank < k):
+        top[groups[i]].append({"value": values[i], "count": int(counts[i])})
+    return top
+
+
+def _as_text(value: Any) -> Any:
+    """Compact JSON for unhashable values (lists, dicts, arrays); others unchanged."""
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if not isinstance(value, (list, dict, set)):
+        return value
+    try:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class ColumnProfiler:
+    def __init__(self, top_k: int = DEFAULT_TOP_K, quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.top_k = top_k
+        self.quantiles = tuple(quantiles)
+        self.block_size = block_size
+
+    def profile(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """Profile every column of `df`; keys follow the frame's column order."""
+        started = time.perf_counter()
+        df = _coerce_objects(df)
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for kind, columns in self._group_by_kind(df).items():
+            for i in range(0, len(columns), self.block_size):
+                block = df[columns[i:i + self.block_size]]
+                if kind == "numeric":
+                    profiles.update(self._profile_numeric(block))
+                elif kind == "datetime":
+                    profiles.update(self._profile_datetime(block))
+                else:
+                    profiles.update(self._profile_text(block))
+        profile_seconds.observe(time.perf_counter() - started)
+        profiled_columns.inc(len(df.columns))
+        return {str(col): profiles[str(col)] for col in df.columns}
+
+    @staticmethod
+    def _group_by_kind(df: pd.DataFrame) -> Dict[str, List[Any]]:
+        groups: Dict[str, List[Any]] = {"numeric": [], "datetime": [], "text": []}
+        for col, dtype in df.dtypes.items():
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                groups["datetime"].append(col)
+            elif pd.api.types.is_numeric_dtype(dtype):
+                groups["numeric"].append(col)
+            else:
+                groups["text"].append(col)
+        return groups
+
+    def _base(self, block: pd.DataFrame, kind: str, non_null: np.ndarray) -> List[Dict[str, Any]]:
+        n = len(block)
+        return [
+            {
+                "kind": kind,
+                "dtype": str(dtype),
+                "count": n,
+                "non_null": int(nn),
+                "null_count": int(n - nn),
+                "null_ratio": (n - nn) / n if n else 0.0,
+            }
+            for dtype, nn in zip(block.dtypes, non_null)
+        ]
+
+    def _sorted_stats(self, keys: np.ndarray, non_null: np.ndarray):
+        """Distinct counts, top-k, min/max and quantiles from a row-sorted block.
+
+        `keys` is (rows, columns) with every column's nulls sorted to the end;
+        only the first `non_null[j]` rows of column j are real values.
+        """
+        n, c = keys.shape
+        if n == 0:
+            empty = np.full(c, np.nan)
+            return np.zeros(c, dtype=np.int64), [[] for _ in range(c)], empty, empty, np.full((len(self.quantiles), c), np.nan)
+        # column-major flattening keeps each column's values contiguous
+        flat = keys.T.ravel()
+        col_of = np.repeat(np.arange(c), n)
+        valid = np.tile(np.arange(n), c) < np.repeat(non_null, n)
+        flat, col_of = flat[valid], col_of[valid]
+
+        starts = np.flatnonzero(_group_starts(col_of, flat))
+        run_len = np.diff(np.r_[starts, len(flat)])
+        run_col = col_of[starts]
+        distinct = np.bincount(run_col, minlength=c)
+        top = _top_k(run_col, flat[starts], run_len, self.top_k, c)
+
+        last = np.clip(non_null - 1, 0, None)
+        cols = np.arange(c)
+        minimum, maximum = keys[0, cols], keys[last, cols]
+
+        # linear interpolation between closest ranks, as numpy.quantile does
+        q = np.asarray(self.quantiles, dtype="float64")[:, None]
+        pos = q * last[None, :]
+        lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+        lo_v, hi_v = keys[lo, cols].astype("float64"), keys[hi, cols].astype("float64")
+        quantiles = lo_v + (hi_v - lo_v) * (pos - lo)
+        return distinct, top, minimum, maximum, quantiles
+
+    def _profile_numeric(self, block: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        values = block.to_numpy(dtype="float64", na_value=np.nan)
+        nulls = np.isnan(values)
+        non_null = len(block) - nulls.sum(axis=0)
+        distinct, top, minimum, maximum, quantiles = self._sorted_stats(np.sort(values, axis=0), non_null)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(nulls, 0.0, values).sum(axis=0) / non_null
+            deviation = np.where(nulls, 0.0, values - mean)
+            std = np.sqrt((deviation ** 2).sum(axis=0) / (non_null - 1))
+        std[non_null < 2] = np.nan
+        zeros = (values == 0).sum(axis=0)
+
+        profiles = self._base(block, "numeric", non_null)
+        for j, (p, dtype) in enumerate(zip(profiles, block.dtypes)):
+            has_values = non_null[j] > 0
+            # the block is float64; report integer and boolean values as such
+            if pd.api.types.is_bool_dtype(dtype):
+                cast = bool
+            elif pd.api.types.is_integer_dtype(dtype):
+                cast = int
+            else:
+                cast = _py
+            p.update({
+                "distinct": int(distinct[j]),
+                "top_values": [{"value": cast(t["value"]), "count": t["count"]} for t in top[j]],
+                "min": cast(minimum[j]) if has_values else None,
+                "max": cast(maximum[j]) if has_values else None,
+                "mean": _py(mean[j]),
+                "std": _py(std[j]),
+                "quantiles": {
+                    _quantile_key(q): (_py(quantiles[i, j]) if has_values else None)
+                    for i, q in enumerate(self.quantiles)
+                },
+                "zero_count": int(zeros[j]),
+            })
+        return dict(zip(map(str, block.columns), profiles))
+
+    def _profile_datetime(self, block: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        block = block.apply(lambda s: s.dt.tz_convert(None) if getattr(s.dt, "tz", None) is not None else s)
+        ints = block.to_numpy(dtype="datetime64[ns]").view("int64")
+        nulls = ints == np.iinfo(np.int64).min  # NaT
+        non_null = len(block) - nulls.sum(axis=0)
+        # push NaT to the end of each column so the valid values come first
+        keys = np.sort(np.where(nulls, np.iinfo(np.int64).max, ints), axis=0)
+        distinct, top, minimum, maximum, quantiles = self._sorted_stats(keys, non_null)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            as_float = ints.astype("float64")
+            mean = np.where(nulls, 0.0, as_float).sum(axis=0) / non_null
+            deviation = np.where(nulls, 0.0, as_float - mean)
+            std = np.sqrt((deviation ** 2).sum(axis=0) / (non_null - 1))
+
+        def stamp(ns) -> Optional[str]:
+            return None if not np.isfinite(ns) else pd.Timestamp(int(ns)).isoformat()
+
+        profiles = self._base(block, "datetime", non_null)
+        for j, p in enumerate(profiles):
+            has_values = non_null[j] > 0
+            p.update({
+                "distinct": int(distinct[j]),
+                "top_values": [{"value": stamp(t["value"]), "count": t["count"]} for t in top[j]],
+                "min": stamp(minimum[j]) if has_values else None,
+                "max": stamp(maximum[j]) if has_values else None,
+                "mean": stamp(mean[j]),
+                "std_seconds": _py(std[j] / 1e9) if non_null[j] > 1 else None,
+                "quantiles": {
+                    _quantile_key(q): (stamp(quantiles[i, j]) if has_values else None)
+                    for i, q in enumerate(self.quantiles)
+                },
+            })
+        return dict(zip(map(str, block.columns), profiles))
+
+    def _profile_text(self, block: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        n, c = block.shape
+        values = block.to_numpy(dtype=object)
+        nulls = pd.isna(values)
+        non_null = n - nulls.sum(axis=0)
+
+        # factorize the whole block once; everything else is computed on the
+        # distinct strings and weighted by how often each occurs per column
+        valid = ~nulls.T.ravel()
+        col_of = np.repeat(np.arange(c), n)[valid]
+        flat = values.T.ravel()[valid]
+        try:
+            codes, uniques = pd.factorize(flat)
+        except TypeError:
+            # ARRAY and json columns hold lists and dicts; profile their JSON text
+            codes, uniques = pd.factorize(np.array([_as_text(v) for v in flat], dtype=object))
+        # distinct objects can share a text form (1 and "1"); merge them
+        text_codes, text = pd.factorize(pd.Index(uniques, dtype=object).astype(str))
+        codes = text_codes[codes] if len(codes) else codes
+        u = max(len(text), 1)
+        pair_keys, pair_counts = np.unique(col_of.astype(np.int64) * u + codes, return_counts=True)
+        pair_col, pair_val = np.divmod(pair_keys, u)
+
+        strings = pd.Series(text, dtype=object)
+        lengths = strings.str.len().to_numpy(dtype="float64")
+
+        def per_column(feature) -> np.ndarray:
+            """Occurrence-weighted per-column sum of a per-distinct-string feature."""
+            feature = np.asarray(feature, dtype="float64")
+            return np.bincount(pair_col, weights=feature[pair_val] * pair_counts, minlength=c)
+
+        length_sum = per_column(lengths)
+        empties = per_column(lengths == 0)
+        numeric = per_column(pd.to_numeric(strings, errors="coerce").notna())
+        dates = per_column(strings.str.fullmatch(_DATE))
+        patterns = {name: per_column(strings.str.fullmatch(rx)) for name, rx in PATTERNS.items()}
+
+        distinct = np.bincount(pair_col, minlength=c)
+        top = _top_k(pair_col, np.asarray(text, dtype=object)[pair_val], pair_counts, self.top_k, c)
+
+        # per-column min/max over the (column-sorted) pairs
+        length_min, length_max = np.full(c, np.nan), np.full(c, np.nan)
+        minimum: Dict[int, str] = {}
+        maximum: Dict[int, str] = {}
+        starts = np.flatnonzero(_group_starts(pair_col))
+        if len(starts):
+            present = pair_col[starts]
+            length_min[present] = np.minimum.reduceat(lengths[pair_val], starts)
+            length_max[present] = np.maximum.reduceat(lengths[pair_val], starts)
+            order = np.argsort(np.asarray(text, dtype=object), kind="stable")
+            rank = np.empty(len(text), dtype=np.int64)
+            rank[order] = np.arange(len(text))
+            ordered = np.asarray(text, dtype=object)[order]
+            minimum = dict(zip(present, ordered[np.minimum.reduceat(rank[pair_val], starts)]))
+            maximum = dict(zip(present, ordered[np.maximum.reduceat(rank[pair_val], starts)]))
+
+        profiles = self._base(block, "text", non_null)
+        for j, p in enumerate(profiles):
+            nn = non_null[j]
+
+            def ratio(counts_per_column) -> Optional[float]:
+                return round(float(counts_per_column[j]) / nn, 4) if nn else None
+
+            p.update({
+                "distinct": int(distinct[j]),
+                "top_values": top[j],
+                "min": minimum.get(j),
+                "max": maximum.get(j),
+                "min_length": int(length_min[j]) if nn else None,
+                "max_length": int(length_max[j]) if nn else None,
+                "avg_length": round(float(length_sum[j]) / nn, 2) if nn else None,
+                "empty_count": int(empties[j]),
+                "numeric_parse_rate": ratio(numeric),
+                "date_parse_rate": ratio(dates),
+                "patterns": {name: ratio(found) for name, found in patterns.items()},
+            })
+        return dict(zip(map(str, block.columns), profiles))
+
+
+def _coerce_objects(df: pd.DataFrame) -> pd.DataFrame:
+    """Give object columns that only hold numbers or datetimes a real dtype.
+
+    Rows built from driver records keep `Decimal` and `datetime` values in
+    object columns; converting them lets those columns use the numeric and
+    datetime blocks.
+    """
+    coerced = df
+    for col in df.columns[(df.dtypes == object).to_numpy()]:
+        inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+        if inferred in ("decimal", "integer", "floating", "mixed-integer-float"):
+            values = pd.to_numeric(df[col], errors="coerce")
+        elif inferred in ("datetime", "datetime64", "date"):
+            values = pd.to_datetime(df[col], errors="coerce", utc=True).dt.tz_convert(None)
+        else:
+            continue
+        if coerced is df:
+            coerced = df.copy()
+        coerced[col] = values
+    return coerced
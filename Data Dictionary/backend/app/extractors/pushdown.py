@@ -0,0 +1,121 @@
+"""Quality metrics computed by the source database as one aggregate query.
+
+Instead of pulling rows into pandas, `build_profile_query` generates a single
+`SELECT COUNT(*), COUNT(col), ...` over the whole table, so the metrics are
+exact (or HyperLogLog estimates for distinct counts where the engine has
+`APPROX_COUNT_DISTINCT`) and no rows leave the database.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# (column name, declared type) pairs as reported by the connector
+ColumnSpec = Tuple[str, str]
+
+_NUMERIC = re.compile(r"\b(tiny|small|medium|big)?int(eger)?\d*\b|numeric|decimal|real|double|float|number|serial", re.I)
+_STRING = re.compile(r"char|text|string|clob|enum", re.I)
+_TEMPORAL = re.compile(r"date|time|interval", re.I)
+# types without a usable equality / ordering in at least one engine
+_OPAQUE = re.compile(r"json|xml|bytea|blob|binary|image|geometry|geography|array|\[\]|variant|object|bool|bit", re.I)
+# comparable for equality only: no MIN/MAX, LENGTH or comparison with 0 / '' (Postgres rejects them)
+_IDENTITY = re.compile(r"uuid|uniqueidentifier|money|inet|cidr|macaddr", re.I)
+
+_APPROX_DISTINCT = {"snowflake", "sqlserver"}
+
+
+def quote_ident(name: str, dialect: str) -> str:
+    if dialect == "mysql":
+        return "`" + name.replace("`", "``") + "`"
+    if dialect == "sqlserver":
+        return "[" + name.replace("]", "]]") + "]"
+    return '"' + name.replace('"', '""') + '"'
+
+
+def type_category(data_type: Optional[str]) -> str:
+    data_type = data_type or ""
+    if _OPAQUE.search(data_type):
+        return "other"
+    if _IDENTITY.search(data_type):
+        return "identity"
+    if _TEMPORAL.search(data_type) and not _STRING.search(data_type):
+        return "temporal"
+    if _NUMERIC.search(data_type) and not _STRING.search(data_type):
+        return "numeric"
+    if _STRING.search(data_type):
+        return "string"
+    return "other"
+
+
+def columns_from_schema(schema: Dict[str, Any]) -> List[ColumnSpec]:
+    """Read (name, type) pairs from any connector's `get_table_schema` output."""
+    specs = []
+    for col in schema.get("columns") or []:
+        if not isinstance(col, dict):
+            continue
+        lowered = {str(k).lower(): v for k, v in col.items()}
+        name = lowered.get("column_name") or lowered.get("name")
+        dtype = lowered.get("data_type") or lowered.get("column_type") or lowered.get("type")
+        if name:
+            specs.append((str(name), str(dtype or "")))
+    return specs
+
+
+def _length_fn(dialect: str) -> str:
+    return {"mysql": "CHAR_LENGTH", "sqlserver": "LEN"}.get(dialect, "LENGTH")
+
+
+def build_profile_query(table_name: str, columns: List[ColumnSpec], dialect: str) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+    """Build the aggregate query for `columns` of `table_name`.
+
+    Returns the SQL and a map from result alias to (column, metric) used by
+    `parse_profile_row`. `table_name` is used verbatim (it may be schema
+    qualified); column names are quoted for `dialect`.
+    """
+    select = ["COUNT(*) AS row_count"]
+    aliases: Dict[str, Tuple[str, str]] = {}
+
+    def add(expr: str, column: str, metric: str):
+        alias = f"c{len(aliases)}"
+        aliases[alias] = (column, metric)
+        select.append(f"{expr} AS {alias}")
+
+    distinct_fn = "APPROX_COUNT_DISTINCT({})" if dialect in _APPROX_DISTINCT else "COUNT(DISTINCT {})"
+    for name, dtype in columns:
+        col = quote_ident(name, dialect)
+        category = type_category(dtype)
+        add(f"COUNT({col})", name, "non_null")
+        if category == "other":
+            continue
+        add(distinct_fn.format(col), name, "distinct")
+        if category == "identity":
+            continue
+        add(f"MIN({col})", name, "min")
+        add(f"MAX({col})", name, "max")
+        if category == "numeric":
+            add(f"SUM(CASE WHEN {col} = 0 THEN 1 ELSE 0 END)", name, "zero_count")
+        elif category == "string":
+            add(f"AVG({_length_fn(dialect)}({col}))", name, "avg_length")
+            add(f"SUM(CASE WHEN {col} = '' THEN 1 ELSE 0 END)", name, "empty_count")
+    return f"SELECT {', '.join(select)} FROM {table_name}", aliases
+
+
+def parse_profile_row(row: Dict[str, Any], aliases: Dict[str, Tuple[str, str]]) -> Dict[str, Any]:
+    """Turn the aggregate row into the `/api/quality` metrics shape."""
+    lowered = {str(k).lower(): v for k, v in row.items()}
+    total = int(lowered.get("row_count") or 0)
+    columns: Dict[str, Dict[str, Any]] = {}
+    for alias, (column, metric) in aliases.items():
+        value = lowered.get(alias)
+        if metric in ("non_null", "distinct", "zero_count", "empty_count") and value is not None:
+            value = int(value)
+        elif metric == "avg_length" and value is not None:
+            value = round(float(value), 2)
+        columns.setdefault(column, {})[metric] = value
+    for stats in columns.values():
+        stats["null_count"] = total - stats["non_null"]
+    return {
+        "completeness": {c: (s["non_null"] / total if total else 0.0) for c, s in columns.items()},
+        "rows_sampled": total,
+        "columns_analyzed": len(columns),
+        "columns": columns,
+    }
@@ -1,15 +1,85 @@
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List
+from app.extractors.sampling import Sampler
+from app.config import settings
+from app.core.logging import logger
+from app.extractors.profiler import ColumnProfiler
+from app.ai.inference import MetadataInferenceEngine
+from app.extractors.pushdown import build_profile_query, columns_from_schema, parse_profile_row
 
 class QualityAnalyzer:
     def __init__(self, connector):
         self.connector = connector
 
-    async def analyze_table(self, table_name: str, sample_rows: int = 1000) -> Dict[str, Any]:
-        # Basic implementation: fetch sample rows (connectors may provide helper) and compute completeness
-        # Connectors currently don't implement fetch rows; this is a placeholder showing intended logic.
-        # In production, connectors should provide `fetch_rows(table_name, limit)` method.
-        return {"table": table_name, "metrics": {"completeness": None}}
+    async def analyze_table(self, table_name: str, sample_rows: int = 1000, batch_size: int = None,
+                            profile: bool = False) -> Dict[str, Any]:
+        """Compute completeness over a statistical sample of at most `sample_rows` rows.
+
+        `Sampler` picks the sampling strategy; rows arrive as columnar chunks
+        and `metrics["sampling"]` reports the strategy and its error. Only
+        running counts are kept unless `profile` is set. Then the first
+        `PROFILE_MAX_ROWS` sampled rows are also kept as frames, and
+        `metrics["columns"]` holds a `ColumnProfiler` profile per column and
+        `metrics["inferred_metadata"]` the columns `MetadataInferenceEngine`
+        can describe from them.
+        """
+        counter = CompletenessCounter()
+        sampler = Sampler(self.connector)
+        frames: List[pd.DataFrame] = []
+        kept = 0
+        async for chunk in sampler.stream(table_name, sample_rows, batch_size=batch_size):
+            counter.add(chunk)
+            if profile and kept < settings.PROFILE_MAX_ROWS:
+                # a frame stores typed columns far more compactly than lists of objects
+                frame = pd.DataFrame(chunk).iloc[:settings.PROFILE_MAX_ROWS - kept]
+                frames.append(frame)
+                kept += len(frame)
+        metrics = {
+            "completeness": counter.completeness(),
+            "rows_sampled": counter.rows,
+            "columns_analyzed": len(counter.columns),
+            "sampling": sampler.plan,
+        }
+        if profile:
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            metrics["profile_rows"] = len(df)
+            metrics["columns"] = ColumnProfiler().profile(df)
+            metrics["inferred_metadata"] = MetadataInferenceEngine().infer_profiles(table_name, metrics["columns"])
+        return {"table": table_name, "metrics": metrics}
+
+    async def compute_pushdown_metrics(self, table_name: str) -> Dict[str, Any]:
+        """Compute exact table metrics with one aggregate query in the database.
+
+        Raises NotImplementedError when the connector has no SQL dialect;
+        callers fall back to `analyze_table`.
+        """
+        dialect = getattr(self.connector, "dialect", None)
+        if not dialect:
+            raise NotImplementedError(f"{type(self.connector).__name__} does not support pushdown")
+        schema = await self.connector.get_table_schema(table_name)
+        columns = columns_from_schema(schema)
+        if not columns:
+            raise ValueError(f"No columns found for table {table_name}")
+        query, aliases = build_profile_query(table_name, columns, dialect)
+        row = await self.connector.fetch_aggregate(query)
+        metrics = parse_profile_row(row, aliases)
+        metrics["mode"] = "pushdown"
+        return {"table": table_name, "metrics": metrics}
+
+    async def analyze(self, table_name: str, mode: str = "sample", sample_rows: int = 1000,
+                      profile: bool = False) -> Dict[str, Any]:
+        """Run `mode` ("pushdown" or "sample"); pushdown falls back to sampling on failure.
+
+        `profile` adds column profiles to sample-mode results.
+        """
+        if mode == "pushdown":
+            try:
+                return await self.compute_pushdown_metrics(table_name)
+            except Exception as e:
+                logger.warning(f"Pushdown metrics failed for {table_name}, falling back to sampling: {str(e)}")
+        analysis = await self.analyze_table(table_name, sample_rows=sample_rows, profile=profile)
+        analysis["metrics"]["mode"] = "sample"
+        return analysis
 
     def compute_completeness(self, df: pd.DataFrame) -> Dict[str, float]:
         res = {}
@@ -18,3 +88,27 @@ class QualityAnalyzer:
             non_null = df[col].notnull().sum()
             res[col] = non_null / total if total > 0 else 0.0
         return res
+
+
+class CompletenessCounter:
+    """Running non-null counts over columnar chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: List[str] = []
+        self._non_null: Dict[str, int] = {}
+
+    def add(self, chunk: Dict[str, Iterable[Any]]):
+        if not chunk:
+            return
+        # one DataFrame per chunk keeps pandas' null semantics (None, NaN, NaT)
+        counts = pd.DataFrame(chunk).notna().sum()
+        for col, n in counts.items():
+            if col not in self._non_null:
+                self.columns.append(col)
+                self._non_null[col] = 0
+            self._non_null[col] += int(n)
+        self.rows += len(next(iter(chunk.values())))
+
+    def completeness(self) -> Dict[str, float]:
+        return {col: (self._non_null[col] / self.rows if self.rows else 0.0) for col in self.columns}
@@ -0,0 +1,159 @@
+"""Database-side statistical sampling for quality analysis.
+
+`SELECT * ... LIMIT n` returns the first physical rows, which is a biased
+sample. `Sampler` picks a strategy per table instead:
+
+- `full`: the catalog estimate says the table is no bigger than the sample,
+  so it is read completely and the metrics are exact.
+- a connector-native strategy (`Connector.plan_sample`), e.g. Postgres
+  `TABLESAMPLE SYSTEM/BERNOULLI`, MySQL random primary-key ranges or
+  Snowflake `SAMPLE (n ROWS)`.
+- `reservoir`: uniform reservoir sampling over the first
+  `SAMPLE_SCAN_LIMIT` streamed rows for connectors without native support.
+
+The sample size is derived from the catalog row estimate: just enough rows
+to reach `SAMPLE_TARGET_ERROR` (95% margin of error of a proportion such as
+completeness) after finite population correction, capped by the requested
+size. Every run reports the chosen strategy and its estimated error.
+"""
+
+import math
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import settings
+from app.connectors.base import ColumnChunk
+from app.core.errors import SamplingUnsupported
+from app.core.logging import logger
+
+Z_95 = 1.96
+
+# Block / range sampling returns correlated rows; inflate the variance by this
+# design effect when estimating their error.
+CLUSTERED_DESIGN_EFFECT = 2.0
+CLUSTERED_STRATEGIES = {"tablesample_system", "random_key_range"}
+
+
+def required_sample_size(estimated_rows: Optional[int], target_error: float) -> int:
+    """Rows needed for a worst-case (p=0.5) margin of error of `target_error`."""
+    n0 = math.ceil(Z_95 ** 2 * 0.25 / target_error ** 2)
+    if not estimated_rows or estimated_rows <= 0:
+        return n0
+    return math.ceil(n0 / (1 + (n0 - 1) / estimated_rows))
+
+
+def estimated_error(sample_size: int, estimated_rows: Optional[int], design_effect: float = 1.0) -> Optional[float]:
+    """95% margin of error of a proportion measured on the sample."""
+    if sample_size <= 0:
+        return None
+    if estimated_rows is not None and sample_size >= estimated_rows:
+        return 0.0
+    fpc = 1.0
+    if estimated_rows and estimated_rows > 1:
+        fpc = math.sqrt(max(estimated_rows - sample_size, 0) / (estimated_rows - 1))
+    return Z_95 * math.sqrt(0.25 * design_effect / sample_size) * fpc
+
+
+class Reservoir:
+    """Algorithm R over columnar chunks; keeps at most `size` rows."""
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None):
+        self.size = size
+        self.seen = 0
+        self.columns: List[str] = []
+        self.rows: List[tuple] = []
+        self._rng = rng or random.Random()
+
+    def add(self, chunk: ColumnChunk):
+        if not chunk:
+            return
+        if not self.columns:
+            self.columns = list(chunk)
+        for row in zip(*(chunk[c] for c in self.columns)):
+            self.seen += 1
+            if len(self.rows) < self.size:
+                self.rows.append(row)
+            else:
+                j = self._rng.randrange(self.seen)
+                if j < self.size:
+                    self.rows[j] = row
+
+    def chunks(self, batch_size: int):
+        for i in range(0, len(self.rows), batch_size):
+            batch = self.rows[i:i + batch_size]
+            yield {name: list(values) for name, values in zip(self.columns, zip(*batch))}
+
+
+class Sampler:
+    def __init__(self, connector, target_error: Optional[float] = None):
+        self.connector = connector
+        self.target_error = target_error or settings.SAMPLE_TARGET_ERROR
+        self.plan: Dict[str, Any] = {}
+
+    async def make_plan(self, table_name: str, requested: int) -> Dict[str, Any]:
+        try:
+            estimated_rows = await self.connector.estimate_row_count(table_name)
+        except Exception as e:
+            logger.warning(f"Row estimate unavailable for {table_name}: {str(e)}")
+            estimated_rows = None
+        if estimated_rows is not None and estimated_rows < 0:
+            # Postgres reports -1 for tables that were never analyzed
+            estimated_rows = None
+
+        size = min(requested, required_sample_size(estimated_rows, self.target_error))
+        if estimated_rows is not None and estimated_rows <= requested:
+            strategy, size = "full", requested
+        else:
+            strategy = self.connector.plan_sample(estimated_rows, size) or "reservoir"
+        return {"strategy": strategy, "sample_size": size, "requested": requested, "estimated_rows": estimated_rows}
+
+    async def stream(self, table_name: str, requested: int, batch_size: Optional[int] = None) -> AsyncIterator[ColumnChunk]:
+        """Yield the sample as columnar chunks; `self.plan` describes it afterwards."""
+        batch_size = batch_size or settings.ROW_BATCH_SIZE
+        plan = self.plan = await self.make_plan(table_name, requested)
+        rows = 0
+
+        if plan["strategy"] not in ("full", "reservoir"):
+            try:
+                async for chunk in self.connector.stream_sample(table_name, plan, batch_size):
+                    rows += len(next(iter(chunk.values()), []))
+                    yield chunk
+            except SamplingUnsupported as e:
+                if rows:
+                    raise
+                logger.info(f"{plan['strategy']} unavailable for {table_name} ({str(e)}); using reservoir sampling")
+                plan["strategy"] = "reservoir"
+
+        if plan["strategy"] == "full":
+            async for chunk in self.connector.stream_rows(table_name, limit=plan["sample_size"], batch_size=batch_size):
+                rows += len(next(iter(chunk.values()), []))
+                yield chunk
+        elif plan["strategy"] == "reservoir":
+            reservoir = Reservoir(plan["sample_size"])
+            scan_limit = max(settings.SAMPLE_SCAN_LIMIT, plan["sample_size"])
+            async for chunk in self.connector.stream_rows(table_name, limit=scan_limit, batch_size=batch_size):
+                reservoir.add(chunk)
+            plan["rows_scanned"] = reservoir.seen
+            for chunk in reservoir.chunks(batch_size):
+                rows += len(next(iter(chunk.values()), []))
+                yield chunk
+
+        self._finish_plan(rows)
+
+    def _finish_plan(self, rows: int):
+        plan = self.plan
+        plan["rows_sampled"] = rows
+        population = plan["estimated_rows"]
+        if plan["strategy"] == "full":
+            # exact unless the (stale) estimate hid rows beyond the limit
+            exact = rows < plan["sample_size"]
+            plan["estimated_error"] = 0.0 if exact else round(estimated_error(rows, None), 4)
+            return
+        if plan["strategy"] == "reservoir" and plan.get("rows_scanned") is not None:
+            # the reservoir is only uniform over the rows it scanned
+            if population is None or plan["rows_scanned"] < population:
+                plan["population_covered"] = plan["rows_scanned"]
+            population = plan["rows_scanned"] if population is None else min(population, plan["rows_scanned"])
+        design_effect = CLUSTERED_DESIGN_EFFECT if plan["strategy"] in CLUSTERED_STRATEGIES else 1.0
+        error = estimated_error(rows, population, design_effect)
+        plan["estimated_error"] = round(error, 4) if error is not None else None
@@ -0,0 +1,66 @@
+"""Schema fingerprints and structured catalog diffs for incremental extraction."""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+
+def schema_fingerprint(schema: Dict[str, Any]) -> str:
+    """Content hash of an extracted table schema (column order is significant)."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _column_name(column: Any) -> Optional[str]:
+    if isinstance(column, dict):
+        for key in ("column_name", "COLUMN_NAME", "name", "NAME"):
+            if column.get(key) is not None:
+                return str(column[key])
+    return None
+
+
+def diff_table(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Column-level differences between two versions of one table."""
+    old_cols = {_column_name(c): c for c in before.get("columns") or []}
+    new_cols = {_column_name(c): c for c in after.get("columns") or []}
+    changed = {
+        name: {"before": old_cols[name], "after": col}
+        for name, col in new_cols.items()
+        if name in old_cols and json.dumps(old_cols[name], sort_keys=True, default=str)
+        != json.dumps(col, sort_keys=True, default=str)
+    }
+    other_keys = (set(before) | set(after)) - {"columns"}
+    return {
+        "added_columns": [n for n in new_cols if n not in old_cols],
+        "dropped_columns": [n for n in old_cols if n not in new_cols],
+        "changed_columns": changed,
+        "constraints_changed": any(
+            json.dumps(before.get(k), sort_keys=True, default=str)
+            != json.dumps(after.get(k), sort_keys=True, default=str)
+            for k in other_keys
+        ),
+    }
+
+
+def diff_catalogs(
+    previous: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    fingerprints: Dict[str, str],
+) -> Dict[str, Any]:
+    """Compare stored entries (table -> {fingerprint, schema}) with a new extraction.
+
+    `fingerprints` holds the fingerprint of every table in `current`.
+    """
+    added = sorted(k for k in current if k not in previous)
+    dropped = sorted(k for k in previous if k not in current)
+    altered = {}
+    unchanged = 0
+    for key in sorted(current):
+        old = previous.get(key)
+        if old is None:
+            continue
+        if old["fingerprint"] == fingerprints[key]:
+            unchanged += 1
+        else:
+            altered[key] = diff_table(old["schema"], current[key])
+    return {"added": added, "dropped": dropped, "altered": altered, "unchanged": unchanged}
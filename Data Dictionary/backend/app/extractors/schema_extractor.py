@@ -1,20 +1,421 @@
-from typing import Dict, Any
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from app.connectors.base import BaseConnector
 from app.core.errors import ExtractionError
+from app.core.logging import logger
+from app.core.singleflight import flight_group
+from app.config import settings
+from app.extractors.schema_diff import diff_catalogs, schema_fingerprint
+
+extract_flight = flight_group("extract")
+
+
+def _row_value(row: Dict[str, Any], *keys: str) -> Optional[Any]:
+    # connectors return either lower-case (postgres) or upper-case (mysql,
+    # sql server) column labels; accept both
+    for key in keys:
+        value = row.get(key)
+        if value is None:
+            value = row.get(key.upper())
+        if value is not None:
+            return value
+    return None
+
+
+def _table_name(row: Dict[str, Any]) -> Optional[str]:
+    return _row_value(row, "table_name", "name")
+
+
+def _table_schema(row: Dict[str, Any]) -> Optional[str]:
+    return _row_value(row, "table_schema", "schema_name")
+
+
+def result_keys(pairs) -> Dict[Tuple[Optional[str], str], str]:
+    """Map (schema, table) pairs to result keys.
+
+    Tables are keyed by name like the per-table path; a name that exists in
+    several schemas is keyed as `schema.table` instead so the entries don't
+    overwrite each other.
+    """
+    pairs = list(pairs)
+    name_counts: Dict[str, int] = {}
+    for _, name in pairs:
+        name_counts[name] = name_counts.get(name, 0) + 1
+    return {
+        (schema, name): name if name_counts[name] == 1 or not schema else f"{schema}.{name}"
+        for schema, name in pairs
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
 
 class SchemaExtractor:
-    def __init__(self, connector: BaseConnector):
+    """Extracts table schemas from a connector.
+
+    Connectors with bulk catalog support are read in a few set-based queries.
+    Everything else goes table by table, `concurrency` tables at a time, with
+    a per-table timeout and retries. A table that still fails is recorded in
+    `errors` instead of failing the whole run; `stats` describes the last run.
+    """
+
+    def __init__(
+        self,
+        connector: BaseConnector,
+        concurrency: Optional[int] = None,
+        table_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+    ):
         self.connector = connector
+        self.concurrency = concurrency or settings.EXTRACT_CONCURRENCY
+        self.table_timeout = table_timeout if table_timeout is not None else settings.EXTRACT_TABLE_TIMEOUT
+        self.retries = retries if retries is not None else settings.EXTRACT_RETRIES
+        self.retry_backoff = retry_backoff if retry_backoff is not None else settings.EXTRACT_RETRY_BACKOFF
+        self.errors: Dict[str, str] = {}
+        self.stats: Dict[str, Any] = {}
+        self.diff: Optional[Dict[str, Any]] = None
+        self._latencies: List[float] = []
 
     async def extract_all(self) -> Dict[str, Any]:
+        """Extract every table; concurrent calls against the same pool share one run."""
+        source = getattr(getattr(self.connector, "pool", None), "key", None)
+        if source is None:
+            return await self._extract_all()
+
+        async def run():
+            result = await self._extract_all()
+            return result, self.errors, self.stats
+
+        result, errors, stats = await extract_flight.do(source, run)
+        # every caller gets its own copies of the shared run
+        self.errors, self.stats = dict(errors), dict(stats)
+        return dict(result)
+
+    async def _extract_all(self) -> Dict[str, Any]:
+        self.errors = {}
+        started = time.perf_counter()
+        try:
+            if getattr(self.connector, "supports_bulk_catalog", False):
+                try:
+                    catalog = await self.connector.get_catalog()
+                except NotImplementedError:
+                    catalog = None
+                if catalog is not None:
+                    result = self.group_catalog(catalog)
+                    self._finish_run("bulk", started, len(result), [])
+                    return result
+            return await self._extract_per_table(started)
+        except Exception as e:
+            raise ExtractionError(str(e))
+
+    def _effective_concurrency(self) -> int:
+        # never ask for more parallel tables than the shared pool can serve
+        limit = max(1, self.concurrency)
+        pool_max = getattr(getattr(self.connector, "pool", None), "max_size", None)
+        if isinstance(pool_max, int) and pool_max > 0:
+            limit = min(limit, pool_max)
+        return limit
+
+    async def _extract_per_table(self, started: float) -> Dict[str, Any]:
+        tables = await self.connector.get_tables()
+        # t may be dict with table_schema/table_name or NAME depending on connector
+        names = [_table_name(t) for t in tables]
+        result = await self._extract_tables(names)
+        self._finish_run("per_table", started, len(names), self._latencies)
+        return result
+
+    async def _extract_tables(self, names: List[str]) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(self._effective_concurrency())
+        latencies: List[float] = []
+
+        async def extract_one(table_name: str):
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    return await self.extract_table(table_name)
+                finally:
+                    latencies.append(time.perf_counter() - t0)
+
+        outcomes = await asyncio.gather(*(extract_one(n) for n in names), return_exceptions=True)
+
+        result = {}
+        for table_name, outcome in zip(names, outcomes):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                self.errors[table_name] = str(outcome) or type(outcome).__name__
+            else:
+                result[table_name] = outcome
+        self._latencies = latencies
+        return result
+
+    async def iter_tables(self, chunk_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each table's schema as soon as it has been extracted.
+
+        Records are `{"type": "table", "table", "schema"}` or
+        `{"type": "error", "table", "error"}`, followed by one
+        `{"type": "summary"}` record with the run stats. Only a bounded amount
+        of the catalog is held at once: bulk connectors are read
+        `chunk_size` tables per query round and per-table connectors keep at
+        most `concurrency` tables in flight.
+        """
+        self.errors = {}
+        started = time.perf_counter()
         try:
             tables = await self.connector.get_tables()
-            result = {}
-            for t in tables:
-                # t may be dict with table_schema/table_name or NAME depending on connector
-                table_name = t.get("table_name") or t.get("name") or t.get("name")
-                schema = await self.connector.get_table_schema(table_name)
-                result[table_name] = schema
+        except Exception as e:
+            raise ExtractionError(str(e))
+
+        count = 0
+        if getattr(self.connector, "supports_bulk_catalog", False):
+            chunk_size = chunk_size or settings.EXTRACT_STREAM_CHUNK
+            pairs = [(_table_schema(t), _table_name(t)) for t in tables]
+            keys = result_keys(pairs)
+            for i in range(0, len(pairs), chunk_size):
+                try:
+                    catalog = await self.connector.get_catalog(tables=pairs[i:i + chunk_size])
+                except Exception as e:
+                    raise ExtractionError(str(e))
+                for key, schema in self.group_catalog(catalog, keys=keys).items():
+                    count += 1
+                    yield {"type": "table", "table": key, "schema": schema}
+            mode, latencies = "bulk", []
+        else:
+            names = [_table_name(t) for t in tables]
+            latencies: List[float] = []
+
+            async def extract_one(table_name: str):
+                t0 = time.perf_counter()
+                try:
+                    return table_name, await self.extract_table(table_name), None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return table_name, None, str(e) or type(e).__name__
+                finally:
+                    latencies.append(time.perf_counter() - t0)
+
+            remaining = iter(names)
+            pending = set()
+            limit = self._effective_concurrency()
+            try:
+                while True:
+                    while len(pending) < limit:
+                        name = next(remaining, None)
+                        if name is None:
+                            break
+                        pending.add(asyncio.ensure_future(extract_one(name)))
+                    if not pending:
+                        break
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        table_name, schema, error = task.result()
+                        count += 1
+                        if error is not None:
+                            self.errors[table_name] = error
+                            yield {"type": "error", "table": table_name, "error": error}
+                        else:
+                            yield {"type": "table", "table": table_name, "schema": schema}
+            finally:
+                # the consumer went away (e.g. client disconnected)
+                for task in pending:
+                    task.cancel()
+            mode = "per_table"
+
+        self._finish_run(mode, started, count, latencies)
+        yield {"type": "summary", "tables": count, "errors": len(self.errors), "stats": self.stats}
+
+    async def extract_incremental(self, source: str, store=None) -> Dict[str, Any]:
+        """Extract the catalog, re-reading only tables whose fingerprint changed.
+
+        When the connector offers cheap table signatures, tables whose
+        signature matches the stored one are served from `store` and only the
+        rest are extracted. Otherwise the whole catalog is extracted and
+        compared by content fingerprint. Either way `diff` lists added,
+        dropped and altered tables (with column-level changes) against the
+        previous run for `source`, and the store is updated.
+        """
+        if store is None:
+            from app.storage.fingerprint_store import FingerprintStore
+            store = FingerprintStore()
+        started = time.perf_counter()
+        previous = await asyncio.to_thread(store.load, source)
+        signals: Optional[Dict[str, Any]] = None
+        try:
+            if getattr(self.connector, "supports_table_signatures", False):
+                rows = await self.connector.get_table_signatures()
+                signals = self._key_signatures(rows)
+        except NotImplementedError:
+            signals = None
+        except Exception as e:
+            raise ExtractionError(str(e))
+
+        if signals is None:
+            current = await self.extract_all()
+            reused = 0
+        else:
+            stale = {
+                key: pair for key, (pair, signal) in signals.items()
+                if key not in previous or previous[key]["signal"] != signal
+            }
+            current = {key: previous[key]["schema"] for key in signals if key not in stale}
+            reused = len(current)
+            self.errors = {}
+            if stale:
+                current.update(await self._extract_subset(stale, {pair: key for key, (pair, _) in signals.items()}))
+            else:
+                self._finish_run("incremental", started, 0, [])
+
+        fingerprints = {key: schema_fingerprint(schema) for key, schema in current.items()}
+        # tables that failed this time are neither current nor dropped
+        comparable = {k: v for k, v in previous.items() if k not in self.errors}
+        diff = diff_catalogs(comparable, current, fingerprints)
+        entries = {}
+        for key, schema in current.items():
+            signal = signals[key][1] if signals is not None else None
+            old = previous.get(key)
+            if old is None or old["fingerprint"] != fingerprints[key] or old["signal"] != signal:
+                entries[key] = {"signal": signal, "fingerprint": fingerprints[key], "schema": schema}
+        await asyncio.to_thread(store.save, source, entries, diff["dropped"])
+
+        self.diff = diff
+        self.stats["incremental"] = {"reextracted": len(current) - reused, "reused": reused}
+        self.stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return current
+
+    def _key_signatures(self, rows: List[Dict[str, Any]]) -> Dict[str, Tuple[Tuple[Optional[str], str], Any]]:
+        # key signatures exactly like extract_all keys its result
+        pairs = [((_table_schema(r), _table_name(r)), _row_value(r, "signature")) for r in rows]
+        if getattr(self.connector, "supports_bulk_catalog", False):
+            keys = result_keys(pair for pair, _ in pairs)
+            return {keys[pair]: (pair, None if sig is None else str(sig)) for pair, sig in pairs}
+        return {pair[1]: (pair, None if sig is None else str(sig)) for pair, sig in pairs}
+
+    async def _extract_subset(self, stale: Dict[str, Tuple[Optional[str], str]], keys) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if getattr(self.connector, "supports_bulk_catalog", False):
+                catalog = await self.connector.get_catalog(tables=list(stale.values()))
+                result = self.group_catalog(catalog, keys=keys)
+                self._finish_run("incremental", started, len(stale), [])
+                return result
+            result = await self._extract_tables(list(stale))
+            self._finish_run("incremental", started, len(stale), self._latencies)
             return result
         except Exception as e:
             raise ExtractionError(str(e))
+
+    async def extract_table(self, table_name: str) -> Dict[str, Any]:
+        """Fetch one table's schema with a timeout, retrying with exponential backoff."""
+        attempt = 0
+        while True:
+            try:
+                coro = self.connector.get_table_schema(table_name)
+                if self.table_timeout and self.table_timeout > 0:
+                    return await asyncio.wait_for(coro, timeout=self.table_timeout)
+                return await coro
+            except Exception as e:
+                if attempt >= self.retries:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise ExtractionError(f"timed out after {self.table_timeout}s") from e
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(f"Retrying schema extraction for {table_name} in {delay:.2f}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    def _finish_run(self, mode: str, started: float, table_count: int, latencies: List[float]):
+        elapsed = time.perf_counter() - started
+        ordered = sorted(latencies)
+        self.stats = {
+            "mode": mode,
+            "tables": table_count,
+            "succeeded": table_count - len(self.errors),
+            "failed": len(self.errors),
+            "concurrency": self._effective_concurrency() if latencies else None,
+            "elapsed_s": round(elapsed, 3),
+            "tables_per_sec": round(table_count / elapsed, 2) if elapsed > 0 else None,
+            "latency_ms": {
+                "p50": round(_percentile(ordered, 50) * 1000, 2),
+                "p95": round(_percentile(ordered, 95) * 1000, 2),
+                "p99": round(_percentile(ordered, 99) * 1000, 2),
+                "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+            },
+        }
+        logger.info(
+            f"Schema extraction ({mode}): {self.stats['succeeded']}/{table_count} tables in "
+            f"{self.stats['elapsed_s']}s ({self.stats['tables_per_sec']} tables/s, "
+            f"p99 {self.stats['latency_ms']['p99']}ms)"
+        )
+
+    @staticmethod
+    def group_catalog(
+        catalog: Dict[str, List[Dict[str, Any]]],
+        keys: Optional[Dict[Tuple[Optional[str], str], str]] = None,
+    ) -> Dict[str, Any]:
+        """Group flat catalog rows (see `BaseConnector.get_catalog`) by table.
+
+        Each row is visited exactly once. Tables are keyed as described in
+        `result_keys`; pass `keys` when `catalog` only covers part of the
+        tables so the keys match those of a full extraction.
+        """
+        grouped: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+
+        def entry_for(row: Dict[str, Any]) -> Dict[str, Any]:
+            key = (_table_schema(row), _table_name(row))
+            entry = grouped.get(key)
+            if entry is None:
+                entry = grouped[key] = {
+                    "schema": key[0],
+                    "columns": [],
+                    "primary_key": [],
+                    "foreign_keys": [],
+                    "unique_constraints": [],
+                    "indexes": [],
+                }
+            return entry
+
+        for row in catalog.get("tables") or []:
+            entry_for(row)
+
+        for row in catalog.get("columns") or []:
+            column = {k: v for k, v in row.items() if k.lower() not in ("table_schema", "table_name")}
+            entry_for(row)["columns"].append(column)
+
+        for row in catalog.get("constraints") or []:
+            entry = entry_for(row)
+            ctype = (row.get("constraint_type") or "").upper()
+            columns = list(row.get("columns") or [])
+            if ctype == "PRIMARY KEY":
+                entry["primary_key"] = columns
+            elif ctype == "FOREIGN KEY":
+                entry["foreign_keys"].append({
+                    "constraint_name": row.get("constraint_name"),
+                    "columns": columns,
+                    "referenced_schema": row.get("referenced_schema"),
+                    "referenced_table": row.get("referenced_table"),
+                    "referenced_columns": list(row.get("referenced_columns") or []),
+                })
+            else:
+                entry["unique_constraints"].append({
+                    "constraint_name": row.get("constraint_name"),
+                    "columns": columns,
+                })
+
+        for row in catalog.get("indexes") or []:
+            entry_for(row)["indexes"].append({
+                "index_name": row.get("index_name"),
+                "columns": list(row.get("columns") or []),
+                "is_unique": bool(row.get("is_unique")),
+                "is_primary": bool(row.get("is_primary")),
+            })
+
+        if keys is None:
+            keys = result_keys(grouped)
+        return {keys.get(pair) or pair[1]: entry for pair, entry in grouped.items()}
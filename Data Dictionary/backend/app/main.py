@@ -1,7 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+from app.config import settings
 from app.core.logging import setup_logging
-from app.api.routes import extract, quality, ai, export, sample
+from app.ai.batch import batch_jobs
+from app.core.db import close_db
+from app.core.http import close_http_client, start_http_client
+from app.core.metrics import CONTENT_TYPE, metrics_registry
+from app.core.pools import pool_registry
+from app.core.singleflight import flight_stats
+from app.api.routes import extract, quality, ai, export, sample, dictionary
+from app.core.responses import FastJSONResponse
 from app.api.middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
     SecurityHeadersMiddleware,
     LoggingMiddleware,
     limiter,
@@ -14,12 +25,16 @@ setup_logging()
 app = FastAPI(
     title="Data Dictionary Backend API",
     description="Extract, analyze, and document enterprise database schemas with AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
-# Add middleware (order matters: security first, then logging)
+# Add middleware (order matters: metrics first so they time everything, then
+# security, then logging, then compression)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Rate limiting
 app.state.limiter = limiter
@@ -31,8 +46,41 @@ app.include_router(quality.router, prefix="/api/quality", tags=["data-quality"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai-features"])
 app.include_router(export.router, prefix="/api/export", tags=["export"])
 app.include_router(sample.router, prefix="/api/sample", tags=["sample-data"])
+app.include_router(dictionary.router, prefix="/api/dictionary", tags=["dictionary"])
+
+@app.on_event("startup")
+async def open_http_client():
+    await start_http_client()
+
+@app.on_event("shutdown")
+async def close_connection_pools():
+    await pool_registry.close_all()
+
+@app.on_event("shutdown")
+async def cancel_batch_jobs():
+    # finished tables are already checkpointed; resubmitting resumes the job
+    await batch_jobs.cancel_all()
+
+@app.on_event("shutdown")
+async def close_shared_http_client():
+    await close_http_client()
+
+@app.on_event("shutdown")
+async def close_dictionary_store():
+    await close_db()
 
 @app.get("/healthz", tags=["health"])
 async def healthz():
     return {"status": "ok", "service": "data-dictionary-backend"}
 
+@app.get("/api/inflight", tags=["health"])
+async def inflight():
+    """Request coalescing counters: calls, shared waits and waiters per key."""
+    return {"status": "ok", "groups": flight_stats()}
+
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Prometheus metrics: request, connector, pool, LLM, cache and profiling series."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
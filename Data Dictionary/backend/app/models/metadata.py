@@ -0,0 +1,26 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
+
+# Typed form of the METADATA_PROMPT answer (app/ai/prompt_builder.py).
+# Field names follow the prompt, so answers validate as they are; unknown
+# keys the model adds are kept.
+
+class ColumnMetadata(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    columnName: str = Field(..., min_length=1)
+    dataType: str = Field(..., min_length=1)
+    description: str = Field(..., min_length=1)
+    nullable: Optional[bool] = None
+    isUnique: Optional[bool] = None
+    sampleValues: List[Any] = Field(default_factory=list)
+
+class TableMetadata(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    tableType: str = "TABLE"
+    tableName: str = Field(..., min_length=1)
+    description: str = Field(..., min_length=1)
+    primaryKeys: List[str] = Field(default_factory=list)
+    foreignKeys: List[Any] = Field(default_factory=list)
+    columns: List[ColumnMetadata] = Field(..., min_length=1)
@@ -1,18 +1,40 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, validator
 from typing import Any, Dict, List, Optional
 
+# Catalog entries as SchemaExtractor.extract_all returns them. Connectors add
+# driver-specific fields, which are kept. The extract routes render their
+# response themselves (app/core/responses.py), so these document the shape
+# without validating multi-megabyte catalogs on every call.
+
 class ColumnInfo(BaseModel):
-    column_name: str
-    data_type: Optional[str]
-    is_nullable: Optional[str]
+    model_config = ConfigDict(extra="allow")
+
+    # MySQL and Snowflake rows spell it COLUMN_NAME
+    column_name: Optional[str] = Field(default=None, validation_alias=AliasChoices("column_name", "COLUMN_NAME"))
+    data_type: Optional[str] = None
+    is_nullable: Optional[str] = None
+    ordinal_position: Optional[int] = None
 
 class TableSchema(BaseModel):
-    table_name: str
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    db_schema: Optional[str] = Field(default=None, alias="schema")
     columns: List[ColumnInfo]
+    primary_key: List[str] = Field(default_factory=list)
+    foreign_keys: List[Dict[str, Any]] = Field(default_factory=list)
+    unique_constraints: List[Dict[str, Any]] = Field(default_factory=list)
+    indexes: List[Dict[str, Any]] = Field(default_factory=list)
 
 class ExtractResponse(BaseModel):
     status: str
-    data: Dict[str, Any]
+    # keyed by table name, or `schema.table` when the name is in several schemas
+    data: Dict[str, TableSchema]
+    # tables that could not be extracted, with the reason; the rest of the
+    # catalog is still returned in `data`
+    errors: Optional[Dict[str, str]] = None
+    stats: Optional[Dict[str, Any]] = None
+    # incremental runs only: added/dropped/altered tables since the last run
+    diff: Optional[Dict[str, Any]] = None
 
 class QualityResponse(BaseModel):
     status: str
@@ -26,6 +48,12 @@ class DatabaseConnectionRequest(BaseModel):
     user: Optional[str] = None
     password: Optional[str] = None
     database: Optional[str] = None
+    # Snowflake only; `host` is used as the account identifier when `account` is empty
+    account: Optional[str] = None
+    warehouse: Optional[str] = None
+    db_schema: Optional[str] = None
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64, description="Tables extracted in parallel")
+    incremental: bool = Field(default=False, description="Only re-extract tables whose fingerprint changed")
 
     @validator('db_type')
     def validate_db_type(cls, v):
@@ -37,6 +65,8 @@ class DatabaseConnectionRequest(BaseModel):
 class TableQueryRequest(BaseModel):
     table_name: str = Field(..., min_length=1, max_length=255)
     limit: int = Field(default=1000, ge=1, le=10000)
+    mode: str = Field(default="sample", pattern="^(sample|pushdown)$")
+    profile: bool = Field(default=False, description="Add per-column profiles to sample-mode metrics")
 
     @validator('table_name')
     def sanitize_table_name(cls, v):
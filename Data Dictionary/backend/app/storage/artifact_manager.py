@@ -1,12 +1,20 @@
+import hashlib
 import json
 import os
+import re
+import time
+import uuid
 from datetime import datetime
+from typing import Optional, Tuple
 
 ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "artifacts")
 ARTIFACT_DIR = os.path.abspath(ARTIFACT_DIR)
 
 os.makedirs(ARTIFACT_DIR, exist_ok=True)
 
+# per-table files: `users_20240101120000.md` (older versions) and `users_<content hash>.md`
+_TABLE_ARTIFACT = re.compile(r"_(\d{14}|[0-9a-f]{12})\.(md|json)$")
+
 
 def save_json(name: str, data: dict) -> str:
     ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
@@ -17,19 +25,76 @@ def save_json(name: str, data: dict) -> str:
     return path
 
 
+def write_atomic(path: str, data: bytes):
+    """Write `data` to `path` through a temporary file, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # unique per call: threads and worker processes may write the same path at once
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "xb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _cell(value) -> str:
+    return "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def render_markdown(table_name: str, schema: dict, description: Optional[str] = None) -> str:
+    lines = [f"# Table: {table_name}", ""]
+    if description:
+        lines += [description, ""]
+    cols = schema.get("columns") or []
+    described = any(c.get("description") for c in cols)
+    lines.append("| Column | Data Type | Nullable |" + (" Description |" if described else ""))
+    lines.append("|---|---:|---:|" + ("---|" if described else ""))
+    for c in cols:
+        # support different shapes of column info
+        name = c.get("column_name") or c.get("name") or str(c.get(0, ""))
+        dtype = c.get("data_type") or c.get("type") or ""
+        nullable = c.get("is_nullable") or c.get("nullable") or ""
+        row = f"| {name} | {dtype} | {nullable} |"
+        lines.append(row + f" {_cell(c.get('description'))} |" if described else row)
+    if schema.get("primary_key"):
+        lines += ["", "Primary key: " + ", ".join(map(str, schema["primary_key"]))]
+    foreign_keys = schema.get("foreign_keys") or []
+    if foreign_keys:
+        lines += ["", "Foreign keys:", ""]
+        for fk in foreign_keys:
+            target = ".".join(p for p in (fk.get("referenced_schema"), fk.get("referenced_table")) if p)
+            lines.append(f"- ({', '.join(map(str, fk.get('columns') or []))}) -> "
+                         f"{target}({', '.join(map(str, fk.get('referenced_columns') or []))})")
+    return "\n".join(lines) + "\n"
+
+
 def save_markdown_for_table(table_name: str, schema: dict) -> str:
-    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    filename = f"{table_name}_{ts}.md"
-    path = os.path.join(ARTIFACT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(f"# Table: {table_name}\n\n")
-        cols = schema.get("columns") or []
-        f.write("| Column | Data Type | Nullable |\n")
-        f.write("|---|---:|---:|\n")
-        for c in cols:
-            # support different shapes of column info
-            name = c.get("column_name") or c.get("name") or str(c.get(0, ""))
-            dtype = c.get("data_type") or c.get("type") or ""
-            nullable = c.get("is_nullable") or c.get("nullable") or ""
-            f.write(f"| {name} | {dtype} | {nullable} |\n")
+    """Write the table's Markdown as `<table>_<content hash>.md`; unchanged tables reuse their file."""
+    text = render_markdown(table_name, schema).encode("utf-8")
+    path = os.path.join(ARTIFACT_DIR, f"{table_name}_{hashlib.sha256(text).hexdigest()[:12]}.md")
+    try:
+        # reused: the fresh mtime keeps it from being collected as stale
+        os.utime(path)
+    except FileNotFoundError:
+        write_atomic(path, text)
     return path
+
+
+def remove_stale_artifacts(max_age: float, directory: Optional[str] = None) -> Tuple[int, int]:
+    """Delete per-table Markdown/JSON artifacts older than `max_age` seconds; returns (files, bytes)."""
+    directory = directory or ARTIFACT_DIR
+    cutoff = time.time() - max_age
+    removed = freed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not (entry.is_file() and _TABLE_ARTIFACT.search(entry.name)):
+                continue
+            stat = entry.stat()
+            if stat.st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+                freed += stat.st_size
+    return removed, freed
@@ -0,0 +1,396 @@
+"""Bulk export of the stored data dictionary to Markdown, JSON and Parquet.
+
+One call renders every stored table of a source, or a filtered subset:
+
+- rendered files are content-addressed: each is stored once under
+  `exports/objects/<format>/`, named by a hash of the table's stored
+  definition, columns and descriptions, so later exports reuse the files of
+  unchanged tables instead of rendering them again;
+- missing files are rendered in batches by worker processes
+  (`EXPORT_WORKERS`); exports with fewer than `EXPORT_PARALLEL_MIN_FILES`
+  files to render use a thread instead;
+- `layout="archive"` streams every file into one zip as its batch finishes;
+  `layout="directory"` hard-links them into `<format>/<schema>/<table>.<ext>`.
+  Parquet is one file per schema (`parquet/schema=<name>/`), one row per
+  column, so the directory reads as a partitioned dataset. When a kept
+  export already holds exactly these files, it is returned instead;
+- `collect_garbage` keeps the newest `EXPORT_KEEP` exports, deletes objects
+  no kept export references and per-table artifacts older than
+  `ARTIFACT_MAX_AGE_DAYS`. It runs after every export.
+
+Every export leaves `<export_id>.manifest.json` next to its output.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.logging import logger
+from app.storage.artifact_manager import ARTIFACT_DIR, remove_stale_artifacts, render_markdown, write_atomic
+
+try:  # Parquet needs the optional pyarrow package
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    PARQUET_AVAILABLE = False
+
+FORMATS = ("markdown", "json", "parquet")
+LAYOUTS = ("archive", "directory")
+
+_EXTENSIONS = {"markdown": "md", "json": "json", "parquet": "parquet"}
+_RENDER_VERSION = "1"  # bump when a renderer's output changes, so stored objects are not reused
+_OBJECT_GRACE = 3600.0  # seconds; newer unreferenced files may belong to a running export
+_MAX_BATCH = 256  # units per worker task
+_UNSAFE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+# (format, digest, payload): a table record, or the records of one schema for Parquet
+Unit = Tuple[str, str, Any]
+
+
+def _safe(name: Optional[str]) -> str:
+    return _UNSAFE.sub("_", name or "_").lstrip(".") or "_"
+
+
+def object_path(root: str, fmt: str, digest: str) -> str:
+    return os.path.join(root, "objects", fmt, digest[:2], f"{digest}.{_EXTENSIONS[fmt]}")
+
+
+def table_digest(table: Dict[str, Any]) -> str:
+    """Hash of everything a rendered file of `table` depends on."""
+    digest = hashlib.sha256("\0".join((_RENDER_VERSION, table["source"], table["table_key"],
+                                       table.get("description") or "")).encode("utf-8"))
+    digest.update(table["definition"].encode("utf-8"))
+    digest.update(json.dumps(table["columns"], default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# -- renderers (run in worker processes) ---------------------------------------
+
+def _nullable_text(value: Optional[bool]) -> str:
+    return "" if value is None else ("YES" if value else "NO")
+
+
+def _render_markdown(table: Dict[str, Any]) -> bytes:
+    definition = json.loads(table["definition"])
+    columns = [{"column_name": name, "data_type": dtype, "is_nullable": _nullable_text(nullable),
+                "description": description} for name, _, dtype, nullable, description in table["columns"]]
+    return render_markdown(table["table_key"], {**definition, "columns": columns},
+                           table.get("description")).encode("utf-8")
+
+
+def _render_json(table: Dict[str, Any]) -> bytes:
+    definition = json.loads(table["definition"])
+    descriptions = {name: description for name, _, _, _, description in table["columns"]}
+    for column in definition.get("columns") or []:
+        column["description"] = descriptions.get(column.get("column_name") or column.get("name"))
+    document = {"source": table["source"], "table_key": table["table_key"], "table_name": table["table_name"],
+                "description": table.get("description"), **definition}
+    return json.dumps(document, indent=2, default=str).encode("utf-8")
+
+
+def _render_parquet(tables: List[Dict[str, Any]]) -> bytes:
+    rows: Dict[str, list] = {name: [] for name in (
+        "source", "schema_name", "table_key", "table_name", "table_description", "column_name", "ordinal",
+        "data_type", "nullable", "primary_key", "description")}
+    for table in tables:
+        primary_key = set(json.loads(table["definition"]).get("primary_key") or [])
+        for name, ordinal, dtype, nullable, description in table["columns"]:
+            for field, value in (("source", table["source"]), ("schema_name", table["schema"]),
+                                 ("table_key", table["table_key"]), ("table_name", table["table_name"]),
+                                 ("table_description", table.get("description")), ("column_name", name),
+                                 ("ordinal", ordinal), ("data_type", dtype), ("nullable", nullable),
+                                 ("primary_key", name in primary_key), ("description", description)):
+                rows[field].append(value)
+    schema = pa.schema([(name, pa.int32() if name == "ordinal" else
+                         pa.bool_() if name in ("nullable", "primary_key") else pa.string()) for name in rows])
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.table(rows, schema=schema), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+_RENDERERS = {"markdown": _render_markdown, "json": _render_json, "parquet": _render_parquet}
+
+
+def render_batch(root: str, units: Sequence[Unit]) -> List[Tuple[str, str]]:
+    """Render `units` into the object store under `root`; returns their (format, digest)."""
+    for fmt, digest, payload in units:
+        path = object_path(root, fmt, digest)
+        if not os.path.exists(path):
+            write_atomic(path, _RENDERERS[fmt](payload))
+    return [(fmt, digest) for fmt, digest, _ in units]
+
+
+# -- output --------------------------------------------------------------------
+
+class _ArchiveWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.partial = f"{path}.partial"
+        self.zip = zipfile.ZipFile(self.partial, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, name: str, source_path: str, fmt: str):
+        # Parquet is compressed already
+        self.zip.write(source_path, name, compress_type=zipfile.ZIP_STORED if fmt == "parquet" else None)
+
+    def add_bytes(self, name: str, data: bytes):
+        self.zip.writestr(name, data)
+
+    def close(self):
+        self.zip.close()
+        os.replace(self.partial, self.path)
+
+    def abort(self):
+        self.zip.close()
+        os.remove(self.partial)
+
+
+class _DirectoryWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.partial = f"{path}.partial"
+        os.makedirs(self.partial)
+
+    def add(self, name: str, source_path: str, fmt: str):
+        target = os.path.join(self.partial, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source_path, target)  # objects are never modified in place
+        except OSError:
+            shutil.copyfile(source_path, target)
+
+    def add_bytes(self, name: str, data: bytes):
+        with open(os.path.join(self.partial, name), "wb") as f:
+            f.write(data)
+
+    def close(self):
+        os.replace(self.partial, self.path)
+
+    def abort(self):
+        shutil.rmtree(self.partial, ignore_errors=True)
+
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def _remove(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    size = _size(path)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        os.remove(path)
+    return size
+
+
+class CatalogExporter:
+    def __init__(self, artifact_dir: Optional[str] = None):
+        self.artifact_dir = artifact_dir or ARTIFACT_DIR
+        self.directory = os.path.join(self.artifact_dir, "exports")
+
+    def _manifest_path(self, export_id: str) -> str:
+        return os.path.join(self.directory, f"{export_id}.manifest.json")
+
+    def _plan(self, records: List[Dict[str, Any]], formats: Sequence[str]):
+        """Units to render and the (output name, format, digest) entries of the export."""
+        units: Dict[Tuple[str, str], Unit] = {}
+        entries: List[Tuple[str, str, str]] = []
+        digests = {table["table_key"]: table_digest(table) for table in records}
+        for fmt in formats:
+            if fmt == "parquet":
+                by_schema: Dict[Optional[str], List[Dict[str, Any]]] = {}
+                for table in records:
+                    by_schema.setdefault(table["schema"], []).append(table)
+                for schema, tables in by_schema.items():
+                    digest = hashlib.sha256("\0".join(["parquet"] + [digests[t["table_key"]] for t in tables])
+                                            .encode("utf-8")).hexdigest()
+                    units[(fmt, digest)] = (fmt, digest, tables)
+                    entries.append((f"parquet/schema={_safe(schema)}/part-0.parquet", fmt, digest))
+                continue
+            for table in records:
+                digest = digests[table["table_key"]]
+                units[(fmt, digest)] = (fmt, digest, table)
+                entries.append((f"{fmt}/{_safe(table['schema'])}/{_safe(table['table_name'])}.{_EXTENSIONS[fmt]}",
+                                fmt, digest))
+        pending = [unit for unit in units.values()
+                   if not os.path.exists(object_path(self.directory, unit[0], unit[1]))]
+        return list(units), pending, entries
+
+    async def export(self, store, source: str, formats: Sequence[str] = ("markdown", "json"),
+                     layout: str = "archive", schemas: Optional[List[str]] = None,
+                     tables: Optional[List[str]] = None, workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Export the stored tables of `source`; None when no table matches the filters."""
+        formats = list(dict.fromkeys(formats))
+        unknown = [f for f in formats if f not in FORMATS]
+        if unknown or not formats:
+            raise ValueError(f"formats must be some of {', '.join(FORMATS)}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout must be one of {', '.join(LAYOUTS)}")
+        if "parquet" in formats and not PARQUET_AVAILABLE:
+            raise ValueError("parquet export needs the pyarrow package")
+
+        started = time.perf_counter()
+        records = await store.export_tables(source, schemas, tables)
+        if not records:
+            return None
+        objects, pending, entries = await asyncio.to_thread(self._plan, records, formats)
+        content = hashlib.sha256(json.dumps([layout, entries]).encode("utf-8")).hexdigest()
+        if not pending:
+            previous = await asyncio.to_thread(self._find, source, content)
+            if previous is not None:
+                # same files as a kept export: nothing to write
+                return {**previous, "unchanged": True, "elapsed": round(time.perf_counter() - started, 3)}
+
+        export_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.directory, export_id + (".zip" if layout == "archive" else ""))
+        os.makedirs(self.directory, exist_ok=True)
+        writer = await asyncio.to_thread(_ArchiveWriter if layout == "archive" else _DirectoryWriter, path)
+        by_object: Dict[Tuple[str, str], List[str]] = {}
+        for name, fmt, digest in entries:
+            by_object.setdefault((fmt, digest), []).append(name)
+
+        def write(done):
+            for fmt, digest in done:
+                for name in by_object.pop((fmt, digest), ()):
+                    writer.add(name, object_path(self.directory, fmt, digest), fmt)
+
+        workers = workers or settings.EXPORT_WORKERS or os.cpu_count() or 1
+        parallel = workers > 1 and len(pending) >= settings.EXPORT_PARALLEL_MIN_FILES
+        try:
+            pending_keys = {(u[0], u[1]) for u in pending}
+            # files of unchanged tables go out while the rest is being rendered
+            reused = [key for key in objects if key not in pending_keys]
+            if not parallel:
+                await asyncio.to_thread(write, reused)
+                await asyncio.to_thread(write, await asyncio.to_thread(render_batch, self.directory, pending))
+            else:
+                size = min(_MAX_BATCH, math.ceil(len(pending) / (workers * 4)))
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                try:
+                    loop = asyncio.get_running_loop()
+                    tasks = [loop.run_in_executor(pool, render_batch, self.directory, pending[i:i + size])
+                             for i in range(0, len(pending), size)]
+                    await asyncio.to_thread(write, reused)
+                    for task in asyncio.as_completed(tasks):
+                        await asyncio.to_thread(write, await task)
+                finally:
+                    await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+            manifest = {
+                "export_id": export_id,
+                "source": source,
+                "created_at": datetime.utcnow().isoformat(),
+                "layout": layout,
+                "formats": formats,
+                "filters": {"schemas": schemas, "tables": tables},
+                "path": path,
+                "tables": len(records),
+                "files": len(entries),
+                "rendered": len(pending),
+                "reused": len(objects) - len(pending),
+                "workers": workers if parallel else 1,
+                "content": content,
+            }
+            await asyncio.to_thread(writer.add_bytes, "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+            await asyncio.to_thread(writer.close)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+
+        manifest["bytes"] = await asyncio.to_thread(_size, path)
+        manifest["elapsed"] = round(time.perf_counter() - started, 3)
+        stored = {**manifest, "objects": [f"{fmt}/{digest}" for fmt, digest in objects]}
+        await asyncio.to_thread(write_atomic, self._manifest_path(export_id), json.dumps(stored).encode("utf-8"))
+        manifest["gc"] = await asyncio.to_thread(self.collect_garbage)
+        logger.info(f"Catalog export {export_id}: {len(records)} tables, {len(entries)} files "
+                    f"({len(pending)} rendered) in {manifest['elapsed']:.2f}s")
+        return manifest
+
+    # -- stored exports ------------------------------------------------------
+
+    def _manifests(self) -> List[Dict[str, Any]]:
+        """Stored manifests, newest first."""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for name in os.listdir(self.directory):
+            if name.endswith(".manifest.json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                        found.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(found, key=lambda m: m.get("created_at") or "", reverse=True)
+
+    def _find(self, source: str, content: str) -> Optional[Dict[str, Any]]:
+        for manifest in self._manifests()[:settings.EXPORT_KEEP]:
+            if manifest.get("source") == source and manifest.get("content") == content \
+                    and os.path.exists(manifest.get("path") or ""):
+                manifest.pop("objects", None)
+                return manifest
+        return None
+
+    def list_exports(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in m.items() if k != "objects"} for m in self._manifests()]
+
+    def get_export(self, export_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(os.path.basename(export_id)), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        manifest.pop("objects", None)
+        return manifest
+
+    def collect_garbage(self, keep: Optional[int] = None, max_age_days: Optional[float] = None) -> Dict[str, int]:
+        """Remove old exports, unreferenced objects and stale per-table artifacts."""
+        keep = settings.EXPORT_KEEP if keep is None else keep
+        max_age_days = settings.ARTIFACT_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        stats = {"exports": 0, "objects": 0, "artifacts": 0, "bytes": 0}
+        manifests = self._manifests()
+        for manifest in manifests[keep:]:
+            stats["bytes"] += _remove(manifest.get("path") or "")
+            stats["bytes"] += _remove(self._manifest_path(manifest["export_id"]))
+            stats["exports"] += 1
+
+        referenced = {name for m in manifests[:keep] for name in m.get("objects") or ()}
+        cutoff = time.time() - _OBJECT_GRACE
+        for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+            fmt = os.path.basename(os.path.dirname(root))
+            for name in files:
+                path = os.path.join(root, name)
+                live = not name.endswith(".tmp") and f"{fmt}/{name.split('.', 1)[0]}" in referenced
+                if live or os.path.getmtime(path) >= cutoff:
+                    continue
+                stats["bytes"] += _remove(path)
+                stats["objects"] += 1
+        if os.path.isdir(self.directory):
+            # outputs of exports that died before finishing
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".partial") and os.path.getmtime(path) < cutoff:
+                    stats["bytes"] += _remove(path)
+
+        files, freed = remove_stale_artifacts(max_age_days * 86400, self.artifact_dir)
+        stats["artifacts"] += files
+        stats["bytes"] += freed
+        return stats
+
+
+catalog_exporter = CatalogExporter()
@@ -0,0 +1,525 @@
+"""Persistent data dictionary behind the SQLAlchemy engine of app/core/db.py.
+
+Extraction runs, quality profiles and AI descriptions are written here, and
+the dictionary read endpoints (`/api/dictionary/*`, `/api/extract/all?cached=true`,
+markdown export, stored quality profiles) are served from it without touching
+the source databases. Sources are only read again by an explicit refresh.
+
+Tables (all keyed by `source`, the pool key of the source database):
+
+- `dd_tables`: one row per extracted table, with the extracted definition,
+  its fingerprint, the AI description and the run that last saw it;
+- `dd_columns`: one row per column, indexed by source/schema/table/column
+  and by column name alone for cross-table lookups;
+- `dd_profiles`: the latest quality metrics per table and mode;
+- `dd_runs`: extraction runs with their counts, errors and stats.
+
+Writes are bulk: `save_catalog` upserts in chunks of `DICTIONARY_WRITE_CHUNK`
+rows per statement, rewrites the columns of changed tables only (by schema
+fingerprint) and drops tables a full run no longer saw. Tables a write
+changed are re-indexed for search (app/storage/search_index.py).
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Index, Integer, MetaData, String, Table, Text, UniqueConstraint,
+    and_, bindparam, delete, func, insert, or_, select, update,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.core.db import get_engine
+from app.core.logging import logger
+from app.core.pools import normalize_dsn, pool_key
+from app.extractors.schema_diff import schema_fingerprint
+from app.storage.search_index import search_index
+
+metadata = MetaData()
+
+dd_tables = Table(
+    "dd_tables", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(255), nullable=False),
+    Column("table_key", String(512), nullable=False),
+    Column("schema_name", String(255)),
+    Column("table_name", String(255), nullable=False),
+    Column("fingerprint", String(64), nullable=False),
+    Column("column_count", Integer, nullable=False, default=0),
+    Column("definition", Text, nullable=False),
+    Column("description", Text),
+    Column("ai_metadata", Text),
+    Column("run_id", Integer),
+    Column("refreshed_at", DateTime, nullable=False),
+    UniqueConstraint("source", "table_key", name="uq_dd_tables_key"),
+    Index("ix_dd_tables_lookup", "source", "schema_name", "table_name"),
+    Index("ix_dd_tables_key", "table_key"),
+    Index("ix_dd_tables_name", "table_name"),
+)
+
+dd_columns = Table(
+    "dd_columns", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(255), nullable=False),
+    Column("table_key", String(512), nullable=False),
+    Column("schema_name", String(255)),
+    Column("table_name", String(255), nullable=False),
+    Column("column_name", String(255), nullable=False),
+    Column("ordinal", Integer, nullable=False),
+    Column("data_type", String(255)),
+    Column("nullable", Boolean),
+    Column("definition", Text, nullable=False),
+    Column("description", Text),
+    UniqueConstraint("source", "table_key", "column_name", name="uq_dd_columns_key"),
+    Index("ix_dd_columns_lookup", "source", "schema_name", "table_name", "column_name"),
+    Index("ix_dd_columns_name", "column_name"),
+    Index("ix_dd_columns_table", "table_name"),
+)
+
+dd_profiles = Table(
+    "dd_profiles", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(255), nullable=False),
+    Column("table_key", String(512), nullable=False),
+    Column("mode", String(32), nullable=False),
+    Column("rows_sampled", Integer),
+    Column("metrics", Text, nullable=False),
+    Column("analyzed_at", DateTime, nullable=False),
+    UniqueConstraint("source", "table_key", "mode", name="uq_dd_profiles_key"),
+)
+
+dd_runs = Table(
+    "dd_runs", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(255), nullable=False, index=True),
+    Column("mode", String(32), nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Column("tables", Integer),
+    Column("columns", Integer),
+    Column("changed", Integer),
+    Column("dropped", Integer),
+    Column("errors", Text),
+    Column("stats", Text),
+)
+
+
+def source_of(connector) -> str:
+    # the pool key identifies the source without exposing its password
+    return getattr(getattr(connector, "pool", None), "key", None) or type(connector).__name__
+
+
+def default_source() -> str:
+    """Store key of the `DATABASE_URL` source, without connecting to it."""
+    return pool_key("postgresql", normalize_dsn(settings.DATABASE_URL))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def _loads(text: Optional[str]) -> Any:
+    return json.loads(text) if text else None
+
+
+def _field(row: Dict[str, Any], *names: str) -> Any:
+    # catalog rows are lower-case (postgres) or upper-case (mysql, snowflake)
+    for name in names:
+        for key in (name, name.upper()):
+            if row.get(key) is not None:
+                return row[key]
+    return None
+
+
+def _nullable(value: Any) -> Optional[bool]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip().upper() in ("YES", "Y", "TRUE", "1")
+    return bool(value)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def column_rows(source: str, table_key: str, schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`dd_columns` rows of one extracted table definition."""
+    schema_name = schema.get("schema")
+    table_name = table_key.split(".", 1)[1] if schema_name and table_key.startswith(f"{schema_name}.") else table_key
+    rows = []
+    for i, column in enumerate(schema.get("columns") or []):
+        name = _field(column, "column_name", "name")
+        if name is None:
+            continue
+        rows.append({
+            "source": source, "table_key": table_key, "schema_name": schema_name, "table_name": table_name,
+            "column_name": str(name), "ordinal": int(_field(column, "ordinal_position") or i + 1),
+            "data_type": _field(column, "data_type", "type"), "nullable": _nullable(_field(column, "is_nullable", "nullable")),
+            "definition": _dumps(column),
+        })
+    return rows
+
+
+class DictionaryStore:
+    def __init__(self, engine: Optional[AsyncEngine] = None, chunk_size: Optional[int] = None):
+        self._engine = engine
+        self.chunk_size = chunk_size or settings.DICTIONARY_WRITE_CHUNK
+        self._ready = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self._engine if self._engine is not None else get_engine()
+
+    async def _connect(self, write: bool = False):
+        if not self._ready:
+            async with self._lock:
+                if not self._ready:
+                    async with self.engine.begin() as conn:
+                        await conn.run_sync(metadata.create_all)
+                    self._ready = True
+        return self.engine.begin() if write else self.engine.connect()
+
+    def _upsert(self, conn: AsyncConnection, table: Table, keys: List[str], updates: List[str]):
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(table)
+            return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in updates})
+        else:
+            return None
+        stmt = dialect_insert(table)
+        return stmt.on_conflict_do_update(index_elements=keys, set_={c: stmt.excluded[c] for c in updates})
+
+    async def _bulk_upsert(self, conn: AsyncConnection, table: Table, rows: List[Dict[str, Any]],
+                           keys: List[str], updates: List[str]):
+        stmt = self._upsert(conn, table, keys, updates)
+        if stmt is None:
+            # no native upsert: replace the rows
+            for chunk in _chunks(rows, self.chunk_size):
+                condition = or_(*(and_(*(table.c[k] == row[k] for k in keys)) for row in chunk))
+                await conn.execute(delete(table).where(condition))
+                await conn.execute(insert(table), chunk)
+            return
+        for chunk in _chunks(rows, self.chunk_size):
+            await conn.execute(stmt, chunk)
+
+    # -- writes --------------------------------------------------------------
+
+    async def save_catalog(
+        self,
+        source: str,
+        tables: Dict[str, Dict[str, Any]],
+        mode: str = "full",
+        errors: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        complete: bool = True,
+    ) -> Dict[str, Any]:
+        """Store an extraction result (`SchemaExtractor.extract_all` shape) as a run.
+
+        Only tables whose fingerprint changed get their row and columns
+        rewritten. With `complete`, tables of `source` missing from `tables`
+        (and not among `errors`) are dropped.
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        errors = errors or {}
+        async with await self._connect(write=True) as conn:
+            run_id = (await conn.execute(insert(dd_runs).values(
+                source=source, mode=mode, started_at=now))).inserted_primary_key[0]
+            stored = dict((await conn.execute(
+                select(dd_tables.c.table_key, dd_tables.c.fingerprint).where(dd_tables.c.source == source))).all())
+
+            changed_rows, column_batch, unchanged = [], [], []
+            for key, schema in tables.items():
+                fingerprint = schema_fingerprint(schema)
+                if stored.get(key) == fingerprint:
+                    unchanged.append(key)
+                    continue
+                columns = column_rows(source, key, schema)
+                column_batch.extend(columns)
+                changed_rows.append({
+                    "source": source, "table_key": key, "schema_name": schema.get("schema"),
+                    "table_name": columns[0]["table_name"] if columns else key.rsplit(".", 1)[-1],
+                    "fingerprint": fingerprint, "column_count": len(columns), "definition": _dumps(schema),
+                    "run_id": run_id, "refreshed_at": now,
+                })
+
+            if changed_rows:
+                await self._bulk_upsert(conn, dd_tables, changed_rows, ["source", "table_key"],
+                                        ["schema_name", "table_name", "fingerprint", "column_count", "definition",
+                                         "run_id", "refreshed_at"])
+            for chunk in _chunks(unchanged, self.chunk_size):
+                await conn.execute(update(dd_tables).where(
+                    dd_tables.c.source == source, dd_tables.c.table_key.in_(chunk)).values(run_id=run_id))
+
+            # columns of changed tables: upsert (keeping descriptions), then drop the ones that are gone
+            if column_batch:
+                await self._bulk_upsert(conn, dd_columns, column_batch, ["source", "table_key", "column_name"],
+                                        ["schema_name", "table_name", "ordinal", "data_type", "nullable", "definition"])
+                current: Dict[str, List[str]] = {}
+                for row in column_batch:
+                    current.setdefault(row["table_key"], []).append(row["column_name"])
+                for key, names in current.items():
+                    if stored.get(key) is not None:
+                        await conn.execute(delete(dd_columns).where(
+                            dd_columns.c.source == source, dd_columns.c.table_key == key,
+                            dd_columns.c.column_name.not_in(names)))
+            for row in changed_rows:
+                if row["column_count"] == 0 and stored.get(row["table_key"]) is not None:
+                    await conn.execute(delete(dd_columns).where(
+                        dd_columns.c.source == source, dd_columns.c.table_key == row["table_key"]))
+
+            dropped: List[str] = []
+            if complete:
+                dropped = [k for k in stored if k not in tables and k not in errors]
+                for chunk in _chunks(dropped, self.chunk_size):
+                    await conn.execute(delete(dd_columns).where(
+                        dd_columns.c.source == source, dd_columns.c.table_key.in_(chunk)))
+                    await conn.execute(delete(dd_tables).where(
+                        dd_tables.c.source == source, dd_tables.c.table_key.in_(chunk)))
+
+            summary = {"run_id": run_id, "tables": len(tables), "columns": len(column_batch),
+                       "changed": len(changed_rows), "unchanged": len(unchanged), "dropped": len(dropped)}
+            await conn.execute(update(dd_runs).where(dd_runs.c.id == run_id).values(
+                finished_at=datetime.utcnow(), tables=len(tables), columns=len(column_batch),
+                changed=len(changed_rows), dropped=len(dropped), errors=_dumps(errors) if errors else None,
+                stats=_dumps(stats) if stats else None))
+        summary["elapsed_s"] = round(time.perf_counter() - started, 4)
+        await self._reindex(source, [row["table_key"] for row in changed_rows], dropped)
+        logger.info(f"Dictionary store: run {run_id} for {source}: {summary['changed']} changed, "
+                    f"{summary['unchanged']} unchanged, {summary['dropped']} dropped table(s)")
+        return summary
+
+    async def save_profile(self, source: str, table_key: str, mode: str, metrics: Dict[str, Any]):
+        row = {"source": source, "table_key": table_key, "mode": mode, "rows_sampled": metrics.get("rows_sampled"),
+               "metrics": _dumps(metrics), "analyzed_at": datetime.utcnow()}
+        async with await self._connect(write=True) as conn:
+            await self._bulk_upsert(conn, dd_profiles, [row], ["source", "table_key", "mode"],
+                                    ["rows_sampled", "metrics", "analyzed_at"])
+
+    async def save_descriptions(self, source: str, documented: Dict[str, Dict[str, Any]]) -> int:
+        """Store AI metadata (table -> `TableMetadata` dict) for tables already in the store.
+
+        Returns the number of tables updated.
+        """
+        table_rows, column_rows_ = [], []
+        for key, meta in documented.items():
+            if not isinstance(meta, dict):
+                continue
+            table_rows.append({"b_key": key, "description": meta.get("description"), "ai_metadata": _dumps(meta)})
+            for column in meta.get("columns") or []:
+                if isinstance(column, dict) and column.get("columnName") and column.get("description"):
+                    column_rows_.append({"b_key": key, "b_column": column["columnName"],
+                                         "description": column["description"]})
+        if not table_rows:
+            return 0
+        async with await self._connect(write=True) as conn:
+            result = await conn.execute(
+                update(dd_tables).where(dd_tables.c.source == source, dd_tables.c.table_key == bindparam("b_key"))
+                .values(description=bindparam("description"), ai_metadata=bindparam("ai_metadata")),
+                table_rows)
+            if column_rows_:
+                await conn.execute(
+                    update(dd_columns).where(dd_columns.c.source == source, dd_columns.c.table_key == bindparam("b_key"),
+                                             dd_columns.c.column_name == bindparam("b_column"))
+                    .values(description=bindparam("description")),
+                    column_rows_)
+        await self._reindex(source, [row["b_key"] for row in table_rows])
+        return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(table_rows)
+
+    async def _reindex(self, source: str, keys: List[str], dropped: Iterable[str] = ()):
+        """Bring the search index up to date with written tables; it loads everything on first use otherwise."""
+        if not search_index.loaded or not (keys or dropped):
+            return
+        try:
+            docs = await self.documents(source, keys) if keys else []
+            await asyncio.to_thread(search_index.index_documents, docs, [(source, k) for k in dropped])
+        except Exception as e:
+            logger.error(f"Could not update the search index for {source}: {str(e)}")
+
+    # -- reads ---------------------------------------------------------------
+
+    async def documents(self, source: Optional[str] = None, keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Tables with their columns and descriptions, as `SearchIndex.index_documents` takes them."""
+        t, c = dd_tables, dd_columns
+        groups = list(_chunks(keys, self.chunk_size)) if keys is not None else [None]
+        docs: Dict[tuple, Dict[str, Any]] = {}
+        async with await self._connect() as conn:
+            for chunk in groups:
+                table_filter = [t.c.source == source] if source else []
+                column_filter = [c.c.source == source] if source else []
+                if chunk is not None:
+                    table_filter.append(t.c.table_key.in_(chunk))
+                    column_filter.append(c.c.table_key.in_(chunk))
+                rows = (await conn.execute(select(t.c.source, t.c.table_key, t.c.schema_name, t.c.table_name,
+                                                  t.c.description).where(*table_filter))).all()
+                for src, key, schema, name, description in rows:
+                    docs[(src, key)] = {"source": src, "table_key": key, "schema": schema, "table_name": name,
+                                        "description": description, "columns": []}
+                rows = (await conn.execute(select(c.c.source, c.c.table_key, c.c.column_name, c.c.data_type,
+                                                  c.c.description).where(*column_filter)
+                                           .order_by(c.c.source, c.c.table_key, c.c.ordinal))).all()
+                for src, key, *column in rows:  # plain tuples: Row attribute access is slow at this size
+                    doc = docs.get((src, key))
+                    if doc is not None:
+                        doc["columns"].append(tuple(column))
+        return list(docs.values())
+
+    async def export_tables(self, source: str, schemas: Optional[List[str]] = None,
+                            tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Tables of `source` with their definitions and columns, for catalog exports.
+
+        `tables` matches table keys or bare names. Columns are
+        (name, ordinal, data type, nullable, description) tuples.
+        """
+        t, c = dd_tables, dd_columns
+        table_filter, column_filter = [t.c.source == source], [c.c.source == source]
+        if schemas:
+            table_filter.append(t.c.schema_name.in_(schemas))
+            column_filter.append(c.c.schema_name.in_(schemas))
+        wanted = set(tables) if tables else None
+        found: Dict[str, Dict[str, Any]] = {}
+        async with await self._connect() as conn:
+            rows = (await conn.execute(select(t.c.table_key, t.c.schema_name, t.c.table_name, t.c.description,
+                                              t.c.definition).where(*table_filter).order_by(t.c.table_key))).all()
+            for row in rows:
+                if wanted is None or row.table_key in wanted or row.table_name in wanted:
+                    found[row.table_key] = {
+                        "source": source, "table_key": row.table_key, "schema": row.schema_name,
+                        "table_name": row.table_name, "description": row.description,
+                        "definition": row.definition, "columns": []}
+            rows = (await conn.execute(select(c.c.table_key, c.c.column_name, c.c.ordinal, c.c.data_type,
+                                              c.c.nullable, c.c.description).where(*column_filter)
+                                       .order_by(c.c.table_key, c.c.ordinal))).all()
+            for key, *column in rows:
+                table = found.get(key)
+                if table is not None:
+                    table["columns"].append(tuple(column))
+        return list(found.values())
+
+    async def list_tables(self, source: Optional[str] = None, schema: Optional[str] = None,
+                          search: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        conditions = []
+        if source:
+            conditions.append(dd_tables.c.source == source)
+        if schema:
+            conditions.append(dd_tables.c.schema_name == schema)
+        if search:
+            conditions.append(dd_tables.c.table_key.like(f"%{search}%"))
+        columns = [dd_tables.c.source, dd_tables.c.table_key, dd_tables.c.schema_name, dd_tables.c.table_name,
+                   dd_tables.c.column_count, dd_tables.c.description, dd_tables.c.refreshed_at]
+        async with await self._connect() as conn:
+            total = (await conn.execute(select(func.count()).select_from(dd_tables).where(*conditions))).scalar_one()
+            rows = (await conn.execute(select(*columns).where(*conditions)
+                                       .order_by(dd_tables.c.source, dd_tables.c.table_key)
+                                       .limit(limit).offset(offset))).mappings().all()
+        return {"total": total, "limit": limit, "offset": offset,
+                "items": [{**r, "refreshed_at": r["refreshed_at"].isoformat()} for r in rows]}
+
+    async def list_columns(self, source: Optional[str] = None, schema: Optional[str] = None,
+                           table: Optional[str] = None, search: Optional[str] = None,
+                           data_type: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        conditions = []
+        if source:
+            conditions.append(dd_columns.c.source == source)
+        if schema:
+            conditions.append(dd_columns.c.schema_name == schema)
+        if table:
+            # keys are schema-qualified; a bare name matches the table in any schema
+            conditions.append(dd_columns.c.table_key == table if "." in table else dd_columns.c.table_name == table)
+        if search:
+            conditions.append(dd_columns.c.column_name.like(f"%{search}%"))
+        if data_type:
+            conditions.append(func.lower(dd_columns.c.data_type) == data_type.lower())
+        columns = [dd_columns.c.source, dd_columns.c.table_key, dd_columns.c.schema_name, dd_columns.c.table_name,
+                   dd_columns.c.column_name, dd_columns.c.ordinal, dd_columns.c.data_type, dd_columns.c.nullable,
+                   dd_columns.c.description]
+        async with await self._connect() as conn:
+            total = (await conn.execute(select(func.count()).select_from(dd_columns).where(*conditions))).scalar_one()
+            rows = (await conn.execute(select(*columns).where(*conditions)
+                                       .order_by(dd_columns.c.source, dd_columns.c.table_key, dd_columns.c.ordinal)
+                                       .limit(limit).offset(offset))).mappings().all()
+        return {"total": total, "limit": limit, "offset": offset, "items": [dict(r) for r in rows]}
+
+    async def get_table(self, table: str, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A stored table by key or bare name (the most recently refreshed match), with its columns and profiles."""
+        conditions = [dd_tables.c.table_key == table if "." in table else
+                      or_(dd_tables.c.table_key == table, dd_tables.c.table_name == table)]
+        if source:
+            conditions.append(dd_tables.c.source == source)
+        async with await self._connect() as conn:
+            row = (await conn.execute(
+                select(dd_tables).where(*conditions)
+                .order_by((dd_tables.c.table_key == table).desc(), dd_tables.c.refreshed_at.desc()).limit(1)
+            )).mappings().first()
+            if row is None:
+                return None
+            columns = (await conn.execute(
+                select(dd_columns.c.column_name, dd_columns.c.ordinal, dd_columns.c.data_type, dd_columns.c.nullable,
+                       dd_columns.c.description)
+                .where(dd_columns.c.source == row["source"], dd_columns.c.table_key == row["table_key"])
+                .order_by(dd_columns.c.ordinal))).mappings().all()
+            profiles = (await conn.execute(
+                select(dd_profiles.c.mode, dd_profiles.c.metrics, dd_profiles.c.analyzed_at)
+                .where(dd_profiles.c.source == row["source"],
+                       dd_profiles.c.table_key.in_([row["table_key"], row["table_name"]])))).mappings().all()
+        return {
+            "source": row["source"], "table_key": row["table_key"], "schema_name": row["schema_name"],
+            "table_name": row["table_name"], "fingerprint": row["fingerprint"],
+            "refreshed_at": row["refreshed_at"].isoformat(), "run_id": row["run_id"],
+            "description": row["description"], "ai_metadata": _loads(row["ai_metadata"]),
+            "definition": _loads(row["definition"]), "columns": [dict(c) for c in columns],
+            "profiles": {p["mode"]: {"metrics": _loads(p["metrics"]), "analyzed_at": p["analyzed_at"].isoformat()}
+                         for p in profiles},
+        }
+
+    async def get_profile(self, source: str, table_key: str, mode: str) -> Optional[Dict[str, Any]]:
+        async with await self._connect() as conn:
+            row = (await conn.execute(select(dd_profiles.c.metrics, dd_profiles.c.analyzed_at).where(
+                dd_profiles.c.source == source, dd_profiles.c.table_key == table_key,
+                dd_profiles.c.mode == mode))).first()
+        if row is None:
+            return None
+        return {"metrics": _loads(row.metrics), "analyzed_at": row.analyzed_at.isoformat()}
+
+    async def catalog(self, source: str) -> Dict[str, Any]:
+        """The stored definitions of `source`, shaped like `SchemaExtractor.extract_all`."""
+        async with await self._connect() as conn:
+            rows = (await conn.execute(select(dd_tables.c.table_key, dd_tables.c.definition)
+                                       .where(dd_tables.c.source == source)
+                                       .order_by(dd_tables.c.table_key))).all()
+        return {key: json.loads(definition) for key, definition in rows}
+
+    async def runs(self, source: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        query = select(dd_runs).order_by(dd_runs.c.id.desc()).limit(limit)
+        if source:
+            query = query.where(dd_runs.c.source == source)
+        async with await self._connect() as conn:
+            rows = (await conn.execute(query)).mappings().all()
+        return [{
+            **{k: v for k, v in r.items() if k not in ("errors", "stats", "started_at", "finished_at")},
+            "started_at": r["started_at"].isoformat(),
+            "finished_at": r["finished_at"].isoformat() if r["finished_at"] else None,
+            "errors": _loads(r["errors"]), "stats": _loads(r["stats"]),
+        } for r in rows]
+
+    async def sources(self) -> List[Dict[str, Any]]:
+        async with await self._connect() as conn:
+            rows = (await conn.execute(
+                select(dd_tables.c.source, func.count().label("tables"), func.max(dd_tables.c.refreshed_at).label("refreshed_at"))
+                .group_by(dd_tables.c.source).order_by(dd_tables.c.source))).mappings().all()
+        return [{**r, "refreshed_at": r["refreshed_at"].isoformat() if r["refreshed_at"] else None} for r in rows]
+
+
+dictionary_store = DictionaryStore()
@@ -0,0 +1,78 @@
+"""SQLite store of per-table schema fingerprints for incremental extraction.
+
+For every (source, table) it keeps the connector's cheap catalog signal (if
+any), a content fingerprint of the extracted schema and the schema itself,
+so unchanged tables can be served without touching the source database.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable
+
+from app.storage.artifact_manager import ARTIFACT_DIR
+
+DEFAULT_PATH = os.path.join(ARTIFACT_DIR, "fingerprints.sqlite3")
+
+
+class FingerprintStore:
+    def __init__(self, path: str = None):
+        self.path = path or DEFAULT_PATH
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_fingerprints (
+                source TEXT NOT NULL,
+                table_key TEXT NOT NULL,
+                signal TEXT,
+                fingerprint TEXT NOT NULL,
+                schema_json TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (source, table_key)
+            )
+        """)
+        return conn
+
+    def load(self, source: str) -> Dict[str, Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT table_key, signal, fingerprint, schema_json FROM table_fingerprints WHERE source = ?",
+                (source,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            key: {"signal": signal, "fingerprint": fingerprint, "schema": json.loads(schema_json)}
+            for key, signal, fingerprint, schema_json in rows
+        }
+
+    def save(self, source: str, entries: Dict[str, Dict[str, Any]], dropped: Iterable[str] = ()):
+        """Upsert `entries` (table -> signal/fingerprint/schema) and forget `dropped` tables."""
+        now = datetime.utcnow().isoformat()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO table_fingerprints (source, table_key, signal, fingerprint, schema_json, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (source, table_key) DO UPDATE SET
+                        signal = excluded.signal,
+                        fingerprint = excluded.fingerprint,
+                        schema_json = excluded.schema_json,
+                        updated_at = excluded.updated_at
+                    """,
+                    [
+                        (source, key, e.get("signal"), e["fingerprint"], json.dumps(e["schema"], default=str), now)
+                        for key, e in entries.items()
+                    ],
+                )
+                conn.executemany(
+                    "DELETE FROM table_fingerprints WHERE source = ? AND table_key = ?",
+                    [(source, key) for key in dropped],
+                )
+        finally:
+            conn.close()
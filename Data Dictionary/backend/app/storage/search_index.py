@@ -0,0 +1,441 @@
+"""In-process search over the data dictionary: BM25 plus hashed n-gram vectors.
+
+Every stored table and every column is a document built from its names,
+data type and AI description (see `DictionaryStore.documents`). Two indexes
+answer a query, and `hybrid` mode fuses their rankings (reciprocal rank
+fusion):
+
+- an inverted index scored with BM25. Tokens are identifier words
+  (`customerEmail`, `customer_email` -> customer, email), lightly stemmed;
+  column names weigh twice as much as descriptions and table names;
+- a vector index of hashed word and character-trigram features
+  (`SEARCH_VECTOR_DIM` dimensions, int8 per component), so `mail` still
+  finds `e_mail_addr` without any model or network access. Above
+  `SEARCH_IVF_MIN_DOCS` documents the vectors are clustered (IVF: spherical
+  k-means into `SEARCH_IVF_LISTS` lists) and a query scans only the
+  `SEARCH_IVF_PROBES` closest lists; below it they are scanned in full.
+
+Indexing is incremental: the store re-indexes the tables a refresh or new
+descriptions changed, and documents of replaced tables are tombstoned until
+enough of them pile up to rebuild. Postings and vectors live in growable
+numpy arrays, so queries are vectorized over candidates only.
+"""
+
+import asyncio
+import math
+import re
+import sys
+import threading
+import time
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai.inference import singular, snake_case
+from app.config import settings
+from app.core.logging import logger
+from app.core.metrics import Gauge, metrics_registry
+
+KINDS = ("table", "column")
+MODES = ("hybrid", "bm25", "vector")
+
+_WORD = re.compile(r"[a-z0-9]+")
+# words of questions like "which column holds customer email"; dropped from queries only
+_QUERY_STOPWORDS = frozenset(
+    "a an and the of in on for to with by which what where who that is are holds hold holding "
+    "contains contain containing column columns field fields table tables".split()
+)
+_RRF_K = 60  # reciprocal rank fusion constant
+_CANDIDATES = 100  # per-index results fused in hybrid mode
+
+
+@lru_cache(maxsize=1 << 17)
+def tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(t for t in (singular(w) for w in _WORD.findall(snake_case(text))) if t)
+
+
+def query_tokens(query: str) -> Tuple[str, ...]:
+    tokens = tokenize(query or "")
+    kept = tuple(t for t in tokens if t not in _QUERY_STOPWORDS)
+    return kept or tokens
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_vector(token: str, dim: int) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    padded = f"<{token}>"
+    features = [(f"w:{token}", 1.0)] + [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[(h & 0x7FFFFFFF) % dim] += -weight if h & 0x80000000 else weight
+    return vector
+
+
+@lru_cache(maxsize=1 << 17)
+def text_vector(text: str, dim: int) -> np.ndarray:
+    """Unnormalized hashed-feature vector of a text (shared; do not modify)."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in tokenize(text):
+        vector += _token_vector(token, dim)
+    return vector
+
+
+class _Growable:
+    """A numpy array with amortized appends."""
+
+    def __init__(self, dtype, width: Optional[int] = None):
+        self.data = np.zeros((1024,) if width is None else (1024, width), dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.zeros((max(end, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    @property
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # column names and types repeat across tables; keep one copy of each
+    return None if value is None else sys.intern(str(value))
+
+
+def _top(ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    if len(ids) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[part], scores[part]
+    order = np.argsort(-scores, kind="stable")
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+class SearchIndex:
+    def __init__(self, dim: Optional[int] = None, lists: Optional[int] = None, probes: Optional[int] = None,
+                 min_ivf_docs: Optional[int] = None, k1: float = 1.2, b: float = 0.75):
+        self.dim = dim or settings.SEARCH_VECTOR_DIM
+        self.nlist = lists or settings.SEARCH_IVF_LISTS
+        self.probes = probes or settings.SEARCH_IVF_PROBES
+        self.min_ivf_docs = settings.SEARCH_IVF_MIN_DOCS if min_ivf_docs is None else min_ivf_docs
+        self.k1, self.b = k1, b
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}  # term -> (doc ids, weighted tf)
+        self.doc_len = _Growable(np.float32)
+        self.doc_kind = _Growable(np.int8)
+        self.doc_table = _Growable(np.int32)
+        self.doc_source = _Growable(np.int32)
+        self.alive = _Growable(np.bool_)
+        self.vectors = _Growable(np.int8, self.dim)
+        self.doc_column: List[Optional[str]] = []
+        self.doc_type: List[Optional[str]] = []
+        self.doc_description: List[Optional[str]] = []
+        # table slot -> [source, table_key, schema, table_name, description, signature, doc ids]
+        self.tables: List[Optional[list]] = []
+        self.table_slots: Dict[Tuple[str, str], int] = {}
+        self.source_ids: Dict[str, int] = {}
+        self.live = self.dead = 0
+        self.total_len = 0.0
+        self.centroids: Optional[np.ndarray] = None
+        self.ivf_lists: List[array] = []
+        self.trained_docs = 0
+
+    # -- indexing ------------------------------------------------------------
+
+    async def ensure_loaded(self, store):
+        """Index everything in `store` once; later writes arrive through `index_documents`."""
+        if self.loaded:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            docs = await store.documents()
+            await asyncio.to_thread(self.index_documents, docs)
+            self.loaded = True
+            logger.info(f"Search index loaded: {self.live} documents from {len(docs)} tables "
+                        f"in {time.perf_counter() - started:.2f}s")
+
+    def index_documents(self, docs: Iterable[Dict[str, Any]], removed: Iterable[Tuple[str, str]] = ()) -> int:
+        """(Re-)index tables (`DictionaryStore.documents` shape) and drop `removed` ones.
+
+        Tables whose content is unchanged are skipped. Returns the number of
+        documents added.
+        """
+        added = 0
+        for source, table_key in removed:
+            with self._lock:
+                slot = self.table_slots.pop((source, table_key), None)
+                if slot is not None:
+                    self._kill(self.tables[slot][6])
+                    self.tables[slot] = None
+        for doc in docs:
+            with self._lock:
+                added += self._index_table(doc)
+        with self._lock:
+            self._maintain()
+        return added
+
+    def _index_table(self, doc: Dict[str, Any]) -> int:
+        key = (doc["source"], doc["table_key"])
+        columns = [tuple(c) for c in doc.get("columns") or []]
+        signature = hash((doc.get("schema"), doc["table_name"], doc.get("description"), tuple(columns)))
+        slot = self.table_slots.get(key)
+        if slot is not None:
+            if self.tables[slot][5] == signature:
+                return 0
+            self._kill(self.tables[slot][6])
+        else:
+            slot = self.table_slots[key] = len(self.tables)
+            self.tables.append(None)
+        source_id = self.source_ids.setdefault(doc["source"], len(self.source_ids))
+        table_name, description, schema = doc["table_name"], doc.get("description"), doc.get("schema")
+
+        # (kind, column, data type, description, BM25 fields, vector fields) per document
+        entries = [(0, None, None, description,
+                    [(table_name, 2.0), (description, 1.0), (schema, 0.5)],
+                    [(table_name, 2.0), (description, 1.0)])]
+        for name, data_type, column_description in columns:
+            entries.append((1, name, data_type, column_description,
+                            [(name, 2.0), (table_name, 1.0), (data_type, 0.5), (column_description, 1.0)],
+                            [(name, 2.0), (column_description, 1.0), (table_name, 0.5), (data_type, 0.5)]))
+
+        first = self.doc_kind.size
+        ids = array("i", range(first, first + len(entries)))
+        lengths = []
+        vectors = np.zeros((len(entries), self.dim), dtype=np.float32)
+        for i, (kind, name, data_type, text, fields, vector_fields) in enumerate(entries):
+            doc_id = first + i
+            weights: Dict[str, float] = {}
+            for value, weight in fields:
+                for token in tokenize(value) if value else ():
+                    weights[token] = weights.get(token, 0.0) + weight
+            for term, weight in weights.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = (array("i"), array("f"))
+                posting[0].append(doc_id)
+                posting[1].append(weight)
+            lengths.append(sum(weights.values()))
+            for value, weight in vector_fields:
+                if value:
+                    vectors[i] += weight * text_vector(value, self.dim)
+            self.doc_column.append(_intern(name))
+            self.doc_type.append(_intern(data_type))
+            self.doc_description.append(text)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        quantized = np.round(vectors / np.maximum(norms, 1e-9) * 127).astype(np.int8)
+        self.vectors.extend(quantized)
+        self.doc_len.extend(lengths)
+        self.doc_kind.extend([e[0] for e in entries])
+        self.doc_table.extend([slot] * len(entries))
+        self.doc_source.extend([source_id] * len(entries))
+        self.alive.extend([True] * len(entries))
+        self.live += len(entries)
+        self.total_len += float(sum(lengths))
+        if self.centroids is not None:
+            self._assign(np.asarray(ids, dtype=np.int64))
+        self.tables[slot] = [doc["source"], doc["table_key"], schema, table_name, description, signature, ids]
+        return len(entries)
+
+    def _kill(self, ids: array):
+        doc_ids = np.frombuffer(ids, dtype=np.int32)
+        self.alive.view[doc_ids] = False
+        self.total_len -= float(self.doc_len.view[doc_ids].sum())
+        self.live -= len(doc_ids)
+        self.dead += len(doc_ids)
+
+    def _maintain(self):
+        if self.dead > max(10_000, self.live):
+            self.compact()
+        if self.live >= self.min_ivf_docs and (self.centroids is None or self.live > 4 * self.trained_docs):
+            self.train()
+
+    def compact(self):
+        """Rebuild without tombstoned documents."""
+        with self._lock:
+            docs = []
+            for entry in self.tables:
+                if entry is None:
+                    continue
+                source, table_key, schema, table_name, description, _, ids = entry
+                columns = [(self.doc_column[i], self.doc_type[i], self.doc_description[i]) for i in ids[1:]]
+                docs.append({"source": source, "table_key": table_key, "schema": schema, "table_name": table_name,
+                             "description": description, "columns": columns})
+            trained = self.centroids is not None
+            self._reset()
+            for doc in docs:
+                self._index_table(doc)
+            if trained and self.live >= self.min_ivf_docs:
+                self.train()
+
+    def train(self):
+        """Cluster the live vectors into IVF lists (spherical k-means)."""
+        with self._lock:
+            started = time.perf_counter()
+            live = np.flatnonzero(self.alive.view)
+            nlist = max(1, min(self.nlist, len(live) // 16))
+            rng = np.random.default_rng(0)
+            sample = rng.choice(live, size=min(len(live), 64 * nlist), replace=False)
+            points = self.vectors.view[sample].astype(np.float32) / 127
+            centroids = points[rng.choice(len(points), nlist, replace=False)]
+            for _ in range(8):
+                assign = np.argmax(points @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, points)
+                empty = np.bincount(assign, minlength=nlist) == 0
+                if empty.any():
+                    sums[empty] = points[rng.choice(len(points), int(empty.sum()))]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-9)
+            self.centroids = centroids.astype(np.float32)
+            self.ivf_lists = [array("i") for _ in range(nlist)]
+            self._assign(live)
+            self.trained_docs = self.live
+            logger.info(f"Search index: clustered {len(live)} vectors into {nlist} lists "
+                        f"in {time.perf_counter() - started:.2f}s")
+
+    def _assign(self, ids: np.ndarray, batch: int = 65536):
+        for start in range(0, len(ids), batch):
+            chunk = ids[start:start + batch]
+            nearest = np.argmax(self.vectors.view[chunk].astype(np.float32) @ self.centroids.T, axis=1)
+            order = np.argsort(nearest, kind="stable")
+            bounds = np.searchsorted(nearest[order], np.arange(len(self.ivf_lists) + 1))
+            for list_id in np.flatnonzero(np.diff(bounds)):
+                members = chunk[order[bounds[list_id]:bounds[list_id + 1]]]
+                self.ivf_lists[list_id].frombytes(members.astype(np.int32).tobytes())
+
+    # -- queries -------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 20, mode: str = "hybrid", kind: Optional[str] = None,
+               source: Optional[str] = None) -> List[Dict[str, Any]]:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        with self._lock:
+            mask = self._mask(kind, source)
+            if mask is None:
+                return []
+            k = max(limit, _CANDIDATES) if mode == "hybrid" else limit
+            lexical = self._bm25(query_tokens(query), mask, k) if mode != "vector" else []
+            semantic = self._nearest(query, mask, k) if mode != "bm25" else []
+            if mode == "bm25":
+                ranked = [(doc_id, score) for doc_id, score in lexical]
+            elif mode == "vector":
+                ranked = [(doc_id, score) for doc_id, score in semantic]
+            else:
+                fused: Dict[int, float] = {}
+                for results in (lexical, semantic):
+                    for rank, (doc_id, _) in enumerate(results):
+                        fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+                ranked = sorted(fused.items(), key=lambda kv: -kv[1])
+            bm25, cosine = dict(lexical), dict(semantic)
+            hits = []
+            for doc_id, score in ranked[:limit]:
+                hit = self._hit(doc_id)
+                hit["score"] = round(score, 6)
+                if doc_id in bm25:
+                    hit["bm25"] = round(bm25[doc_id], 4)
+                if doc_id in cosine:
+                    hit["similarity"] = round(cosine[doc_id], 4)
+                hits.append(hit)
+            return hits
+
+    def _mask(self, kind: Optional[str], source: Optional[str]) -> Optional[np.ndarray]:
+        mask = self.alive.view
+        if kind is not None:
+            if kind not in KINDS:
+                raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+            mask = mask & (self.doc_kind.view == KINDS.index(kind))
+        if source is not None:
+            if source not in self.source_ids:
+                return None
+            mask = mask & (self.doc_source.view == self.source_ids[source])
+        return mask
+
+    def _bm25(self, tokens: Tuple[str, ...], mask: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if not self.live:
+            return []
+        avgdl = self.total_len / self.live
+        ids_parts, score_parts = [], []
+        for term in set(tokens):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            ids = np.frombuffer(posting[0], dtype=np.int32)
+            tf = np.frombuffer(posting[1], dtype=np.float32)
+            df = len(ids)
+            idf = math.log(1.0 + (self.live - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len.view[ids] / avgdl)
+            ids_parts.append(ids.copy())
+            score_parts.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not ids_parts:
+            return []
+        ids, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        keep = mask[ids]
+        return _top(ids[keep], scores[keep], k)
+
+    def _nearest(self, query: str, mask: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        vector = text_vector(query, self.dim).copy()
+        for token in set(tokenize(query or "")) - set(query_tokens(query)):
+            vector -= _token_vector(token, self.dim)  # drop stopwords again
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0 or not self.live:
+            return []
+        vector /= norm
+        if self.centroids is None:
+            candidates = np.flatnonzero(mask)
+        else:
+            closest = np.argsort(-(self.centroids @ vector))[:self.probes]
+            candidates = np.concatenate([np.frombuffer(self.ivf_lists[i], dtype=np.int32) for i in closest])
+            candidates = candidates[mask[candidates]]
+        if not len(candidates):
+            return []
+        scores = (self.vectors.view[candidates].astype(np.float32) @ vector) / 127
+        related = scores > 0
+        return _top(candidates[related], scores[related], k)
+
+    def _hit(self, doc_id: int) -> Dict[str, Any]:
+        source, table_key, schema, table_name = self.tables[int(self.doc_table.view[doc_id])][:4]
+        kind = KINDS[int(self.doc_kind.view[doc_id])]
+        hit = {"kind": kind, "source": source, "table": table_key, "schema": schema, "table_name": table_name}
+        if kind == "column":
+            hit.update(column=self.doc_column[doc_id], data_type=self.doc_type[doc_id])
+        hit["description"] = self.doc_description[doc_id]
+        return hit
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "documents": self.live,
+                "tombstoned": self.dead,
+                "tables": len(self.table_slots),
+                "terms": len(self.postings),
+                "vector_dim": self.dim,
+                "ivf_lists": len(self.ivf_lists) if self.centroids is not None else 0,
+                "ivf_probes": self.probes,
+                "vector_bytes": int(self.vectors.size * self.dim),
+            }
+
+    def metrics(self) -> List[Any]:
+        return [Gauge.snapshot("search_index_documents", "Dictionary search documents by state", ("state",),
+                               {("live",): self.live, ("tombstoned",): self.dead})]
+
+
+search_index = SearchIndex()
+metrics_registry.register_collector(search_index.metrics)
@@ -0,0 +1,79 @@
+"""Bulk catalog export against one Markdown export per table.
+
+Run from the backend directory:
+
+    python -m benchmarks.catalog_export                         # 5,000 tables x 20 columns
+    python -m benchmarks.catalog_export --tables 1000 --formats markdown json parquet --workers 4
+
+Stores a synthetic catalog in a temporary dictionary store, then times:
+
+- the baseline: `get_table` plus `save_markdown_for_table` per table, what
+  the per-table export route does for every call (without the HTTP round
+  trip);
+- a cold bulk export, where every file is rendered (`--workers` processes);
+- a second export of the same catalog, which finds the first one;
+- an export after new descriptions for 1% of the tables.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.storage import artifact_manager
+from app.storage.catalog_export import CatalogExporter
+from app.storage.dictionary_store import DictionaryStore
+from benchmarks.dictionary_store import fresh_engine, synthetic_catalog
+
+
+async def run(args):
+    tmp = tempfile.mkdtemp()
+    catalog = synthetic_catalog(args.tables, args.columns)
+    store = DictionaryStore(engine=await fresh_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'd.sqlite3')}"))
+    await store.save_catalog("bench", catalog)
+    print(f"catalog: {args.tables:,} tables x {args.columns} columns, formats {' '.join(args.formats)}")
+
+    if not args.skip_baseline:
+        artifact_manager.ARTIFACT_DIR = os.path.join(tmp, "single")
+        os.makedirs(artifact_manager.ARTIFACT_DIR)
+        started = time.perf_counter()
+        for key in catalog:
+            stored = await store.get_table(key)
+            artifact_manager.save_markdown_for_table(stored["table_name"], stored["definition"])
+        print(f"per-table markdown: {time.perf_counter() - started:6.2f}s  ({len(catalog):,} calls)")
+
+    exporter = CatalogExporter(artifact_dir=os.path.join(tmp, "bulk"))
+    os.makedirs(exporter.artifact_dir)
+
+    async def export(label):
+        started = time.perf_counter()
+        manifest = await exporter.export(store, "bench", formats=args.formats, layout=args.layout,
+                                         workers=args.workers)
+        elapsed = time.perf_counter() - started
+        if manifest.get("unchanged"):
+            print(f"{label:18s}  {elapsed:6.2f}s  same files as export {manifest['export_id']}, nothing written")
+            return
+        print(f"{label:18s}  {elapsed:6.2f}s  rendered {manifest['rendered']:,}, reused {manifest['reused']:,}, "
+              f"{manifest['bytes'] / 1e6:.1f} MB, {manifest['workers']} worker(s)")
+
+    await export("bulk, cold")
+    await export("bulk, unchanged")
+    keys = list(catalog)[::100]
+    await store.save_descriptions("bench", {key: {"description": "Touched.", "columns": []} for key in keys})
+    await export(f"bulk, {len(keys)} changed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--formats", nargs="+", default=["markdown", "json"])
+    parser.add_argument("--layout", default="archive", choices=["archive", "directory"])
+    parser.add_argument("--workers", type=int, default=None, help="EXPORT_WORKERS (default: one per CPU)")
+    parser.add_argument("--skip-baseline", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
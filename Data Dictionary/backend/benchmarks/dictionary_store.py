@@ -0,0 +1,116 @@
+"""Write throughput of the dictionary store: bulk upserts against per-row inserts.
+
+Run from the backend directory:
+
+    python -m benchmarks.dictionary_store                      # 5,000 tables x 20 columns
+    python -m benchmarks.dictionary_store --tables 500 --url postgresql+asyncpg://...
+
+Each run starts from an empty database (a temporary SQLite file unless
+`--url` is given; its `dd_*` tables are dropped first). `save_catalog`
+writes the catalog in chunks of `--chunk` rows per statement; the baseline
+inserts every table and column row with its own statement, in one
+transaction. A second `save_catalog` of the same catalog shows the cost of
+a refresh where nothing changed, and a few reads show the serving latency.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.extractors.schema_diff import schema_fingerprint
+from app.storage.dictionary_store import DictionaryStore, _dumps, column_rows, dd_columns, dd_tables, metadata
+
+TYPES = ["integer", "bigint", "text", "character varying", "timestamp without time zone", "boolean", "numeric"]
+
+
+def synthetic_catalog(tables: int, columns: int):
+    catalog = {}
+    for t in range(tables):
+        schema = f"schema_{t % 10}"
+        catalog[f"{schema}.table_{t}"] = {
+            "schema": schema,
+            "columns": [{"column_name": f"col_{c}", "data_type": TYPES[(t + c) % len(TYPES)],
+                         "is_nullable": "YES" if c % 3 else "NO", "ordinal_position": c + 1}
+                        for c in range(columns)],
+            "primary_key": ["col_0"],
+            "foreign_keys": [],
+            "unique_constraints": [],
+            "indexes": [],
+        }
+    return catalog
+
+
+async def fresh_engine(url):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+    return engine
+
+
+async def per_row(engine, source, catalog):
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        for key, schema in catalog.items():
+            columns = column_rows(source, key, schema)
+            await conn.execute(insert(dd_tables).values(
+                source=source, table_key=key, schema_name=schema["schema"], table_name=key.split(".", 1)[1],
+                fingerprint=schema_fingerprint(schema), column_count=len(columns), definition=_dumps(schema),
+                refreshed_at=now))
+            for row in columns:
+                await conn.execute(insert(dd_columns).values(**row))
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - started, result
+
+
+async def run(args):
+    catalog = synthetic_catalog(args.tables, args.columns)
+    total = args.tables * args.columns
+    print(f"catalog: {args.tables:,} tables x {args.columns} columns = {total:,} columns")
+    tmp = tempfile.mkdtemp()
+
+    def url(name):
+        return args.url or f"sqlite+aiosqlite:///{os.path.join(tmp, name)}"
+
+    engine = await fresh_engine(url("bulk.sqlite3"))
+    store = DictionaryStore(engine=engine, chunk_size=args.chunk)
+    elapsed, _ = await timed(store.save_catalog("bench", catalog))
+    print(f"bulk upsert:      {elapsed:.2f}s  {total / elapsed:,.0f} columns/s")
+    elapsed, _ = await timed(store.save_catalog("bench", catalog))
+    print(f"unchanged rerun:  {elapsed:.2f}s")
+    reads = [store.list_tables(limit=100), store.list_columns(table="table_7"),
+             store.list_columns(search="col_1", limit=50, offset=100), store.get_table("schema_3.table_3")]
+    for name, coro in zip(("tables page", "table columns", "column search", "table detail"), reads):
+        elapsed, _ = await timed(coro)
+        print(f"  read {name:14s} {elapsed * 1000:.1f} ms")
+    await engine.dispose()
+
+    if not args.skip_baseline:
+        engine = await fresh_engine(url("rows.sqlite3"))
+        elapsed, _ = await timed(per_row(engine, "bench", catalog))
+        print(f"per-row inserts:  {elapsed:.2f}s  {total / elapsed:,.0f} columns/s")
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=None, help="rows per statement (DICTIONARY_WRITE_CHUNK)")
+    parser.add_argument("--url", default=None, help="SQLAlchemy async URL; dd_* tables are dropped first")
+    parser.add_argument("--skip-baseline", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
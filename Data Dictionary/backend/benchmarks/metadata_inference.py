@@ -0,0 +1,131 @@
+"""Columns resolved without the model, and latency saved, by local inference.
+
+Run from the backend directory:
+
+    python -m benchmarks.metadata_inference                    # 200 tables
+    python -m benchmarks.metadata_inference --tables 50 --time-scale 0.1
+
+Every table of the synthetic corpus mixes boilerplate columns (`id`,
+`created_at`, `<entity>_id`, `email`, `is_*`, ...) with domain columns
+(`amount`, `status`, `notes`, ...). Each is documented through the
+`/api/ai/json-metadata` route twice, with and without `local_inference`,
+against a fake model whose latency grows with the columns it describes
+(`--base-latency` plus `--column-latency` per column, times `--time-scale`).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+from app.ai.groq_client import GroqClient
+from app.api.routes import ai
+from app.api.routes.ai import JsonMetadataRequest, generate_json_metadata
+
+ENTITIES = ["customer", "order", "invoice", "product", "shipment", "ticket", "payment", "account"]
+
+
+def _boilerplate(other: str, rng: random.Random, i: int):
+    return {
+        "id": i + 1,
+        f"{other}_id": rng.randint(1, 500),
+        "created_at": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T10:00:00Z",
+        "updated_at": f"2024-1{rng.randint(0, 2)}-0{rng.randint(1, 9)}T12:30:00Z",
+        "email": f"user{i}@example.com",
+        "is_active": rng.random() < 0.8,
+        "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+    }
+
+
+def _domain(rng: random.Random):
+    return {
+        "amount": round(rng.uniform(1, 900), 2),
+        "status": rng.choice(["open", "closed", "pending"]),
+        "notes": rng.choice(["", "call back", "priority", None]),
+        "score": rng.randint(0, 100),
+        "region": rng.choice(["EU", "US", "APAC"]),
+        "quantity": rng.randint(1, 20),
+    }
+
+
+def synthetic_corpus(tables: int, rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for t in range(tables):
+        entity = ENTITIES[t % len(ENTITIES)]
+        other = rng.choice([e for e in ENTITIES if e != entity])
+        keep = None
+        records = []
+        for i in range(rows):
+            record = {**_boilerplate(other, rng, i), **_domain(rng)}
+            if keep is None:
+                keep = rng.sample(list(record), k=rng.randint(6, len(record)))
+            records.append({k: record[k] for k in keep})
+        corpus.append((f"{entity}s_{t}", {"rows": records}))
+    return corpus
+
+
+class FakeGroq(GroqClient):
+    """Answers with metadata for the columns in the prompt, after a simulated delay."""
+
+    base_latency = 0.25
+    column_latency = 0.08
+    calls = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(api_key="benchmark", use_cache=False)
+
+    async def generate_summary(self, text: str) -> str:
+        FakeGroq.calls += 1
+        data = text.split("Data:\n", 1)[-1]
+        names = list(dict.fromkeys(re.findall(r'"([A-Za-z_]+)":', data)))
+        names = [n for n in names if n not in ("rows", "fields", "count", "examples", "type", "sample")]
+        await asyncio.sleep(self.base_latency + self.column_latency * len(names))
+        columns = [{"columnName": n, "dataType": "VARCHAR", "description": f"The {n}."} for n in names]
+        return json.dumps({"tableName": "t", "description": "A table.", "columns": columns})
+
+
+async def document(corpus, local_inference: bool):
+    started = time.perf_counter()
+    local = total = 0
+    for name, data in corpus:
+        result = await generate_json_metadata(
+            JsonMetadataRequest(json_data=data, table_name=name, use_cache=False, local_inference=local_inference))
+        report = result.get("inference")
+        total += report["columns"] if report else len(data["rows"][0])
+        local += report["resolved_locally"] if report else 0
+    return time.perf_counter() - started, local, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--base-latency", type=float, default=0.25, help="seconds per completion")
+    parser.add_argument("--column-latency", type=float, default=0.08, help="seconds per described column")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="multiplier on the simulated latency")
+    args = parser.parse_args()
+
+    FakeGroq.base_latency = args.base_latency * args.time_scale
+    FakeGroq.column_latency = args.column_latency * args.time_scale
+    ai.GroqClient = FakeGroq
+    corpus = synthetic_corpus(args.tables, args.rows)
+
+    for label, local_inference in (("model only", False), ("local inference", True)):
+        FakeGroq.calls = 0
+        elapsed, local, total = asyncio.run(document(corpus, local_inference))
+        if local_inference:
+            saved = baseline - elapsed
+            print(f"{label:16s} {elapsed:.2f}s  {FakeGroq.calls} calls  {local}/{total} columns local "
+                  f"({local / total:.0%})  saved {saved:.2f}s ({saved / baseline:.0%}, "
+                  f"{saved / args.time_scale:.1f}s at full latency)")
+        else:
+            baseline = elapsed
+            print(f"{label:16s} {elapsed:.2f}s  {FakeGroq.calls} calls  {total} columns")
+
+
+if __name__ == "__main__":
+    main()
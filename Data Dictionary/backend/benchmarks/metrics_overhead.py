@@ -0,0 +1,147 @@
+"""Cost of metrics recording per request, against a 5k req/s budget.
+
+Run from the backend directory:
+
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --requests 500000 --app-requests 5000
+
+Requests are driven straight through ASGI (no HTTP client or socket), so only
+the app and its middleware are timed. It reports:
+
+- the primitives: a histogram and a counter update, with and without the
+  `labels()` lookup;
+- what `MetricsMiddleware` adds to a request, measured around an ASGI app
+  that does nothing but answer, as a share of the 200 us a request may
+  take at 5k req/s;
+- the cost of a whole request through a bare FastAPI app and through the
+  full app (`GET /healthz`, logging off), with metrics on and off.
+
+The isolated figure is the one to go by. The middleware adds a few
+microseconds, which is below the run-to-run noise of a whole FastAPI
+request on a shared machine. Two identical runs of the full app can differ
+by several percent.
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+
+from fastapi import FastAPI
+
+from app.api.middleware import MetricsMiddleware
+from app.config import settings
+from app.core.metrics import MetricsRegistry
+
+BUDGET_US = 1e6 / 5000  # per request at 5k req/s
+
+
+class _Route:
+    path = "/api/dictionary/tables/{table}"
+
+
+async def answer(scope, receive, send):
+    """The least an endpoint can do: be routed and send a response."""
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def primitives():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = registry.counter("bench_total", "bench", ("source", "kind"))
+    child = histogram.labels("GET", "/api/dictionary/tables/{table}", 200)
+    number = 1_000_000
+    for label, stmt, env in (
+        ("histogram observe", "child.observe(0.0042)", {"child": child}),
+        ("histogram labels + observe", "h.labels('GET', '/api/dictionary/tables/{table}', 200).observe(0.0042)",
+         {"h": histogram}),
+        ("counter labels + inc", "c.labels('postgresql://u@db/x', 'rows').inc(500)", {"c": counter}),
+    ):
+        seconds = min(timeit.repeat(stmt, globals=env, number=number, repeat=3))
+        print(f"{label:28s} {seconds / number * 1e9:7.0f} ns")
+
+
+def asgi_scope(path):
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"test")], "client": ("127.0.0.1", 50000), "server": ("test", 80)}
+
+
+async def request(app, path):
+    done = asyncio.Event()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()  # as a server would: the client goes away after the response
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(asgi_scope(path), receive, send)
+
+
+async def per_request_us(app, path, count, rounds, enabled=True):
+    """Best-of-`rounds` microseconds per request."""
+    settings.METRICS_ENABLED = enabled
+    await request(app, path)  # builds the middleware stack
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(count):
+            await request(app, path)
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e6
+
+
+def bare_app():
+    mini = FastAPI()
+
+    @mini.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"item_id": item_id}
+
+    return mini
+
+
+async def run(args):
+    primitives()
+
+    plain = await per_request_us(answer, "/", args.requests, args.rounds)
+    measured = await per_request_us(MetricsMiddleware(answer), "/", args.requests, args.rounds)
+    added = measured - plain
+    print(f"MetricsMiddleware adds      {added:5.2f} us/request = {added / BUDGET_US * 100:4.2f}% "
+          f"of a request at 5k req/s ({BUDGET_US:.0f} us)")
+
+    from app.core.logging import logger
+    from app.main import app
+    if hasattr(logger, "remove"):
+        logger.remove()  # loguru: per-request log lines would dominate the timing
+    else:
+        logger.disabled = True
+    bare = bare_app()
+    for label, without, with_, path in (("bare FastAPI app", bare, MetricsMiddleware(bare), "/items/7"),
+                                        ("full app, /healthz", app, app, "/healthz")):
+        off = await per_request_us(without, path, args.app_requests, args.rounds, enabled=False)
+        on = await per_request_us(with_, path, args.app_requests, args.rounds)
+        print(f"{label:20s} {off:7.1f} us/request without metrics, {on:7.1f} us with "
+              f"({(on / off - 1) * 100:+.1f}%); the isolated cost is {added / off * 100:.2f}% of it")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000, help="per round, around the no-op app")
+    parser.add_argument("--app-requests", type=int, default=2000, help="per round, through FastAPI")
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Serialization throughput of a large catalog response, before and after FastJSONResponse.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization                      # 10,000 tables x 20 columns
+    python -m benchmarks.serialization --tables 2000 --rounds 5
+
+Compares the ways an `/api/extract` payload can become bytes:
+
+- `response_model`: what FastAPI did before, validating and serializing the
+  dict against `ExtractResponse` with `data: Dict[str, Any]` and writing it
+  with the stdlib encoder;
+- `jsonable_encoder`: a plain dict return without a response model;
+- `FastJSONResponse`: the pre-rendered response the extract routes return now.
+
+It then compresses that body with gzip and zstd, and times the whole
+`/api/extract/all?cached=true` request through the app for each
+`Accept-Encoding`.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.core.responses import ENCODINGS, FastJSONResponse, compress
+from benchmarks.dictionary_store import synthetic_catalog
+
+
+class UntypedExtractResponse(BaseModel):
+    # ExtractResponse as it was before typed catalog models
+    status: str
+    data: Dict[str, Any]
+    errors: Optional[Dict[str, str]] = None
+    stats: Optional[Dict[str, Any]] = None
+    diff: Optional[Dict[str, Any]] = None
+
+
+def best_of(rounds, fn):
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def serialize(args, catalog):
+    payload = {"status": "ok", "data": catalog, "errors": None, "stats": {"tables": len(catalog)}, "diff": None}
+    field = create_response_field(name="Response_extract", type_=UntypedExtractResponse)
+
+    def response_model():
+        return JSONResponse(asyncio.run(serialize_response(field=field, response_content=payload))).body
+
+    results = {}
+    for name, fn in (("response_model", response_model),
+                     ("jsonable_encoder", lambda: JSONResponse(jsonable_encoder(payload)).body),
+                     ("FastJSONResponse", lambda: FastJSONResponse(payload).body)):
+        elapsed, body = best_of(args.rounds, fn)
+        results[name] = elapsed
+        print(f"{name:17s} {elapsed * 1000:8.1f} ms  {len(body) / 1e6:6.1f} MB  {len(body) / 1e6 / elapsed:7.1f} MB/s")
+    print(f"speed-up over response_model: {results['response_model'] / results['FastJSONResponse']:.1f}x")
+
+    for encoding in ENCODINGS:
+        elapsed, packed = best_of(args.rounds, lambda: compress(body, encoding))
+        print(f"{encoding:17s} {elapsed * 1000:8.1f} ms  {len(packed) / 1e6:6.2f} MB  "
+              f"({len(body) / len(packed):.0f}x smaller)")
+
+
+async def requests(args, catalog):
+    """Whole `/api/extract/all?cached=true` requests, with the catalog read from a stub store."""
+    from app.main import app
+    import app.api.routes.extract as extract_routes
+
+    async def stored(source):
+        return catalog
+
+    extract_routes.dictionary_store.catalog = stored
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        for encoding in ("identity",) + ENCODINGS:
+            times = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                async with ac.stream("GET", "/api/extract/all?cached=true",
+                                     headers={"Accept-Encoding": encoding}) as response:
+                    size = sum([len(chunk) async for chunk in response.aiter_raw()])
+                times.append(time.perf_counter() - started)
+            print(f"request {encoding:9s} {statistics.median(times) * 1000:8.1f} ms  {size / 1e6:6.2f} MB on the wire")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    catalog = synthetic_catalog(args.tables, args.columns)
+    print(f"catalog: {args.tables:,} tables x {args.columns} columns")
+    serialize(args, catalog)
+    asyncio.run(requests(args, catalog))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import pytest
+from app.ai.cache import ResponseCache, cache_key
 from app.ai.groq_client import GroqClient
 from app.ai.langchain_pipeline import LangChainPipeline
 
@@ -18,3 +19,95 @@ async def test_pipeline_summarize():
     # dummy client echoes the text it received; ensure sample file text is included
     assert result.startswith("dummy_response for:")
     assert "SAMPLE_EMPLOYEES" in result or "employees" in result.lower()
+
+
+@pytest.mark.asyncio
+async def test_equivalent_schemas_produce_the_same_prompt():
+    texts = []
+
+    class RecordingClient(GroqClient):
+        async def generate_summary(self, text: str) -> str:
+            texts.append(text)
+            return ""
+
+    pipeline = LangChainPipeline(groq_client=RecordingClient(api_key="test"))
+    await pipeline.summarize_table({"table": "users", "columns": ["id"]})
+    await pipeline.summarize_table({"columns": ["id"], "table": "users"})
+    assert texts[0] == texts[1]
+    assert cache_key("m", 0.7, texts[0]) == cache_key("m", 0.7, texts[1] + "\n  \n")
+
+
+@pytest.mark.asyncio
+async def test_response_cache_tiers_ttl_and_eviction(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path=path, ttl=60, max_entries=2)
+    await cache.set("a", "alpha")
+    await cache.set("b", "beta")
+    await cache.set("c", "gamma")  # evicts "a" from memory only
+
+    assert await cache.get("c") == "gamma"
+    assert await cache.get("a") == "alpha"  # served by the disk tier
+    await cache.set("old", "stale", ttl=-1)
+    assert await cache.get("old") is None
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["evictions"] >= 1 and stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+    # a new instance (process restart) still sees the disk entries
+    assert await ResponseCache(path=path).get("b") == "beta"
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": "described"}}]}
+
+
+@pytest.mark.asyncio
+async def test_groq_client_serves_repeated_prompts_from_cache(tmp_path):
+    calls = []
+
+    class FakeHttpClient:
+        async def post(self, url, headers=None, json=None):
+            calls.append(json)
+            return FakeResponse()
+
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+
+    client = GroqClient(api_key="test", cache=cache, http_client=FakeHttpClient())
+    assert await client.generate_summary("describe users") == "described"
+    assert await client.generate_summary("describe users") == "described"
+    assert len(calls) == 1
+
+    # per-request opt-out always reaches the API
+    await GroqClient(api_key="test", cache=cache, use_cache=False, http_client=FakeHttpClient()).generate_summary("describe users")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_regenerated_metadata_replaces_the_broken_cached_answer(tmp_path):
+    import httpx
+    import json
+    from app.api.routes.ai import _validated_metadata
+
+    fixed = json.dumps({"tableName": "users", "description": "people",
+                        "columns": [{"columnName": "id", "dataType": "INTEGER", "description": "the id"}]})
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"choices": [{"message": {"content": fixed}}]}))
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = GroqClient(api_key="test", cache=cache, use_cache=True, http_client=http_client)
+        key = cache_key(client.model, client.temperature, "describe users")
+        await cache.set(key, "I cannot help with that.")
+
+        broken = await client.generate_summary("describe users")
+        result = await _validated_metadata(client, broken, "users", ["describe users"])
+
+        assert result["valid"] and result["validation"]["regenerated"]
+        assert await cache.get(key) == fixed
+        assert await client.generate_summary("describe users") == fixed
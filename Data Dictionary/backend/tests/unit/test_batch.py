@@ -0,0 +1,140 @@
+import asyncio
+import re
+import time
+
+import httpx
+import pytest
+from app.ai.batch import BatchDocumenter, BatchJobManager, Checkpoint, RateLimiter, TokenBucket, retries, retry_after
+from app.ai.groq_client import GroqClient
+from app.ai.langchain_pipeline import LangChainPipeline
+
+
+def rate_limited(seconds="0.05"):
+    request = httpx.Request("POST", "http://groq.test")
+    response = httpx.Response(429, headers={"Retry-After": seconds}, request=request)
+    return httpx.HTTPStatusError("rate limited", request=request, response=response)
+
+
+class FakeGroq(GroqClient):
+    def __init__(self, state):
+        super().__init__(api_key="test", use_cache=False)
+        self.state = state
+
+    async def generate_summary(self, text: str) -> str:
+        state = self.state
+        table = re.search(r'table"?:\s*"?(\w+)', text).group(1)
+        state["calls"].append(table)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+            if table in state["throttle"]:
+                state["throttle"].remove(table)
+                raise rate_limited()
+            if table in state["broken"]:
+                raise RuntimeError("bad table")
+        finally:
+            state["in_flight"] -= 1
+        self.last_usage = {"total_tokens": 100}
+        return f"about {table}"
+
+
+def documenter(state, **kwargs):
+    kwargs.setdefault("limiter", RateLimiter(requests_per_minute=0, tokens_per_minute=0))
+    return BatchDocumenter(pipeline_factory=lambda: LangChainPipeline(FakeGroq(state)), retry_backoff=0.01, **kwargs)
+
+
+def new_state(**kwargs):
+    state = {"calls": [], "in_flight": 0, "max_in_flight": 0, "throttle": set(), "broken": set()}
+    state.update(kwargs)
+    return state
+
+
+TABLES = {f"t{i}": {"table": f"t{i}", "columns": []} for i in range(6)}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_callers():
+    bucket = TokenBucket(per_minute=600, capacity=1)  # 10 per second
+    started = time.perf_counter()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.perf_counter() - started >= 0.18
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after(rate_limited("2").response) == 2.0
+    response = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert retry_after(response) == 0.0
+    assert retry_after(httpx.Response(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_batch_is_bounded_and_retries_rate_limits():
+    state = new_state(throttle={"t1", "t3"})
+    batch = documenter(state, concurrency=2)
+    retried = retries.labels("rate_limited").value
+    results = await batch.run(TABLES)
+
+    assert set(results) == set(TABLES)
+    assert state["max_in_flight"] == 2
+    assert results["t1"]["attempts"] == 2
+    assert batch.progress["rate_limited"] == 2
+    assert retries.labels("rate_limited").value == retried + 2
+    assert batch.progress["tokens_used"] == 600
+    assert batch.progress["status"] == "completed"
+    assert batch.progress["tables_per_minute"] > 0
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_resumes_unfinished_tables(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "job.jsonl"))
+    first = documenter(new_state(broken={"t4"}), checkpoint=checkpoint, max_retries=0)
+    await first.run(TABLES)
+    assert first.progress["status"] == "completed_with_errors"
+    assert list(first.errors) == ["t4"]
+
+    # simulate a crash mid-write
+    with open(checkpoint.path, "a") as f:
+        f.write('{"table": "t5", "summ')
+
+    state = new_state()
+    second = documenter(state, checkpoint=checkpoint)
+    results = await second.run(TABLES)
+    assert state["calls"] == ["t4"]
+    assert second.progress["resumed"] == 5
+    assert len(results) == 6
+
+
+@pytest.mark.asyncio
+async def test_batch_never_checkpoints_the_local_stub(monkeypatch, tmp_path):
+    from app.main import app
+
+    monkeypatch.setattr("app.config.settings.GROQ_API_KEY", "")
+    checkpoint = Checkpoint(str(tmp_path / "job.jsonl"))
+    batch = BatchDocumenter(limiter=RateLimiter(0, 0), checkpoint=checkpoint)
+    await batch.run({"t0": TABLES["t0"]})
+    assert batch.progress["status"] == "completed_with_errors" and "GROQ_API_KEY" in batch.errors["t0"]
+    assert checkpoint.load() == {}
+
+    stubbed = BatchDocumenter(pipeline_factory=lambda: LangChainPipeline(GroqClient(use_cache=False)),
+                              limiter=RateLimiter(0, 0), checkpoint=checkpoint)
+    await stubbed.run({"t1": TABLES["t1"]})
+    assert list(stubbed.errors) == ["t1"] and checkpoint.load() == {}
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/ai/batch", json={"tables": TABLES})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_job_manager_runs_jobs_in_background(tmp_path):
+    manager = BatchJobManager(directory=str(tmp_path), limiter=RateLimiter(0, 0))
+    state = new_state()
+    job = manager.start(TABLES, pipeline_factory=lambda: LangChainPipeline(FakeGroq(state)))
+    assert manager.start(TABLES) is job  # same catalog, same running job
+    await job.task
+
+    status = job.status()
+    assert status["progress"]["completed"] == 6
+    assert set(manager.load_results(job.id)) == set(TABLES)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app.connectors.blocking import BlockingExecutor
+from app.core.errors import ConnectorError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cancelled = threading.Event()
+
+    def sleep(self, seconds):
+        # behaves like a driver honoring cursor.cancel()
+        if self.cancelled.wait(seconds):
+            raise RuntimeError("query cancelled")
+        return threading.get_ident()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_stall_the_event_loop():
+    executor = BlockingExecutor(FakeConnection, max_workers=2, name="test")
+
+    async def slow():
+        async with executor.acquire() as lease:
+            return await lease.run(lambda cur: cur.sleep(0.2))
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    threads = await asyncio.gather(slow(), slow())
+    elapsed = time.perf_counter() - started
+    tick_task.cancel()
+
+    assert elapsed < 0.39  # ran in parallel on two workers
+    assert ticks >= 10  # loop kept running meanwhile
+    assert executor.size == 2
+    assert len(set(threads)) == 2
+    await executor.close()
+    assert executor.size == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_query_and_frees_worker():
+    executor = BlockingExecutor(FakeConnection, max_workers=1, name="test", query_timeout=0.05)
+
+    async with executor.acquire() as lease:
+        with pytest.raises(ConnectorError):
+            await lease.run(lambda cur: cur.sleep(5))
+
+    async with executor.acquire() as lease:
+        assert await lease.run(lambda cur: "ok") == "ok"
+    await executor.close()
+
+
+def test_sqlserver_connection_string_braces_every_value(monkeypatch):
+    from app.connectors.sqlserver import SQLServerConnector
+
+    monkeypatch.setattr("app.config.settings.SQLSERVER_DRIVER", "ODBC Driver 18 for SQL Server")
+    connector = SQLServerConnector.from_params(
+        host="db.local", port=1433, user="app;Encrypt=no", password="p}w;d=1", database="sales db"
+    )
+
+    assert connector.conn_str == (
+        "DRIVER={ODBC Driver 18 for SQL Server};SERVER={db.local,1433};DATABASE={sales db};"
+        "UID={app;Encrypt=no};PWD={p}}w;d=1};TrustServerCertificate=yes"
+    )
@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import time
+import zipfile
+
+import httpx
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.storage import artifact_manager
+from app.storage.catalog_export import CatalogExporter
+from app.storage.dictionary_store import DictionaryStore
+
+
+def table(schema, *columns):
+    return {"schema": schema, "primary_key": [columns[0]],
+            "foreign_keys": [{"columns": ["user_id"], "referenced_schema": "public", "referenced_table": "users",
+                              "referenced_columns": ["id"]}] if "user_id" in columns else [],
+            "columns": [{"column_name": c, "data_type": "integer" if c.endswith("id") else "text",
+                         "is_nullable": "NO" if c == "id" else "YES", "ordinal_position": i + 1}
+                        for i, c in enumerate(columns)]}
+
+
+CATALOG = {
+    "public.users": table("public", "id", "email", "name"),
+    "public.orders": table("public", "id", "user_id", "status"),
+    "sales.leads": table("sales", "id", "email"),
+}
+
+
+def test_concurrent_atomic_writes_to_one_path_do_not_collide(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = str(tmp_path / "users_0123456789ab.md")
+    payloads = [f"version {i}\n".encode() * 1000 for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: artifact_manager.write_atomic(path, data), payloads))
+
+    with open(path, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["users_0123456789ab.md"]
+
+
+async def stored_catalog(tmp_path):
+    store = DictionaryStore(engine=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dictionary.sqlite3'}"))
+    await store.save_catalog("src", CATALOG)
+    await store.save_descriptions("src", {"public.users": {
+        "description": "People who can sign in.", "columns": [{"columnName": "email", "description": "Login | e-mail."}]}})
+    return store
+
+
+@pytest.mark.asyncio
+async def test_archive_export_renders_every_format_once(tmp_path):
+    store = await stored_catalog(tmp_path)
+    exporter = CatalogExporter(artifact_dir=str(tmp_path))
+    first = await exporter.export(store, "src", formats=["markdown", "json", "parquet"])
+    assert (first["tables"], first["files"], first["rendered"], first["reused"]) == (3, 8, 8, 0)
+
+    with zipfile.ZipFile(first["path"]) as archive:
+        names = set(archive.namelist())
+        users = archive.read("markdown/public/users.md").decode()
+        orders = json.loads(archive.read("json/public/orders.json"))
+        public = pq.read_table(io.BytesIO(archive.read("parquet/schema=public/part-0.parquet"))).to_pylist()
+    assert {"markdown/sales/leads.md", "json/sales/leads.json", "parquet/schema=sales/part-0.parquet",
+            "manifest.json"} <= names
+    assert "People who can sign in." in users and "| email | text | YES | Login \\| e-mail. |" in users
+    assert orders["foreign_keys"][0]["referenced_table"] == "users" and orders["columns"][1]["description"] is None
+    email = next(r for r in public if (r["table_name"], r["column_name"]) == ("users", "email"))
+    assert len(public) == 6 and public[0]["primary_key"] is True and email["description"] == "Login | e-mail."
+
+    again = await exporter.export(store, "src", formats=["markdown", "json", "parquet"])
+    assert again["unchanged"] is True and again["export_id"] == first["export_id"]
+    linked = await exporter.export(store, "src", formats=["markdown", "json", "parquet"], layout="directory")
+    assert (linked["rendered"], linked["reused"]) == (0, 8)
+
+    await store.save_descriptions("src", {"sales.leads": {"description": "Prospects.", "columns": []}})
+    third = await exporter.export(store, "src", formats=["markdown", "json", "parquet"])
+    assert third["rendered"] == 3  # the leads Markdown and JSON, and the sales partition
+
+
+@pytest.mark.asyncio
+async def test_directory_export_filters_and_renders_in_worker_processes(monkeypatch, tmp_path):
+    store = await stored_catalog(tmp_path)
+    exporter = CatalogExporter(artifact_dir=str(tmp_path))
+    monkeypatch.setattr("app.config.settings.EXPORT_PARALLEL_MIN_FILES", 1)
+
+    manifest = await exporter.export(store, "src", formats=["markdown"], layout="directory", workers=2,
+                                     schemas=["public"], tables=["users", "public.orders"])
+    assert (manifest["tables"], manifest["workers"]) == (2, 2)
+    files = sorted(os.path.relpath(os.path.join(d, f), manifest["path"])
+                   for d, _, names in os.walk(manifest["path"]) for f in names)
+    assert files == ["manifest.json", "markdown/public/orders.md", "markdown/public/users.md"]
+    assert "Foreign keys:" in open(os.path.join(manifest["path"], "markdown/public/orders.md")).read()
+    assert await exporter.export(store, "src", schemas=["nope"]) is None
+    with pytest.raises(ValueError):
+        await exporter.export(store, "src", formats=["pdf"])
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_keeps_referenced_files(monkeypatch, tmp_path):
+    store = await stored_catalog(tmp_path)
+    exporter = CatalogExporter(artifact_dir=str(tmp_path))
+    monkeypatch.setattr("app.storage.catalog_export._OBJECT_GRACE", 0.0)
+    monkeypatch.setattr(artifact_manager, "ARTIFACT_DIR", str(tmp_path))
+    old = await exporter.export(store, "src", formats=["json"])
+    await store.save_descriptions("src", {"sales.leads": {"description": "Prospects.", "columns": []}})
+    new = await exporter.export(store, "src", formats=["json"])
+
+    stale = tmp_path / "users_20200101000000.md"
+    stale.write_text("# Table: users\n")
+    os.utime(stale, (time.time() - 30 * 86400,) * 2)
+    kept = artifact_manager.save_markdown_for_table("users", CATALOG["public.users"])
+    # re-exporting the unchanged table must protect the file it hands out again
+    os.utime(kept, (time.time() - 30 * 86400,) * 2)
+    assert artifact_manager.save_markdown_for_table("users", CATALOG["public.users"]) == kept
+
+    removed = exporter.collect_garbage(keep=1)
+    assert (removed["exports"], removed["objects"], removed["artifacts"]) == (1, 1, 1)
+    assert not os.path.exists(old["path"]) and os.path.exists(new["path"]) and os.path.exists(kept)
+    assert [m["export_id"] for m in exporter.list_exports()] == [new["export_id"]]
+    with zipfile.ZipFile(new["path"]) as archive:
+        assert json.loads(archive.read("json/sales/leads.json"))["description"] == "Prospects."
+
+
+@pytest.mark.asyncio
+async def test_catalog_export_routes(monkeypatch, tmp_path):
+    store = await stored_catalog(tmp_path)
+    monkeypatch.setattr("app.api.routes.export.dictionary_store", store)
+    monkeypatch.setattr("app.api.routes.export.catalog_exporter", CatalogExporter(artifact_dir=str(tmp_path)))
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        created = (await ac.post("/api/export/catalog", json={"source": "src", "formats": ["markdown"]})).json()
+        download = await ac.get(f"/api/export/catalog/{created['export_id']}", params={"download": True})
+        listed = (await ac.get("/api/export/catalog")).json()
+        bad = await ac.post("/api/export/catalog", json={"source": "src", "layout": "tarball"})
+        missing = await ac.post("/api/export/catalog", json={"source": "other"})
+        unknown = await ac.get("/api/export/catalog/nope")
+
+    assert created["files"] == 3 and "gc" in created
+    assert download.headers["content-type"] == "application/zip"
+    assert "markdown/public/users.md" in zipfile.ZipFile(io.BytesIO(download.content)).namelist()
+    assert [e["export_id"] for e in listed["exports"]] == [created["export_id"]]
+    assert (bad.status_code, missing.status_code, unknown.status_code) == (400, 404, 404)
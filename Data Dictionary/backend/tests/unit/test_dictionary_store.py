@@ -0,0 +1,110 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.storage.dictionary_store import DictionaryStore
+
+
+def table(schema, *columns):
+    return {"schema": schema, "primary_key": [columns[0]], "foreign_keys": [],
+            "columns": [{"column_name": c, "data_type": "integer" if c.endswith("id") else "text",
+                         "is_nullable": "NO" if c == "id" else "YES", "ordinal_position": i + 1}
+                        for i, c in enumerate(columns)]}
+
+
+CATALOG = {
+    "public.users": table("public", "id", "email", "name"),
+    "public.orders": table("public", "id", "user_id", "status"),
+    "sales.leads": table("sales", "id", "email"),
+}
+
+
+def temp_store(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dictionary.sqlite3'}")
+    # small chunks so the tests cover several statements per write
+    return DictionaryStore(engine=engine, chunk_size=2)
+
+
+@pytest.mark.asyncio
+async def test_save_catalog_rewrites_only_changed_tables(tmp_path):
+    store = temp_store(tmp_path)
+    first = await store.save_catalog("src", CATALOG)
+    assert (first["changed"], first["columns"], first["dropped"]) == (3, 8, 0)
+
+    again = await store.save_catalog("src", CATALOG)
+    assert (again["changed"], again["unchanged"], again["columns"]) == (0, 3, 0)
+
+    altered = {"public.users": table("public", "id", "email", "created_at"), "public.orders": CATALOG["public.orders"]}
+    third = await store.save_catalog("src", altered, errors={"sales.leads": "timeout"})
+    assert (third["changed"], third["dropped"]) == (1, 0)  # a failed table is not dropped
+    users = await store.get_table("public.users")
+    assert [c["column_name"] for c in users["columns"]] == ["id", "email", "created_at"]
+    assert users["columns"][0]["nullable"] is False and users["definition"]["primary_key"] == ["id"]
+
+    fourth = await store.save_catalog("src", altered)
+    assert fourth["dropped"] == 1 and await store.get_table("sales.leads") is None
+    assert [r["changed"] for r in await store.runs("src")] == [0, 1, 0, 3]
+
+
+@pytest.mark.asyncio
+async def test_reads_page_and_filter(tmp_path):
+    store = temp_store(tmp_path)
+    await store.save_catalog("src", CATALOG)
+    await store.save_catalog("other", {"public.users": CATALOG["public.users"]})
+
+    page = await store.list_tables(source="src", limit=2, offset=1)
+    assert page["total"] == 3 and [t["table_key"] for t in page["items"]] == ["public.users", "sales.leads"]
+    assert (await store.list_tables(schema="sales"))["total"] == 1
+
+    emails = await store.list_columns(search="email")
+    assert emails["total"] == 3
+    orders = await store.list_columns(source="src", table="orders", data_type="INTEGER")
+    assert [c["column_name"] for c in orders["items"]] == ["id", "user_id"]
+    assert {s["source"]: s["tables"] for s in await store.sources()} == {"other": 1, "src": 3}
+    assert set(await store.catalog("other")) == {"public.users"}
+
+
+@pytest.mark.asyncio
+async def test_descriptions_and_profiles_survive_unrelated_refreshes(tmp_path):
+    store = temp_store(tmp_path)
+    await store.save_catalog("src", CATALOG)
+    stored = await store.save_descriptions("src", {"public.users": {
+        "description": "People who can sign in.",
+        "columns": [{"columnName": "email", "description": "Login e-mail."}]}})
+    await store.save_profile("src", "users", "sample", {"rows_sampled": 3, "completeness": {"id": 1.0}})
+    await store.save_catalog("src", {**CATALOG, "public.users": table("public", "id", "email", "name", "age")})
+
+    users = await store.get_table("users", source="src")
+    assert stored == 1 and users["description"] == "People who can sign in."
+    assert [c["description"] for c in users["columns"]] == [None, "Login e-mail.", None, None]
+    assert users["profiles"]["sample"]["metrics"]["rows_sampled"] == 3
+    assert (await store.get_profile("src", "users", "pushdown")) is None
+
+
+@pytest.mark.asyncio
+async def test_routes_serve_from_the_store(monkeypatch, tmp_path):
+    store = temp_store(tmp_path)
+    for module in ("dictionary", "export", "extract"):
+        monkeypatch.setattr(f"app.api.routes.{module}.dictionary_store", store)
+    monkeypatch.setattr("app.storage.artifact_manager.ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.extract.default_source", lambda: "src")
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        missing = await ac.get("/api/export/markdown/users")
+        assert missing.status_code == 404
+        assert (await ac.get("/api/extract/all?cached=true")).status_code == 404
+
+        await store.save_catalog("src", CATALOG)
+        tables = (await ac.get("/api/dictionary/tables", params={"schema": "public", "limit": 1})).json()
+        columns = (await ac.get("/api/dictionary/columns", params={"q": "email"})).json()
+        detail = await ac.get("/api/dictionary/tables/public.orders")
+        export = (await ac.get("/api/export/markdown/users")).json()
+        cached = (await ac.get("/api/extract/all?cached=true")).json()
+        assert (await ac.get("/api/dictionary/tables/nope")).status_code == 404
+        assert (await ac.get("/api/dictionary/tables", params={"limit": 0})).status_code == 422
+
+    assert tables["total"] == 2 and len(tables["items"]) == 1
+    assert columns["total"] == 2
+    assert detail.json()["table"]["columns"][1]["column_name"] == "user_id"
+    assert export["source"] == "src" and "| email | text | YES |" in open(export["path"]).read()
+    assert set(cached["data"]) == set(CATALOG) and cached["stats"]["from_store"] is True
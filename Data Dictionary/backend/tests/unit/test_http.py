@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from app.ai.cache import ResponseCache
+from app.ai.groq_client import GroqClient
+from app.core.http import build_client, close_http_client, get_http_client
+
+HANDSHAKE_DELAY = 0.03  # stands in for TCP + TLS setup on a new connection
+
+
+class StubCompletionServer:
+    """Minimal keep-alive HTTP/1.1 server answering chat completions."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/openai/v1/chat/completions"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(HANDSHAKE_DELAY)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                prompt = json.loads(await reader.readexactly(length))["messages"][0]["content"]
+                self.requests += 1
+                body = json.dumps({"choices": [{"message": {"content": f"echo: {prompt}"}}]}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _summaries(count, http_client=None, fresh=False):
+    started = time.perf_counter()
+    for i in range(count):
+        if fresh:
+            async with httpx.AsyncClient() as client:
+                result = await GroqClient(api_key="test", use_cache=False, http_client=client).generate_summary(f"t{i}")
+        else:
+            result = await GroqClient(api_key="test", use_cache=False, http_client=http_client).generate_summary(f"t{i}")
+        assert result == f"echo: t{i}"
+    return time.perf_counter() - started
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_connections(monkeypatch):
+    async with StubCompletionServer() as server:
+        monkeypatch.setattr("app.ai.groq_client.settings.GROQ_API_URL", server.url)
+
+        fresh = await _summaries(10, fresh=True)
+        assert server.connections == 10
+
+        async with build_client() as client:
+            await _summaries(1, http_client=client)  # warm-up
+            warm_connections = server.connections
+            shared = await _summaries(10, http_client=client)
+
+        assert server.connections == warm_connections  # no new connections after warm-up
+        assert shared < fresh / 2
+        assert server.requests == 21
+
+
+@pytest.mark.asyncio
+async def test_app_client_is_shared_and_closed():
+    client = get_http_client()
+    assert get_http_client() is client
+    await close_http_client()
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_groq_client_defaults_to_the_shared_client(monkeypatch):
+    async with StubCompletionServer() as server:
+        monkeypatch.setattr("app.ai.groq_client.settings.GROQ_API_URL", server.url)
+        client = GroqClient(api_key="test", cache=ResponseCache(path=""))
+        await client.generate_summary("a")
+        await client.generate_summary("b")
+        await close_http_client()
+    assert (server.connections, server.requests) == (1, 2)
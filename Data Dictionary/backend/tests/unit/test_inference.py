@@ -0,0 +1,112 @@
+import json
+
+import httpx
+import pandas as pd
+import pytest
+from app.ai.groq_client import GroqClient
+from app.ai.inference import MetadataInferenceEngine, payload_records, restrict_payload
+from app.extractors.profiler import ColumnProfiler
+from app.main import app
+
+ROWS = [
+    {"id": i, "customer_id": i % 3, "created_at": f"2024-01-0{i + 1}T10:00:00Z", "email": f"u{i}@x.io",
+     "is_active": i % 2 == 0, "amount": 10.5 * i, "status": "open" if i else None}
+    for i in range(4)
+]
+
+
+def test_obvious_columns_are_resolved_locally():
+    inference = MetadataInferenceEngine().infer_records("orders", ROWS)
+
+    assert inference["resolved"] == ["id", "customer_id", "created_at", "email", "is_active"]
+    assert inference["unresolved"] == ["amount", "status"]
+    assert inference["primaryKeys"] == ["id"]
+    assert inference["foreignKeys"] == [{"columnName": "customer_id", "referencedTable": "customer", "inferred": True}]
+    columns = inference["columns"]
+    assert columns["id"]["description"] == "Unique identifier of the order record."
+    assert columns["created_at"]["dataType"] == "TIMESTAMP"
+    assert columns["is_active"]["description"] == "Whether the order is active."
+    assert (columns["status"]["nullable"], columns["id"]["isUnique"], columns["customer_id"]["isUnique"]) == (True, True, False)
+
+
+def test_names_need_matching_values():
+    # a `created_at` of free text or an `is_` flag of numbers is not boilerplate
+    records = [{"created_at": "yesterday", "is_new": 1}, {"created_at": "today", "is_new": 0}]
+    assert MetadataInferenceEngine().infer_records("t", records)["resolved"] == []
+
+
+def test_profiles_are_evidence_too():
+    df = pd.DataFrame({"id": [1, 2, 3], "billing_email": ["a@b.io", "c@d.io", None],
+                       "shipped_at": pd.to_datetime(["2024-01-01", "2024-01-02", None])})
+    inference = MetadataInferenceEngine().infer_profiles("shipments", ColumnProfiler().profile(df))
+
+    assert inference["resolved"] == ["id", "billing_email", "shipped_at"]
+    assert inference["columns"]["billing_email"]["description"] == "Billing e-mail address."
+    assert inference["columns"]["shipped_at"]["nullable"] is True
+
+
+def test_payload_records_and_restriction():
+    data = {"source": "crm", "rows": ROWS}
+    key, records = payload_records(data)
+    assert (key, records) == ("rows", ROWS)
+    restricted = restrict_payload(data, key, ["amount"])
+    assert restricted["source"] == "crm" and restricted["rows"][1] == {"amount": 10.5}
+    assert payload_records({"a": 1}) == (None, [{"a": 1}])
+
+
+def test_merge_keeps_column_order_and_local_columns():
+    inference = MetadataInferenceEngine().infer_records("orders", ROWS)
+    model = {"tableName": "orders", "description": "Orders.", "primaryKeys": [],
+             "columns": [{"columnName": "status", "dataType": "VARCHAR", "description": "Order state."},
+                         {"columnName": "amount", "dataType": "DECIMAL", "description": "Order total."}]}
+    merged = MetadataInferenceEngine.merge(inference, model)
+
+    assert [c["columnName"] for c in merged["columns"]] == list(ROWS[0])
+    assert merged["columns"][5]["dataType"] == "DECIMAL"
+    assert merged["primaryKeys"] == ["id"] and merged["foreignKeys"][0]["columnName"] == "customer_id"
+
+
+class RecordingGroq(GroqClient):
+    prompts = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(api_key="test", use_cache=False)
+
+    async def generate_summary(self, text: str) -> str:
+        RecordingGroq.prompts.append(text)
+        return json.dumps({"tableName": "orders", "description": "Customer orders.", "columns": [
+            {"columnName": "amount", "dataType": "FLOAT", "description": "Order total."},
+            {"columnName": "status", "dataType": "VARCHAR", "description": "Order state."},
+        ]})
+
+
+@pytest.mark.asyncio
+async def test_route_sends_only_unresolved_columns(monkeypatch):
+    monkeypatch.setattr("app.api.routes.ai.GroqClient", RecordingGroq)
+    RecordingGroq.prompts = []
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/ai/json-metadata", json={"json_data": {"rows": ROWS}, "table_name": "orders"})
+        body = r.json()
+
+    assert len(RecordingGroq.prompts) == 1
+    data = RecordingGroq.prompts[0].split("Data:\n", 1)[1]
+    assert '"amount"' in data and '"email"' not in data
+    assert body["valid"] is True
+    assert [c["columnName"] for c in body["metadata"]["columns"]] == list(ROWS[0])
+    assert body["metadata"]["description"] == "Customer orders."
+    assert body["inference"] == {"columns": 7, "resolved_locally": 5, "local_fraction": 0.7143,
+                                 "model_columns": ["amount", "status"], "model_skipped": False}
+
+
+@pytest.mark.asyncio
+async def test_route_skips_the_model_when_every_column_resolves(monkeypatch):
+    monkeypatch.setattr("app.api.routes.ai.GroqClient", RecordingGroq)
+    RecordingGroq.prompts = []
+    rows = [{k: v for k, v in row.items() if k not in ("amount", "status")} for row in ROWS]
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/ai/json-metadata", json={"json_data": {"rows": rows}, "table_name": "orders"})
+        body = r.json()
+
+    assert RecordingGroq.prompts == []
+    assert body["inference"]["model_skipped"] is True and body["metadata"]["tableName"] == "orders"
+    assert body["prompt"]["prompt_tokens"] == 0 and body["prompt"]["tokens_saved"] > 0
@@ -0,0 +1,131 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.ai.groq_client import GroqClient, call_seconds, tokens_used
+from app.connectors.base import BaseConnector, query_errors, query_rows, query_seconds
+from app.core.metrics import MetricsRegistry
+from app.main import app
+from app.storage.dictionary_store import DictionaryStore
+
+
+class ListingConnector(BaseConnector):
+    async def get_tables(self):
+        return [{"schema": "public", "table": "users"}, {"schema": "public", "table": "orders"}]
+
+    async def stream_rows(self, table_name, limit=1000, batch_size=None):
+        for start in range(0, 5, 2):
+            yield {"id": list(range(start, min(start + 2, 5)))}
+
+    async def fetch_aggregate(self, query):
+        raise RuntimeError("relation does not exist")
+
+
+def sample(text, line_start):
+    return float(next(line for line in text.splitlines() if line.startswith(line_start)).rsplit(" ", 1)[1])
+
+
+def test_render_writes_the_text_exposition_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    registry.counter("ops_total", "Ops", ("path",)).labels('a "b"\\c').inc(2)
+    registry.gauge("busy", "Busy workers").set(3)
+    for value in (0.05, 0.1, 0.5, 7.0):
+        latency.labels("read").observe(value)
+    assert registry.histogram("op_seconds", "Op latency", ("op",)) is latency
+    with pytest.raises(ValueError):
+        registry.counter("op_seconds", "Op latency")
+    with pytest.raises(ValueError):
+        latency.labels()
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text and "# TYPE busy gauge" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 2\n' in text
+    assert 'op_seconds_bucket{op="read",le="1.0"} 3\n' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4\nop_seconds_sum{op="read"} 7.65\nop_seconds_count{op="read"} 4\n' in text
+    assert 'ops_total{path="a \\"b\\"\\\\c"} 2\n' in text and "busy 3\n" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_labels_requests_by_route(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dictionary.sqlite3'}")
+    monkeypatch.setattr("app.api.routes.dictionary.dictionary_store", DictionaryStore(engine=engine))
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.get("/healthz")
+        await ac.get("/api/dictionary/tables/no_such_table")
+        await ac.get("/no/such/path")
+        response = await ac.get("/metrics")
+        monkeypatch.setattr("app.config.settings.METRICS_ENABLED", False)
+        disabled = await ac.get("/metrics")
+
+    text = response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}') >= 1
+    assert 'route="/api/dictionary/tables/{table}",status="404"' in text and 'route="unmatched"' in text
+    assert "no_such_table" not in text
+    assert sample(text, "http_requests_in_flight") == 1  # the scrape itself
+    assert "db_pool_connections" in text and 'llm_cache_lookups_total{result="miss"}' in text
+    assert disabled.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_connector_queries_are_timed_and_counted():
+    connector = ListingConnector()
+    rows = query_rows.labels("ListingConnector", "rows")
+    streamed = query_seconds.labels("ListingConnector", "rows")
+    before = (rows.value, sum(streamed.counts), query_rows.labels("ListingConnector", "tables").value)
+
+    assert len(await connector.get_tables()) == 2
+    chunks = [chunk async for chunk in connector.stream_rows("users")]
+    with pytest.raises(RuntimeError):
+        await connector.fetch_aggregate("SELECT count(*) FROM nope")
+
+    assert len(chunks) == 3 and ListingConnector.stream_rows.__name__ == "stream_rows"
+    assert (rows.value, sum(streamed.counts), query_rows.labels("ListingConnector", "tables").value) == \
+        (before[0] + 5, before[1] + 1, before[2] + 2)
+    assert query_errors.labels("ListingConnector", "aggregate").value >= 1
+
+
+@pytest.mark.asyncio
+async def test_groq_calls_record_status_and_tokens():
+    answers = [httpx.Response(429, json={"error": "slow down"}),
+               httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}],
+                                         "usage": {"prompt_tokens": 12, "completion_tokens": 3}})]
+    transport = httpx.MockTransport(lambda request: answers.pop(0))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = GroqClient(api_key="test", use_cache=False, http_client=http_client)
+        client.model = "metrics-test"
+        with pytest.raises(httpx.HTTPStatusError):
+            await client._complete("describe users", None)
+        assert (await client._complete("describe users", None))[0] == "ok"
+
+    assert sum(call_seconds.labels("metrics-test", "429").counts) == 1
+    assert sum(call_seconds.labels("metrics-test", "200").counts) == 1
+    assert tokens_used.labels("metrics-test", "prompt").value == 12
+    assert tokens_used.labels("metrics-test", "completion").value == 3
+
+
+class FilteringConnector(ListingConnector):
+    async def get_tables(self):
+        return [t for t in await super().get_tables() if t["table"] != "orders"]
+
+    async def stream_rows(self, table_name, limit=1000, batch_size=None):
+        async for chunk in super().stream_rows(table_name, limit, batch_size):
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_overrides_calling_super_are_recorded_once():
+    connector = FilteringConnector()
+    tables = query_seconds.labels("FilteringConnector", "tables")
+    streamed = query_seconds.labels("FilteringConnector", "rows")
+    rows = query_rows.labels("FilteringConnector", "rows")
+    before = (sum(tables.counts), sum(streamed.counts), rows.value)
+
+    assert await connector.get_tables() == [{"schema": "public", "table": "users"}]
+    chunks = [chunk async for chunk in connector.stream_rows("users")]
+
+    assert len(chunks) == 3
+    assert (sum(tables.counts), sum(streamed.counts), rows.value) == (before[0] + 1, before[1] + 1, before[2] + 5)
+    # a second call in the same context is recorded again
+    await connector.get_tables()
+    assert sum(tables.counts) == before[0] + 2
@@ -0,0 +1,78 @@
+import json
+import re
+
+import pytest
+from app.ai.groq_client import GroqClient
+from app.ai.langchain_pipeline import LangChainPipeline
+from app.ai.packing import PACKED_METADATA_PROMPT, TablePacker, pack, split_packed_output
+
+
+COLUMNS = [{"columnName": "c0", "dataType": "INTEGER", "description": "identifier"}]
+
+
+def small_table(name, columns=4):
+    return {"table": name, "columns": [{"column_name": f"c{i}", "data_type": "integer"} for i in range(columns)]}
+
+
+class MetadataGroq(GroqClient):
+    """Answers packed prompts with keyed JSON, single prompts with one object."""
+
+    def __init__(self, drop=()):
+        super().__init__(api_key="test", use_cache=False)
+        self.prompts = []
+        self.drop = set(drop)
+
+    async def generate_summary(self, text: str) -> str:
+        self.prompts.append(text)
+        if text.startswith(PACKED_METADATA_PROMPT):
+            names = re.findall(r"^### (\w+)$", text, re.M)
+            answer = {n: {"description": f"about {n}", "columns": COLUMNS} for n in names if n not in self.drop}
+            return "Sure! " + json.dumps(answer)
+        name = re.search(r"Table Name: (\w+)", text).group(1)
+        return json.dumps({"tableName": name, "description": f"alone {name}", "columns": COLUMNS})
+
+
+def test_pack_respects_budgets_and_table_limit():
+    costs = {f"t{i}": (100, 50) for i in range(10)}
+    bins = pack(costs, prompt_budget=450, completion_budget=1000, max_tables=3)
+    assert [len(b) for b in bins] == [3, 3, 3, 1]
+    bins = pack(costs, prompt_budget=10_000, completion_budget=120, max_tables=20)
+    assert all(len(b) == 2 for b in bins)
+
+
+def test_split_matches_names_case_insensitively_and_drops_invalid_tables():
+    valid = {"description": "orders", "columns": COLUMNS}
+    answer = "Result: " + json.dumps({"Orders": valid, "users": "oops", "items": {"columns": COLUMNS}})
+    found = split_packed_output(answer, ["orders", "users", "items", "missing"])
+    assert list(found) == ["orders"]
+    assert found["orders"]["tableName"] == "orders"
+    assert split_packed_output("no json here", ["orders"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_small_tables_share_calls_and_missing_ones_are_retried():
+    tables = {f"t{i}": small_table(f"t{i}") for i in range(8)}
+    tables["wide"] = small_table("wide", columns=40)
+    groq = MetadataGroq(drop={"t3"})
+    pipeline = LangChainPipeline(groq)
+    metadata = await pipeline.document_tables(tables)
+
+    assert list(metadata) == list(tables)
+    assert metadata["t0"]["description"] == "about t0"
+    assert metadata["t3"]["description"] == "alone t3"
+    assert metadata["wide"]["description"] == "alone wide"
+
+    report = pipeline.last_pack_report
+    assert report["retried"] == ["t3"]
+    assert report["packed_tables"] == 8
+    assert report["calls"] == len(groq.prompts) == report["packed_calls"] + 2
+    assert report["calls_saved"] == 9 - report["calls"] > 0
+
+
+@pytest.mark.asyncio
+async def test_one_table_per_call_disables_packing():
+    groq = MetadataGroq()
+    packer = TablePacker(groq, max_tables=1)
+    await packer.document({f"t{i}": small_table(f"t{i}") for i in range(3)})
+    assert packer.last_report["packed_calls"] == 0
+    assert packer.last_report["calls_saved"] == 0
@@ -0,0 +1,72 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.extractors.profiler import ColumnProfiler
+
+
+def test_numeric_block_matches_pandas():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({f"c{i}": rng.normal(size=500) for i in range(5)})
+    df.iloc[::7, 2] = np.nan
+    df["ints"] = rng.integers(0, 10, 500)
+
+    # a block size smaller than the frame exercises several blocks
+    profiles = ColumnProfiler(block_size=2).profile(df)
+
+    assert list(profiles) == list(df.columns)
+    for col in df.columns:
+        s, p = df[col], profiles[col]
+        assert p["null_count"] == s.isna().sum()
+        assert p["distinct"] == s.nunique()
+        assert p["mean"] == pytest.approx(s.mean())
+        assert p["std"] == pytest.approx(s.std())
+        assert [p["quantiles"][k] for k in ("p25", "p50", "p75")] == pytest.approx(s.quantile([0.25, 0.5, 0.75]).tolist())
+        assert (p["min"], p["max"]) == (pytest.approx(s.min()), pytest.approx(s.max()))
+    top = profiles["ints"]["top_values"][0]
+    assert top == {"value": int(df["ints"].value_counts().idxmax()), "count": int(df["ints"].value_counts().max())}
+
+
+def test_text_profile_reports_patterns_and_parse_rates():
+    df = pd.DataFrame({"contact": ["a@x.io", "b@x.io", "b@x.io", "+1 415-555-0100", "42", "2024-03-01", None, ""]})
+    p = ColumnProfiler().profile(df)["contact"]
+
+    assert (p["non_null"], p["null_count"], p["distinct"]) == (7, 1, 6)
+    assert p["top_values"][0] == {"value": "b@x.io", "count": 2}
+    assert (p["min"], p["max"]) == ("", "b@x.io")
+    assert (p["min_length"], p["max_length"], p["empty_count"]) == (0, 15, 1)
+    assert p["patterns"]["email"] == pytest.approx(3 / 7, abs=1e-4)
+    assert p["patterns"]["phone"] == pytest.approx(1 / 7, abs=1e-4)
+    assert p["numeric_parse_rate"] == pytest.approx(1 / 7, abs=1e-4)
+    assert p["date_parse_rate"] == pytest.approx(1 / 7, abs=1e-4)
+
+
+def test_driver_objects_are_profiled_by_their_real_type():
+    df = pd.DataFrame({
+        "price": [Decimal("1.50"), None, Decimal("2")],
+        "created": [datetime.datetime(2024, 1, 1), None, datetime.datetime(2024, 1, 3)],
+        "empty": [None, None, None],
+    })
+    profiles = ColumnProfiler().profile(df)
+
+    assert profiles["price"]["kind"] == "numeric" and profiles["price"]["mean"] == pytest.approx(1.75)
+    assert profiles["created"]["kind"] == "datetime"
+    assert profiles["created"]["quantiles"]["p50"] == "2024-01-02T00:00:00"
+    assert (profiles["empty"]["null_ratio"], profiles["empty"]["distinct"], profiles["empty"]["min"]) == (1.0, 0, None)
+
+
+def test_list_and_dict_columns_are_profiled_as_json_text():
+    df = pd.DataFrame({
+        "tags": [[1, 2], [3], None, [1, 2]],
+        "payload": [{"a": 1}, None, {"a": 1}, {"b": [2]}],
+        "name": ["x", "y", None, "x"],
+    })
+    profiles = ColumnProfiler().profile(df)
+
+    assert profiles["tags"]["kind"] == "text" and profiles["tags"]["null_count"] == 1
+    assert profiles["tags"]["distinct"] == 2
+    assert profiles["tags"]["top_values"][0] == {"value": "[1,2]", "count": 2}
+    assert profiles["payload"]["distinct"] == 2 and profiles["payload"]["max"] == '{"b":[2]}'
+    assert profiles["name"]["distinct"] == 2
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from app.ai.groq_client import GroqClient
+from app.ai.langchain_pipeline import LangChainPipeline
+from app.ai.prompt_builder import PromptBuilder, estimate_tokens, merge_json_outputs
+
+
+def wide_table(n):
+    return {
+        "schema": "public",
+        "table": "events",
+        "primary_key": ["id"],
+        "columns": [
+            {"column_name": f"attribute_{i}", "data_type": "character varying", "is_nullable": "YES",
+             "character_maximum_length": 255, "column_default": None}
+            for i in range(n)
+        ],
+    }
+
+
+def test_estimate_counts_indentation_and_punctuation():
+    data = {"a": [1, 2, 3], "b": {"c": "hello world"}}
+    assert estimate_tokens(json.dumps(data, indent=2)) > estimate_tokens(json.dumps(data, separators=(",", ":")))
+    assert estimate_tokens("") == 0
+
+
+def test_oversized_schema_is_split_into_column_chunks():
+    schema = wide_table(300)
+    prompts, report = PromptBuilder(budget=800).table_prompts(schema, baseline=str(schema))
+
+    assert report["chunks"] == len(prompts) > 1
+    assert all(estimate_tokens(p) <= 800 for p in prompts)
+    lines = [line for p in prompts for line in p.splitlines() if line.startswith("attribute_")]
+    assert len(lines) == 300 and lines[0] == "attribute_0|character varying(255)|YES"
+    # every chunk carries the table header
+    assert all(p.startswith("table: public.events\nprimary key: id") for p in prompts)
+    assert report["tokens_saved"] > 0
+
+
+def test_records_collapse_to_representative_examples():
+    records = [{"id": i, "dept": ["eng", "ops"][i % 2], "bio": "x" * 500, "manager": None} for i in range(1000)]
+    instructions = "Describe:\n"
+    baseline = instructions + json.dumps(records, indent=2)
+    prompts, report = PromptBuilder().payload_prompts(records, instructions, baseline=baseline)
+
+    payload = json.loads(prompts[0][len(instructions):])
+    assert payload["rows"] == 1000
+    assert payload["fields"]["dept"]["examples"] == ["eng", "ops"]
+    assert len(payload["fields"]["bio"]["examples"][0]) == 61  # truncated
+    assert payload["fields"]["manager"] == {"type": "null", "examples": [], "nulls": 1000}
+    assert report["tokens_saved"] > 0.9 * report["baseline_tokens"]
+
+
+def test_chunked_metadata_answers_are_merged():
+    outputs = [
+        'Here you go: {"tableName": "t", "columns": [{"columnName": "a"}]}',
+        '{"tableName": "t", "columns": [{"columnName": "b"}]}',
+    ]
+    merged = json.loads(merge_json_outputs(outputs))
+    assert [c["columnName"] for c in merged["columns"]] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_sends_one_call_per_chunk_and_reports_savings():
+    prompts = []
+
+    class RecordingClient(GroqClient):
+        async def generate_summary(self, text: str) -> str:
+            prompts.append(text)
+            return f"part {len(prompts)}"
+
+    pipeline = LangChainPipeline(RecordingClient(api_key="test"), PromptBuilder(budget=600))
+    summary = await pipeline.summarize_table(wide_table(200))
+
+    assert len(prompts) == pipeline.last_prompt_stats["chunks"] > 1
+    assert "SAMPLE_EMPLOYEES" in prompts[0]
+    assert summary.startswith("[part 1 of")
+    assert pipeline.last_prompt_stats["tokens_saved"] > 0
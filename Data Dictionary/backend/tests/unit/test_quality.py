@@ -0,0 +1,237 @@
+import httpx
+import pytest
+from app.connectors.base import BaseConnector
+from app.core.errors import SamplingUnsupported
+from app.extractors.pushdown import build_profile_query
+from app.extractors.quality_analyzer import QualityAnalyzer
+from app.extractors.sampling import Reservoir, Sampler, estimated_error, required_sample_size
+
+
+class RowsConnector(BaseConnector):
+    def __init__(self, rows, estimate=None):
+        self.rows = rows
+        self.estimate = estimate
+
+    async def fetch_rows(self, table_name: str, limit: int = 1000):
+        return self.rows[:limit]
+
+    async def estimate_row_count(self, table_name: str):
+        return self.estimate
+
+
+class NativeSamplingConnector(RowsConnector):
+    def __init__(self, rows, supported=True):
+        super().__init__(rows, estimate=len(rows))
+        self.supported = supported
+
+    def plan_sample(self, estimated_rows, sample_size):
+        return "every_other_row"
+
+    async def stream_sample(self, table_name, plan, batch_size):
+        if not self.supported:
+            raise SamplingUnsupported("no key")
+        picked = self.rows[::2][:plan["sample_size"]]
+        yield {"id": [r["id"] for r in picked]}
+
+
+@pytest.mark.asyncio
+async def test_stream_rows_fallback_yields_columnar_batches():
+    rows = [{"id": i, "email": None if i % 2 else f"u{i}@x.io"} for i in range(5)]
+    chunks = [c async for c in RowsConnector(rows).stream_rows("users", limit=5, batch_size=2)]
+
+    assert [len(c["id"]) for c in chunks] == [2, 2, 1]
+    assert chunks[0] == {"id": [0, 1], "email": ["u0@x.io", None]}
+
+
+@pytest.mark.asyncio
+async def test_analyze_table_aggregates_across_chunks():
+    rows = [{"id": i, "email": None if i % 2 else f"u{i}@x.io"} for i in range(10)]
+    analyzer = QualityAnalyzer(RowsConnector(rows, estimate=10))
+    result = await analyzer.analyze_table("users", sample_rows=20, batch_size=3)
+
+    metrics = result["metrics"]
+    assert metrics["rows_sampled"] == 10
+    assert metrics["columns_analyzed"] == 2
+    assert metrics["completeness"] == {"id": 1.0, "email": 0.5}
+    assert metrics["sampling"]["strategy"] == "full"
+    assert metrics["sampling"]["estimated_error"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_analyze_table_handles_empty_tables():
+    result = await QualityAnalyzer(RowsConnector([])).analyze_table("empty")
+    metrics = result["metrics"]
+    assert (metrics["completeness"], metrics["rows_sampled"], metrics["columns_analyzed"]) == ({}, 0, 0)
+
+
+def test_sample_size_and_error_shrink_with_population():
+    assert required_sample_size(None, 0.02) == 2401
+    assert required_sample_size(1000, 0.02) < 1000
+    assert estimated_error(500, 500) == 0.0
+    assert estimated_error(400, 10_000_000) == pytest.approx(0.049, abs=0.001)
+
+
+def test_reservoir_keeps_a_bounded_uniform_sample():
+    reservoir = Reservoir(5)
+    for start in range(0, 100, 10):
+        reservoir.add({"id": list(range(start, start + 10))})
+    assert reservoir.seen == 100
+    ids = [v for chunk in reservoir.chunks(2) for v in chunk["id"]]
+    assert len(ids) == 5 and len(set(ids)) == 5
+
+
+@pytest.mark.asyncio
+async def test_sampler_falls_back_to_reservoir_without_native_strategy():
+    rows = [{"id": i} for i in range(1000)]
+    sampler = Sampler(RowsConnector(rows, estimate=None))
+    sampled = [v async for chunk in sampler.stream("t", 50, batch_size=20) for v in chunk["id"]]
+
+    assert len(sampled) == 50
+    assert sampler.plan["strategy"] == "reservoir"
+    assert sampler.plan["rows_scanned"] == 1000
+    assert 0 < sampler.plan["estimated_error"] < 1
+
+
+@pytest.mark.asyncio
+async def test_sampler_uses_native_strategy_and_falls_back_when_unsupported():
+    rows = [{"id": i} for i in range(100)]
+    sampler = Sampler(NativeSamplingConnector(rows))
+    sampled = [v async for chunk in sampler.stream("t", 10) for v in chunk["id"]]
+    assert sampler.plan["strategy"] == "every_other_row"
+    assert sampled == list(range(0, 20, 2))
+
+    sampler = Sampler(NativeSamplingConnector(rows, supported=False))
+    sampled = [v async for chunk in sampler.stream("t", 10) for v in chunk["id"]]
+    assert sampler.plan["strategy"] == "reservoir"
+    assert len(sampled) == 10
+
+
+def test_profile_query_quotes_columns_and_picks_metrics_by_type():
+    columns = [("id", "integer"), ("email", "character varying"), ("created", "timestamp"), ("doc", "jsonb")]
+    sql, aliases = build_profile_query("public.users", columns, "postgresql")
+
+    assert sql.startswith("SELECT COUNT(*) AS row_count, COUNT(\"id\") AS c0")
+    assert sql.endswith("FROM public.users")
+    assert 'COUNT(DISTINCT "email")' in sql
+    assert 'SUM(CASE WHEN "id" = 0 THEN 1 ELSE 0 END)' in sql
+    assert 'AVG(LENGTH("email"))' in sql
+    # opaque types only get a null count
+    assert [m for c, m in aliases.values() if c == "doc"] == ["non_null"]
+    assert [m for c, m in aliases.values() if c == "created"] == ["non_null", "distinct", "min", "max"]
+
+    sql, aliases = build_profile_query("t", [("uid", "uuid"), ("price", "money"), ("took", "interval")], "postgresql")
+    assert [m for c, m in aliases.values() if c == "uid"] == ["non_null", "distinct"]
+    assert [m for c, m in aliases.values() if c == "price"] == ["non_null", "distinct"]
+    assert [m for c, m in aliases.values() if c == "took"] == ["non_null", "distinct", "min", "max"]
+    assert '"took" = 0' not in sql
+
+    sql, _ = build_profile_query("users", [("name", "VARCHAR(50)")], "sqlserver")
+    assert "APPROX_COUNT_DISTINCT([name])" in sql and "LEN([name])" in sql
+
+
+class AggregateConnector(RowsConnector):
+    dialect = "postgresql"
+
+    def __init__(self, rows):
+        super().__init__(rows, estimate=len(rows))
+        self.queries = []
+
+    async def get_table_schema(self, table_name):
+        return {"table": table_name, "columns": [{"column_name": "id", "data_type": "integer"},
+                                                 {"column_name": "email", "data_type": "text"}]}
+
+    async def fetch_aggregate(self, query):
+        self.queries.append(query)
+        # uppercase keys as Snowflake returns them
+        return {"ROW_COUNT": 4, "C0": 4, "C1": 4, "C2": 1, "C3": 9, "C4": 0,
+                "C5": 2, "C6": 3, "C7": "a@x.io", "C8": "c@x.io", "C9": "8.5", "C10": 1}
+
+
+@pytest.mark.asyncio
+async def test_pushdown_metrics_parse_the_aggregate_row():
+    connector = AggregateConnector([])
+    result = await QualityAnalyzer(connector).analyze("users", mode="pushdown")
+
+    metrics = result["metrics"]
+    assert len(connector.queries) == 1
+    assert metrics["mode"] == "pushdown"
+    assert metrics["rows_sampled"] == 4
+    assert metrics["completeness"] == {"id": 1.0, "email": 0.5}
+    assert metrics["columns"]["email"] == {"non_null": 2, "null_count": 2, "distinct": 3, "min": "a@x.io",
+                                           "max": "c@x.io", "avg_length": 8.5, "empty_count": 1}
+
+
+class UuidConnector(AggregateConnector):
+    async def get_table_schema(self, table_name):
+        return {"table": table_name, "columns": [{"column_name": "uid", "data_type": "uuid"}]}
+
+    async def fetch_aggregate(self, query):
+        self.queries.append(query)
+        # what Postgres has no function or operator for on uuid
+        if 'MIN("uid")' in query or 'LENGTH("uid")' in query or '"uid" = ' in query:
+            raise RuntimeError("function min(uuid) does not exist")
+        return {"row_count": 3, "c0": 3, "c1": 3}
+
+
+@pytest.mark.asyncio
+async def test_pushdown_profiles_uuid_columns_without_falling_back():
+    connector = UuidConnector([])
+    result = await QualityAnalyzer(connector).analyze("users", mode="pushdown")
+
+    assert result["metrics"]["mode"] == "pushdown" and len(connector.queries) == 1
+    assert result["metrics"]["columns"]["uid"] == {"non_null": 3, "null_count": 0, "distinct": 3}
+
+
+class DsnAggregateConnector(AggregateConnector):
+    def __init__(self, dsn=None):
+        super().__init__([])
+
+    async def connect(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_analyze_route_accepts_the_pushdown_mode(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr("app.connectors.postgresql.PostgresConnector", DsnAggregateConnector)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/quality/analyze", json={"table_name": "users", "mode": "pushdown"})
+        invalid = await ac.post("/api/quality/analyze", json={"table_name": "users", "mode": "guess"})
+
+    assert response.status_code == 200
+    assert response.json()["metrics"]["mode"] == "pushdown"
+    assert response.json()["metrics"]["completeness"] == {"id": 1.0, "email": 0.5}
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_pushdown_falls_back_to_sampling_without_dialect():
+    rows = [{"id": 1, "email": None}, {"id": 2, "email": "b@x.io"}]
+    result = await QualityAnalyzer(RowsConnector(rows, estimate=2)).analyze("users", mode="pushdown")
+
+    assert result["metrics"]["mode"] == "sample"
+    assert result["metrics"]["completeness"] == {"id": 1.0, "email": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_analyze_table_includes_column_profiles():
+    rows = [{"id": i, "email": None if i % 2 else f"u{i}@x.io"} for i in range(10)]
+    result = await QualityAnalyzer(RowsConnector(rows, estimate=10)).analyze_table("users", batch_size=4, profile=True)
+
+    columns = result["metrics"]["columns"]
+    assert columns["id"]["distinct"] == 10 and columns["id"]["max"] == 9
+    assert columns["email"]["patterns"]["email"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_column_profiles_are_opt_in_and_capped(monkeypatch):
+    rows = [{"id": i, "email": f"u{i}@x.io"} for i in range(10)]
+    plain = await QualityAnalyzer(RowsConnector(rows, estimate=10)).analyze_table("users", batch_size=4)
+    assert "columns" not in plain["metrics"]
+
+    monkeypatch.setattr("app.config.settings.PROFILE_MAX_ROWS", 6)
+    capped = await QualityAnalyzer(RowsConnector(rows, estimate=10)).analyze("users", profile=True)
+    metrics = capped["metrics"]
+    assert metrics["rows_sampled"] == 10 and metrics["completeness"]["id"] == 1.0
+    assert metrics["profile_rows"] == 6 and metrics["columns"]["id"]["count"] == 6
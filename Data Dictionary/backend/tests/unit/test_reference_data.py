@@ -0,0 +1,62 @@
+import json
+import os
+
+import httpx
+import pytest
+from app.core.reference_data import ReferenceDataCache
+from app.main import app
+
+
+def write(path, data):
+    path.write_text(json.dumps(data, indent=2))
+
+
+def test_file_is_loaded_once_and_reloaded_on_change(tmp_path):
+    path = tmp_path / "sample.json"
+    write(path, [{"id": 1, "name": "Ada"}])
+    cache = ReferenceDataCache()
+
+    first = cache.get(str(path))
+    assert cache.data(str(path)) == [{"id": 1, "name": "Ada"}]
+    assert cache.get(str(path)) is first
+    assert first.body() == b'[{"id":1,"name":"Ada"}]'
+    assert cache.derive("count", lambda a: len(a.data), str(path)) == 1
+
+    write(path, [{"id": 1}, {"id": 2}])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.derive("count", lambda a: len(a.data), str(path)) == 2
+    assert cache.stats()["reloads"] == 1
+
+
+def test_large_files_are_memory_mapped(tmp_path):
+    path = tmp_path / "big.json"
+    rows = [{"id": i, "note": "x" * 50} for i in range(2000)]
+    write(path, rows)
+    asset = ReferenceDataCache(mmap_threshold=1024).get(str(path))
+
+    assert asset.mapped is not None
+    assert asset.data == rows
+    assert b"".join(asset.iter_body(chunk_size=4096)) == path.read_bytes()
+
+
+def test_invalid_json_raises_value_error(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("")
+    cache = ReferenceDataCache()
+    assert cache.text(str(path)) == ""
+    with pytest.raises(ValueError):
+        cache.data(str(path))
+    assert cache.text(str(tmp_path / "missing.json")) is None
+
+
+@pytest.mark.asyncio
+async def test_sample_extract_serves_cached_bytes(tmp_path, monkeypatch):
+    path = tmp_path / "sample.json"
+    write(path, {"tables": ["users"]})
+    monkeypatch.setattr("app.api.routes.sample.SAMPLE_PATH", str(path))
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/sample/extract", json={})
+    assert r.status_code == 200
+    assert r.content == b'{"tables":["users"]}'
+    assert r.headers["content-type"] == "application/json"
@@ -0,0 +1,89 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import numpy as np
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.api.middleware import CompressionMiddleware
+from app.core.responses import FastJSONResponse, dumps, negotiate
+from app.main import app
+from app.models.schemas import ExtractResponse
+
+
+def test_dumps_matches_the_fastapi_encoding():
+    payload = {"when": datetime(2024, 5, 1, 12, 30), "amount": Decimal("12.50"), "count": Decimal("3"),
+               "tags": {"pii"}, "name": "Zoë", "nested": {"rows": [1, None, 2.5]}}
+    assert json.loads(dumps(payload)) == jsonable_encoder(payload)
+    assert json.loads(dumps({1: np.int64(7), "ratio": np.float32(0.5), "values": np.arange(3)})) == \
+        {"1": 7, "ratio": 0.5, "values": [0, 1, 2]}
+
+
+def test_extract_response_documents_upper_case_column_rows():
+    response = ExtractResponse.model_validate({"status": "success", "data": {
+        "users": {"schema": "shop", "columns": [{"COLUMN_NAME": "id", "COLUMN_TYPE": "int"}]},
+        "public.orders": {"columns": [{"column_name": "id", "data_type": "integer"}]},
+    }})
+    assert response.data["users"].columns[0].column_name == "id"
+    assert response.data["public.orders"].columns[0].data_type == "integer"
+
+
+def test_negotiate_follows_client_weights():
+    assert negotiate("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate("zstd;q=0.5, gzip") == "gzip"
+    assert negotiate("*;q=0.2") == "zstd"
+    assert negotiate("gzip;q=0, br") is None
+    assert negotiate(None) is None
+
+
+@pytest.mark.asyncio
+async def test_catalog_responses_are_compressed_when_accepted(monkeypatch):
+    catalog = {f"public.t{i}": {"schema": "public", "columns": [{"column_name": f"c{j}", "data_type": "text"}
+                                                                  for j in range(10)]} for i in range(50)}
+
+    async def stored(source):
+        return catalog
+
+    monkeypatch.setattr("app.api.routes.extract.dictionary_store.catalog", stored)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        plain = await ac.get("/api/extract/all?cached=true", headers={"Accept-Encoding": "identity"})
+        packed = await ac.get("/api/extract/all?cached=true", headers={"Accept-Encoding": "zstd"})
+        small = await ac.get("/api/extract/pools", headers={"Accept-Encoding": "zstd"})
+
+    assert "content-encoding" not in plain.headers and plain.json()["data"] == catalog
+    assert packed.headers["content-encoding"] == "zstd" and packed.headers["vary"] == "Accept-Encoding"
+    assert int(packed.headers["content-length"]) < len(plain.content) / 5
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(packed.content) == plain.content
+    assert "content-encoding" not in small.headers  # under COMPRESSION_MIN_SIZE
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_are_not_compressed():
+    mini = FastAPI(default_response_class=FastJSONResponse)
+    mini.add_middleware(CompressionMiddleware)
+
+    @mini.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(3):
+                yield dumps({"row": i, "pad": "x" * 2000}) + b"\n"
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    @mini.get("/whole")
+    async def whole():
+        return {"pad": "x" * 5000}
+
+    async with httpx.AsyncClient(app=mini, base_url="http://test") as ac:
+        streamed = await ac.get("/stream", headers={"Accept-Encoding": "gzip"})
+        # read the raw body: httpx would decode gzip transparently
+        async with ac.stream("GET", "/whole", headers={"Accept-Encoding": "gzip"}) as whole:
+            raw = b"".join([chunk async for chunk in whole.aiter_raw()])
+
+    assert "content-encoding" not in streamed.headers and len(streamed.text.splitlines()) == 3
+    assert whole.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(raw)) == {"pad": "x" * 5000}
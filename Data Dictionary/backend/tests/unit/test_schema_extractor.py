@@ -0,0 +1,316 @@
+import asyncio
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.connectors.base import BaseConnector
+from app.extractors.schema_extractor import SchemaExtractor
+
+
+class PerTableConnector(BaseConnector):
+    def __init__(self):
+        self.schema_calls = 0
+
+    async def get_tables(self):
+        return [{"TABLE_SCHEMA": "shop", "TABLE_NAME": "users"}]
+
+    async def get_table_schema(self, table_name: str):
+        self.schema_calls += 1
+        return {"columns": [{"COLUMN_NAME": "id", "COLUMN_TYPE": "int", "IS_NULLABLE": "NO"}]}
+
+
+class BulkConnector(PerTableConnector):
+    supports_bulk_catalog = True
+
+    async def get_catalog(self):
+        return {
+            "tables": [
+                {"table_schema": "public", "table_name": "users"},
+                {"table_schema": "public", "table_name": "orders"},
+                {"table_schema": "archive", "table_name": "orders"},
+                {"table_schema": "public", "table_name": "empty"},
+            ],
+            "columns": [
+                {"table_schema": "public", "table_name": "users", "column_name": "id", "ordinal_position": 1},
+                {"table_schema": "public", "table_name": "users", "column_name": "email", "ordinal_position": 2},
+                {"table_schema": "public", "table_name": "orders", "column_name": "user_id", "ordinal_position": 1},
+                {"table_schema": "archive", "table_name": "orders", "column_name": "id", "ordinal_position": 1},
+            ],
+            "constraints": [
+                {"table_schema": "public", "table_name": "users", "constraint_name": "users_pkey",
+                 "constraint_type": "PRIMARY KEY", "columns": ["id"]},
+                {"table_schema": "public", "table_name": "orders", "constraint_name": "orders_user_fk",
+                 "constraint_type": "FOREIGN KEY", "columns": ["user_id"], "referenced_schema": "public",
+                 "referenced_table": "users", "referenced_columns": ["id"]},
+            ],
+            "indexes": [
+                {"table_schema": "public", "table_name": "users", "index_name": "users_pkey",
+                 "columns": ["id"], "is_unique": True, "is_primary": True},
+            ],
+        }
+
+
+@pytest.mark.asyncio
+async def test_extract_all_uses_bulk_catalog():
+    connector = BulkConnector()
+    result = await SchemaExtractor(connector).extract_all()
+
+    assert connector.schema_calls == 0
+    assert set(result) == {"users", "public.orders", "archive.orders", "empty"}
+    users = result["users"]
+    assert [c["column_name"] for c in users["columns"]] == ["id", "email"]
+    assert "table_name" not in users["columns"][0]
+    assert users["primary_key"] == ["id"]
+    assert users["indexes"][0]["is_primary"] is True
+    assert result["public.orders"]["foreign_keys"][0]["referenced_table"] == "users"
+    assert result["empty"]["columns"] == []
+
+
+@pytest.mark.asyncio
+async def test_extract_all_falls_back_to_per_table():
+    connector = PerTableConnector()
+    result = await SchemaExtractor(connector).extract_all()
+
+    assert connector.schema_calls == 1
+    assert result["users"]["columns"][0]["COLUMN_NAME"] == "id"
+
+
+class FlakyConnector(BaseConnector):
+    def __init__(self):
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_tables(self):
+        return [{"table_name": f"t{i}"} for i in range(6)] + [{"table_name": "broken"}, {"table_name": "flaky"}]
+
+    async def get_table_schema(self, table_name: str):
+        self.attempts[table_name] = self.attempts.get(table_name, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if table_name == "broken":
+                raise RuntimeError("permission denied")
+            if table_name == "flaky" and self.attempts[table_name] == 1:
+                raise RuntimeError("connection reset")
+            return {"columns": [{"column_name": "id"}]}
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_per_table_extraction_is_bounded_and_returns_partial_results():
+    connector = FlakyConnector()
+    extractor = SchemaExtractor(connector, concurrency=3, table_timeout=5, retries=1, retry_backoff=0)
+    result = await extractor.extract_all()
+
+    assert connector.max_in_flight <= 3
+    assert "flaky" in result and connector.attempts["flaky"] == 2
+    assert "broken" not in result
+    assert extractor.errors == {"broken": "permission denied"}
+    assert extractor.stats["succeeded"] == 7
+    assert extractor.stats["failed"] == 1
+    assert extractor.stats["tables_per_sec"] > 0
+
+
+@pytest.mark.asyncio
+async def test_per_table_timeout_is_reported_as_error():
+    class SlowConnector(PerTableConnector):
+        async def get_table_schema(self, table_name: str):
+            await asyncio.sleep(1)
+
+    extractor = SchemaExtractor(SlowConnector(), table_timeout=0.01, retries=0)
+    result = await extractor.extract_all()
+    assert result == {}
+    assert "timed out" in extractor.errors["users"]
+
+
+class SignatureConnector(BaseConnector):
+    supports_bulk_catalog = True
+    supports_table_signatures = True
+
+    def __init__(self):
+        self.columns = {
+            "users": [{"column_name": "id", "data_type": "integer"}],
+            "orders": [{"column_name": "id", "data_type": "integer"}],
+        }
+        self.catalog_requests = []
+
+    async def get_table_signatures(self):
+        return [
+            {"table_schema": "public", "table_name": name, "signature": str(hash(str(cols)))}
+            for name, cols in self.columns.items()
+        ]
+
+    async def get_catalog(self, tables=None):
+        self.catalog_requests.append(tables)
+        wanted = {t[1] for t in tables} if tables is not None else set(self.columns)
+        return {
+            "tables": [{"table_schema": "public", "table_name": n} for n in wanted],
+            "columns": [
+                dict(c, table_schema="public", table_name=n)
+                for n, cols in self.columns.items() if n in wanted for c in cols
+            ],
+        }
+
+
+@pytest.mark.asyncio
+async def test_incremental_extraction_only_reads_changed_tables(tmp_path):
+    from app.storage.fingerprint_store import FingerprintStore
+
+    store = FingerprintStore(str(tmp_path / "fp.sqlite3"))
+    connector = SignatureConnector()
+
+    first = await SchemaExtractor(connector).extract_incremental("src", store)
+    assert set(first) == {"users", "orders"}
+    assert first["users"]["columns"][0]["column_name"] == "id"
+
+    connector.columns["users"].append({"column_name": "email", "data_type": "text"})
+    del connector.columns["orders"]
+    connector.columns["items"] = [{"column_name": "sku", "data_type": "text"}]
+
+    extractor = SchemaExtractor(connector)
+    second = await extractor.extract_incremental("src", store)
+
+    assert set(second) == {"users", "items"}
+    assert sorted(t[1] for t in connector.catalog_requests[-1]) == ["items", "users"]
+    assert extractor.diff["added"] == ["items"]
+    assert extractor.diff["dropped"] == ["orders"]
+    assert extractor.diff["altered"]["users"]["added_columns"] == ["email"]
+    assert extractor.stats["incremental"] == {"reextracted": 2, "reused": 0}
+
+    third_extractor = SchemaExtractor(connector)
+    third = await third_extractor.extract_incremental("src", store)
+    assert third == second
+    assert third_extractor.diff["unchanged"] == 2
+    assert third_extractor.stats["incremental"]["reused"] == 2
+
+
+class FakeMySQLCursor:
+    """Answers each INFORMATION_SCHEMA view with per-table hashes from `parts`.
+
+    Names starting with "v_" are views; a query joined to TABLES on
+    BASE TABLE does not see them.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        view = next((v for v in ("KEY_COLUMN_USAGE", "STATISTICS", "COLUMNS") if v in query), None)
+        self.rows = [
+            {"TABLE_SCHEMA": "shop", "TABLE_NAME": table, "part": part}
+            for table, part in self.parts.get(view, {}).items()
+            if not (table.startswith("v_") and "TABLE_TYPE = 'BASE TABLE'" in query)
+        ]
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeMySQLPool:
+    def __init__(self, parts):
+        self.parts = parts
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+    def cursor(self, cursor_class=None):
+        return FakeMySQLCursor(self.parts)
+
+
+@pytest.mark.asyncio
+async def test_mysql_signature_changes_when_only_an_index_changes():
+    from app.connectors.mysql import MySQLConnector
+
+    parts = {
+        "COLUMNS": {"users": "c1", "orders": "c2", "v_active_users": "c3"},
+        "KEY_COLUMN_USAGE": {"orders": "k2"},
+        "STATISTICS": {"users": "i1", "orders": "i2", "dropped": "i3"},
+    }
+    connector = MySQLConnector()
+    connector.pool = FakeMySQLPool(parts)
+
+    before = {r["TABLE_NAME"]: r["signature"] for r in await connector.get_table_signatures()}
+    parts["STATISTICS"]["users"] = "i1 with a new index"
+    after = {r["TABLE_NAME"]: r["signature"] for r in await connector.get_table_signatures()}
+
+    assert set(before) == {"users", "orders"}
+    assert after["users"] != before["users"]
+    assert after["orders"] == before["orders"]
+
+
+@pytest.mark.asyncio
+async def test_iter_tables_streams_per_table_results_and_summary():
+    connector = FlakyConnector()
+    extractor = SchemaExtractor(connector, concurrency=2, retries=0)
+    records = [r async for r in extractor.iter_tables()]
+
+    assert connector.max_in_flight <= 2
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["tables"] == 8 and records[-1]["errors"] == 2
+    tables = {r["table"] for r in records if r["type"] == "table"}
+    errors = {r["table"] for r in records if r["type"] == "error"}
+    assert tables == {f"t{i}" for i in range(6)}
+    assert errors == {"broken", "flaky"}
+
+
+@pytest.mark.asyncio
+async def test_iter_tables_reads_bulk_catalog_in_chunks():
+    connector = SignatureConnector()
+    connector.columns["items"] = [{"column_name": "sku"}]
+
+    async def get_tables():
+        return [{"table_schema": "public", "table_name": n} for n in connector.columns]
+
+    connector.get_tables = get_tables
+    records = [r async for r in SchemaExtractor(connector).iter_tables(chunk_size=2)]
+
+    assert [len(t) for t in connector.catalog_requests] == [2, 1]
+    assert sorted(r["table"] for r in records if r["type"] == "table") == ["items", "orders", "users"]
+    assert records[-1]["type"] == "summary"
+
+
+class ConnectedBulkConnector(BulkConnector):
+    def __init__(self, **params):
+        super().__init__()
+        self.params = params
+
+    async def connect(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_connect_route_extracts_with_the_requested_connector(monkeypatch, tmp_path):
+    from app.main import app
+    from app.storage.dictionary_store import DictionaryStore
+
+    store = DictionaryStore(engine=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dictionary.sqlite3'}"))
+    monkeypatch.setattr("app.api.routes.extract.dictionary_store", store)
+    monkeypatch.setattr("app.connectors.mysql.MySQLConnector", ConnectedBulkConnector)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/extract/connect", json={"db_type": "mysql", "host": "db", "user": "u",
+                                                              "password": "p", "database": "shop"})
+        unsupported = await ac.post("/api/extract/connect", json={"db_type": "oracle"})
+
+    assert response.status_code == 200
+    assert set(response.json()["data"]) == {"users", "public.orders", "archive.orders", "empty"}
+    assert await store.sources()
+    assert unsupported.status_code == 422
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.storage.dictionary_store import DictionaryStore
+from app.storage.search_index import SearchIndex, query_tokens, tokenize
+
+
+def doc(table, columns, description=None, source="src"):
+    return {"source": source, "table_key": f"public.{table}", "schema": "public", "table_name": table,
+            "description": description, "columns": columns}
+
+
+DOCS = [
+    doc("customers", [("id", "integer", None), ("email_address", "text", "Contact e-mail of the customer"),
+                      ("fullName", "text", None)], "People who buy things."),
+    doc("orders", [("id", "integer", None), ("customer_id", "integer", None), ("total", "numeric", "Order amount")]),
+    doc("users", [("id", "integer", None), ("e_mail", "text", None)]),
+]
+
+
+def test_tokens_split_identifiers_and_drop_question_words():
+    assert tokenize("customerEmail") == tokenize("customer_emails") == ("customer", "email")
+    assert query_tokens("which column holds customer email") == ("customer", "email")
+
+
+def test_bm25_and_vectors_find_columns():
+    index = SearchIndex(min_ivf_docs=10**9)
+    assert index.index_documents(DOCS) == 11
+
+    top = index.search("which column holds customer email", mode="bm25", kind="column")[0]
+    assert (top["table"], top["column"]) == ("public.customers", "email_address")
+    # no shared token, but shared character trigrams
+    assert index.search("mail", mode="vector", kind="column")[0]["column"] == "e_mail"
+    hybrid = index.search("customer email", limit=3)
+    assert hybrid[0]["column"] == "email_address" and "bm25" in hybrid[0] and "similarity" in hybrid[0]
+    assert index.search("full name", kind="column", limit=1)[0]["column"] == "fullName"
+    assert index.search("customer", kind="table", limit=1)[0]["description"] == "People who buy things."
+    assert index.search("customer email", source="other") == []
+
+
+def test_indexing_is_incremental():
+    index = SearchIndex(min_ivf_docs=10**9)
+    index.index_documents(DOCS)
+    assert index.index_documents(DOCS) == 0  # unchanged tables are skipped
+
+    described = doc("users", [("id", "integer", None), ("e_mail", "text", "Login address for sign in")])
+    assert index.index_documents([described]) == 3
+    assert index.search("login", mode="bm25")[0]["column"] == "e_mail"
+    assert index.stats()["tombstoned"] == 3
+
+    index.index_documents([], removed=[("src", "public.users")])
+    assert all(h["table"] != "public.users" for h in index.search("mail login", limit=20))
+    index.compact()
+    assert (index.stats()["documents"], index.stats()["tombstoned"]) == (8, 0)
+    assert index.search("customer email", mode="bm25", kind="column")[0]["column"] == "email_address"
+
+
+def test_ivf_scanning_every_list_matches_the_exhaustive_scan():
+    docs = [doc(f"table_{t}", [(f"{word}_{c}", "text", None) for c, word in
+                               enumerate(["email", "phone", "amount", "created_at", "status", "name"])])
+            for t in range(60)]
+    exact = SearchIndex(min_ivf_docs=10**9)
+    clustered = SearchIndex(lists=8, probes=8, min_ivf_docs=100)
+    exact.index_documents(docs)
+    clustered.index_documents(docs)
+
+    assert clustered.stats()["ivf_lists"] == 8 and exact.stats()["ivf_lists"] == 0
+    for query in ("email", "phone number", "status"):
+        assert ([h["score"] for h in clustered.search(query, mode="vector", limit=10)]
+                == [h["score"] for h in exact.search(query, mode="vector", limit=10)])
+    # new documents go to the closest list
+    clustered.index_documents([doc("late", [("mailbox", "text", None)])])
+    assert clustered.search("mailbox", mode="vector", limit=1)[0]["table"] == "public.late"
+
+
+@pytest.mark.asyncio
+async def test_search_route_loads_the_store_and_follows_new_descriptions(monkeypatch, tmp_path):
+    store = DictionaryStore(engine=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'd.sqlite3'}"))
+    index = SearchIndex(min_ivf_docs=10**9)
+    monkeypatch.setattr("app.api.routes.dictionary.dictionary_store", store)
+    monkeypatch.setattr("app.api.routes.dictionary.search_index", index)
+    monkeypatch.setattr("app.storage.dictionary_store.search_index", index)
+    await store.save_catalog("src", {"public.accounts": {"schema": "public", "columns": [
+        {"column_name": "id", "data_type": "integer"}, {"column_name": "addr", "data_type": "text"}]}})
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        first = (await ac.get("/api/dictionary/search", params={"q": "billing address", "mode": "bm25"})).json()
+        await store.save_descriptions("src", {"public.accounts": {
+            "description": "Customer accounts.", "columns": [{"columnName": "addr", "description": "Billing address."}]}})
+        second = (await ac.get("/api/dictionary/search", params={"q": "billing address", "kind": "column"})).json()
+        bad = await ac.get("/api/dictionary/search", params={"q": "x", "mode": "fuzzy"})
+        stats = (await ac.get("/api/dictionary/search/stats")).json()
+
+    assert first["hits"] == []
+    assert second["hits"][0]["column"] == "addr" and second["hits"][0]["description"] == "Billing address."
+    assert bad.status_code == 400
+    assert stats["index"]["loaded"] is True and stats["index"]["documents"] == 3
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from app.ai.cache import ResponseCache
+from app.ai.groq_client import GroqClient
+from app.connectors.base import BaseConnector
+from app.core.singleflight import SingleFlight
+from app.extractors.schema_extractor import SchemaExtractor
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call_and_its_error():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.02)
+        return {"n": len(runs)}
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+    assert runs == [1] and all(r is results[0] for r in results)
+    stats = flight.stats()
+    assert (stats["executions"], stats["shared"], stats["in_flight"]) == (1, 4, 0)
+    assert stats["keys"]["k"]["max_waiters"] == 5
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    outcomes = await asyncio.gather(flight.do("bad", fail), flight.do("bad", fail), return_exceptions=True)
+    assert [str(o) for o in outcomes] == ["boom", "boom"]
+    assert flight.stats()["keys"]["bad"]["errors"] == 1
+
+    # finished calls are not cached
+    await flight.do("k", work)
+    assert len(runs) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.03)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+
+class SlowResponse:
+    status_code = 200
+    text = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": "described"}}], "usage": {"total_tokens": 7}}
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_in_flight_reach_the_api_once():
+    posts = []
+
+    class SlowHttpClient:
+        async def post(self, url, headers=None, json=None):
+            posts.append(json)
+            await asyncio.sleep(0.02)
+            return SlowResponse()
+
+    clients = [GroqClient(api_key="test", cache=ResponseCache(path=""), http_client=SlowHttpClient())
+               for _ in range(4)]
+    answers = await asyncio.gather(*(c.generate_summary("describe orders") for c in clients))
+    assert answers == ["described"] * 4
+    assert len(posts) == 1
+    assert all(c.last_usage == {"total_tokens": 7} for c in clients)
+
+
+@pytest.mark.asyncio
+async def test_cache_opt_out_does_not_join_a_summary_in_flight(monkeypatch):
+    from app.ai.langchain_pipeline import LangChainPipeline
+
+    posts = []
+
+    class SlowHttpClient:
+        async def post(self, url, headers=None, json=None):
+            posts.append(json)
+            await asyncio.sleep(0.02)
+            return SlowResponse()
+
+    monkeypatch.setattr(LangChainPipeline, "_read_sample", lambda self: None)
+    pipelines = [LangChainPipeline(GroqClient(api_key="test", cache=ResponseCache(path=""), use_cache=use_cache,
+                                              http_client=SlowHttpClient()))
+                 for use_cache in (True, True, False)]
+    schema = {"columns": [{"column_name": "id", "data_type": "integer"}]}
+    answers = await asyncio.gather(*(p.summarize_table(schema) for p in pipelines))
+    assert answers == ["described"] * 3
+    assert len(posts) == 2
+
+
+class PooledConnector(BaseConnector):
+    def __init__(self, calls):
+        self.pool = SimpleNamespace(key="postgresql://u@db:5432/shop#abc")
+        self.calls = calls
+
+    async def get_tables(self):
+        self.calls.append(1)
+        await asyncio.sleep(0.02)
+        return [{"table_name": "users"}]
+
+    async def get_table_schema(self, table_name):
+        return {"columns": [{"column_name": "id"}]}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_catalog_extractions_share_one_run():
+    calls = []
+    extractors = [SchemaExtractor(PooledConnector(calls)) for _ in range(3)]
+    results = await asyncio.gather(*(e.extract_all() for e in extractors))
+    assert len(calls) == 1
+    assert all(r == {"users": {"columns": [{"column_name": "id"}]}} for r in results)
+    assert results[0] is not results[1]
+    assert all(e.stats["tables"] == 1 for e in extractors)
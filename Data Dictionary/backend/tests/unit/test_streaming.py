@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from app.ai.cache import ResponseCache
+from app.ai.groq_client import GroqClient
+from app.ai.streaming import PromptStream, iter_sse_data
+from app.main import app
+
+TOKEN_DELAY = 0.05
+
+
+class StubSSEServer:
+    """Chat completions server that streams its answer as chunked server-sent events."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.requests = []
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/openai/v1/chat/completions"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(":", 1)[1]) for line in head.decode().split("\r\n")
+                      if line.lower().startswith("content-length:"))
+        self.requests.append(json.loads(await reader.readexactly(length)))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+
+        def send(data: bytes):
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        send(b": keep-alive\n\n")
+        for piece in self.pieces:
+            event = "data: " + json.dumps({"choices": [{"delta": {"content": piece}}]}) + "\n\n"
+            # split every event mid-line across two writes
+            half = len(event) // 2
+            send(event[:half].encode())
+            await writer.drain()
+            send(event[half:].encode())
+            await writer.drain()
+            await asyncio.sleep(TOKEN_DELAY)
+        usage = {"choices": [{"delta": {}}], "x_groq": {"usage": {"total_tokens": 42}}}
+        send(("data: " + json.dumps(usage) + "\n\ndata: [DONE]\n\n").encode())
+        send(b"")
+        await writer.drain()
+        writer.close()
+
+
+async def _lines(*lines):
+    for line in lines:
+        yield line
+
+
+@pytest.mark.asyncio
+async def test_sse_parser_joins_multiline_data_and_skips_comments():
+    events = [e async for e in iter_sse_data(_lines(": ping", "event: x", "data: a", "data:b", "", "", "data: c"))]
+    assert events == ["a\nb", "c"]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_pieces_as_they_arrive(tmp_path):
+    pieces = ['{"tableName": ', '"users", ', '"columns": []}']
+    async with StubSSEServer(pieces) as server, httpx.AsyncClient() as http:
+        client = GroqClient(api_key="test", cache=ResponseCache(path=str(tmp_path / "c.sqlite3")), http_client=http)
+        client.url = server.url
+        received = [piece async for piece in client.stream_summary("describe users")]
+
+        assert received == pieces
+        assert server.requests[0]["stream"] is True
+        assert client.last_usage == {"total_tokens": 42}
+        stats = client.last_stream_stats
+        assert stats["chunks"] == 3
+        assert stats["time_to_first_token"] < TOKEN_DELAY <= stats["total_seconds"] - stats["time_to_first_token"]
+
+        # the assembled answer is cached and replayed in one piece
+        assert [p async for p in client.stream_summary("describe users")] == ["".join(pieces)]
+        assert client.last_stream_stats["cached"] is True
+        assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_prompt_stream_keeps_answers_per_chunk():
+    class Pieces(GroqClient):
+        async def stream_summary(self, text):
+            for word in text.split():
+                yield word + " "
+
+    stream = PromptStream(Pieces(api_key="test"), ["a b", "c"])
+    tokens = [t async for t in stream.tokens()]
+    assert [t["part"] for t in tokens] == [0, 0, 1]
+    assert stream.outputs == ["a b ", "c "]
+    assert stream.timing["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_json_metadata_stream_route_validates_assembled_json(monkeypatch):
+    pieces = ['Here: ```json\n{"description": "people", "columns": [{"columnName": "id", ',
+              '"dataType": "INTEGER", "description": "identifier",}]}\n```']
+    async with StubSSEServer(pieces) as server:
+        monkeypatch.setattr("app.ai.groq_client.settings.GROQ_API_URL", server.url)
+        monkeypatch.setattr("app.ai.groq_client.settings.GROQ_API_KEY", "test")
+        async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+            body = {"json_data": {"people": [{"id": 1}]}, "table_name": "people", "use_cache": False,
+                    "local_inference": False}
+            r = await ac.post("/api/ai/json-metadata/stream", json=body)
+
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(d) async for d in iter_sse_data(_lines(*r.text.split("\n")))]
+    assert "".join(e["text"] for e in events[:-1]) == "".join(pieces)
+    done = events[-1]
+    assert done["valid"] is True
+    assert done["metadata"]["tableName"] == "people"
+    assert done["metadata"]["columns"][0]["dataType"] == "INTEGER"
+    assert done["validation"]["repairs"] == ["code_fence", "trailing_comma"]
+    assert done["timing"]["time_to_first_token"] is not None
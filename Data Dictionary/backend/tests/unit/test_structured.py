@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from app.ai.groq_client import GroqClient
+from app.ai.json_repair import repair_json
+from app.ai.structured import MetadataValidator, ParseStats, parse_json_object
+
+
+@pytest.mark.parametrize("text, expected, repairs", [
+    ('Sure:\n```json\n{"a": [1, 2,], "b": True,}\n```', {"a": [1, 2], "b": True},
+     ["code_fence", "trailing_comma", "python_literal"]),
+    ('{"a": "two\nlines" "b": None}', {"a": "two\nlines", "b": None},
+     ["control_character", "missing_comma", "python_literal"]),
+    ('{"columns": [{"columnName": "id", "nullable": fal', {"columns": [{"columnName": "id", "nullable": False}]},
+     ["truncated"]),
+    ('{"a": 1, "desc": "cut mid', {"a": 1, "desc": "cut mid"}, ["truncated"]),
+    ('{"a": 1, "b":', {"a": 1, "b": None}, ["truncated", "missing_value"]),
+])
+def test_repair_json(text, expected, repairs):
+    assert repair_json(text) == (expected, repairs)
+
+
+def test_repair_json_stops_after_the_first_value():
+    assert repair_json('{"a": 1} and then {"b": 2}')[0] == {"a": 1}
+    with pytest.raises(ValueError):
+        repair_json("no json at all")
+
+
+def test_objects_are_not_mistaken_for_a_bracket_in_the_prose():
+    text = 'Sure [see below]: {"a": 1}'
+    assert repair_json(text)[0] == [None, None]  # the first value, whatever it is
+    assert repair_json(text, object_only=True) == ({"a": 1}, ["prose"])
+    assert parse_json_object(text) == ({"a": 1}, ["prose"])
+    with pytest.raises(ValueError):
+        repair_json("[1, 2]", object_only=True)
+
+
+def column(name, **fields):
+    return {"columnName": name, "dataType": "INTEGER", "description": f"the {name}", **fields}
+
+
+class ScriptedGroq(GroqClient):
+    def __init__(self, answers):
+        super().__init__(api_key="test", use_cache=False)
+        self.answers = list(answers)
+        self.prompts = []
+
+    async def generate_summary(self, text: str) -> str:
+        self.prompts.append(text)
+        return self.answers.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_only_invalid_fields_are_reasked():
+    answer = json.dumps({"tableName": "users", "description": "people",
+                         "columns": [column("id"), column("email", dataType=None), column("age")]})
+    groq = ScriptedGroq(['{"columns": [{"index": 1, "dataType": "VARCHAR"}]}'])
+    stats = ParseStats()
+    result = await MetadataValidator(groq, stats=stats).resolve(answer)
+
+    assert result["valid"] and result["reasks"] == 1
+    assert result["metadata"]["columns"][1]["dataType"] == "VARCHAR"
+    # the re-ask carries the broken column only
+    assert '"columnName":"email"' in groq.prompts[0] and '"columnName":"age"' not in groq.prompts[0]
+    assert "columns[1].dataType" in groq.prompts[0]
+    assert stats.stats()["fixed_by_reask"] == 1
+
+
+@pytest.mark.asyncio
+async def test_answers_without_json_are_regenerated_and_counted():
+    stats = ParseStats()
+    validator = MetadataValidator(ScriptedGroq([]), stats=stats)
+
+    async def regenerate():
+        return json.dumps({"description": "d", "columns": [column("id")]})
+
+    result = await validator.resolve("I cannot help with that.", defaults={"tableName": "t"}, regenerate=regenerate)
+    assert result["valid"] and result["regenerated"]
+    assert result["metadata"]["tableName"] == "t"
+
+    failed = await validator.resolve("still nothing")
+    assert not failed["valid"] and failed["metadata"] == "still nothing"
+    counters = stats.stats()
+    assert (counters["parses"], counters["regenerations"], counters["failed"]) == (2, 1, 1)
+    assert counters["success_rate"] == 0.5